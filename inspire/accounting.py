@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启智(Inspire)训练任务 GPU 时长与费用统计
+GPU-hour and cost accounting over monitored jobs
+
+把状态快照中的累计运行时长(running_time_ms)与任务的规格信息关联，按任务、项目和名称前缀
+增量累加 GPU 时长和费用：每个快照只计算与上一次之间的增量，不重新扫描历史。
+
+规格信息来自任务详情的 framework_config (gpu_count、instance_count、instance_spec_price_info)，
+详情中缺少GPU数量时按 predef_id 在 list_available_specs 返回的规格中查找。
+
+BudgetGuard 在某个范围的 GPU 时长超过预算时停止该范围内仍在运行的任务。
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from monitor_plugin import MonitorPlugin
+
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ('SUCCEEDED', 'FAILED', 'CANCELLED')
+SCOPES = ('total', 'project', 'prefix', 'job')
+MS_PER_HOUR = 3600 * 1000
+
+
+@dataclass
+class SpecInfo:
+    """资源规格"""
+    spec_id: str
+    gpu_count: float = 0
+    gpu_type: str = ''
+    price_per_hour: Optional[float] = None
+
+
+@dataclass
+class JobMeta:
+    """计费所需的任务信息"""
+    job_id: str
+    name: str = ''
+    project_id: str = ''
+    gpu_count: float = 0  # 所有实例的GPU总数
+    price_per_hour: Optional[float] = None  # 所有实例每小时的总价，未知时为None
+
+
+@dataclass
+class Usage:
+    """累计用量"""
+    gpu_hours: float = 0.0
+    cost: float = 0.0
+    running_ms: int = 0
+    jobs: int = 0
+
+
+@dataclass
+class _JobState:
+    meta: JobMeta
+    last_running_ms: int = 0
+    status: str = ''
+    keys: Tuple[Tuple[str, str], ...] = field(default_factory=tuple)
+
+
+def _number(value: Any, default: float = 0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def parse_specs(result: Dict[str, Any]) -> Dict[str, SpecInfo]:
+    """
+    解析 list_available_specs 的返回数据
+
+    接口文档未给出规格列表的结构，这里兼容 data 为列表或包含 specs/list/items 列表的字典，
+    每个规格取 spec_id (或 predef_id/id) 和 gpu_count (或 resource_spec_price/instance_spec_price_info 中的字段)。
+
+    Args:
+        result: list_available_specs 的返回结果
+
+    Returns:
+        spec_id -> 规格
+    """
+    data = result.get('data', result)
+    if isinstance(data, dict):
+        data = next((data[key] for key in ('specs', 'list', 'items') if isinstance(data.get(key), list)), [])
+
+    specs: Dict[str, SpecInfo] = {}
+    for item in data if isinstance(data, list) else []:
+        if not isinstance(item, dict):
+            continue
+        spec_id = item.get('spec_id') or item.get('predef_id') or item.get('id')
+        if not spec_id:
+            continue
+        resource = item.get('resource_spec_price') or {}
+        price_info = item.get('instance_spec_price_info') or {}
+        gpu_info = price_info.get('gpu_info') or {}
+        price = price_info.get('total_price_per_hour', item.get('total_price_per_hour'))
+        specs[spec_id] = SpecInfo(
+            spec_id=spec_id,
+            gpu_count=_number(item.get('gpu_count', resource.get('gpu_count', price_info.get('gpu_count')))),
+            gpu_type=item.get('gpu_type') or resource.get('gpu_type') or gpu_info.get('gpu_type', ''),
+            price_per_hour=_number(price, None) if price is not None else None
+        )
+    return specs
+
+
+def job_meta_from_detail(data: Dict[str, Any], specs: Optional[Dict[str, SpecInfo]] = None) -> JobMeta:
+    """
+    从任务详情构建计费信息
+
+    Args:
+        data: get_job_detail 返回的 data 字段
+        specs: list_available_specs 解析出的规格，详情中缺少GPU数量时使用
+
+    Returns:
+        任务计费信息
+    """
+    specs = specs or {}
+    gpu_count = 0.0
+    price: Optional[float] = 0.0
+    for config in data.get('framework_config') or []:
+        instances = _number(config.get('instance_count'), 1) or 1
+        price_info = config.get('instance_spec_price_info') or {}
+        spec = specs.get(config.get('predef_id') or config.get('spec_id') or '')
+
+        gpus = _number(config.get('gpu_count')) or _number(price_info.get('gpu_count')) \
+            or _number((config.get('resource_spec_price') or {}).get('gpu_count'))
+        if not gpus and spec is not None:
+            gpus = spec.gpu_count
+        gpu_count += gpus * instances
+
+        unit_price = price_info.get('total_price_per_hour')
+        if unit_price is None and spec is not None:
+            unit_price = spec.price_per_hour
+        if unit_price is None or price is None:
+            price = None
+        else:
+            price += _number(unit_price) * instances
+
+    return JobMeta(
+        job_id=data.get('job_id', ''),
+        name=data.get('name', ''),
+        project_id=data.get('project_id', ''),
+        gpu_count=gpu_count,
+        price_per_hour=price if data.get('framework_config') else None
+    )
+
+
+class UsageLedger(MonitorPlugin):
+    """
+    增量用量账本
+
+    作为监控插件注册时，每个快照按 job_id 查找任务信息(未登记的任务通过 resolve_meta 获取一次)，
+    只累加 running_time_ms 相对上一次快照的增量。
+    """
+
+    def __init__(self, resolve_meta: Optional[Callable[[str], Optional[JobMeta]]] = None,
+                 prefixes: Optional[Iterable[str]] = None, prefix_separator: str = '-'):
+        """
+        Args:
+            resolve_meta: job_id -> 任务计费信息，用于未登记的任务
+            prefixes: 按这些名称前缀汇总；为None时以名称最后一个分隔符之前的部分作为前缀
+            prefix_separator: 推断前缀时使用的分隔符
+        """
+        self.resolve_meta = resolve_meta
+        self.prefixes = list(prefixes) if prefixes else None
+        self.prefix_separator = prefix_separator
+        self.jobs: Dict[str, _JobState] = {}
+        self.totals: Dict[Tuple[str, str], Usage] = {}
+
+    def _prefixes_of(self, name: str) -> List[str]:
+        if self.prefixes is not None:
+            return [prefix for prefix in self.prefixes if name.startswith(prefix)]
+        if self.prefix_separator in name:
+            return [name.rsplit(self.prefix_separator, 1)[0]]
+        return [name] if name else []
+
+    def register(self, meta: JobMeta) -> None:
+        """
+        登记任务计费信息
+
+        Args:
+            meta: 任务计费信息
+        """
+        if meta.job_id in self.jobs:
+            self.jobs[meta.job_id].meta = meta
+            return
+
+        if not meta.gpu_count:
+            logger.warning("No GPU count known for job %s, its GPU-hours will be 0", meta.job_id,
+                           extra={'job_id': meta.job_id})
+        keys = [('total', ''), ('job', meta.job_id)]
+        if meta.project_id:
+            keys.append(('project', meta.project_id))
+        keys += [('prefix', prefix) for prefix in self._prefixes_of(meta.name)]
+        self.jobs[meta.job_id] = _JobState(meta=meta, keys=tuple(keys))
+        for key in keys:
+            self.totals.setdefault(key, Usage()).jobs += 1
+
+    def observe(self, job_id: str, running_time_ms: Any, status: str = '') -> float:
+        """
+        记录一次观测到的累计运行时长
+
+        Args:
+            job_id: 任务ID
+            running_time_ms: 详情中的累计运行时长(毫秒)
+            status: 任务状态
+
+        Returns:
+            本次新增的 GPU 时长
+        """
+        state = self.jobs.get(job_id)
+        if state is None:
+            meta = self.resolve_meta(job_id) if self.resolve_meta else None
+            if meta is not None:
+                meta.job_id = job_id
+            self.register(meta or JobMeta(job_id=job_id))
+            state = self.jobs[job_id]
+
+        running_ms = int(_number(running_time_ms))
+        # 运行时长变小说明任务重新开始了一轮(容错重试)，整段计入
+        delta_ms = running_ms - state.last_running_ms if running_ms >= state.last_running_ms else running_ms
+        state.last_running_ms = running_ms
+        state.status = status or state.status
+        if delta_ms <= 0:
+            return 0.0
+
+        gpu_hours = delta_ms / MS_PER_HOUR * state.meta.gpu_count
+        cost = delta_ms / MS_PER_HOUR * (state.meta.price_per_hour or 0.0)
+        for key in state.keys:
+            usage = self.totals[key]
+            usage.gpu_hours += gpu_hours
+            usage.cost += cost
+            usage.running_ms += delta_ms
+        return gpu_hours
+
+    def on_snapshot(self, snapshot, previous) -> None:
+        self.observe(snapshot.job_id, snapshot.running_time_ms, snapshot.status)
+
+    def usage(self, scope: str = 'total', key: str = '') -> Usage:
+        """
+        查询某个范围的累计用量
+
+        Args:
+            scope: 'total'、'project'、'prefix' 或 'job'
+            key: 项目ID、名称前缀或任务ID (total 时忽略)
+
+        Returns:
+            累计用量
+        """
+        return self.totals.get((scope, '' if scope == 'total' else key), Usage())
+
+    def breakdown(self, scope: str) -> List[Tuple[str, Usage]]:
+        """
+        按范围列出用量，GPU 时长从高到低
+
+        Args:
+            scope: 'project'、'prefix' 或 'job'
+
+        Returns:
+            (键, 用量) 列表
+        """
+        rows = [(key, usage) for (row_scope, key), usage in self.totals.items() if row_scope == scope]
+        return sorted(rows, key=lambda row: row[1].gpu_hours, reverse=True)
+
+    def scope_jobs(self, scope: str, key: str) -> List[str]:
+        """列出某个范围内的任务ID"""
+        scope_key = (scope, '' if scope == 'total' else key)
+        return [job_id for job_id, state in self.jobs.items() if scope_key in state.keys]
+
+
+class BudgetGuard:
+    """
+    GPU 时长预算守卫
+
+    每个 scope 范围(整体、每个项目、每个名称前缀或每个任务)的 GPU 时长超过预算时，
+    停止该范围内尚未结束的任务；enforce 为 False 时只告警。
+    """
+
+    def __init__(self, ledger: UsageLedger, budget_gpu_hours: float, scope: str = 'total',
+                 stop_jobs: Optional[Callable[[List[str]], Any]] = None, enforce: bool = False):
+        """
+        Args:
+            ledger: 用量账本
+            budget_gpu_hours: 每个范围的 GPU 时长预算
+            scope: 预算范围，见 SCOPES
+            stop_jobs: 停止一组任务的函数，通常为 InspireAPI.stop_training_jobs；返回 BatchResult 时
+                       只有 succeeded 中的任务算作已停止，其余任务在下一次 check 时重试
+            enforce: 是否真正停止任务
+
+        Raises:
+            ValueError: scope 未知时
+        """
+        if scope not in SCOPES:
+            raise ValueError(f"Unknown budget scope '{scope}', expected one of: {SCOPES}")
+        self.ledger = ledger
+        self.budget_gpu_hours = budget_gpu_hours
+        self.scope = scope
+        self.stop_jobs = stop_jobs
+        self.enforce = enforce
+        self.stopped: Dict[str, str] = {}
+
+    def over_budget(self) -> List[Tuple[str, Usage]]:
+        """超过预算的范围"""
+        if self.scope == 'total':
+            usage = self.ledger.usage('total')
+            return [('', usage)] if usage.gpu_hours > self.budget_gpu_hours else []
+        return [(key, usage) for key, usage in self.ledger.breakdown(self.scope)
+                if usage.gpu_hours > self.budget_gpu_hours]
+
+    def check(self) -> List[str]:
+        """
+        检查预算并停止超出预算范围内仍在运行的任务
+
+        Returns:
+            本次请求停止(或 enforce 为 False 时应当停止)的任务ID
+        """
+        to_stop: List[str] = []
+        labels: Dict[str, str] = {}
+        for key, usage in self.over_budget():
+            running = [job_id for job_id in self.ledger.scope_jobs(self.scope, key)
+                       if job_id not in self.stopped and self.ledger.jobs[job_id].status not in TERMINAL_STATUSES]
+            if not running:
+                continue
+            label = f"{self.scope} {key}".strip()
+            logger.warning(f"Budget exceeded for {label}: {usage.gpu_hours:.2f} > "
+                           f"{self.budget_gpu_hours:.2f} GPU-hours, {len(running)} jobs still running")
+            for job_id in running:
+                labels[job_id] = label
+            to_stop.extend(running)
+
+        if not to_stop:
+            return to_stop
+        if not self.enforce or self.stop_jobs is None:
+            # 只告警时每个任务只报告一次
+            self.stopped.update(labels)
+            return to_stop
+
+        try:
+            result = self.stop_jobs(to_stop)
+        except Exception as e:
+            logger.error(f"Failed to stop {len(to_stop)} over-budget jobs, will retry: {str(e)}")
+            return to_stop
+        succeeded = getattr(result, 'succeeded', None)
+        confirmed = to_stop if succeeded is None else [job_id for job_id in to_stop if job_id in succeeded]
+        for job_id in confirmed:
+            self.stopped[job_id] = labels[job_id]
+        if len(confirmed) < len(to_stop):
+            logger.warning(f"Failed to stop {len(to_stop) - len(confirmed)} over-budget jobs, will retry")
+        return to_stop
+
+
+def format_usage_report(ledger: UsageLedger, scopes: Iterable[str] = ('project', 'prefix', 'job')) -> str:
+    """
+    生成文本用量报告
+
+    Args:
+        ledger: 用量账本
+        scopes: 要列出的范围
+
+    Returns:
+        报告文本
+    """
+    lines = []
+    for scope in scopes:
+        rows = ledger.breakdown(scope)
+        if not rows:
+            continue
+        width = max(len(scope), max(len(key) for key, _ in rows))
+        lines.append(f"{scope:<{width}}  {'jobs':>5}  {'GPU-hours':>10}  {'cost':>10}")
+        for key, usage in rows:
+            lines.append(f"{key:<{width}}  {usage.jobs:>5}  {usage.gpu_hours:>10.2f}  {usage.cost:>10.2f}")
+        lines.append('')
+
+    total = ledger.usage('total')
+    lines.append(f"Total: {total.jobs} jobs, {total.gpu_hours:.2f} GPU-hours, cost {total.cost:.2f}")
+    return '\n'.join(lines)
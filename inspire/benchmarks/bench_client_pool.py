@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+客户端池基准测试
+Benchmark: requests/second of a threaded service embedding InspireAPI
+
+在本机启动模拟的启智API (stub_server) 和一个多线程Web服务，服务的每个请求查询一次任务详情：
+- per-request: 每个请求新建 InspireAPI (新 session + 认证)，即目前编排服务的用法
+- pool: 从 InspireClientPool 租用已认证的客户端
+
+Usage:
+    python benchmarks/bench_client_pool.py --clients 16 --duration 5
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from client_pool import InspireClientPool  # noqa: E402
+from inspire_api_control import InspireAPI, InspireConfig  # noqa: E402
+from stub_server import StubInspireServer  # noqa: E402
+
+
+USERNAME, PASSWORD = 'bench', 'bench'
+
+
+def start_service(mode: str, config: InspireConfig, pool: InspireClientPool) -> ThreadingHTTPServer:
+    """启动模拟的编排服务: GET /jobs/<job_id> 返回任务状态"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            job_id = self.path.rsplit('/', 1)[-1]
+            if mode == 'pool':
+                with pool.lease(USERNAME, PASSWORD) as api:
+                    status = api.get_job_detail(job_id)['data']['status']
+            else:
+                api = InspireAPI(config)
+                try:
+                    api.authenticate(USERNAME, PASSWORD)
+                    status = api.get_job_detail(job_id)['data']['status']
+                finally:
+                    api.session.close()
+            body = status.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_load(url: str, clients: int, duration: float):
+    """clients 个线程持续请求 duration 秒，返回 (请求数, 延迟列表)"""
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker(index: int):
+        session = requests.Session()
+        local = []
+        i = 0
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            response = session.get(f"{url}/jobs/job-{index}-{i % 50}", timeout=30)
+            response.raise_for_status()
+            local.append(time.perf_counter() - start)
+            i += 1
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description='InspireClientPool benchmark')
+    parser.add_argument('--clients', type=int, default=16, help='并发客户端线程数 (默认: 16)')
+    parser.add_argument('--duration', type=float, default=5.0, help='每种模式的压测时间(秒) (默认: 5)')
+    parser.add_argument('--latency', type=float, default=0.002, help='模拟API每个请求的延迟(秒)')
+    parser.add_argument('--auth-latency', type=float, default=0.02, help='模拟API认证请求的额外延迟(秒)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    stub = StubInspireServer(latency=args.latency, auth_latency=args.auth_latency).start()
+    config = InspireConfig(base_url=stub.base_url)
+
+    print(f"{'mode':<14}{'requests/s':>12}{'p50 (ms)':>10}{'p99 (ms)':>10}{'auth calls':>12}")
+    for mode in ('per-request', 'pool'):
+        pool = InspireClientPool(config, max_clients=args.clients)
+        service = start_service(mode, config, pool)
+        auth_before = stub.counts.get('/auth/token', 0)
+
+        latencies = sorted(run_load(f"http://127.0.0.1:{service.server_address[1]}", args.clients, args.duration))
+        auth_calls = stub.counts.get('/auth/token', 0) - auth_before
+        p50 = latencies[len(latencies) // 2] * 1000
+        p99 = latencies[int(len(latencies) * 0.99)] * 1000
+        print(f"{mode:<14}{len(latencies) / args.duration:>12,.0f}{p50:>10.1f}{p99:>10.1f}{auth_calls:>12,}")
+
+        service.shutdown()
+        service.server_close()
+        pool.close()
+    stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+失败任务分类基准测试
+Benchmark: failure triage throughput over historical records
+
+生成 N 条失败记录 (sub_msg 取自常见错误消息，部分带任务相关的 rank/地址使消息各不相同)，
+对比逐条规则 re.search 的朴素做法与 FailureTriage 的批量统计、逐条分类，
+以及从 JSONL 文件读取后统计的端到端耗时。
+
+Usage:
+    python benchmarks/bench_failure_triage.py --count 1000000 --unique 0.05
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from failure_triage import DEFAULT_RULES, FailureTriage, iter_records  # noqa: E402
+from serializers import write_snapshots  # noqa: E402
+
+
+MESSAGES = [
+    "Traceback (most recent call last):\n  File \"train.py\", line 12\nRuntimeError: CUDA out of memory. "
+    "Tried to allocate 2.00 GiB",
+    "NCCL WARN Call to ibv_create_qp failed; NCCL error: unhandled system error",
+    "Xid 79: GPU has fallen off the bus",
+    "ModuleNotFoundError: No module named 'flash_attn'",
+    "container exited with code 1",
+    "pod evicted: node drain",
+    "Back-off pulling image: ErrImagePull",
+    "OSError: [Errno 28] No space left on device",
+    "job failed",
+    "",
+]
+UNIQUE_TEMPLATES = [
+    "[rank{rank}]: Watchdog caught collective operation timeout: WorkNCCL(SeqNum={seq}) ran for 600000 ms",
+    "connection reset by peer 10.0.{a}.{b}:29500",
+    "RuntimeError: CUDA out of memory on device {a}, allocated {seq} MiB",
+]
+
+
+def make_records(count: int, unique: float, seed: int = 0):
+    rng = random.Random(seed)
+    records = []
+    for i in range(count):
+        if rng.random() < unique:
+            sub_msg = rng.choice(UNIQUE_TEMPLATES).format(rank=i % 4096, seq=i, a=i % 256, b=(i // 256) % 256)
+        else:
+            sub_msg = rng.choice(MESSAGES)
+        start = 1700000000000 + i * 1000
+        records.append({
+            'job_id': f"job-{i:08d}",
+            'status': 'FAILED',
+            'sub_status': i % 2,
+            'sub_msg': sub_msg,
+            'timeline': {'created': str(start), 'run': str(start + 60000), 'finished': str(start + rng.choice(
+                (30000, 600000, 7200000)))},
+        })
+    return records
+
+
+def naive_classify(records):
+    """逐条规则依次 re.search，代表未编译合并的写法"""
+    counts = {}
+    rules = [(rule, [re.compile(p, re.IGNORECASE) for p in rule.patterns] +
+              [re.compile(re.escape(k), re.IGNORECASE) for k in rule.keywords]) for rule in DEFAULT_RULES]
+    for record in records:
+        category = 'unclassified'
+        for rule, patterns in rules:
+            if any(pattern.search(record['sub_msg']) for pattern in patterns):
+                category = rule.category
+                break
+        counts[category] = counts.get(category, 0) + 1
+    return counts
+
+
+def timed(label: str, count: int, func):
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    print(f"{label:<28}{seconds:>10.3f}{count / seconds:>16,.0f}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Failure triage benchmark')
+    parser.add_argument('--count', type=int, default=1000000, help='记录数量 (默认: 1000000)')
+    parser.add_argument('--unique', type=float, default=0.05,
+                        help='sub_msg 各不相同的记录比例 (默认: 0.05)')
+    parser.add_argument('--skip-naive', action='store_true', help='跳过朴素做法')
+    args = parser.parse_args()
+
+    print(f"Generating {args.count:,} failed records ({args.unique:.0%} unique messages)...")
+    records = make_records(args.count, args.unique)
+    print(f"{'method':<28}{'seconds':>10}{'records/s':>16}")
+
+    if not args.skip_naive:
+        timed('naive per-rule search', args.count, lambda: naive_classify(records))
+    summary = timed('summarize', args.count, lambda: FailureTriage().summarize(records))
+    timed('classify_many', args.count, lambda: sum(1 for _ in FailureTriage().classify_many(records)))
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'history.jsonl')
+        with open(path, 'wb') as f:
+            write_snapshots(records, f, 'jsonl')
+        timed('jsonl file -> summarize', args.count, lambda: FailureTriage().summarize(iter_records(path)))
+
+    print()
+    for (category, label), count in sorted(summary.counts.items(), key=lambda item: -item[1]):
+        print(f"{category:<16}{label:<12}{count:>10,}")
+
+
+if __name__ == "__main__":
+    main()
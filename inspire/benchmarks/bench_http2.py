@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP/2 传输基准测试
+Benchmark: HTTP/1.1 requests.Session vs HTTP/2 transport under concurrent detail polls
+
+在子进程中启动 TLS 上的 HTTP/1.1 模拟API (StubInspireServer) 和 HTTP/2 模拟API (StubInspireH2Server)，
+两者共用同一份数据和延迟设置，服务端不与客户端争用GIL。对每个并发度，N 个线程同时调用 InspireAPI
+查询不同任务的详情，统计服务端接受的TCP连接数(包括认证请求)、请求延迟和吞吐量。证书由 openssl 临时生成。
+
+需要 pip install 'httpx[http2]'。
+
+Usage:
+    python benchmarks/bench_http2.py --concurrency 10,100,1000 --rounds 5
+"""
+
+import os
+import ssl
+import sys
+import time
+import logging
+import argparse
+import tempfile
+import threading
+import subprocess
+import multiprocessing
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from http2_transport import HTTP2Session, httpx  # noqa: E402
+from inspire_api_control import InspireAPI, InspireConfig  # noqa: E402
+from stub_server import StubInspireH2Server, StubInspireServer  # noqa: E402
+
+
+def make_certificate(directory: str):
+    """生成 127.0.0.1 的自签名证书，返回 (证书路径, 私钥路径)"""
+    cert, key = os.path.join(directory, 'cert.pem'), os.path.join(directory, 'key.pem')
+    subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+                    '-keyout', key, '-out', cert, '-subj', '/CN=127.0.0.1',
+                    '-addext', 'subjectAltName=IP:127.0.0.1'],
+                   check=True, capture_output=True)
+    return cert, key
+
+
+def server_context(cert: str, key: str) -> ssl.SSLContext:
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert, key)
+    return context
+
+
+def serve(pipe, cert: str, key: str, latency: float, streams: int) -> None:
+    """子进程: 启动两个模拟服务，发送地址后等待停止信号"""
+    http1_server = StubInspireServer(latency=latency, ssl_context=server_context(cert, key)).start()
+    http2_server = StubInspireH2Server(http1_server, server_context(cert, key),
+                                       max_concurrent_streams=streams).start()
+    pipe.send((http1_server.base_url, http2_server.base_url))
+    pipe.recv()
+    http2_server.stop()
+    http1_server.stop()
+
+
+def connection_counts(base_url: str):
+    response = requests.post(f"{base_url}/stub/stats", json={}, timeout=10)
+    return response.json()['data']['connections']
+
+
+def run(api: InspireAPI, concurrency: int, rounds: int):
+    """concurrency 个线程各查询 rounds 次，返回 (耗时, 延迟列表)"""
+    barrier = threading.Barrier(concurrency)
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(index: int):
+        local = []
+        barrier.wait()
+        for i in range(rounds):
+            start = time.perf_counter()
+            api._fetch_job_detail(f"job-{index}-{i}")
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTTP/2 transport benchmark')
+    parser.add_argument('--concurrency', type=str, default='10,100,1000', help='并发度，逗号分隔 (默认: 10,100,1000)')
+    parser.add_argument('--rounds', type=int, default=5, help='每个线程的请求次数 (默认: 5)')
+    parser.add_argument('--latency', type=float, default=0.01, help='模拟API每个请求的延迟(秒)')
+    parser.add_argument('--streams', type=int, default=128, help='HTTP/2 每个连接的并发流上限 (默认: 128)')
+    args = parser.parse_args()
+
+    if httpx is None:
+        print("This benchmark requires: pip install 'httpx[http2]'")
+        return 1
+    logging.basicConfig(level=logging.WARNING)
+    threading.stack_size(512 * 1024)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cert, key = make_certificate(tmpdir)
+        # requests 和 httpx 都从环境变量读取CA证书
+        os.environ['REQUESTS_CA_BUNDLE'] = cert
+        os.environ['SSL_CERT_FILE'] = cert
+
+        pipe, child_pipe = multiprocessing.Pipe()
+        server = multiprocessing.Process(target=serve, args=(child_pipe, cert, key, args.latency, args.streams),
+                                         daemon=True)
+        server.start()
+        http1_url, http2_url = pipe.recv()
+
+        print(f"{'transport':<10}{'concurrency':>12}{'connections':>13}{'p50 (ms)':>10}{'p99 (ms)':>10}"
+              f"{'requests/s':>12}")
+        try:
+            for concurrency in [int(value) for value in args.concurrency.split(',')]:
+                for transport, base_url, protocol in (('http/1.1', http1_url, 'http/1.1'),
+                                                      ('http/2', http2_url, 'h2')):
+                    before = connection_counts(http1_url).get(protocol, 0)
+                    config = InspireConfig(base_url=base_url, http2=transport == 'http/2',
+                                           max_workers=concurrency, cache_ttl=0)
+                    api = InspireAPI(config)
+                    api.authenticate('bench', 'bench')
+
+                    seconds, latencies = run(api, concurrency, args.rounds)
+                    connections = connection_counts(http1_url).get(protocol, 0) - before
+                    if isinstance(api.session, HTTP2Session) and 'HTTP/2' not in api.session.http_versions:
+                        transport += ' (fallback)'
+                    p50 = latencies[len(latencies) // 2] * 1000
+                    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+                    print(f"{transport:<10}{concurrency:>12,}{connections:>13,}{p50:>10.1f}{p99:>10.1f}"
+                          f"{len(latencies) / seconds:>12,.0f}")
+                    api.session.close()
+        finally:
+            pipe.send('stop')
+            server.join(timeout=10)
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
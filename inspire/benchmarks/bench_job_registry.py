@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地任务登记表基准测试
+Benchmark: job registry record rate and selector lookups vs scanning a JSONL log
+
+生成 --jobs 个超参数扫描任务 (名称 sweep<k>-lr<lr>-s<seed>，标签 sweep=<k>、lr=<lr>、seed=<seed>)，比较：
+- registry: JobRegistry 逐个 record (每个任务一次提交，与 submit_job_payload 相同)，再按名称前缀/标签查询
+- jsonl: 把同样的记录追加写入 JSONL 文件，查询时逐行读取并过滤 (即"翻找旧输出"的做法)
+
+Usage:
+    python benchmarks/bench_job_registry.py --jobs 100000
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from job_registry import JobRegistry  # noqa: E402
+
+
+LEARNING_RATES = ('1e-4', '3e-4', '1e-3', '3e-3')
+
+
+def make_jobs(count: int):
+    """生成 (job_id, payload, tags)"""
+    for i in range(count):
+        sweep, lr, seed = i // 100, LEARNING_RATES[i % len(LEARNING_RATES)], i % 25
+        name = f"sweep{sweep:04d}-lr{lr}-s{seed}"
+        payload = {
+            'name': name,
+            'command': f"python train.py --lr {lr} --seed {seed}",
+            'framework_config': [{'spec_id': 'spec-h200', 'instance_count': 1}],
+            'envs': [{'name': 'LR', 'value': lr}, {'name': 'SEED', 'value': str(seed)}]
+        }
+        yield f"job-{i:08d}", payload, [f"sweep={sweep:04d}", f"lr={lr}", f"seed={seed}"]
+
+
+def scan_jsonl(path: str, name_prefix=None, tags=()):
+    """逐行读取 JSONL 并过滤，返回匹配的任务ID"""
+    matched = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            entry = json.loads(line)
+            if name_prefix and not entry['payload']['name'].startswith(name_prefix):
+                continue
+            if not all(tag in entry['tags'] for tag in tags):
+                continue
+            matched.append(entry['job_id'])
+    return matched
+
+
+def timed(func, repeat: int):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Job registry benchmark')
+    parser.add_argument('--jobs', type=int, default=100000, help='登记的任务数 (默认: 100000)')
+    parser.add_argument('--repeat', type=int, default=5, help='每个查询重复次数 (默认: 5)')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='bench-registry-')
+    try:
+        registry = JobRegistry(os.path.join(directory, 'jobs.db'))
+        log_path = os.path.join(directory, 'jobs.jsonl')
+
+        start = time.perf_counter()
+        for job_id, payload, tags in make_jobs(args.jobs):
+            registry.record(job_id, payload, tags)
+        record_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with open(log_path, 'w', encoding='utf-8') as f:
+            for job_id, payload, tags in make_jobs(args.jobs):
+                f.write(json.dumps({'job_id': job_id, 'payload': payload, 'tags': tags}) + '\n')
+        log_seconds = time.perf_counter() - start
+
+        print(f"jobs: {args.jobs}")
+        print(f"record: registry {args.jobs / record_seconds:,.0f} jobs/s, "
+              f"jsonl append {args.jobs / log_seconds:,.0f} jobs/s\n")
+        print(f"{'query':<34}{'matches':>9}{'registry ms':>13}{'jsonl ms':>11}")
+
+        sweep = f"{args.jobs // 200:04d}"
+        queries = [
+            (f"name:sweep{sweep}-lr3e-4", f"sweep{sweep}-lr3e-4", ()),
+            (f"tag:sweep={sweep},tag:lr=3e-4", None, (f"sweep={sweep}", 'lr=3e-4')),
+            ("tag:lr=3e-4,tag:seed=7", None, ('lr=3e-4', 'seed=7')),
+            ("tag:lr=3e-4", None, ('lr=3e-4',)),
+        ]
+        for selector, name_prefix, tags in queries:
+            registry_seconds, job_ids = timed(lambda: registry.resolve(selector), args.repeat)
+            scan_seconds, expected = timed(lambda: scan_jsonl(log_path, name_prefix, tags), max(1, args.repeat // 2))
+            if sorted(job_ids) != sorted(expected):
+                print(f"{selector}: registry returned {len(job_ids)} jobs, scan returned {len(expected)}")
+            print(f"{selector:<34}{len(job_ids):>9}{registry_seconds * 1000:>13.2f}{scan_seconds * 1000:>11.1f}")
+        registry.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
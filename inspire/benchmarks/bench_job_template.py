@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JobTemplate 负载生成基准测试
+Micro-benchmark: training job payloads per second
+
+对比三种方式生成并编码 N 个任务负载的速度(不发送网络请求)：
+- baseline: 与 create_training_job 相同，每个任务完整验证、构建负载并用 json 编码
+- template: JobTemplate.render + 标准库 json 编码
+- template+fast: JobTemplate.render_json (安装了 orjson 时使用 orjson)
+
+Usage:
+    python benchmarks/bench_job_template.py --jobs 10000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inspire_api_control import InspireAPI, orjson  # noqa: E402
+from job_template import JobTemplate  # noqa: E402
+
+
+SHARED = dict(
+    logic_compute_group_id="lcg-303ac8c6-aa19-4284-af03-2296592326e5",
+    project_id="project-c67c548f-f02c-453b-ba5b-8745db6886e7",
+    workspace_id="ws-9dcc0e1f-80a4-4af2-bc2f-0e352e7b17e6",
+    framework="pytorch",
+    spec_id="4dd0e854-e2a4-4253-95e6-64c13f0b5117",
+    image="docker.sii.shaipower.online/inspire-studio/ngc-cuda12.4-base:1.0",
+    task_priority=8,
+    shm_gi=40,
+    envs=[{"name": "NCCL_DEBUG", "value": "WARN"}],
+)
+
+
+def run_baseline(jobs: int) -> None:
+    for i in range(jobs):
+        name = f"sweep-{i}"
+        command = f"python train.py --lr {i * 1e-6:.2e}"
+        envs = SHARED['envs'] + [{"name": "SEED", "value": str(i)}]
+        InspireAPI._validate_required_params(
+            name=name, command=command,
+            logic_compute_group_id=SHARED['logic_compute_group_id'],
+            project_id=SHARED['project_id'], workspace_id=SHARED['workspace_id'],
+            framework=SHARED['framework'], spec_id=SHARED['spec_id']
+        )
+        InspireAPI._validate_job_resources(1, SHARED['shm_gi'], SHARED['task_priority'])
+        payload = InspireAPI.build_job_payload(
+            name=name, command=command,
+            logic_compute_group_id=SHARED['logic_compute_group_id'],
+            project_id=SHARED['project_id'], workspace_id=SHARED['workspace_id'],
+            framework=SHARED['framework'], spec_id=SHARED['spec_id'],
+            image=SHARED['image'], task_priority=SHARED['task_priority'],
+            shm_gi=SHARED['shm_gi'], envs=envs
+        )
+        json.dumps(payload).encode('utf-8')
+
+
+def run_template(jobs: int, fast: bool) -> None:
+    template = JobTemplate(**SHARED)
+    for i in range(jobs):
+        kwargs = dict(command=f"python train.py --lr {i * 1e-6:.2e}",
+                      envs=[{"name": "SEED", "value": str(i)}])
+        if fast:
+            template.render_json(f"sweep-{i}", **kwargs)
+        else:
+            json.dumps(template.render(f"sweep-{i}", **kwargs)).encode('utf-8')
+
+
+def measure(label: str, func, jobs: int, repeat: int) -> None:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(jobs)
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<16} {jobs / best:>12,.0f} payloads/s  ({best * 1000:.1f} ms for {jobs} jobs)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='JobTemplate payload benchmark')
+    parser.add_argument('--jobs', type=int, default=10000, help='任务数量 (默认: 10000)')
+    parser.add_argument('--repeat', type=int, default=5, help='重复次数，取最快一次 (默认: 5)')
+    args = parser.parse_args()
+
+    measure('baseline', run_baseline, args.jobs, args.repeat)
+    measure('template', lambda n: run_template(n, fast=False), args.jobs, args.repeat)
+    label = 'template+orjson' if orjson is not None else 'template+json'
+    measure(label, lambda n: run_template(n, fast=True), args.jobs, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+大响应基准测试
+Benchmark: peak RSS and time of buffered vs streaming parsing of large node lists
+
+在本机启动模拟的启智API (stub_server，节点数 --nodes)，每种方式在独立子进程中遍历全部节点并统计GPU占用，
+测量传输字节数、耗时和峰值RSS的增长：
+- json: 一次请求全部节点，response.json() 整体解析 (即 list_cluster_nodes 的做法)
+- stream: 一次请求全部节点，_stream_items 边下载边解析
+- paged: iter_cluster_nodes 每页 100 个节点流式解析
+每种方式分别测试不压缩 (identity) 和默认协商的压缩 (ACCEPT_ENCODING)。
+
+Usage:
+    python benchmarks/bench_large_responses.py --nodes 10000
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import resource
+import subprocess
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from http2_transport import ACCEPT_ENCODING  # noqa: E402
+from inspire_api_control import APIEndpoints, InspireAPI, InspireConfig  # noqa: E402
+from stub_server import StubInspireServer  # noqa: E402
+
+
+MODES = ('json', 'stream', 'paged')
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_child(mode: str, url: str, nodes: int, encoding: str) -> None:
+    """子进程: 遍历全部节点，输出一行JSON结果"""
+    logging.basicConfig(level=logging.WARNING)
+    api = InspireAPI(InspireConfig(base_url=url))
+    api.authenticate('bench', 'bench')
+    api.headers['Accept-Encoding'] = encoding
+    payload = {'page_num': 1, 'page_size': nodes}
+    list(api.iter_cluster_nodes(page_size=10))  # 预热连接和导入
+    baseline = peak_rss_mb()
+
+    start = time.perf_counter()
+    if mode == 'json':
+        result = api._make_request('POST', APIEndpoints.CLUSTER_NODES_LIST, payload)
+        items = result['data']['nodes']
+    elif mode == 'stream':
+        items = api._stream_items(APIEndpoints.CLUSTER_NODES_LIST, payload, ('data', 'nodes'))
+    else:
+        items = api.iter_cluster_nodes(page_size=100)
+    count = used = 0
+    for node in items:
+        count += 1
+        used += node['gpu_used']
+    seconds = time.perf_counter() - start
+
+    print(json.dumps({'count': count, 'used': used, 'seconds': seconds, 'rss': peak_rss_mb() - baseline}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Large response benchmark')
+    parser.add_argument('--nodes', type=int, default=10000, help='集群节点数量 (默认: 10000)')
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--url', help=argparse.SUPPRESS)
+    parser.add_argument('--encoding', default=ACCEPT_ENCODING, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.url, args.nodes, args.encoding)
+        return
+
+    stub = StubInspireServer(node_count=args.nodes).start()
+    print(f"nodes: {args.nodes}, Accept-Encoding: {ACCEPT_ENCODING}\n")
+    print(f"{'method':<10}{'encoding':<16}{'wire MB':>10}{'seconds':>10}{'peak RSS +MB':>14}")
+    for encoding in ('identity', ACCEPT_ENCODING):
+        for mode in MODES:
+            before = requests.post(f"{stub.base_url}/stub/stats").json()['data']['bytes_sent']
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--child', mode, '--url', stub.base_url,
+                 '--nodes', str(args.nodes), '--encoding', encoding],
+                check=True, capture_output=True, text=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            after = requests.post(f"{stub.base_url}/stub/stats").json()['data']['bytes_sent']
+            if result['count'] != args.nodes:
+                print(f"{mode}: expected {args.nodes} nodes, got {result['count']}")
+            print(f"{mode:<10}{encoding:<16}{(after - before) / 1e6:>10.2f}{result['seconds']:>10.3f}"
+                  f"{result['rss']:>14.1f}")
+    stub.stop()
+
+
+if __name__ == "__main__":
+    main()
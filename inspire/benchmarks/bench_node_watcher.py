@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+节点监视基准测试
+Benchmark: cost of a node watcher sweep vs the number of changed nodes
+
+在本机启动模拟的启智API (stub_server，节点数 --nodes)，每轮之前在模拟服务中修改 k 个节点的资源池，比较：
+- naive: 每轮用 list_cluster_nodes 取回并解析全部页面，再与上一轮的全部节点逐个比较
+- watcher: NodeWatcher.poll，摘要未变的页面跳过解析和比较
+另外测量在第一页插入一个节点 (后续所有页面错位) 的最坏情况。
+"client ms" 是一轮耗时减去等待HTTP响应的时间，即解析、摘要和比较的开销。
+
+Usage:
+    python benchmarks/bench_node_watcher.py --nodes 10000 --sweeps 5
+"""
+
+import os
+import sys
+import time
+import random
+import logging
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from inspire_api_control import InspireAPI, InspireConfig  # noqa: E402
+from node_watcher import NodeWatcher  # noqa: E402
+from stub_server import StubInspireServer  # noqa: E402
+
+
+POOLS = ('online', 'backup', 'fault', 'unknown')
+
+
+def naive_sweep(api: InspireAPI, page_size: int, previous: dict) -> int:
+    """取回全部节点并与上一轮逐个比较，返回变化数"""
+    current = {}
+    page_num = 1
+    while True:
+        nodes = api.list_cluster_nodes(page_num=page_num, page_size=page_size)['data']['nodes']
+        for node in nodes:
+            current[node['node_id']] = node['resource_pool']
+        if len(nodes) < page_size:
+            break
+        page_num += 1
+    changes = sum(1 for node_id, pool in current.items() if previous.get(node_id) != pool)
+    changes += sum(1 for node_id in previous if node_id not in current)
+    previous.clear()
+    previous.update(current)
+    return changes
+
+
+class TimedSession:
+    """累计HTTP请求耗时的会话包装"""
+
+    def __init__(self, session):
+        self.session = session
+        self.seconds = 0.0
+
+    def post(self, url, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self.session.post(url, **kwargs)
+        finally:
+            self.seconds += time.perf_counter() - start
+
+
+def measure(session: TimedSession, sweep):
+    """返回 (总耗时, 客户端耗时, sweep 的返回值)"""
+    http_before = session.seconds
+    start = time.perf_counter()
+    result = sweep()
+    total = time.perf_counter() - start
+    return total, total - (session.seconds - http_before), result
+
+
+def mutate(stub: StubInspireServer, rng: random.Random, count: int) -> None:
+    """把 count 个随机节点移到另一个资源池"""
+    for index in rng.sample(range(len(stub.nodes)), count):
+        node = stub.nodes[index]
+        node['resource_pool'] = rng.choice([pool for pool in POOLS if pool != node['resource_pool']])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Node watcher benchmark')
+    parser.add_argument('--nodes', type=int, default=10000, help='集群节点数量 (默认: 10000)')
+    parser.add_argument('--sweeps', type=int, default=5, help='每种变化量测量的轮数 (默认: 5)')
+    parser.add_argument('--changes', type=str, default='0,1,10,100,1000', help='每轮变化的节点数，逗号分隔')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    stub = StubInspireServer(node_count=args.nodes).start()
+    api = InspireAPI(InspireConfig(base_url=stub.base_url))
+    api.authenticate('bench', 'bench')
+    session = api.session = TimedSession(api.session)
+    page_size = 100
+    rng = random.Random(0)
+
+    watcher = NodeWatcher(api, page_size=page_size)
+    watcher.poll()
+    previous: dict = {}
+    naive_sweep(api, page_size, previous)
+
+    print(f"nodes: {args.nodes}, pages: {watcher.last_sweep.pages}\n")
+    print(f"{'changes':<14}{'naive ms':>10}{'client ms':>11}{'watcher ms':>12}{'client ms':>11}"
+          f"{'pages parsed':>14}{'events':>8}")
+
+    def report(label, rows):
+        columns = list(zip(*rows))
+        print(f"{label:<14}" + ''.join(f"{statistics.median(column) * 1000:>{width}.1f}"
+                                       for column, width in zip(columns[:4], (10, 11, 12, 11)))
+              + f"{statistics.median(columns[4]):>14.0f}{statistics.median(columns[5]):>8.0f}")
+
+    for count in [int(value) for value in args.changes.split(',')]:
+        rows = []
+        for _ in range(args.sweeps):
+            mutate(stub, rng, count)
+            naive_total, naive_client, _ = measure(session, lambda: naive_sweep(api, page_size, previous))
+            total, client, changes = measure(session, watcher.poll)
+            rows.append((naive_total, naive_client, total, client, watcher.last_sweep.pages_parsed, len(changes)))
+        report(str(count), rows)
+
+    # 第一页插入节点，后续页面全部错位
+    stub.nodes.insert(0, StubInspireServer._make_node(args.nodes + 1))
+    naive_total, naive_client, _ = measure(session, lambda: naive_sweep(api, page_size, previous))
+    total, client, changes = measure(session, watcher.poll)
+    report('insert@page1', [(naive_total, naive_client, total, client, watcher.last_sweep.pages_parsed, len(changes))])
+    stub.stop()
+
+
+if __name__ == "__main__":
+    main()
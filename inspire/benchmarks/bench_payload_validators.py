@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+负载验证基准测试
+Benchmark: compiled payload validator vs interpreted schema walk vs server round-trip
+
+生成 N 个创建任务负载 (每个带若干 envs 和 dataset_info，其中一部分有错误)，比较：
+- interpreted: 每次验证都遍历 ModelSpec 字段表的通用写法
+- compiled: payload_validators 生成的验证函数
+- template: JobTemplate.render (含验证) 的吞吐量
+- stub round-trip: 把错误负载发送到本机模拟API才发现错误的耗时 (不含真实网络延迟)
+
+Usage:
+    python benchmarks/bench_payload_validators.py --payloads 10000 --invalid 0.1
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import logging
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from inspire_api_control import InspireAPI, InspireConfig  # noqa: E402
+from job_template import JobTemplate  # noqa: E402
+from payload_validators import (  # noqa: E402
+    FIELD_RULES, JOB_MODEL, SCALAR_TYPES, FieldRule, PayloadError, compile_validator, load_models
+)
+from stub_server import StubInspireServer  # noqa: E402
+
+
+SHARED = dict(
+    logic_compute_group_id="lcg-303ac8c6-aa19-4284-af03-2296592326e5",
+    project_id="project-c67c548f-f02c-453b-ba5b-8745db6886e7",
+    workspace_id="ws-9dcc0e1f-80a4-4af2-bc2f-0e352e7b17e6",
+    framework="pytorch",
+    spec_id="4dd0e854-e2a4-4253-95e6-64c13f0b5117",
+    image="docker.sii.shaipower.online/inspire-studio/ngc-cuda12.4-base:1.0",
+    task_priority=8,
+    shm_gi=40,
+)
+CORRUPTIONS = [
+    lambda p: p['envs'].append({"name": "1BAD", "value": "x"}),
+    lambda p: p['envs'].append({"name": "NO_VALUE"}),
+    lambda p: p['dataset_info'].append({"path": "/mnt/data"}),
+    lambda p: p.update(task_priority=11),
+    lambda p: p.update(max_running_time_ms=3600000),
+    lambda p: p['framework_config'][0].update(instance_count="2"),
+]
+
+
+def make_payloads(count: int, invalid: float, envs: int, seed: int = 0):
+    rng = random.Random(seed)
+    payloads = []
+    for i in range(count):
+        payload = InspireAPI.build_job_payload(
+            name=f"sweep-{i}", command=f"python train.py --seed {i}",
+            envs=[{"name": f"VAR_{j}", "value": str(i * j)} for j in range(envs)],
+            dataset_info=[{"dataset_id": f"ds-{i % 7}", "path": "/mnt/data", "version_id": "v1"}],
+            **SHARED
+        )
+        if rng.random() < invalid:
+            rng.choice(CORRUPTIONS)(payload)
+        payloads.append(payload)
+    return payloads
+
+
+def interpreted_validate(value, model_name, models, path='payload'):
+    """逐字段查表的通用验证，代表不做代码生成的写法"""
+    model = models[model_name]
+    if type(value) is not dict:
+        raise PayloadError(f"{path}: expected object", path)
+    for key in value:
+        if key not in model.fields:
+            raise PayloadError(f"{path}: unknown field {key}", path)
+    for spec in model.fields.values():
+        rule = FIELD_RULES.get((model_name, spec.name), FieldRule())
+        item = value.get(spec.name)
+        field_path = f"{path}.{spec.name}"
+        if item is None:
+            if rule.required or (model_name, spec.name) == ('train.Env', 'value'):
+                raise PayloadError(f"{field_path}: required", field_path)
+            continue
+        items = item if spec.array else [item]
+        if spec.array and type(item) is not list:
+            raise PayloadError(f"{field_path}: expected array", field_path)
+        if rule.min_items and len(items) < rule.min_items:
+            raise PayloadError(f"{field_path}: too few items", field_path)
+        for index, element in enumerate(items):
+            element_path = f"{field_path}[{index}]" if spec.array else field_path
+            if spec.type not in SCALAR_TYPES:
+                interpreted_validate(element, spec.type, models, element_path)
+                continue
+            expected = {'string': (str,), 'integer': (int,), 'number': (int, float),
+                        'boolean': (bool,), 'object': (dict,)}[spec.type]
+            if type(element) not in expected:
+                raise PayloadError(f"{element_path}: expected {spec.type}", element_path)
+            if rule.required and not element.strip():
+                raise PayloadError(f"{element_path}: required", element_path)
+            if rule.pattern is not None and not re.fullmatch(rule.pattern, element):
+                raise PayloadError(f"{element_path}: pattern", element_path)
+            if rule.minimum is not None and element < rule.minimum:
+                raise PayloadError(f"{element_path}: minimum", element_path)
+            if rule.maximum is not None and element > rule.maximum:
+                raise PayloadError(f"{element_path}: maximum", element_path)
+
+
+def measure(label: str, payloads, validate) -> int:
+    rejected = 0
+    start = time.perf_counter()
+    for payload in payloads:
+        try:
+            validate(payload)
+        except PayloadError:
+            rejected += 1
+    seconds = time.perf_counter() - start
+    print(f"{label:<22}{len(payloads) / seconds:>14,.0f}{seconds / len(payloads) * 1e6:>12.1f}{rejected:>10,}")
+    return rejected
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Payload validator benchmark')
+    parser.add_argument('--payloads', type=int, default=10000, help='负载数量 (默认: 10000)')
+    parser.add_argument('--invalid', type=float, default=0.1, help='有错误的负载比例 (默认: 0.1)')
+    parser.add_argument('--envs', type=int, default=8, help='每个负载的环境变量数 (默认: 8)')
+    parser.add_argument('--round-trips', type=int, default=200, help='发送到模拟API的错误负载数 (默认: 200)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    payloads = make_payloads(args.payloads, args.invalid, args.envs)
+    models = load_models()
+
+    start = time.perf_counter()
+    compile_validator.cache_clear()
+    validate = compile_validator()
+    print(f"parse + compile: {(time.perf_counter() - start) * 1000:.1f} ms (once per process)\n")
+
+    print(f"{'method':<22}{'payloads/s':>14}{'us/payload':>12}{'rejected':>10}")
+    measure('interpreted', payloads, lambda p: interpreted_validate(p, JOB_MODEL, models))
+    measure('compiled', payloads, validate)
+
+    template = JobTemplate(envs=[{"name": f"VAR_{j}", "value": "0"} for j in range(args.envs)], **SHARED)
+    start = time.perf_counter()
+    for i in range(args.payloads):
+        template.render(f"sweep-{i}", command=f"python train.py --seed {i}",
+                        envs=[{"name": "SEED", "value": str(i)}])
+    seconds = time.perf_counter() - start
+    print(f"{'template.render':<22}{args.payloads / seconds:>14,.0f}{seconds / args.payloads * 1e6:>12.1f}"
+          f"{0:>10,}")
+
+    # 不做本地验证时，错误负载要到服务端返回后才能发现
+    stub = StubInspireServer().start()
+    api = InspireAPI(InspireConfig(base_url=stub.base_url))
+    api.authenticate('bench', 'bench')
+    bad = dict(payloads[0], task_priority=11)
+    start = time.perf_counter()
+    for _ in range(args.round_trips):
+        api.submit_job_payload(bad)
+    seconds = time.perf_counter() - start
+    print(f"{'stub round-trip':<22}{args.round_trips / seconds:>14,.0f}{seconds / args.round_trips * 1e6:>12.1f}"
+          f"{'-':>10}")
+    api.session.close()
+    stub.stop()
+
+
+if __name__ == "__main__":
+    main()
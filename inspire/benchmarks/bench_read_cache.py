@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+读请求合并与缓存基准测试
+Benchmark: duplicate detail/spec reads with single-flight and TTL cache
+
+在本机启动模拟的启智API (stub_server)，多个线程反复读取少量热点任务的详情和规格列表：
+- direct: 绕过读缓存，每次调用都发送请求
+- coalesce: cache_ttl=0，只合并同时进行的相同请求
+- cache: cache_ttl>0，合并请求并短时缓存结果
+
+Usage:
+    python benchmarks/bench_read_cache.py --threads 32 --calls 200 --jobs 4
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from inspire_api_control import APIEndpoints, InspireAPI, InspireConfig  # noqa: E402
+from stub_server import StubInspireServer  # noqa: E402
+
+
+def run(api: InspireAPI, mode: str, threads: int, calls: int, jobs: int) -> float:
+    """threads 个线程各调用 calls 次，返回总耗时(秒)"""
+    barrier = threading.Barrier(threads)
+
+    def worker(index: int):
+        barrier.wait()
+        for i in range(calls):
+            job_id = f"job-hot-{(index + i) % jobs}"
+            if i % 10 == 9:
+                if mode == 'direct':
+                    api._fetch_specs('lcg-bench')
+                else:
+                    api.list_available_specs('lcg-bench')
+            elif mode == 'direct':
+                api._fetch_job_detail(job_id)
+            else:
+                api.get_job_detail(job_id)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Read cache benchmark')
+    parser.add_argument('--threads', type=int, default=32, help='并发线程数 (默认: 32)')
+    parser.add_argument('--calls', type=int, default=200, help='每个线程的调用次数 (默认: 200)')
+    parser.add_argument('--jobs', type=int, default=4, help='热点任务数 (默认: 4)')
+    parser.add_argument('--latency', type=float, default=0.01, help='模拟API每个请求的延迟(秒)')
+    parser.add_argument('--ttl', type=float, default=1.0, help='cache 模式的缓存时间(秒) (默认: 1.0)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    stub = StubInspireServer(latency=args.latency).start()
+    total = args.threads * args.calls
+
+    print(f"{'mode':<10}{'seconds':>10}{'calls/s':>12}{'requests':>10}{'hits':>8}{'coalesced':>11}")
+    for mode, ttl in (('direct', 0.0), ('coalesce', 0.0), ('cache', args.ttl)):
+        config = InspireConfig(base_url=stub.base_url, cache_ttl=ttl, max_workers=args.threads)
+        api = InspireAPI(config)
+        api.authenticate('bench', 'bench')
+        before = sum(stub.counts.get(path, 0) for path in (APIEndpoints.TRAIN_JOB_DETAIL, APIEndpoints.SPECS_LIST))
+
+        seconds = run(api, mode, args.threads, args.calls, args.jobs)
+        sent = sum(stub.counts.get(path, 0) for path in (APIEndpoints.TRAIN_JOB_DETAIL, APIEndpoints.SPECS_LIST))
+        stats = api.cache.stats()
+        print(f"{mode:<10}{seconds:>10.2f}{total / seconds:>12,.0f}{sent - before:>10,}"
+              f"{stats['hits']:>8,}{stats['coalesced']:>11,}")
+        api.session.close()
+    stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+快照序列化基准测试
+Benchmark: snapshot serialization throughput and file size
+
+对比原有导出方式 (asdict 深拷贝 + json.dump(indent=2)) 与 serializers 中各格式
+导出 N 个快照的耗时、吞吐量和文件大小。
+
+Usage:
+    python benchmarks/bench_serializers.py --count 1000000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from dataclasses import asdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from job_monitor import StatusSnapshot  # noqa: E402
+from serializers import FORMATS, msgpack, orjson, write_snapshots  # noqa: E402
+
+
+STATUSES = ('PENDING', 'RUNNING', 'SUCCEEDED', 'FAILED')
+
+
+def make_snapshots(count: int):
+    snapshots = []
+    for i in range(count):
+        created = str(1700000000000 + i * 1000)
+        snapshots.append(StatusSnapshot(
+            timestamp=f"2026-10-19T12:{(i // 60) % 60:02d}:{i % 60:02d}.{i % 1000000:06d}",
+            job_id=f"job-{i % 1000:08d}",
+            status=STATUSES[i % len(STATUSES)],
+            sub_status=i % 2,
+            sub_msg="" if i % 7 else "排队中",
+            running_time_ms=str(i * 10000),
+            created_at=created,
+            finished_at=None,
+            timeline={'created': created, 'resource_prepared': created, 'run': created},
+            node_count=1 + i % 8,
+            priority=4,
+            step=i,
+            loss=1.0 / (i + 1),
+            throughput=1234.5
+        ))
+    return snapshots
+
+
+def legacy_export(snapshots, path: str) -> None:
+    data = {'snapshots': [asdict(snapshot) for snapshot in snapshots]}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Snapshot serialization benchmark')
+    parser.add_argument('--count', type=int, default=1000000, help='快照数量 (默认: 1000000)')
+    parser.add_argument('--skip-legacy', action='store_true', help='跳过原有导出方式')
+    args = parser.parse_args()
+
+    print(f"Generating {args.count:,} snapshots...")
+    snapshots = make_snapshots(args.count)
+    print(f"orjson: {'yes' if orjson else 'no'}, msgpack: {'yes' if msgpack else 'no'}")
+    print(f"{'format':<16}{'seconds':>10}{'snapshots/s':>16}{'size (MB)':>12}")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cases = [] if args.skip_legacy else [('legacy-asdict', None)]
+        cases += [(fmt, fmt) for fmt in FORMATS if fmt != 'msgpack' or msgpack is not None]
+        for label, fmt in cases:
+            path = os.path.join(tmpdir, f"export.{label}")
+            start = time.perf_counter()
+            if fmt is None:
+                legacy_export(snapshots, path)
+            else:
+                with open(path, 'wb') as f:
+                    write_snapshots(snapshots, f, fmt)
+            elapsed = time.perf_counter() - start
+            size = os.path.getsize(path) / (1 << 20)
+            print(f"{label:<16}{elapsed:>10.2f}{args.count / elapsed:>16,.0f}{size:>12.1f}")
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+停止延迟基准测试
+Benchmark: latency from stop() to the monitoring call returning
+
+在本机启动模拟的启智API (stub_server)，用很长的轮询间隔和重试延迟运行各种监控方式，
+运行一段时间后调用 stop()，测量到监控调用返回的时间：
+- monitor_job: 单任务监控，停在轮询间隔的等待中
+- retry (monitor): JobMonitor.get_job_status 连不上服务时，停在重试等待中
+- retry (api): InspireAPI._make_request_with_retry 连不上服务时，停在重试等待中
+- dashboard: run_dashboard 同时监控大量任务
+- fleet: FleetMonitor 多进程监控大量任务 (包含工作进程退出和 join)
+
+改用 StopToken 之前，这些等待都是 time.sleep，停止延迟最多是一个完整的轮询间隔或重试延迟。
+
+Usage:
+    python benchmarks/bench_shutdown.py --jobs 1000 --poll-interval 30
+"""
+
+import io
+import os
+import sys
+import time
+import logging
+import argparse
+import threading
+import contextlib
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dashboard import Dashboard, run_dashboard  # noqa: E402
+from fleet_monitor import FleetMonitor  # noqa: E402
+from inspire_api_control import InspireAPI, InspireAPIError, InspireConfig  # noqa: E402
+from job_monitor import JobMonitor, MonitorConfig  # noqa: E402
+from stub_server import StubInspireServer  # noqa: E402
+
+
+UNREACHABLE = 'http://127.0.0.1:9'
+
+
+def measure(label: str, target, stop, settle: float, repeat: int) -> None:
+    """在线程中运行 target，settle 秒后调用 stop()，统计到线程结束的时间"""
+    latencies = []
+    for _ in range(repeat):
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        time.sleep(settle)
+        start = time.perf_counter()
+        stop()
+        thread.join(timeout=120)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if thread.is_alive():
+            print(f"{label:<20} did not stop within 120s")
+            return
+    print(f"{label:<20}{statistics.median(latencies):>12.1f}{max(latencies):>12.1f}")
+
+
+def make_monitor(base_url: str, poll_interval: int, retry_delay: float = 1.0) -> JobMonitor:
+    config = MonitorConfig(base_url=base_url, poll_interval=poll_interval, retry_delay=retry_delay,
+                           progress_display=False, summary_display=False)
+    return JobMonitor(config)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Shutdown latency benchmark')
+    parser.add_argument('--jobs', type=int, default=1000, help='dashboard/fleet 监控的任务数 (默认: 1000)')
+    parser.add_argument('--poll-interval', type=int, default=30, help='轮询间隔和重试延迟(秒) (默认: 30)')
+    parser.add_argument('--workers', type=int, default=4, help='fleet 工作进程数 (默认: 4)')
+    parser.add_argument('--settle', type=float, default=1.0, help='调用 stop() 前运行的时间(秒) (默认: 1.0)')
+    parser.add_argument('--repeat', type=int, default=3, help='每种方式重复次数 (默认: 3)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    stub = StubInspireServer().start()
+    job_ids = [f"job-{i:05d}" for i in range(args.jobs)]
+    print(f"poll interval / retry delay: {args.poll_interval}s, jobs: {args.jobs}\n")
+    print(f"{'method':<20}{'median ms':>12}{'max ms':>12}")
+
+    monitor = make_monitor(stub.base_url, args.poll_interval)
+    monitor.authenticate('bench', 'bench')
+
+    def run_single():
+        monitor.stop_token.reset()
+        monitor.monitor_job(job_ids[0])
+
+    measure('monitor_job', run_single, monitor.stop, args.settle, args.repeat)
+
+    offline = make_monitor(UNREACHABLE, args.poll_interval, retry_delay=args.poll_interval)
+    offline.token = 'bench'
+
+    def run_offline():
+        offline.stop_token.reset()
+        offline.get_job_status(job_ids[0])
+
+    measure('retry (monitor)', run_offline, offline.stop, args.settle, args.repeat)
+
+    api = InspireAPI(InspireConfig(base_url=UNREACHABLE, retry_delay=args.poll_interval))
+    api.token = 'bench'
+
+    def run_api():
+        api.stop_token.reset()
+        try:
+            api.get_job_detail(job_ids[0])
+        except InspireAPIError:
+            pass
+
+    measure('retry (api)', run_api, api.stop_token.stop, args.settle, args.repeat)
+
+    def run_board():
+        monitor.stop_token.reset()
+        run_dashboard(monitor, job_ids, Dashboard(out=io.StringIO()), workers=8)
+
+    measure('dashboard', run_board, monitor.stop, args.settle, args.repeat)
+
+    fleets = []
+
+    def run_fleet():
+        fleet = FleetMonitor(monitor.config, monitor.token, workers=args.workers, rate_limit=0)
+        fleets.append(fleet)
+        with contextlib.redirect_stdout(io.StringIO()):
+            fleet.run(job_ids)
+
+    measure('fleet', run_fleet, lambda: fleets[-1].stop(), args.settle + 1.0, args.repeat)
+
+    stub.stop()
+
+
+if __name__ == "__main__":
+    main()
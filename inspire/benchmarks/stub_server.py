@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基准测试用的启智 OpenAPI 模拟服务
+Stub Inspire OpenAPI server for benchmarks
+
+实现认证、任务创建/详情/停止、规格列表和集群节点列表接口，
+任务状态和节点数据保存在内存中，可以设置每个请求的固定延迟。
+不校验请求体，只用于在本机测量客户端开销，不代表平台真实行为。
+
+StubInspireServer 是 HTTP/1.1 服务 (可选 TLS)；StubInspireH2Server 用同一份数据提供
+TLS 上的 HTTP/2 服务 (需要 h2)。两者都按协议统计接受的TCP连接数，
+POST /stub/stats (不需要认证) 返回连接数、各接口的请求数和发送的响应体字节数。
+客户端的 Accept-Encoding 包含 gzip (或 br，需要 brotli) 时，不小于 compress_min_size 的响应体被压缩。
+
+Usage:
+    python benchmarks/stub_server.py --port 18080 --latency 0.005
+"""
+
+import ssl
+import gzip
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import h2.config
+    import h2.events
+    import h2.exceptions
+    import h2.settings
+    import h2.connection
+except ImportError:
+    h2 = None
+
+
+class StubInspireServer:
+    """
+    内存中的启智 OpenAPI 模拟服务
+    """
+
+    def __init__(self, port: int = 0, host: str = '127.0.0.1', latency: float = 0.0,
+                 auth_latency: float = 0.0, node_count: int = 100, token_ttl: int = 3600,
+                 ssl_context: Optional[ssl.SSLContext] = None, compression: bool = True,
+                 compress_min_size: int = 1024):
+        """
+        Args:
+            port: 监听端口 (0 表示随机端口)
+            host: 监听地址
+            latency: 每个请求的固定延迟(秒)
+            auth_latency: 认证请求的额外延迟(秒)
+            node_count: 集群节点数量
+            token_ttl: 签发 token 的有效期(秒)
+            ssl_context: 服务端TLS上下文，提供时使用 https
+            compression: 是否按 Accept-Encoding 压缩响应
+            compress_min_size: 压缩的最小响应体字节数
+        """
+        self.latency = latency
+        self.auth_latency = auth_latency
+        self.token_ttl = token_ttl
+        self.compression = compression
+        self.compress_min_size = compress_min_size
+        self.bytes_sent = 0
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.nodes = [self._make_node(i) for i in range(node_count)]
+        self.tokens: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self.connections: Dict[str, int] = {}  # 协议 -> 接受的TCP连接数
+        self._lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                try:
+                    body = json.loads(self.rfile.read(length) or b'{}')
+                except ValueError:
+                    body = {}
+                status, result = stub.handle(self.path, body, self.headers.get('Authorization'))
+                data, encoding = stub.encode(result, self.headers.get('Accept-Encoding'))
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                if encoding:
+                    self.send_header('Content-Encoding', encoding)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            daemon_threads = True
+            request_queue_size = 1024  # 默认的 5 在并发建立连接时会被拒绝
+
+            def get_request(self):
+                sock, address = self.socket.accept()
+                stub.count_connection('http/1.1')
+                if ssl_context is not None:
+                    # 在处理线程中握手，避免阻塞接受新连接
+                    sock = ssl_context.wrap_socket(sock, server_side=True, do_handshake_on_connect=False)
+                return sock, address
+
+            def finish_request(self, request, client_address):
+                if ssl_context is not None:
+                    try:
+                        request.do_handshake()
+                    except (OSError, ssl.SSLError):
+                        return
+                super().finish_request(request, client_address)
+
+        self.server = Server((host, port), Handler)
+        self.port = self.server.server_address[1]
+        self.base_url = f"{'https' if ssl_context else 'http'}://{host}:{self.port}"
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _make_node(index: int) -> Dict[str, Any]:
+        return {
+            'node_id': f"node-{index:06d}",
+            'resource_pool': ('online', 'backup', 'fault', 'unknown')[index % 4],
+            'status': 'READY' if index % 10 else 'NOT_READY',
+            'gpu_count': 8,
+            'gpu_used': index % 9,
+            'cpu_count': 120,
+            'memory_gi': 1600,
+            'logic_compute_group_id': 'lcg-stub',
+        }
+
+    def _job(self, job_id: str) -> Dict[str, Any]:
+        job = self.jobs.get(job_id)
+        if job is None:
+            job = self.jobs[job_id] = {
+                'job_id': job_id,
+                'name': f"stub-{job_id}",
+                'status': 'RUNNING',
+                'sub_status': 0,
+                'sub_msg': '',
+                'running_time_ms': '1000',
+                'created_at': str(int(time.time() * 1000)),
+                'finished_at': None,
+                'node_count': 1,
+                'priority': 4,
+            }
+        return job
+
+    def count_connection(self, protocol: str) -> None:
+        """记录一个新连接"""
+        with self._lock:
+            self.connections[protocol] = self.connections.get(protocol, 0) + 1
+
+    def encode(self, result: Dict[str, Any], accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        """
+        序列化响应体，客户端接受且响应足够大时压缩
+
+        Returns:
+            (响应体, Content-Encoding 或 None)
+        """
+        data = json.dumps(result).encode('utf-8')
+        encoding = None
+        if self.compression and len(data) >= self.compress_min_size:
+            accepted = {item.split(';')[0].strip().lower() for item in (accept_encoding or '').split(',')}
+            if 'br' in accepted and brotli is not None:
+                data, encoding = brotli.compress(data, quality=4), 'br'
+            elif 'gzip' in accepted:
+                data, encoding = gzip.compress(data, compresslevel=6), 'gzip'
+        with self._lock:
+            self.bytes_sent += len(data)
+        return data, encoding
+
+    def delay_for(self, path: str) -> float:
+        """请求的模拟延迟(秒)"""
+        return self.latency + (self.auth_latency if path == '/auth/token' else 0.0)
+
+    def handle(self, path: str, body: Dict[str, Any], authorization: Optional[str], wait: bool = True):
+        """
+        处理一个请求
+
+        Args:
+            path: 请求路径
+            body: 请求体
+            authorization: Authorization 请求头
+            wait: 是否在当前线程中等待模拟延迟 (异步服务自行等待时为False)
+
+        Returns:
+            (HTTP状态码, 响应JSON)
+        """
+        delay = self.delay_for(path)
+        if wait and delay:
+            time.sleep(delay)
+
+        with self._lock:
+            if path == '/stub/stats':
+                return 200, {'code': 0, 'data': {'connections': dict(self.connections), 'counts': dict(self.counts),
+                                                 'bytes_sent': self.bytes_sent}}
+            self.counts[path] = self.counts.get(path, 0) + 1
+            if path == '/auth/token':
+                token = uuid.uuid4().hex
+                self.tokens[token] = time.monotonic() + self.token_ttl
+                return 200, {'code': 0, 'data': {'access_token': token, 'expires_in': self.token_ttl}}
+
+            token = (authorization or '').replace('Bearer ', '', 1)
+            if self.tokens.get(token, 0) < time.monotonic():
+                return 401, {'code': 401, 'message': 'invalid token'}
+
+            if path.endswith('/train_job/create'):
+                job_id = f"job-{uuid.uuid4()}"
+                self.jobs[job_id] = dict(self._job(job_id), name=body.get('name', ''), status='PENDING')
+                return 200, {'code': 0, 'data': {'job_id': job_id}}
+            if path.endswith('/train_job/detail'):
+                return 200, {'code': 0, 'data': dict(self._job(body.get('job_id', '')))}
+            if path.endswith('/train_job/stop'):
+                self._job(body.get('job_id', ''))['status'] = 'CANCELLED'
+                return 200, {'code': 0, 'data': {}}
+            if path.endswith('/specs/list'):
+                return 200, {'code': 0, 'data': {'specs': [
+                    {'spec_id': 'spec-stub-8gpu', 'gpu_count': 8, 'cpu_count': 120, 'memory_gi': 1600},
+                ]}}
+            if path.endswith('/cluster_nodes/list'):
+                page_num = max(1, int(body.get('page_num', 1)))
+                page_size = max(1, int(body.get('page_size', 10)))
+                start = (page_num - 1) * page_size
+                return 200, {'code': 0, 'data': {
+                    'nodes': self.nodes[start:start + page_size],
+                    'total': len(self.nodes),
+                }}
+        return 404, {'code': 404, 'message': f'unknown endpoint {path}'}
+
+    def start(self) -> 'StubInspireServer':
+        """在后台线程中启动服务"""
+        self._thread = threading.Thread(target=self.server.serve_forever, name='stub-inspire', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """停止服务"""
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class StubInspireH2Server:
+    """
+    TLS 上的 HTTP/2 模拟服务，请求交给 StubInspireServer.handle 处理
+    """
+
+    def __init__(self, stub: StubInspireServer, ssl_context: ssl.SSLContext, port: int = 0,
+                 host: str = '127.0.0.1', max_concurrent_streams: int = 128):
+        """
+        Args:
+            stub: 提供数据和延迟设置的 HTTP/1.1 模拟服务 (不需要启动)
+            ssl_context: 服务端TLS上下文，ALPN 会被设置为 h2
+            port: 监听端口 (0 表示随机端口)
+            host: 监听地址
+            max_concurrent_streams: 每个连接的并发流上限 (nginx 默认 128)
+
+        Raises:
+            ImportError: 没有安装 h2 时
+        """
+        if h2 is None:
+            raise ImportError("StubInspireH2Server requires the 'h2' package")
+        ssl_context.set_alpn_protocols(['h2'])
+        self.stub = stub
+        self.ssl_context = ssl_context
+        self.host = host
+        self.port = port
+        self.max_concurrent_streams = max_concurrent_streams
+        self.base_url = ''
+        self._loop = asyncio.new_event_loop()
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+
+    async def _respond(self, conn, writer, stream_id: int, headers: Dict[str, str], body: bytes) -> None:
+        path = headers.get(':path', '')
+        delay = self.stub.delay_for(path)
+        if delay:
+            await asyncio.sleep(delay)
+        try:
+            payload = json.loads(body or b'{}')
+        except ValueError:
+            payload = {}
+        status, result = self.stub.handle(path, payload, headers.get('authorization'), wait=False)
+        data, encoding = self.stub.encode(result, headers.get('accept-encoding'))
+        response_headers = [(':status', str(status)), ('content-type', 'application/json'),
+                            ('content-length', str(len(data)))]
+        if encoding:
+            response_headers.append(('content-encoding', encoding))
+        conn.send_headers(stream_id, response_headers)
+        # 响应都小于默认的流控窗口，按帧大小切分即可
+        frame_size = conn.max_outbound_frame_size
+        for start in range(0, len(data), frame_size):
+            conn.send_data(stream_id, data[start:start + frame_size],
+                           end_stream=start + frame_size >= len(data))
+        if not data:
+            conn.end_stream(stream_id)
+        writer.write(conn.data_to_send())
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.stub.count_connection('h2')
+        conn = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False, header_encoding='utf-8'))
+        conn.local_settings = h2.settings.Settings(client=False, initial_values={
+            h2.settings.SettingCodes.MAX_CONCURRENT_STREAMS: self.max_concurrent_streams,
+        })
+        conn.initiate_connection()
+        writer.write(conn.data_to_send())
+        streams: Dict[int, Any] = {}
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                for event in conn.receive_data(data):
+                    if isinstance(event, h2.events.RequestReceived):
+                        streams[event.stream_id] = (dict(event.headers), bytearray())
+                    elif isinstance(event, h2.events.DataReceived):
+                        streams[event.stream_id][1].extend(event.data)
+                        conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+                    elif isinstance(event, h2.events.StreamEnded):
+                        headers, body = streams.pop(event.stream_id)
+                        asyncio.ensure_future(self._respond(conn, writer, event.stream_id, headers, bytes(body)))
+                    elif isinstance(event, h2.events.ConnectionTerminated):
+                        return
+                writer.write(conn.data_to_send())
+                await writer.drain()
+        except (ConnectionError, ssl.SSLError, h2.exceptions.ProtocolError):
+            pass
+        finally:
+            writer.close()
+
+    def start(self) -> 'StubInspireH2Server':
+        """在后台线程中启动服务"""
+        async def listen():
+            self._server = await asyncio.start_server(self._serve, self.host, self.port,
+                                                      ssl=self.ssl_context, backlog=1024)
+            self.port = self._server.sockets[0].getsockname()[1]
+            self.base_url = f"https://{self.host}:{self.port}"
+
+        self._loop.run_until_complete(listen())
+        self._thread = threading.Thread(target=self._loop.run_forever, name='stub-inspire-h2', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """停止服务"""
+        async def shutdown():
+            self._server.close()
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._loop.stop()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stub Inspire OpenAPI server')
+    parser.add_argument('--port', type=int, default=18080, help='监听端口 (默认: 18080)')
+    parser.add_argument('--latency', type=float, default=0.0, help='每个请求的固定延迟(秒)')
+    parser.add_argument('--auth-latency', type=float, default=0.0, help='认证请求的额外延迟(秒)')
+    parser.add_argument('--nodes', type=int, default=100, help='集群节点数量 (默认: 100)')
+    parser.add_argument('--no-compression', action='store_true', help='不压缩响应')
+    args = parser.parse_args()
+
+    stub = StubInspireServer(port=args.port, latency=args.latency,
+                             auth_latency=args.auth_latency, node_count=args.nodes,
+                             compression=not args.no_compression)
+    print(f"Stub Inspire API listening on {stub.base_url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
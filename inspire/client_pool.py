@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启智(Inspire) API 客户端池
+Thread-safe InspireAPI client pool for embedding in services
+
+在Web服务等多线程环境中复用已认证的客户端，避免每个请求都新建 session 并重新认证：
+- 所有客户端共用一个 requests session (连接池)
+- 每组凭证只保存一个 token，过期前在锁内刷新，并发请求只触发一次认证
+- 同一凭证的客户端共用一个读缓存，同时读取同一任务详情只发送一次请求
+- 通过上下文管理器租用客户端，用完自动归还
+
+Usage:
+    pool = InspireClientPool(InspireConfig(), max_clients=32)
+    with pool.lease() as api:
+        api.get_job_detail(job_id)
+"""
+
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from http2_transport import create_session
+from inspire_api_control import InspireAPI, InspireAPIError, InspireConfig, get_credentials
+from job_registry import JobRegistry
+from read_cache import ReadCache
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Credential:
+    """单组凭证的共享状态"""
+    token: Optional[str] = None
+    expires_at: Optional[float] = None  # time.monotonic() 时间，未知时为None
+    lifetime: Optional[float] = None  # 认证时 token 的有效期(秒)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    idle: List[InspireAPI] = field(default_factory=list)
+    cache: Optional[ReadCache] = None
+
+
+class InspireClientPool:
+    """
+    线程安全的 InspireAPI 客户端池
+    """
+
+    def __init__(self, config: Optional[InspireConfig] = None, max_clients: int = 32,
+                 refresh_margin: float = 300.0, lease_timeout: Optional[float] = None,
+                 registry: Optional[JobRegistry] = None):
+        """
+        Args:
+            config: API配置，池中所有客户端共用
+            max_clients: 同时租出的客户端上限，也是共享连接池的大小
+            refresh_margin: token 到期前多少秒刷新 (不超过 token 有效期的一半)
+            lease_timeout: 租用客户端的最长等待时间(秒)，None 表示一直等待
+            registry: 本地任务登记表，池中所有客户端提交的任务都记录在这里
+        """
+        self.config = config or InspireConfig()
+        self.max_clients = max_clients
+        self.refresh_margin = refresh_margin
+        self.lease_timeout = lease_timeout
+        self.registry = registry
+
+        self.session = create_session(self.config.http2, max_connections=max_clients,
+                                      timeout=self.config.timeout)
+
+        self._slots = threading.BoundedSemaphore(max_clients)
+        self._lock = threading.Lock()
+        self._credentials: Dict[Tuple[str, str], _Credential] = {}
+        self.authentications = 0
+
+    def _credential(self, username: str, password: str) -> _Credential:
+        with self._lock:
+            state = self._credentials.get((username, password))
+            if state is None:
+                state = self._credentials[(username, password)] = _Credential(
+                    cache=ReadCache(ttl=self.config.cache_ttl, max_entries=self.config.cache_size))
+            return state
+
+    def _token_valid(self, state: _Credential) -> bool:
+        if state.token is None:
+            return False
+        if state.expires_at is None:
+            return True
+        # 有效期短于两倍 refresh_margin 的 token 在过了一半有效期时刷新，否则每次租用都会重新认证
+        margin = self.refresh_margin if state.lifetime is None else min(self.refresh_margin, state.lifetime / 2)
+        return time.monotonic() < state.expires_at - margin
+
+    def _ensure_token(self, client: InspireAPI, state: _Credential, username: str, password: str) -> None:
+        """token 缺失或即将过期时在凭证锁内刷新，其余线程等待并复用新 token"""
+        if not self._token_valid(state):
+            with state.lock:
+                if not self._token_valid(state):
+                    client.authenticate(username, password)
+                    state.token = client.token
+                    state.expires_at = client.token_expires_at
+                    state.lifetime = None if state.expires_at is None else state.expires_at - time.monotonic()
+                    self.authentications += 1
+
+        if client.token != state.token:
+            client.token = state.token
+            client.token_expires_at = state.expires_at
+            client.headers['Authorization'] = f"Bearer {state.token}"
+
+    def invalidate(self, username: Optional[str] = None, password: Optional[str] = None) -> None:
+        """
+        作废凭证的 token，下一次租用时重新认证
+
+        Args:
+            username: 用户名 (默认: 环境变量中的凭证)
+            password: 密码
+        """
+        if username is None or password is None:
+            username, password = get_credentials()
+        state = self._credential(username, password)
+        with state.lock:
+            state.token = None
+            state.expires_at = None
+            state.lifetime = None
+
+    @contextmanager
+    def lease(self, username: Optional[str] = None, password: Optional[str] = None) -> Iterator[InspireAPI]:
+        """
+        租用一个已认证的客户端
+
+        请求返回 HTTP 401 时作废该凭证的 token，下一次租用会重新认证。
+
+        Args:
+            username: 用户名 (默认: 环境变量 INSPIRE_USERNAME)
+            password: 密码 (默认: 环境变量 INSPIRE_PASSWORD)
+
+        Yields:
+            InspireAPI 客户端，只能在 with 块内使用
+
+        Raises:
+            InspireAPIError: 等待空闲客户端超时时
+            AuthenticationError: 认证失败时
+        """
+        if username is None or password is None:
+            username, password = get_credentials()
+
+        if not self._slots.acquire(timeout=self.lease_timeout):
+            raise InspireAPIError(f"No client available within {self.lease_timeout} seconds")
+        try:
+            state = self._credential(username, password)
+            with self._lock:
+                client = state.idle.pop() if state.idle else None
+            if client is None:
+                client = InspireAPI(self.config, session=self.session, cache=state.cache, registry=self.registry)
+            self._ensure_token(client, state, username, password)
+
+            try:
+                yield client
+            except InspireAPIError as e:
+                response = getattr(e.__context__, 'response', None)
+                if response is not None and response.status_code == 401:
+                    logger.warning("Token rejected by server, will re-authenticate on next lease")
+                    with state.lock:
+                        if state.token == client.token:
+                            state.token = None
+                raise
+            finally:
+                with self._lock:
+                    state.idle.append(client)
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        """关闭共享连接池"""
+        with self._lock:
+            self._credentials.clear()
+        self.session.close()
+
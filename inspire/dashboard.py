@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启智(Inspire)多任务终端仪表盘
+Live terminal dashboard for many monitored jobs
+
+在终端备用屏幕中以表格显示所有任务的最新状态：
+- 按状态/任务ID/运行时长/更新时间排序，可按状态过滤
+- 每帧与上一帧逐行比较，只重绘内容变化的行
+- 刷新率有上限，轮询结果再多也不会增加渲染次数
+- 输出不是终端时退化为每个状态变化打印一行
+
+本模块不导入 job_monitor，轮询通过传入的监控器对象的 get_job_status 完成。
+"""
+
+import sys
+import time
+import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, TextIO
+
+from monitor_plugin import MonitorPlugin
+
+
+TERMINAL_STATUSES = ('SUCCEEDED', 'FAILED', 'CANCELLED')
+# 排序时的状态顺序，未列出的状态排在 RUNNING 之后
+STATUS_ORDER = {'RUNNING': 0, 'PENDING': 2, 'FAILED': 3, 'UNKNOWN': 4, 'SUCCEEDED': 5, 'CANCELLED': 6}
+SORT_KEYS = ('status', 'job', 'runtime', 'updated')
+
+# ANSI 控制序列
+_ALT_SCREEN_ON = '\x1b[?1049h\x1b[?25l'
+_ALT_SCREEN_OFF = '\x1b[?25h\x1b[?1049l'
+_CLEAR_LINE = '\x1b[K'
+_CLEAR_BELOW = '\x1b[J'
+_COLORS = {'RUNNING': '\x1b[32m', 'PENDING': '\x1b[33m', 'FAILED': '\x1b[31m',
+           'SUCCEEDED': '\x1b[36m', 'CANCELLED': '\x1b[90m'}
+_RESET = '\x1b[0m'
+# 行内状态列的位置 (任务ID列宽42加一个空格)
+_STATUS_START, _STATUS_END = 43, 53
+
+
+def _format_runtime(ms: Any) -> str:
+    try:
+        seconds = int(ms) // 1000
+    except (TypeError, ValueError):
+        return '-'
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+class Dashboard(MonitorPlugin):
+    """
+    多任务状态表格
+    """
+
+    def __init__(self, out: Optional[TextIO] = None, max_fps: float = 4.0, sort_by: str = 'status',
+                 statuses: Optional[Iterable[str]] = None, full_redraw_interval: float = 30.0):
+        """
+        Args:
+            out: 输出流 (默认: sys.stdout)
+            max_fps: 每秒最多刷新次数
+            sort_by: 排序字段，见 SORT_KEYS
+            statuses: 只显示这些状态的任务 (默认: 全部)
+            full_redraw_interval: 整屏重绘的间隔(秒)，用于修复被其他输出(如日志)打乱的屏幕
+
+        Raises:
+            ValueError: 排序字段未知时
+        """
+        if sort_by not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key '{sort_by}', expected one of: {SORT_KEYS}")
+        self.out = out or sys.stdout
+        self.min_frame_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.sort_by = sort_by
+        self.statuses = {status.upper() for status in statuses} if statuses else None
+        self.full_redraw_interval = full_redraw_interval
+        self.interactive = self.out.isatty()
+
+        self.snapshots: Dict[str, Any] = {}
+        self._lines: Dict[str, str] = {}  # job_id -> 已格式化的行，快照变化时才重新格式化
+        self._updated: Dict[str, float] = {}
+        self._frame: List[str] = []  # 上一帧屏幕上的每一行
+        self._dirty = True
+        self._last_frame_time = 0.0
+        self._last_full_redraw = 0.0
+        self._width = 0
+        self._active = False
+        self.frames = 0
+        self.rows_written = 0
+
+    def update(self, snapshot) -> None:
+        """
+        记录任务的最新快照
+
+        Args:
+            snapshot: 状态快照
+        """
+        previous = self.snapshots.get(snapshot.job_id)
+        self.snapshots[snapshot.job_id] = snapshot
+        if not self.interactive:
+            if previous is None or (previous.status, previous.sub_status) != (snapshot.status, snapshot.sub_status):
+                self.out.write(f"[{snapshot.timestamp[:19]}] {snapshot.job_id}: "
+                               f"{previous.status if previous else '-'} -> {snapshot.status} "
+                               f"(sub_status: {snapshot.sub_status}) {snapshot.sub_msg}".rstrip() + '\n')
+                self.out.flush()
+            return
+
+        if previous is None or (previous.status, previous.sub_status, previous.sub_msg,
+                                previous.running_time_ms, previous.step) != \
+                (snapshot.status, snapshot.sub_status, snapshot.sub_msg, snapshot.running_time_ms, snapshot.step):
+            self._lines.pop(snapshot.job_id, None)
+            self._updated[snapshot.job_id] = time.time()
+            self._dirty = True
+
+    def on_snapshot(self, snapshot, previous) -> None:
+        self.update(snapshot)
+
+    def _format_row(self, job_id: str) -> str:
+        line = self._lines.get(job_id)
+        if line is None:
+            snapshot = self.snapshots[job_id]
+            updated = datetime.fromtimestamp(self._updated.get(job_id, 0)).strftime('%H:%M:%S')
+            progress = f"step {snapshot.step}" if snapshot.step is not None else ''
+            line = (f"{job_id:<42.42} {snapshot.status:<10.10} {snapshot.sub_status:>3} "
+                    f"{_format_runtime(snapshot.running_time_ms):>10} {snapshot.node_count:>5} "
+                    f"{updated:>8}  {progress:<12.12} {' '.join(str(snapshot.sub_msg).split())}")[:self._width]
+            # 按可见宽度截断后再给状态列上色
+            color = _COLORS.get(snapshot.status)
+            if color and len(line) >= _STATUS_END:
+                line = f"{line[:_STATUS_START]}{color}{line[_STATUS_START:_STATUS_END]}{_RESET}{line[_STATUS_END:]}"
+            self._lines[job_id] = line
+        return line
+
+    def _ordered_jobs(self) -> List[str]:
+        job_ids = [job_id for job_id, snapshot in self.snapshots.items()
+                   if self.statuses is None or snapshot.status in self.statuses]
+        if self.sort_by == 'job':
+            return sorted(job_ids)
+        if self.sort_by == 'runtime':
+            def runtime(job_id):
+                try:
+                    return -int(self.snapshots[job_id].running_time_ms)
+                except (TypeError, ValueError):
+                    return 0
+            return sorted(job_ids, key=lambda job_id: (runtime(job_id), job_id))
+        if self.sort_by == 'updated':
+            return sorted(job_ids, key=lambda job_id: (-self._updated.get(job_id, 0), job_id))
+        return sorted(job_ids, key=lambda job_id: (STATUS_ORDER.get(self.snapshots[job_id].status, 1), job_id))
+
+    def _build_frame(self, height: int) -> List[str]:
+        counts: Dict[str, int] = {}
+        for snapshot in self.snapshots.values():
+            counts[snapshot.status] = counts.get(snapshot.status, 0) + 1
+        summary = '  '.join(f"{status} {count}" for status, count in
+                            sorted(counts.items(), key=lambda item: STATUS_ORDER.get(item[0], 1)))
+        shown = f" | filter: {','.join(sorted(self.statuses))}" if self.statuses else ''
+        header = [
+            f"Inspire jobs: {len(self.snapshots)}  {summary}  | sort: {self.sort_by}{shown}",
+            f"{'JOB ID':<42} {'STATUS':<10} {'SUB':>3} {'RUNTIME':>10} {'NODES':>5} {'UPDATED':>8}  "
+            f"{'PROGRESS':<12} MESSAGE",
+        ]
+        job_ids = self._ordered_jobs()
+        capacity = max(0, height - len(header) - 1)
+        rows = [self._format_row(job_id) for job_id in job_ids[:capacity]]
+        hidden = len(job_ids) - len(rows)
+        footer = [f"... {hidden} more jobs (use --filter or a taller terminal)"] if hidden > 0 else []
+        return [line[:self._width] for line in header] + rows + [line[:self._width] for line in footer]
+
+    def render(self, force: bool = False) -> bool:
+        """
+        在刷新率上限内重绘变化的行
+
+        Args:
+            force: 忽略刷新率上限
+
+        Returns:
+            是否输出了新的一帧
+        """
+        if not self.interactive:
+            return False
+        now = time.monotonic()
+        full = now - self._last_full_redraw >= self.full_redraw_interval
+        if not (self._dirty or full) or (not force and now - self._last_frame_time < self.min_frame_interval):
+            return False
+
+        if not self._active:
+            self.out.write(_ALT_SCREEN_ON)
+            self._active = True
+            full = True
+
+        size = shutil.get_terminal_size()
+        if size.columns != self._width:
+            self._width = size.columns
+            self._lines.clear()
+            full = True
+
+        frame = self._build_frame(size.lines)
+        if full:
+            self._frame = []
+            self._last_full_redraw = now
+
+        parts = []
+        for index, line in enumerate(frame):
+            if index >= len(self._frame) or self._frame[index] != line:
+                parts.append(f"\x1b[{index + 1};1H{line}{_CLEAR_LINE}")
+        if len(frame) < len(self._frame) or full:
+            parts.append(f"\x1b[{len(frame) + 1};1H{_CLEAR_BELOW}")
+
+        if parts:
+            self.out.write(''.join(parts))
+            self.out.flush()
+            self.rows_written += len(parts)
+        self._frame = frame
+        self._dirty = False
+        self._last_frame_time = now
+        self.frames += 1
+        return True
+
+    def close(self) -> None:
+        """退出备用屏幕，并在普通屏幕上留下最终的状态统计"""
+        if self._active:
+            self.render(force=True)
+            self.out.write(_ALT_SCREEN_OFF)
+            self._active = False
+        counts: Dict[str, int] = {}
+        for snapshot in self.snapshots.values():
+            counts[snapshot.status] = counts.get(snapshot.status, 0) + 1
+        self.out.write("最终状态: " + ", ".join(f"{status} {count}" for status, count in sorted(counts.items())) + '\n')
+        self.out.flush()
+
+
+def run_dashboard(monitor: Any, job_ids: List[str], dashboard: Dashboard, workers: int = 8,
+                  timeout: Optional[float] = None, should_stop: Optional[Callable[[], bool]] = None) -> None:
+    """
+    并发轮询一组任务并刷新仪表盘，直到全部结束、超时或被停止
+
+    Args:
+        monitor: 已认证的 JobMonitor (使用其 get_job_status、config.poll_interval 和 stop_token)
+        job_ids: 任务ID列表
+        dashboard: 仪表盘
+        workers: 并发查询数
+        timeout: 超时时间(秒)，默认使用 monitor.config.timeout
+        should_stop: 返回True时停止
+
+    monitor.stop() 之后不再等待排队中的查询，只有正在进行的请求会在后台结束。
+    """
+    pending = list(dict.fromkeys(job_ids))
+    interval = monitor.config.poll_interval
+    deadline = time.monotonic() + (timeout if timeout is not None else monitor.config.timeout)
+    token = monitor.stop_token
+
+    def stopped() -> bool:
+        return token.stopped or (should_stop is not None and should_stop()) or time.monotonic() > deadline
+
+    executor = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        while pending and not stopped():
+            round_start = time.monotonic()
+            futures = {executor.submit(monitor.get_job_status, job_id): job_id for job_id in pending}
+            for future in as_completed(futures):
+                if token.stopped:
+                    break
+                snapshot = future.result()
+                if snapshot is not None:
+                    dashboard.update(snapshot)
+                dashboard.render()
+
+            pending = [job_id for job_id in pending
+                       if job_id not in dashboard.snapshots
+                       or dashboard.snapshots[job_id].status not in TERMINAL_STATUSES]
+            while pending and not stopped() and time.monotonic() - round_start < interval:
+                dashboard.render()
+                if token.wait(min(dashboard.min_frame_interval or 0.25, 0.25,
+                                  interval - (time.monotonic() - round_start))):
+                    break
+    finally:
+        executor.shutdown(wait=not token.stopped, cancel_futures=True)
+        dashboard.close()
@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启智(Inspire)任务状态变化事件钩子
+Event hooks on job status transitions
+
+HookRegistry 作为监控插件检测状态变化，把事件分发给按 status、sub_status 或 job_id 模式注册的回调：
+- 同步回调在有界线程池中执行，排队的事件超过上限时丢弃并记录警告，不会阻塞轮询
+- async 回调在独立的事件循环线程中执行，超时后被取消
+- 同步回调无法被强制中断，从开始执行算起超时后只记录警告，回调返回前仍占用排队名额
+
+内置钩子：
+- ResubmitHook: 任务失败后按退避时间重新提交
+- WriteFileHook: 把事件追加写入 JSON Lines 文件
+- ShellHook: 执行命令，事件信息通过环境变量和标准输入传入
+
+Usage:
+    hooks = HookRegistry()
+    hooks.register(ShellHook("notify-send failed"), status='FAILED')
+
+    @hooks.on(status=('SUCCEEDED', 'FAILED'), job_pattern='job-sweep-*')
+    async def on_done(event):
+        ...
+
+    monitor.add_plugin(hooks)
+"""
+
+import os
+import re
+import json
+import time
+import shlex
+import asyncio
+import fnmatch
+import logging
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, is_dataclass
+from typing import Any, Callable, Dict, List, Optional, Pattern, Union
+
+from monitor_plugin import MonitorPlugin
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TransitionEvent:
+    """状态变化事件"""
+    job_id: str
+    status: str
+    sub_status: int
+    sub_msg: str
+    previous_status: Optional[str]
+    previous_sub_status: Optional[int]
+    timestamp: str
+    snapshot: Any = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可JSON序列化的字典"""
+        data = {key: value for key, value in vars(self).items() if key != 'snapshot'}
+        if self.snapshot is not None:
+            data['snapshot'] = asdict(self.snapshot) if is_dataclass(self.snapshot) else self.snapshot
+        return data
+
+
+def _as_set(value) -> Optional[frozenset]:
+    if value is None:
+        return None
+    if isinstance(value, (str, int)):
+        return frozenset([value])
+    return frozenset(value)
+
+
+class Hook:
+    """
+    已注册的钩子及其过滤条件
+    """
+
+    def __init__(self, callback: Callable[[TransitionEvent], Any], status=None, sub_status=None,
+                 job_pattern: Optional[Union[str, Pattern]] = None, timeout: Optional[float] = None,
+                 name: Optional[str] = None):
+        self.callback = callback
+        self.statuses = _as_set(status)
+        self.sub_statuses = _as_set(sub_status)
+        if isinstance(job_pattern, str):
+            job_pattern = re.compile(fnmatch.translate(job_pattern))
+        self.job_pattern = job_pattern
+        self.timeout = timeout
+        self.name = name or getattr(callback, '__name__', type(callback).__name__)
+        self.is_async = asyncio.iscoroutinefunction(callback) or \
+            asyncio.iscoroutinefunction(getattr(callback, '__call__', None))
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.dropped = 0
+
+    def matches(self, event: TransitionEvent) -> bool:
+        """事件是否满足过滤条件"""
+        if self.statuses is not None and event.status not in self.statuses:
+            return False
+        if self.sub_statuses is not None and event.sub_status not in self.sub_statuses:
+            return False
+        if self.job_pattern is not None and not self.job_pattern.match(event.job_id):
+            return False
+        return True
+
+
+class _Slot:
+    """一次执行占用的排队名额，只释放一次"""
+
+    def __init__(self, semaphore: threading.BoundedSemaphore):
+        self._semaphore = semaphore
+        self._lock = threading.Lock()
+        self._released = False
+
+    def release(self) -> bool:
+        with self._lock:
+            if self._released:
+                return False
+            self._released = True
+        self._semaphore.release()
+        return True
+
+
+class HookRegistry(MonitorPlugin):
+    """
+    状态变化钩子注册表
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 100, default_timeout: Optional[float] = 30.0):
+        """
+        Args:
+            max_workers: 执行同步回调的线程数
+            max_pending: 正在执行和排队的回调上限，超过时丢弃新事件
+            default_timeout: 回调的默认超时时间(秒)，None 表示不限制
+        """
+        self.default_timeout = default_timeout
+        self.hooks: List[Hook] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='hook')
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+
+    def register(self, callback: Callable[[TransitionEvent], Any], status=None, sub_status=None,
+                 job_pattern: Optional[Union[str, Pattern]] = None, timeout: Optional[float] = None,
+                 name: Optional[str] = None) -> Hook:
+        """
+        注册钩子
+
+        Args:
+            callback: 回调函数或 async 函数，参数为 TransitionEvent
+            status: 只响应这些状态 (字符串或集合，默认: 全部)
+            sub_status: 只响应这些子状态 (整数或集合，默认: 全部)
+            job_pattern: job_id 的通配符模式 (如 'job-sweep-*') 或编译好的正则表达式
+            timeout: 超时时间(秒)，默认使用回调的 timeout 属性或 default_timeout
+            name: 日志中显示的名称
+
+        Returns:
+            钩子对象，可用于 unregister
+        """
+        if timeout is None:
+            timeout = getattr(callback, 'timeout', self.default_timeout)
+        hook = Hook(callback, status=status, sub_status=sub_status, job_pattern=job_pattern,
+                    timeout=timeout, name=name)
+        with self._lock:
+            self.hooks.append(hook)
+        return hook
+
+    def on(self, status=None, sub_status=None, job_pattern=None, timeout=None, name=None):
+        """register 的装饰器形式"""
+        def decorator(callback):
+            self.register(callback, status=status, sub_status=sub_status, job_pattern=job_pattern,
+                          timeout=timeout, name=name)
+            return callback
+        return decorator
+
+    def unregister(self, hook: Hook) -> None:
+        """取消注册钩子"""
+        with self._lock:
+            if hook in self.hooks:
+                self.hooks.remove(hook)
+
+    def on_snapshot(self, snapshot, previous) -> None:
+        if previous is not None and (previous.status, previous.sub_status) == (snapshot.status, snapshot.sub_status):
+            return
+        self.dispatch(TransitionEvent(
+            job_id=snapshot.job_id,
+            status=snapshot.status,
+            sub_status=snapshot.sub_status,
+            sub_msg=snapshot.sub_msg,
+            previous_status=previous.status if previous else None,
+            previous_sub_status=previous.sub_status if previous else None,
+            timestamp=snapshot.timestamp,
+            snapshot=snapshot
+        ))
+
+    def dispatch(self, event: TransitionEvent) -> int:
+        """
+        把事件分发给匹配的钩子，立即返回
+
+        Args:
+            event: 状态变化事件
+
+        Returns:
+            已安排执行的钩子数
+        """
+        with self._lock:
+            hooks = [hook for hook in self.hooks if hook.matches(event)]
+
+        scheduled = 0
+        for hook in hooks:
+            if not self._slots.acquire(blocking=False):
+                hook.dropped += 1
+                logger.warning("Hook queue full, dropping %s for job %s (%s)", hook.name, event.job_id,
+                               event.status, extra={'job_id': event.job_id})
+                continue
+            slot = _Slot(self._slots)
+            hook.calls += 1
+            if hook.is_async:
+                self._schedule_async(hook, event, slot)
+            else:
+                self._schedule_sync(hook, event, slot)
+            scheduled += 1
+        return scheduled
+
+    def _schedule_sync(self, hook: Hook, event: TransitionEvent, slot: _Slot) -> None:
+        def on_timeout():
+            hook.timeouts += 1
+            logger.warning("Hook %s still running after %ss for job %s", hook.name, hook.timeout,
+                           event.job_id, extra={'job_id': event.job_id})
+
+        def run():
+            # 超时从回调开始执行时计算，排队时间不算在内；名额在回调返回后才释放，
+            # 因此 max_pending 限制的是排队和正在执行的回调总数
+            timer = None
+            if hook.timeout is not None:
+                timer = threading.Timer(hook.timeout, on_timeout)
+                timer.daemon = True
+                timer.start()
+            try:
+                hook.callback(event)
+            except Exception as e:
+                hook.failures += 1
+                logger.error("Hook %s failed for job %s: %s", hook.name, event.job_id, e,
+                             extra={'job_id': event.job_id})
+            finally:
+                if timer is not None:
+                    timer.cancel()
+                slot.release()
+
+        self._executor.submit(run)
+
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(target=self._loop.run_forever, name='hook-loop', daemon=True)
+                self._loop_thread.start()
+            return self._loop
+
+    def _schedule_async(self, hook: Hook, event: TransitionEvent, slot: _Slot) -> None:
+        async def run():
+            try:
+                await asyncio.wait_for(hook.callback(event), hook.timeout)
+            except asyncio.TimeoutError:
+                hook.timeouts += 1
+                logger.warning("Hook %s timed out after %ss for job %s", hook.name, hook.timeout,
+                               event.job_id, extra={'job_id': event.job_id})
+            except Exception as e:
+                hook.failures += 1
+                logger.error("Hook %s failed for job %s: %s", hook.name, event.job_id, e,
+                             extra={'job_id': event.job_id})
+            finally:
+                slot.release()
+
+        asyncio.run_coroutine_threadsafe(run(), self._event_loop())
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """每个钩子的调用、失败、超时和丢弃次数"""
+        with self._lock:
+            return {hook.name: {'calls': hook.calls, 'failures': hook.failures,
+                                'timeouts': hook.timeouts, 'dropped': hook.dropped}
+                    for hook in self.hooks}
+
+    def close(self, wait: bool = True) -> None:
+        """
+        停止接收事件
+
+        Args:
+            wait: 是否等待正在执行的回调完成
+        """
+        self._executor.shutdown(wait=wait)
+        if self._loop is not None:
+            if wait:
+                pending = asyncio.run_coroutine_threadsafe(self._drain_loop(), self._loop)
+                pending.result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop_thread.join(timeout=5)
+
+    @staticmethod
+    async def _drain_loop() -> None:
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# 内置钩子
+
+def payload_from_detail(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    根据任务详情重建创建任务的请求负载
+
+    Args:
+        data: get_job_detail 返回的 data 字段
+
+    Returns:
+        train_job/create 请求负载
+    """
+    payload = {key: data[key] for key in (
+        'name', 'logic_compute_group_id', 'project_id', 'workspace_id', 'framework', 'command',
+        'task_priority', 'auto_fault_tolerance', 'enable_notification', 'enable_troubleshoot',
+        'max_running_time_ms', 'reserve_on_fail_ms', 'reserve_on_success_ms', 'tb_summary_path',
+    ) if data.get(key) is not None}
+    payload['framework_config'] = [{
+        'image': config.get('image', ''),
+        'image_type': config.get('image_type', ''),
+        'instance_count': config.get('instance_count', 1),
+        'shm_gi': config.get('shm_gi', 1),
+        'spec_id': config.get('spec_id') or config.get('predef_id', ''),
+    } for config in data.get('framework_config') or []]
+    payload['dataset_info'] = data.get('dataset_info') or []
+    payload['envs'] = data.get('envs') or []
+    return payload
+
+
+class ResubmitHook:
+    """
+    任务失败后重新提交
+
+    按 backoff * backoff_factor^(n-1) 等待后提交第 n 次重试，新任务名加上 "-retry<n>" 后缀。
+    同一原始任务的重试链(包括重试任务再次失败)最多重试 max_attempts 次。
+    等待在钩子线程中进行，因此默认不设超时 (timeout = None)。
+    """
+
+    timeout = None
+
+    def __init__(self, api: Any, max_attempts: int = 3, backoff: float = 60.0, backoff_factor: float = 2.0,
+                 payload_factory: Optional[Callable[[TransitionEvent], Dict[str, Any]]] = None,
+                 on_resubmitted: Optional[Callable[[str, str], Any]] = None,
+                 should_retry: Optional[Callable[[TransitionEvent], bool]] = None):
+        """
+        Args:
+            api: 已认证的 InspireAPI
+            max_attempts: 每个原始任务最多重试次数
+            backoff: 第一次重试前的等待时间(秒)
+            backoff_factor: 每次重试等待时间的倍数
+            payload_factory: 根据事件生成请求负载，默认用 api.registry 中的原始负载，没有记录时按任务详情重建
+            on_resubmitted: 重新提交后调用，参数为 (失败的job_id, 新job_id)
+            should_retry: 返回False时不重试该失败 (如 failure_triage 判定为不可重试)，默认全部重试
+        """
+        self.api = api
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.backoff_factor = backoff_factor
+        self.payload_factory = payload_factory
+        self.on_resubmitted = on_resubmitted
+        self.should_retry = should_retry
+        self._lock = threading.Lock()
+        self._origin: Dict[str, str] = {}  # 重试任务 -> 原始任务
+        self._attempts: Dict[str, int] = {}  # 原始任务 -> 已重试次数
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        """取消正在等待的重试"""
+        self._cancelled.set()
+
+    def __call__(self, event: TransitionEvent) -> Optional[str]:
+        if self.should_retry is not None and not self.should_retry(event):
+            logger.info("Job %s failed with a non-retryable error, not resubmitting", event.job_id,
+                        extra={'job_id': event.job_id})
+            return None
+        with self._lock:
+            origin = self._origin.get(event.job_id, event.job_id)
+            attempt = self._attempts.get(origin, 0) + 1
+            if attempt > self.max_attempts:
+                logger.warning("Job %s failed, retry limit (%d) reached for %s", event.job_id,
+                               self.max_attempts, origin, extra={'job_id': event.job_id})
+                return None
+            self._attempts[origin] = attempt
+
+        delay = self.backoff * self.backoff_factor ** (attempt - 1)
+        logger.info("Job %s failed, resubmitting in %.0fs (attempt %d/%d)", event.job_id, delay,
+                    attempt, self.max_attempts, extra={'job_id': event.job_id})
+        if self._cancelled.wait(delay):
+            return None
+
+        # 本地登记表中有原始负载时直接复用，重试任务继承原任务的标签
+        registry = getattr(self.api, 'registry', None)
+        record = registry.get(event.job_id) if registry is not None else None
+        if self.payload_factory is not None:
+            payload = self.payload_factory(event)
+        elif record is not None:
+            payload = dict(record.payload)
+        else:
+            payload = payload_from_detail(self.api.get_job_detail(event.job_id).get('data', {}))
+        base_name = re.sub(r'-retry\d+$', '', payload.get('name', event.job_id))
+        payload['name'] = f"{base_name}-retry{attempt}"
+
+        result = self.api.submit_job_payload(payload, tags=record.tags if record is not None else None)
+        new_job_id = result.get('data', {}).get('job_id')
+        with self._lock:
+            self._origin[new_job_id] = origin
+        logger.info("Resubmitted job %s as %s", event.job_id, new_job_id, extra={'job_id': event.job_id})
+        if self.on_resubmitted is not None:
+            self.on_resubmitted(event.job_id, new_job_id)
+        return new_job_id
+
+
+class WriteFileHook:
+    """
+    把事件追加写入 JSON Lines 文件
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: 输出文件路径
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, event: TransitionEvent) -> None:
+        line = json.dumps(event.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+
+class ShellHook:
+    """
+    执行外部命令
+
+    命令不经过 shell 解析 (需要管道等功能时使用 sh -c '...')。事件通过环境变量
+    INSPIRE_JOB_ID、INSPIRE_STATUS、INSPIRE_SUB_STATUS、INSPIRE_SUB_MSG、INSPIRE_PREVIOUS_STATUS
+    传入，标准输入为事件JSON。命令超时时被终止。
+    """
+
+    def __init__(self, command: Union[str, List[str]], timeout: float = 60.0, cwd: Optional[str] = None):
+        """
+        Args:
+            command: 命令字符串或参数列表
+            timeout: 超时时间(秒)
+            cwd: 工作目录
+        """
+        self.args = shlex.split(command) if isinstance(command, str) else list(command)
+        self.command_timeout = timeout
+        # 注册表的超时略长于命令超时，命令超时由 subprocess 终止进程并作为失败记录
+        self.timeout = timeout + 5
+        self.cwd = cwd
+        self.__name__ = f"shell:{self.args[0]}" if self.args else 'shell'
+
+    def __call__(self, event: TransitionEvent) -> int:
+        env = dict(os.environ,
+                   INSPIRE_JOB_ID=event.job_id,
+                   INSPIRE_STATUS=event.status,
+                   INSPIRE_SUB_STATUS=str(event.sub_status),
+                   INSPIRE_SUB_MSG=event.sub_msg or '',
+                   INSPIRE_PREVIOUS_STATUS=event.previous_status or '')
+        start = time.monotonic()
+        completed = subprocess.run(
+            self.args, input=json.dumps(event.to_dict(), ensure_ascii=False, default=str),
+            text=True, env=env, cwd=self.cwd, timeout=self.command_timeout, capture_output=True
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"command exited with {completed.returncode}: {completed.stderr.strip()[:200]}")
+        logger.debug("Hook command %s finished in %.2fs", self.args[0], time.monotonic() - start)
+        return completed.returncode
+
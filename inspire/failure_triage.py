@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启智(Inspire)失败任务分类
+Failure triage over sub_msg, sub_status codes and timeline gaps
+
+把一组有序的规则编译成一个匹配器，判断失败任务属于节点故障、网络、OOM、用户代码错误等哪一类，
+并标记为可重试(retryable)或不可重试(fatal)：
+- 所有规则的 sub_msg 正则/关键字合并为一个带命名分组的正则，每条消息只扫描一次
+- sub_status 代码查字典，时间线间隔(如运行不到一分钟就失败)只在前两者没有命中更高优先级规则时计算
+- 规则顺序即优先级，一条消息命中多条规则时取排在最前的规则
+- 相同的 sub_msg 只匹配一次，批量分类历史记录时大部分记录只需要一次字典查找
+
+规则可以从JSON文件加载 (规则对象列表，字段同 TriageRule)。
+"""
+
+import io
+import re
+import csv
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from monitor_plugin import MonitorPlugin
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+logger = logging.getLogger(__name__)
+
+LABELS = ('retryable', 'fatal', 'unknown')
+UNCLASSIFIED = 'unclassified'
+
+
+@dataclass
+class TriageRule:
+    """
+    分类规则，任一条件命中即匹配
+
+    patterns 会被合并进同一个正则，不要在其中使用命名分组。
+    """
+    name: str
+    category: str
+    retryable: bool
+    patterns: List[str] = field(default_factory=list)  # sub_msg 正则，不区分大小写
+    keywords: List[str] = field(default_factory=list)  # sub_msg 关键字，不区分大小写
+    sub_statuses: List[int] = field(default_factory=list)
+    missing: Optional[str] = None  # 时间线中缺少该阶段时命中，如 'run' 表示从未开始运行
+    gap: Optional[Tuple[str, str]] = None  # 时间线两个阶段 (起点, 终点)，与 min_gap/max_gap 一起使用
+    min_gap: Optional[float] = None  # 间隔不少于该秒数时命中
+    max_gap: Optional[float] = None  # 间隔不超过该秒数时命中
+
+    @property
+    def label(self) -> str:
+        return 'retryable' if self.retryable else 'fatal'
+
+
+@dataclass
+class Verdict:
+    """单个失败任务的分类结果"""
+    job_id: str
+    status: str
+    label: str
+    category: str
+    rule: Optional[str] = None
+    evidence: str = ''  # 命中的文本、子状态或时间线间隔
+    sub_msg: str = ''
+
+    @property
+    def retryable(self) -> bool:
+        return self.label == 'retryable'
+
+
+@dataclass
+class TriageSummary:
+    """批量分类的统计"""
+    records: int = 0  # 读取的记录数
+    classified: int = 0  # 参与分类的记录数
+    counts: Dict[Tuple[str, str], int] = field(default_factory=dict)  # (类别, 标签) -> 数量
+    examples: Dict[Tuple[str, str], str] = field(default_factory=dict)  # (类别, 标签) -> 第一条 sub_msg
+
+    def labels(self) -> Dict[str, int]:
+        """按标签汇总"""
+        totals: Dict[str, int] = {}
+        for (_, label), count in self.counts.items():
+            totals[label] = totals.get(label, 0) + count
+        return totals
+
+
+DEFAULT_RULES = [
+    TriageRule('gpu_hardware', 'node_fault', True, patterns=[
+        r'\bXid\b', r'ECC error', r'uncorrectable (?:ECC|memory)', r'fallen off the bus',
+        r'NVLink.{0,40}(?:error|fail)', r'CUDA error: (?:an illegal memory access|unspecified launch failure)',
+    ]),
+    TriageRule('node_lost', 'node_fault', True, patterns=[
+        r'node.{0,40}(?:not ?ready|lost|unhealthy|unreachable|failure)', r'kubelet',
+    ]),
+    TriageRule('preempted', 'preempted', True, patterns=[r'preempt', r'evict'], keywords=['node drain']),
+    TriageRule('oom', 'oom', False, patterns=[
+        r'out of memory', r'OutOfMemoryError', r'OOMKilled', r'OOM[ -]?kill', r'exit(?:ed with)? code:? ?137\b',
+        r'Cannot allocate memory',
+    ]),
+    TriageRule('nccl', 'network', True, patterns=[
+        r'NCCL.{0,80}(?:timeout|timed out|error|unhandled system error|remote process exited)',
+        r'Watchdog caught collective operation timeout', r'ibv_\w+.{0,40}fail', r'RDMA',
+    ]),
+    TriageRule('connection', 'network', True, patterns=[
+        r'connection (?:reset|refused|timed out)', r'Broken pipe', r'Network is unreachable',
+        r'Name or service not known', r'Temporary failure in name resolution',
+    ]),
+    TriageRule('image', 'image', False, keywords=['ImagePullBackOff', 'ErrImagePull', 'manifest unknown'],
+               patterns=[r'image.{0,40}not found']),
+    TriageRule('disk_full', 'storage', False,
+               keywords=['No space left on device', 'Disk quota exceeded']),
+    TriageRule('storage_transient', 'storage', True,
+               keywords=['Stale file handle', 'Input/output error', 'Transport endpoint is not connected']),
+    TriageRule('scheduling', 'scheduling', True, patterns=[
+        r'insufficient (?:resource|gpu|quota)', r'Unschedulable', r'quota (?:exceeded|not enough)',
+        r'resource.{0,20}(?:not enough|unavailable)',
+    ]),
+    TriageRule('user_code', 'user_error', False, patterns=[
+        r'Traceback \(most recent call last\)', r'\b\w+(?:Error|Exception):', r'No such file or directory',
+        r'command not found', r'Permission denied', r'exit(?:ed with)? code:? ?[12]\b',
+    ]),
+    TriageRule('never_started', 'startup', True, missing='run'),
+    TriageRule('crash_on_start', 'user_error', False, gap=('run', 'finished'), max_gap=60),
+]
+
+
+def load_rules(path: str) -> List[TriageRule]:
+    """
+    从JSON文件加载规则
+
+    Args:
+        path: 规则文件，内容为规则对象列表
+
+    Returns:
+        规则列表
+
+    Raises:
+        ValueError: 文件格式或规则字段错误时
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        try:
+            items = json.load(f)
+        except ValueError as e:
+            raise ValueError(f"Invalid triage rule file {path}: {str(e)}")
+    if not isinstance(items, list):
+        raise ValueError(f"Triage rule file {path} must contain a JSON list of rules")
+
+    rules = []
+    for item in items:
+        try:
+            rule = TriageRule(**item)
+        except TypeError as e:
+            raise ValueError(f"Invalid triage rule {item!r}: {str(e)}")
+        if rule.gap is not None:
+            rule.gap = tuple(rule.gap)
+        rules.append(rule)
+    return rules
+
+
+def _timestamp(value: Any) -> Optional[float]:
+    """毫秒时间戳字符串转换为秒"""
+    try:
+        return int(value) / 1000.0
+    except (TypeError, ValueError):
+        return None
+
+
+class FailureTriage(MonitorPlugin):
+    """
+    失败任务分类器，也可以作为监控插件在任务进入 FAILED 时分类并记录日志
+    """
+
+    def __init__(self, rules: Optional[List[TriageRule]] = None, cache_size: int = 100000):
+        """
+        Args:
+            rules: 有序规则列表 (默认: DEFAULT_RULES)
+            cache_size: 缓存的不同 sub_msg 数量上限，超出时清空
+
+        Raises:
+            ValueError: 规则中的正则表达式无效时
+        """
+        self.rules = list(rules if rules is not None else DEFAULT_RULES)
+        self.cache_size = cache_size
+        self.verdicts: Dict[str, Verdict] = {}
+
+        branches = []
+        self._codes: Dict[int, int] = {}
+        self._timeline_rules: List[int] = []
+        for index, rule in enumerate(self.rules):
+            parts = [f"(?:{pattern})" for pattern in rule.patterns] + [re.escape(word) for word in rule.keywords]
+            for part in parts:
+                try:
+                    re.compile(part)
+                except re.error as e:
+                    raise ValueError(f"Invalid pattern in triage rule '{rule.name}': {part} ({str(e)})")
+            if parts:
+                branches.append(f"(?P<_r{index}>{'|'.join(parts)})")
+            for code in rule.sub_statuses:
+                self._codes.setdefault(int(code), index)
+            if rule.missing or rule.gap:
+                self._timeline_rules.append(index)
+        try:
+            self._pattern = re.compile('|'.join(branches), re.IGNORECASE) if branches else None
+        except re.error as e:
+            raise ValueError(f"Invalid triage rule patterns: {str(e)}")
+        self._group_rules = {f"_r{index}": index for index in range(len(self.rules))}
+        self._messages: Dict[str, Tuple[int, str]] = {}
+
+    def _match_message(self, sub_msg: str) -> Tuple[int, str]:
+        """sub_msg 命中的最高优先级规则序号和命中文本，未命中时序号为 len(rules)"""
+        cached = self._messages.get(sub_msg)
+        if cached is not None:
+            return cached
+
+        best, evidence = len(self.rules), ''
+        if sub_msg and self._pattern is not None:
+            for match in self._pattern.finditer(sub_msg):
+                index = self._group_rules[match.lastgroup]
+                if index < best:
+                    best, evidence = index, match.group()
+                    if index == 0:
+                        break
+        if len(self._messages) >= self.cache_size:
+            self._messages.clear()
+        self._messages[sub_msg] = (best, evidence)
+        return best, evidence
+
+    def _match_timeline(self, timeline: Any, limit: int) -> Tuple[int, str]:
+        """时间线规则中序号小于 limit 的第一条命中规则"""
+        if isinstance(timeline, str):
+            try:
+                timeline = json.loads(timeline)
+            except ValueError:
+                timeline = None
+        if not timeline:
+            return limit, ''
+        for index in self._timeline_rules:
+            if index >= limit:
+                break
+            rule = self.rules[index]
+            if rule.missing and not timeline.get(rule.missing):
+                return index, f"no {rule.missing} in timeline"
+            if rule.gap:
+                start, end = _timestamp(timeline.get(rule.gap[0])), _timestamp(timeline.get(rule.gap[1]))
+                if start is None or end is None:
+                    continue
+                seconds = end - start
+                if (rule.min_gap is None or seconds >= rule.min_gap) and \
+                        (rule.max_gap is None or seconds <= rule.max_gap):
+                    return index, f"{rule.gap[0]}->{rule.gap[1]} {seconds:.0f}s"
+        return limit, ''
+
+    def _match(self, sub_msg: str, sub_status: Any, timeline: Any) -> Tuple[int, str]:
+        best, evidence = self._match_message(sub_msg)
+        if self._codes:
+            try:
+                code_index = self._codes.get(int(sub_status), best)
+            except (TypeError, ValueError):
+                code_index = best
+            if code_index < best:
+                best, evidence = code_index, f"sub_status={sub_status}"
+        if self._timeline_rules and self._timeline_rules[0] < best:
+            index, timeline_evidence = self._match_timeline(timeline, best)
+            if index < best:
+                best, evidence = index, timeline_evidence
+        return best, evidence
+
+    def classify(self, record: Any) -> Verdict:
+        """
+        分类一条记录
+
+        Args:
+            record: 状态快照、导出的快照字典或任务详情的 data 字典
+
+        Returns:
+            分类结果，没有规则命中时类别为 unclassified、标签为 unknown
+        """
+        if isinstance(record, dict):
+            job_id, status = record.get('job_id', ''), record.get('status', '')
+            sub_msg, sub_status, timeline = record.get('sub_msg') or '', record.get('sub_status'), record.get('timeline')
+        else:
+            job_id, status = record.job_id, record.status
+            sub_msg, sub_status, timeline = record.sub_msg or '', record.sub_status, record.timeline
+
+        index, evidence = self._match(sub_msg, sub_status, timeline)
+        if index == len(self.rules):
+            return Verdict(job_id, status, 'unknown', UNCLASSIFIED, sub_msg=sub_msg)
+        rule = self.rules[index]
+        return Verdict(job_id, status, rule.label, rule.category, rule.name, evidence, sub_msg)
+
+    def classify_many(self, records: Iterable[Any], failed_only: bool = True) -> Iterator[Verdict]:
+        """
+        逐条分类记录
+
+        Args:
+            records: 记录序列
+            failed_only: 只分类状态为 FAILED 的记录
+
+        Yields:
+            分类结果
+        """
+        for record in records:
+            status = record.get('status') if isinstance(record, dict) else record.status
+            if failed_only and status != 'FAILED':
+                continue
+            yield self.classify(record)
+
+    def summarize(self, records: Iterable[Any], failed_only: bool = True) -> TriageSummary:
+        """
+        批量分类并只统计数量，不创建逐条结果
+
+        Args:
+            records: 记录序列
+            failed_only: 只分类状态为 FAILED 的记录
+
+        Returns:
+            分类统计
+        """
+        counts = [0] * (len(self.rules) + 1)
+        examples: Dict[int, str] = {}
+        total = 0
+        match = self._match
+        for record in records:
+            total += 1
+            if isinstance(record, dict):
+                if failed_only and record.get('status') != 'FAILED':
+                    continue
+                sub_msg = record.get('sub_msg') or ''
+                index = match(sub_msg, record.get('sub_status'), record.get('timeline'))[0]
+            else:
+                if failed_only and record.status != 'FAILED':
+                    continue
+                sub_msg = record.sub_msg or ''
+                index = match(sub_msg, record.sub_status, record.timeline)[0]
+            counts[index] += 1
+            if index not in examples:
+                examples[index] = sub_msg
+
+        summary = TriageSummary(records=total, classified=sum(counts))
+        for index, count in enumerate(counts):
+            if not count:
+                continue
+            if index == len(self.rules):
+                key = (UNCLASSIFIED, 'unknown')
+            else:
+                key = (self.rules[index].category, self.rules[index].label)
+            summary.counts[key] = summary.counts.get(key, 0) + count
+            summary.examples.setdefault(key, examples[index])
+        return summary
+
+    def on_snapshot(self, snapshot, previous) -> None:
+        if snapshot.status != 'FAILED' or (previous is not None and previous.status == 'FAILED'):
+            return
+        verdict = self.classify(snapshot)
+        self.verdicts[snapshot.job_id] = verdict
+        logger.warning("Job %s failed: %s (%s)%s", snapshot.job_id, verdict.category, verdict.label,
+                       f" - {verdict.evidence}" if verdict.evidence else '',
+                       extra={'job_id': snapshot.job_id, 'status': snapshot.status,
+                              'failure_category': verdict.category, 'failure_label': verdict.label})
+
+
+def iter_records(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    读取导出的历史记录
+
+    支持 JSONL (每行一个快照)、CSV (serializers 导出的格式) 和 JSON 文档
+    (快照列表、带 snapshots 字段的导出文档，或任务详情响应)。
+
+    Args:
+        path: 文件路径
+
+    Yields:
+        记录字典
+
+    Raises:
+        ValueError: 文件内容无法解析时
+    """
+    lower = path.lower()
+    if lower.endswith(('.jsonl', '.ndjson')):
+        loads = orjson.loads if orjson is not None else json.loads
+        with open(path, 'rb') as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield loads(line)
+                except ValueError as e:
+                    raise ValueError(f"{path}:{line_number}: invalid JSON ({str(e)})")
+        return
+
+    if lower.endswith('.csv'):
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            yield from csv.DictReader(f)
+        return
+
+    with open(path, 'rb') as f:
+        try:
+            document = orjson.loads(f.read()) if orjson is not None else json.load(io.TextIOWrapper(f, 'utf-8'))
+        except ValueError as e:
+            raise ValueError(f"{path}: invalid JSON ({str(e)})")
+    if isinstance(document, dict):
+        if 'snapshots' in document:
+            document = document['snapshots']
+        elif isinstance(document.get('data'), dict):
+            document = [document['data']]
+        else:
+            document = [document]
+    if not isinstance(document, list):
+        raise ValueError(f"{path}: expected a list of records")
+    yield from document
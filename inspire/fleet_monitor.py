@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启智(Inspire)大规模任务多进程分片监控
+Multi-process sharded monitoring for large job fleets
+
+任务按一致性哈希分配到多个工作进程，每个进程使用自己的 JobMonitor 会话轮询分到的任务：
+- 主进程认证一次，所有工作进程共享同一个 token
+- 所有进程共享一个令牌桶限速预算 (rate_limit 次请求/秒)
+- 工作进程只上报状态变化事件，主进程按时间合并成一个有序输出流并写入导出文件(JSONL)
+- 工作进程退出时，把它的分片重新分配给其余进程，并带上最后已知状态，避免重复通知或丢失任务
+- 指定 metrics 时，主进程按合并后的事件和工作进程批量上报的API调用记录更新指标
+- 所有进程共用一个基于 multiprocessing.Event 的停止令牌，stop() 后各进程的等待立即结束
+"""
+
+import json
+import time
+import bisect
+import heapq
+import hashlib
+import logging
+import signal
+import multiprocessing
+from dataclasses import asdict
+from queue import Empty
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from job_monitor import JobMonitor, MonitorConfig, StatusSnapshot
+from metrics_exporter import ApiCallRecorder, FleetMetrics
+from stop_token import StopToken
+
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ('SUCCEEDED', 'FAILED', 'CANCELLED')
+
+
+class HashRing:
+    """
+    一致性哈希环
+    """
+
+    def __init__(self, nodes: Iterable[int] = (), replicas: int = 64):
+        """
+        Args:
+            nodes: 初始节点
+            replicas: 每个节点的虚拟节点数
+        """
+        self.replicas = replicas
+        self._keys: List[int] = []
+        self._owners: Dict[int, int] = {}
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest()[:8], 'big')
+
+    def add(self, node: int) -> None:
+        """添加节点"""
+        for replica in range(self.replicas):
+            point = self._hash(f"{node}#{replica}")
+            if point not in self._owners:
+                bisect.insort(self._keys, point)
+                self._owners[point] = node
+
+    def remove(self, node: int) -> None:
+        """移除节点"""
+        for replica in range(self.replicas):
+            point = self._hash(f"{node}#{replica}")
+            if self._owners.get(point) == node:
+                del self._owners[point]
+                self._keys.remove(point)
+
+    def get(self, key: str) -> int:
+        """
+        查找 key 所属节点
+
+        Raises:
+            LookupError: 环上没有节点时
+        """
+        if not self._keys:
+            raise LookupError("Hash ring is empty")
+        index = bisect.bisect(self._keys, self._hash(key)) % len(self._keys)
+        return self._owners[self._keys[index]]
+
+
+class SharedRateLimiter:
+    """
+    跨进程共享的令牌桶
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None, context=multiprocessing):
+        """
+        Args:
+            rate: 每秒补充的令牌数 (<=0 表示不限速)
+            burst: 桶容量 (默认: 与 rate 相同)
+            context: multiprocessing 上下文
+        """
+        self.rate = rate
+        self.burst = burst or max(rate, 1.0)
+        self._lock = context.Lock()
+        self._tokens = context.Value('d', self.burst, lock=False)
+        self._updated = context.Value('d', time.monotonic(), lock=False)
+
+    def acquire(self, stop_token: Optional[StopToken] = None) -> bool:
+        """
+        取得一个令牌，没有令牌时等待
+
+        Args:
+            stop_token: 停止令牌，停止后放弃等待
+
+        Returns:
+            是否取得令牌 (等待期间被停止时返回False)
+        """
+        if self.rate <= 0:
+            return True
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens = min(self.burst, self._tokens.value + (now - self._updated.value) * self.rate)
+                self._updated.value = now
+                if tokens >= 1:
+                    self._tokens.value = tokens - 1
+                    return True
+                self._tokens.value = tokens
+                wait = (1 - tokens) / self.rate
+            if stop_token is None:
+                time.sleep(wait)
+            elif stop_token.wait(wait):
+                return False
+
+
+def _snapshot_from_dict(data: Optional[Dict[str, Any]]) -> Optional[StatusSnapshot]:
+    """从事件中的快照字典还原快照"""
+    return StatusSnapshot(**data) if data else None
+
+
+def _worker_main(worker_id: int, config: MonitorConfig, token: str,
+                 inbox, events, limiter: SharedRateLimiter, report_api_calls: bool = False,
+                 stop_token: Optional[StopToken] = None) -> None:
+    """
+    工作进程主循环
+
+    inbox 消息: ('assign', job_id, 最后已知快照字典或None) / ('stop',)
+    events 消息: 状态变化事件字典，或 {'worker': id, 'api_calls': [...]} 每轮的API调用记录
+    stop_token 停止后，工作进程在当前请求结束后立即退出
+    """
+    stop_token = stop_token or StopToken()
+    monitor = JobMonitor(config, stop_token=stop_token)
+    recorder = None
+    if report_api_calls:
+        recorder = ApiCallRecorder()
+        monitor.add_plugin(recorder)
+    # 中断信号由主进程统一处理，再通过 inbox 通知工作进程退出
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    monitor.token = token
+    monitor.headers['Authorization'] = f"Bearer {token}"
+
+    jobs: Dict[str, Optional[StatusSnapshot]] = {}
+    sequence = 0
+
+    while not stop_token.stopped:
+        round_start = time.monotonic()
+        try:
+            while True:
+                message = inbox.get_nowait() if jobs else inbox.get(timeout=config.poll_interval)
+                if message[0] == 'stop':
+                    return
+                jobs[message[1]] = _snapshot_from_dict(message[2])
+        except Empty:
+            pass
+
+        for job_id in list(jobs):
+            if not limiter.acquire(stop_token):
+                return
+            snapshot = monitor.get_job_status(job_id)
+            if snapshot is None:
+                continue
+
+            previous = jobs[job_id]
+            if monitor._detect_status_change(snapshot, previous):
+                sequence += 1
+                events.put({
+                    'ts': time.time(),
+                    'worker': worker_id,
+                    'seq': sequence,
+                    'job_id': job_id,
+                    'previous_status': previous.status if previous else None,
+                    'snapshot': asdict(snapshot)
+                })
+            jobs[job_id] = snapshot
+            if snapshot.status in TERMINAL_STATUSES:
+                del jobs[job_id]
+
+        if recorder is not None and recorder.calls:
+            events.put({'worker': worker_id, 'api_calls': recorder.drain()})
+
+        remaining = config.poll_interval - (time.monotonic() - round_start)
+        if remaining > 0 and jobs:
+            stop_token.wait(remaining)
+
+
+class FleetMonitor:
+    """
+    多进程分片监控器
+    """
+
+    def __init__(self, config: MonitorConfig, token: str, workers: int = 4,
+                 rate_limit: float = 50.0, reorder_window: float = 1.0,
+                 metrics: Optional[FleetMetrics] = None, stop_token: Optional[StopToken] = None):
+        """
+        Args:
+            config: 监控配置 (poll_interval/timeout/export_file 对整个集群生效)
+            token: 已认证的访问令牌
+            workers: 工作进程数
+            rate_limit: 所有进程合计每秒最多请求数
+            reorder_window: 合并事件时等待乱序事件的时间窗口(秒)
+            metrics: 指标对象，指定时记录任务状态和API调用
+            stop_token: 停止令牌 (默认: 基于 multiprocessing.Event 新建，需要跨进程共享)
+        """
+        self.config = config
+        self.token = token
+        self.workers = max(1, workers)
+        self.reorder_window = reorder_window
+        self.metrics = metrics
+        self.context = multiprocessing.get_context()
+        self.limiter = SharedRateLimiter(rate_limit, context=self.context)
+        self.events = self.context.Queue()
+        self.stop_token = stop_token or StopToken(self.context.Event())
+        # 停止时唤醒阻塞在事件队列上的主循环
+        self.stop_token.add_callback(lambda: self.events.put({'wakeup': True}))
+        self.ring = HashRing()
+        self.processes: Dict[int, Any] = {}
+        self.inboxes: Dict[int, Any] = {}
+        self.owners: Dict[str, int] = {}
+        self.last_snapshots: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._last_event_ts: Dict[str, float] = {}
+        self._pending: List[Tuple[float, int, int, Dict[str, Any]]] = []
+        self._export = None
+
+    @property
+    def running(self) -> bool:
+        """是否在运行 (未被停止)"""
+        return not self.stop_token.stopped
+
+    def stop(self) -> None:
+        """请求停止监控，所有工作进程的等待立即结束"""
+        self.stop_token.stop('stop() called')
+
+    def _start_worker(self, worker_id: int) -> None:
+        inbox = self.context.Queue()
+        process = self.context.Process(
+            target=_worker_main,
+            args=(worker_id, self.config, self.token, inbox, self.events, self.limiter,
+                  self.metrics is not None, self.stop_token),
+            name=f"fleet-worker-{worker_id}",
+            daemon=True
+        )
+        process.start()
+        self.processes[worker_id] = process
+        self.inboxes[worker_id] = inbox
+        self.ring.add(worker_id)
+
+    def _assign(self, job_id: str) -> None:
+        worker_id = self.ring.get(job_id)
+        self.owners[job_id] = worker_id
+        self.inboxes[worker_id].put(('assign', job_id, self.last_snapshots.get(job_id)))
+
+    def _handle_dead_workers(self) -> None:
+        """把已退出工作进程的任务重新分配给其余进程"""
+        for worker_id, process in list(self.processes.items()):
+            if process.is_alive():
+                continue
+
+            logger.warning(f"Worker {worker_id} exited with code {process.exitcode}, reassigning its jobs")
+            del self.processes[worker_id]
+            del self.inboxes[worker_id]
+            self.ring.remove(worker_id)
+            if not self.processes:
+                logger.warning("All workers exited, starting a replacement")
+                self._start_worker(worker_id)
+
+            orphaned = [job_id for job_id, owner in self.owners.items() if owner == worker_id]
+            for job_id in orphaned:
+                self._assign(job_id)
+
+    def _accept(self, event: Dict[str, Any]) -> None:
+        """
+        接收一个状态变化事件，立即更新任务的最后已知状态，再放入乱序窗口等待输出
+
+        重新分配的任务使用这里的状态，因此窗口内工作进程退出时不会重复报告已经收到的变化；
+        与最后已知状态相同的事件 (重新分配前后两个进程都报告了同一变化) 和更早的事件被丢弃。
+        """
+        job_id = event['job_id']
+        snapshot = event['snapshot']
+        last = self.last_snapshots.get(job_id)
+        if event['ts'] < self._last_event_ts.get(job_id, float('-inf')):
+            return
+        if last is not None and (last['status'], last['sub_status']) == (snapshot['status'], snapshot['sub_status']):
+            return
+        self.last_snapshots[job_id] = snapshot
+        self._last_event_ts[job_id] = event['ts']
+        if snapshot['status'] in TERMINAL_STATUSES:
+            self.owners.pop(job_id, None)
+        heapq.heappush(self._pending, (event['ts'], event['worker'], event['seq'], event))
+
+    def _emit(self, event: Dict[str, Any]) -> None:
+        """输出一个合并后的状态变化事件"""
+        snapshot = event['snapshot']
+        job_id = event['job_id']
+        if self.metrics is not None:
+            self.metrics.record_status(job_id, snapshot['status'], snapshot['sub_status'], timestamp=event['ts'])
+
+        print(f"[{snapshot['timestamp'][:19]}] {job_id}: {event['previous_status'] or '-'} -> "
+              f"{snapshot['status']} (sub_status: {snapshot['sub_status']}) {snapshot['sub_msg']}".rstrip())
+        if self._export is not None:
+            self._export.write(json.dumps(event, ensure_ascii=False) + '\n')
+            self._export.flush()
+
+    def _flush_events(self, force: bool = False) -> None:
+        """输出时间早于乱序窗口的事件"""
+        deadline = time.time() - self.reorder_window
+        while self._pending and (force or self._pending[0][0] <= deadline):
+            _, _, _, event = heapq.heappop(self._pending)
+            self._emit(event)
+
+    def _collect_events(self, timeout: float) -> None:
+        try:
+            event = self.events.get(timeout=timeout)
+            while True:
+                if 'wakeup' in event:
+                    pass
+                elif 'api_calls' in event:
+                    for endpoint, seconds, error in event['api_calls']:
+                        self.metrics.record_api_call(endpoint, seconds, error)
+                else:
+                    self._accept(event)
+                event = self.events.get_nowait()
+        except Empty:
+            pass
+
+    def run(self, job_ids: List[str]) -> Dict[str, Optional[str]]:
+        """
+        监控一组任务直到全部结束、超时或被停止
+
+        Args:
+            job_ids: 任务ID列表
+
+        Returns:
+            job_id -> 最后已知状态
+        """
+        job_ids = list(dict.fromkeys(job_ids))
+        logger.info(f"Monitoring {len(job_ids)} jobs with {self.workers} workers")
+        if self.config.export_file:
+            self._export = open(self.config.export_file, 'w', encoding='utf-8')
+
+        start_time = time.monotonic()
+        try:
+            for worker_id in range(self.workers):
+                self._start_worker(worker_id)
+            for job_id in job_ids:
+                self.last_snapshots.setdefault(job_id, None)
+                self._assign(job_id)
+
+            while not self.stop_token.stopped and (self.owners or self._pending):
+                if time.monotonic() - start_time > self.config.timeout:
+                    logger.warning(f"Monitoring timeout after {self.config.timeout} seconds")
+                    break
+                self._collect_events(timeout=0.2)
+                self._flush_events()
+                if not self.stop_token.stopped:
+                    self._handle_dead_workers()
+        finally:
+            for inbox in self.inboxes.values():
+                inbox.put(('stop',))
+            self._collect_events(timeout=0)
+            self._flush_events(force=True)
+            for process in self.processes.values():
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+            # 提前停止时工作进程不会读完 inbox，丢弃未发送的消息，避免退出时阻塞在队列的写入线程上
+            for queue in list(self.inboxes.values()) + [self.events]:
+                queue.cancel_join_thread()
+            if self._export is not None:
+                self._export.close()
+                logger.info(f"Status change events exported to: {self.config.export_file}")
+
+        return {job_id: snapshot['status'] if snapshot else None
+                for job_id, snapshot in self.last_snapshots.items()}
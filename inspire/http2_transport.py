@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启智(Inspire) API 的 HTTP/2 传输
+HTTP/2 multiplexed transport behind the requests.Session interface
+
+HTTP2Session 基于 httpx (需要 pip install 'httpx[http2]')，实现 InspireAPI 和 JobMonitor
+用到的 requests.Session 接口 (post/get/close)，返回 requests.Response 并抛出 requests 的异常，
+调用方的重试、错误处理和 401 判断都不需要修改：
+- HTTPS 连接通过 ALPN 协商 HTTP/2，多个并发请求复用同一个连接
+- 服务端不支持 HTTP/2 时 httpx 自动使用 HTTP/1.1
+- 连接由一个后台事件循环线程上的 httpx.AsyncClient 管理，调用线程只提交请求并等待结果：
+  httpx 同步客户端的 HTTP/2 连接在大量线程并发时会乱序发送流ID，导致服务端断开连接
+- 同时进行的请求数不超过 max_streams，超过服务端的并发流上限 (常见为 100-128) 的请求在事件循环中
+  按先后顺序排队
+- 没有安装 httpx/h2 时 create_session 返回普通的 requests.Session
+
+明文 http:// 地址不协商 HTTP/2 (没有 ALPN)，始终使用 HTTP/1.1。
+
+两种会话都用 ACCEPT_ENCODING 协商响应压缩并自动解压；HTTP2Session 总是读取完整响应，
+stream=True 的请求在 HTTP/2 下不会减少内存占用。
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.request import ACCEPT_ENCODING as _URLLIB3_ACCEPT_ENCODING
+
+try:
+    import httpx
+    import h2  # noqa: F401  httpx 的 HTTP/2 支持依赖 h2
+except ImportError:
+    httpx = None
+
+
+logger = logging.getLogger(__name__)
+
+# 本机能解码的压缩格式: 总是有 gzip/deflate，安装 brotli 或 zstandard 后还有 br/zstd
+# (httpx 按同样的可选依赖解码)
+ACCEPT_ENCODING = _URLLIB3_ACCEPT_ENCODING
+
+
+class HTTP2Session:
+    """
+    requests.Session 的 HTTP/2 替代实现
+    """
+
+    def __init__(self, max_connections: int = 16, timeout: float = 30.0, max_streams: int = 100):
+        """
+        Args:
+            max_connections: 连接数上限 (HTTP/2 下通常只需要一个连接)
+            timeout: 默认超时时间(秒)
+            max_streams: 同时进行的请求数上限，不应超过服务端的 SETTINGS_MAX_CONCURRENT_STREAMS
+
+        Raises:
+            ImportError: 没有安装 httpx 或 h2 时
+        """
+        if httpx is None:
+            raise ImportError("HTTP/2 transport requires 'httpx[http2]' (pip install 'httpx[http2]')")
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='inspire-http2', daemon=True)
+        self._thread.start()
+        self.client = httpx.AsyncClient(
+            http2=True,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        self._streams = asyncio.Semaphore(max_streams)
+        self.http_versions: Dict[str, int] = {}  # 协议版本 -> 响应数
+        self._versions_lock = threading.Lock()  # 多个调用线程同时更新 http_versions
+
+    async def _send(self, method: str, url: str, kwargs: Dict[str, Any]):
+        async with self._streams:
+            return await self.client.request(method, url, **kwargs)
+
+    def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                json: Any = None, data: Optional[bytes] = None,
+                timeout: Optional[float] = None, stream: bool = False) -> requests.Response:
+        """
+        发送请求
+
+        stream 只为兼容 requests 接口，响应总是在事件循环线程中完整读取。
+
+        Returns:
+            requests.Response
+
+        Raises:
+            requests.exceptions.Timeout: 超时时
+            requests.exceptions.ConnectionError: 连接失败或连接被断开时
+            requests.exceptions.RequestException: 其他请求错误
+        """
+        kwargs: Dict[str, Any] = {'headers': headers}
+        if data is not None:
+            kwargs['content'] = data
+        elif json is not None:
+            kwargs['json'] = json
+        if timeout is not None:
+            kwargs['timeout'] = timeout
+
+        try:
+            response = asyncio.run_coroutine_threadsafe(self._send(method, url, kwargs), self._loop).result()
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e)) from e
+        except (httpx.NetworkError, httpx.RemoteProtocolError) as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+        except httpx.HTTPError as e:
+            raise requests.exceptions.RequestException(str(e)) from e
+
+        with self._versions_lock:
+            self.http_versions[response.http_version] = self.http_versions.get(response.http_version, 0) + 1
+        result = requests.Response()
+        result.status_code = response.status_code
+        result._content = response.content
+        result._content_consumed = True  # iter_content/close 使用已读取的内容，没有底层连接
+        result.headers = CaseInsensitiveDict(response.headers)
+        result.url = str(response.url)
+        result.reason = response.reason_phrase
+        result.encoding = response.encoding
+        result.elapsed = response.elapsed
+        return result
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def close(self) -> None:
+        """关闭连接并停止事件循环线程"""
+        if not self._loop.is_running():
+            return
+        asyncio.run_coroutine_threadsafe(self.client.aclose(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+def create_session(http2: bool = False, max_connections: int = 16,
+                   timeout: float = 30.0):
+    """
+    创建请求会话
+
+    Args:
+        http2: 是否使用 HTTP/2，依赖缺失时退回 HTTP/1.1 并记录警告
+        max_connections: 连接池大小
+        timeout: HTTP/2 会话的默认超时时间(秒)
+
+    Returns:
+        HTTP2Session 或 requests.Session
+    """
+    if http2:
+        if httpx is not None:
+            return HTTP2Session(max_connections=max_connections, timeout=timeout)
+        logger.warning("HTTP/2 requested but 'httpx[http2]' is not installed, falling back to HTTP/1.1")
+
+    session = requests.Session()
+    # 连接池大小与并发上限一致，避免并发请求时丢弃连接
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=max_connections)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
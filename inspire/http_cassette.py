@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启智(Inspire) HTTP 录制/回放传输层
+Record/replay HTTP cassettes for deterministic offline runs
+
+RecordingSession 与 ReplaySession 都是 requests.Session 的子类，可以直接替换
+InspireAPI.session 或 JobMonitor.session：
+- 录制: 把每个请求/响应对及耗时追加写入 JSON Lines 文件(.gz 结尾时gzip压缩)，
+  超时、连接错误等异常同样被记录，便于离线复现重试逻辑
+- 回放: 按 (方法, 路径, 请求体) 依次返回录制的响应，可以按录制的延迟回放，也可以全速回放
+
+录制文件不包含请求头，认证请求中的用户名、密码和响应中的 access_token 会被替换，
+因此回放时不需要真实凭证。
+
+录制/回放会话基于 requests，客户端原来的 HTTP/2 会话会被关闭，录制和回放都使用 HTTP/1.1。
+"""
+
+import gzip
+import json
+import time
+import logging
+import threading
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from http2_transport import HTTP2Session
+
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_VERSION = 1
+REDACTED = '***'
+# 回放时保留的响应头
+_KEPT_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+
+def _open_cassette(path: str, mode: str):
+    """打开录制文件，.gz 结尾时使用gzip"""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def _request_path(url: str) -> str:
+    """去掉协议和主机，使录制文件可以在不同 base_url 下回放"""
+    parts = urlsplit(url)
+    return parts.path + ('?' + parts.query if parts.query else '')
+
+
+def _canonical_body(kwargs: Dict[str, Any]) -> str:
+    """
+    规范化请求体，用作回放匹配键
+
+    Args:
+        kwargs: requests 请求参数
+
+    Returns:
+        排序后的紧凑JSON，用户名和密码字段被替换
+    """
+    body = kwargs.get('json')
+    if body is None and kwargs.get('data') is not None:
+        data = kwargs['data']
+        try:
+            body = json.loads(data)
+        except (TypeError, ValueError):
+            return data.decode('utf-8', errors='replace') if isinstance(data, bytes) else str(data)
+    if body is None:
+        return ''
+    if isinstance(body, dict) and 'password' in body:
+        body = {**body, 'username': REDACTED, 'password': REDACTED}
+    return json.dumps(body, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+
+def _redact_response(text: str) -> str:
+    """替换认证响应中的 access_token"""
+    if 'access_token' not in text:
+        return text
+    try:
+        result = json.loads(text)
+        result['data']['access_token'] = REDACTED
+        return json.dumps(result, ensure_ascii=False)
+    except (ValueError, KeyError, TypeError):
+        return text
+
+
+class RecordingSession(requests.Session):
+    """
+    录制模式会话
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: 录制文件路径
+        """
+        super().__init__()
+        self.path = path
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self._file = _open_cassette(path, 'w')
+        self._write({'version': CASSETTE_VERSION, 'created': datetime.now().isoformat()})
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        line = json.dumps(entry, ensure_ascii=False, separators=(',', ':'))
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def request(self, method, url, **kwargs):
+        entry = {
+            't': round(time.monotonic() - self._start, 6),
+            'm': method.upper(),
+            'p': _request_path(url),
+            'q': _canonical_body(kwargs),
+        }
+        start = time.perf_counter()
+        try:
+            response = super().request(method, url, **kwargs)
+        except requests.exceptions.RequestException as e:
+            entry['l'] = round(time.perf_counter() - start, 6)
+            entry['e'] = type(e).__name__
+            entry['x'] = str(e)
+            self._write(entry)
+            raise
+
+        entry['l'] = round(time.perf_counter() - start, 6)
+        entry['s'] = response.status_code
+        entry['r'] = response.reason
+        entry['h'] = {name: response.headers[name] for name in _KEPT_HEADERS if name in response.headers}
+        entry['b'] = _redact_response(response.content.decode('utf-8', errors='replace'))
+        self._write(entry)
+        return response
+
+    def close(self):
+        super().close()
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+class ReplaySession(requests.Session):
+    """
+    回放模式会话
+
+    同一请求被录制多次时(例如轮询同一任务)按录制顺序依次返回，
+    用完后重复返回最后一次的响应。没有匹配的录制时抛出 ConnectionError。
+    """
+
+    def __init__(self, path: str, speed: float = 0.0):
+        """
+        Args:
+            path: 录制文件路径
+            speed: 延迟倍率，0为全速回放，1为按录制的延迟回放
+        """
+        super().__init__()
+        self.path = path
+        self.speed = speed
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str, str], Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._last: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self.replayed = 0
+        self.missed = 0
+
+        with _open_cassette(path, 'r') as f:
+            header = json.loads(f.readline() or '{}')
+            if header.get('version') != CASSETTE_VERSION:
+                raise ValueError(f"Unsupported cassette version in {path}: {header.get('version')}")
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries[(entry['m'], entry['p'], entry['q'])].append(entry)
+
+    def _next_entry(self, key: Tuple[str, str, str]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            queue = self._entries.get(key)
+            if queue:
+                entry = queue.popleft()
+                self._last[key] = entry
+            else:
+                entry = self._last.get(key)
+            if entry is None:
+                self.missed += 1
+            else:
+                self.replayed += 1
+            return entry
+
+    def request(self, method, url, **kwargs):
+        key = (method.upper(), _request_path(url), _canonical_body(kwargs))
+        entry = self._next_entry(key)
+        if entry is None:
+            raise requests.exceptions.ConnectionError(f"No recorded response for {key[0]} {key[1]}")
+
+        if self.speed > 0:
+            time.sleep(entry.get('l', 0) * self.speed)
+
+        if 'e' in entry:
+            error_class = getattr(requests.exceptions, entry['e'], requests.exceptions.RequestException)
+            raise error_class(entry.get('x', 'Recorded request error'))
+
+        response = requests.Response()
+        response.status_code = entry['s']
+        response.reason = entry.get('r', '')
+        response.headers = CaseInsensitiveDict(entry.get('h', {}))
+        response._content = entry.get('b', '').encode('utf-8')
+        response._content_consumed = True
+        response.encoding = 'utf-8'
+        response.url = url
+        return response
+
+
+def install_cassette(client: Any, record: Optional[str] = None, replay: Optional[str] = None,
+                     speed: float = 0.0) -> Optional[requests.Session]:
+    """
+    为客户端安装录制或回放会话
+
+    Args:
+        client: 具有 session 属性的客户端 (InspireAPI 或 JobMonitor)
+        record: 录制文件路径
+        replay: 回放文件路径
+        speed: 回放延迟倍率
+
+    Returns:
+        安装的会话，两者都未指定时返回None
+    """
+    if record and replay:
+        raise ValueError("Cannot record and replay at the same time")
+
+    if record:
+        session = RecordingSession(record)
+        logger.info(f"Recording HTTP traffic to {record}")
+    elif replay:
+        session = ReplaySession(replay, speed=speed)
+        logger.info(f"Replaying HTTP traffic from {replay} (speed: {speed})")
+    else:
+        return None
+
+    previous = client.session
+    if isinstance(previous, HTTP2Session):
+        # 录制/回放会话基于 requests，替换后 HTTP/2 会话不再使用，关闭它的事件循环线程和连接
+        logger.warning("HTTP/2 is not supported with --record/--replay, using HTTP/1.1")
+        previous.close()
+    else:
+        # 保留客户端原有的连接池配置
+        for prefix, adapter in previous.adapters.items():
+            session.mount(prefix, adapter)
+    client.session = session
+    return session
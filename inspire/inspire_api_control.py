@@ -22,18 +22,35 @@ API Documentation: https://qz.sii.edu.cn/openapi/
 import os
 import json
 import logging
+import sqlite3
 import requests
 import argparse
 import time
-from typing import Dict, Any, Optional, Union
-from dataclasses import dataclass
+from contextlib import closing
+from concurrent.futures import CancelledError, ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Dict, Any, Optional, Union, List, Callable, Iterator, Sequence, Tuple
+from dataclasses import dataclass, field
+
+from accounting import SCOPES, BudgetGuard, UsageLedger, format_usage_report, job_meta_from_detail, parse_specs
+from http2_transport import ACCEPT_ENCODING, create_session
+from http_cassette import install_cassette
+from job_registry import JobRecord, JobRegistry, is_selector, resolve_job_ids
+from json_stream import iter_json_array
+from log_config import configure_logging
+from log_stream import LogBackend, LogLine, LogTailer
+from payload_validators import PayloadError, validate_job_payload
+from profiling import add_profile_arguments, run_with_profiling
+from read_cache import ReadCache
+from stop_token import StopToken, install_signal_handlers
+
+# 可选的快速JSON编码器
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 
@@ -44,6 +61,10 @@ class InspireConfig:
     timeout: int = 30
     max_retries: int = 3
     retry_delay: float = 1.0  # Simplified retry delay
+    max_workers: int = 16  # 批量操作的并发上限
+    cache_ttl: float = 1.0  # 任务详情/规格列表的缓存时间(秒)，0 表示只合并同时进行的相同请求
+    cache_size: int = 1024  # 缓存条目上限
+    http2: bool = False  # 使用 HTTP/2 (需要 httpx[http2])，不可用时退回 HTTP/1.1
 
 
 class APIEndpoints:
@@ -56,6 +77,36 @@ class APIEndpoints:
     CLUSTER_NODES_LIST = "/openapi/v1/cluster_nodes/list"
 
 
+# 流式解析响应时每次读取的解压后字节数
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class BatchResult:
+    """批量操作结果"""
+    succeeded: Dict[str, Any] = field(default_factory=dict)
+    failed: Dict[str, str] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+
+def dumps_json(obj: Any, pretty: bool = False) -> bytes:
+    """
+    编码JSON，安装了 orjson 时使用 orjson
+    
+    Args:
+        obj: 待编码对象
+        pretty: 是否缩进输出
+        
+    Returns:
+        UTF-8编码的JSON字节串
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
 class InspireAPIError(Exception):
     """Inspire API 基础异常"""
     pass
@@ -89,30 +140,125 @@ class InspireAPI:
     DEFAULT_MAX_RUNNING_TIME = "3600000"  # 1小时
     DEFAULT_IMAGE_TYPE = "SOURCE_PRIVATE"
     
-    def __init__(self, config: Optional[InspireConfig] = None):
+    _spec_error: Optional[str] = None  # 接口文档无法读取时的错误，设置后 validate_job_payload 只做基本检查
+    
+    def __init__(self, config: Optional[InspireConfig] = None,
+                 session: Optional[requests.Session] = None,
+                 cache: Optional[ReadCache] = None,
+                 stop_token: Optional[StopToken] = None,
+                 registry: Optional[JobRegistry] = None):
         """
         初始化API客户端
         
         Args:
             config: API配置对象，如果为None则使用默认配置
+            session: 共享的requests session (例如 client_pool 中多个客户端共用的连接池)，
+                     为None时按 config.http2 创建新的session
+            cache: 共享的读缓存 (例如 client_pool 中同一凭证的客户端共用)，
+                   为None时按 config.cache_ttl/cache_size 创建
+            stop_token: 停止令牌，停止后重试等待立即结束 (默认新建)
+            registry: 本地任务登记表，提交成功的任务自动记录 (默认不记录)
         """
         self.config = config or InspireConfig()
+        self.stop_token = stop_token or StopToken()
+        self.registry = registry
+        self.cache = cache or ReadCache(ttl=self.config.cache_ttl, max_entries=self.config.cache_size)
         self.base_url = self.config.base_url.rstrip('/')
         self.token = None
+        self.token_expires_at: Optional[float] = None  # time.monotonic() 时间
         self.headers = {
             'Content-Type': 'application/json',
-            'Accept': 'application/json'
+            'Accept': 'application/json',
+            'Accept-Encoding': ACCEPT_ENCODING
         }
         
-        # 使用简单的requests session，避免urllib3兼容性问题
-        self.session = requests.Session()
+        if session is not None:
+            self.session = session
+            return
+        
+        # 连接池大小与批量并发上限一致，避免并发请求时丢弃连接
+        self.session = create_session(self.config.http2, max_connections=self.config.max_workers,
+                                      timeout=self.config.timeout)
     
-    def _validate_required_params(self, **kwargs) -> None:
+    @staticmethod
+    def _validate_required_params(**kwargs) -> None:
         """验证必需参数"""
         for param_name, param_value in kwargs.items():
             if param_value is None or (isinstance(param_value, str) and not param_value.strip()):
                 raise ValidationError(f"Required parameter '{param_name}' cannot be empty")
     
+    @staticmethod
+    def _validate_job_resources(instance_count: int, shm_gi: int, task_priority: int) -> None:
+        """验证任务数值参数"""
+        if instance_count < 1:
+            raise ValidationError("Instance count must be at least 1")
+        if shm_gi < 1:
+            raise ValidationError("Shared memory size must be at least 1")
+        if task_priority < 1 or task_priority > 10:
+            raise ValidationError("Task priority must be between 1 and 10")
+    
+    @classmethod
+    def validate_job_payload(cls, payload: Dict[str, Any]) -> None:
+        """
+        按接口文档的 JobOpenapi 模型验证完整的创建任务负载 (类型、必填字段、取值范围)
+        
+        接口文档无法读取时记录一次警告，之后只检查必需参数和资源数值范围。
+        
+        Raises:
+            ValidationError: 验证失败时，消息中包含出错字段的路径 (如 envs[2].name)
+        """
+        if cls._spec_error is None:
+            try:
+                validate_job_payload(payload)
+                return
+            except PayloadError as e:
+                raise ValidationError(f"Invalid job payload: {e}")
+            except OSError as e:
+                cls._spec_error = str(e)
+                logger.warning("Cannot load the API document for payload validation (%s), "
+                               "falling back to basic checks", e)
+        
+        framework_config = (payload.get('framework_config') or [{}])[0]
+        cls._validate_required_params(
+            name=payload.get('name'),
+            logic_compute_group_id=payload.get('logic_compute_group_id'),
+            project_id=payload.get('project_id'),
+            workspace_id=payload.get('workspace_id'),
+            framework=payload.get('framework'),
+            command=payload.get('command'),
+            spec_id=framework_config.get('spec_id')
+        )
+        cls._validate_job_resources(framework_config.get('instance_count', 1), framework_config.get('shm_gi', 1),
+                                    payload.get('task_priority', 1))
+    
+    def _wait_before_retry(self, attempt: int, error: str) -> None:
+        """
+        重试前等待，stop_token 停止时立即放弃
+        
+        Raises:
+            InspireAPIError: 等待期间被停止时
+        """
+        if self.stop_token.wait(self.config.retry_delay * (attempt + 1)):
+            raise InspireAPIError(f"Request cancelled while waiting to retry: {error}")
+    
+    def _load_cached(self, key: Tuple[str, str], loader: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        通过读缓存获取结果，同一个键的并发请求只发送一次
+        
+        等待其他线程的请求时最多等待该请求的全部重试时间，stop_token 停止时立即放弃。
+        
+        Raises:
+            InspireAPIError: 请求失败、等待超时或被停止时
+        """
+        attempts = self.config.max_retries + 1
+        timeout = self.config.timeout * attempts + self.config.retry_delay * attempts * (attempts - 1) / 2
+        try:
+            return self.cache.get_or_load(key, loader, timeout=timeout, stop_token=self.stop_token)
+        except FutureTimeoutError:
+            raise InspireAPIError(f"Timed out after {timeout:.0f}s waiting for in-flight request {key}")
+        except CancelledError:
+            raise InspireAPIError(f"Request cancelled while waiting for in-flight request {key}")
+    
     def _make_request_with_retry(self, method: str, url: str, **kwargs) -> requests.Response:
         """
         带重试机制的请求方法
@@ -144,8 +290,8 @@ class InspireAPI:
                 else:
                     # 服务器错误，可能重试
                     if attempt < self.config.max_retries:
-                        logger.warning(f"Server error {response.status_code}, retrying in {self.config.retry_delay}s...")
-                        time.sleep(self.config.retry_delay * (attempt + 1))
+                        logger.warning("Server error %s, retrying in %ss...", response.status_code, self.config.retry_delay)
+                        self._wait_before_retry(attempt, f"server error {response.status_code}")
                         continue
                     else:
                         response.raise_for_status()
@@ -153,8 +299,8 @@ class InspireAPI:
             except requests.exceptions.Timeout as e:
                 last_exception = e
                 if attempt < self.config.max_retries:
-                    logger.warning(f"Request timeout, retrying in {self.config.retry_delay}s...")
-                    time.sleep(self.config.retry_delay * (attempt + 1))
+                    logger.warning("Request timeout, retrying in %ss...", self.config.retry_delay)
+                    self._wait_before_retry(attempt, str(e))
                     continue
                 else:
                     raise InspireAPIError(f"Request timeout after {self.config.max_retries} retries")
@@ -162,8 +308,8 @@ class InspireAPI:
             except requests.exceptions.ConnectionError as e:
                 last_exception = e
                 if attempt < self.config.max_retries:
-                    logger.warning(f"Connection error, retrying in {self.config.retry_delay}s...")
-                    time.sleep(self.config.retry_delay * (attempt + 1))
+                    logger.warning("Connection error, retrying in %ss...", self.config.retry_delay)
+                    self._wait_before_retry(attempt, str(e))
                     continue
                 else:
                     raise InspireAPIError(f"Connection error after {self.config.max_retries} retries: {str(e)}")
@@ -178,7 +324,8 @@ class InspireAPI:
         else:
             raise InspireAPIError("All retry attempts failed")
     
-    def _make_request(self, method: str, endpoint: str, payload: Optional[Dict] = None) -> Dict[str, Any]:
+    def _make_request(self, method: str, endpoint: str, payload: Optional[Dict] = None,
+                      body: Optional[bytes] = None) -> Dict[str, Any]:
         """
         发送HTTP请求的通用方法
         
@@ -186,6 +333,7 @@ class InspireAPI:
             method: HTTP方法
             endpoint: API端点
             payload: 请求负载
+            body: 已编码的JSON请求体 (提供时忽略payload)
             
         Returns:
             API响应数据
@@ -197,13 +345,15 @@ class InspireAPI:
         
         try:
             kwargs = {'headers': self.headers}
-            if payload is not None:
+            if body is not None:
+                kwargs['data'] = body
+            elif payload is not None:
                 kwargs['json'] = payload
             
             response = self._make_request_with_retry(method, url, **kwargs)
             
-            logger.debug(f"Request: {method} {url}")
-            logger.debug(f"Response status: {response.status_code}")
+            logger.debug("Request: %s %s", method, url)
+            logger.debug("Response status: %s", response.status_code)
             
             response.raise_for_status()
             result = response.json()
@@ -219,6 +369,45 @@ class InspireAPI:
             # 这里的异常应该已经被_make_request_with_retry处理了
             raise InspireAPIError(f"Request failed: {str(e)}")
     
+    def _stream_items(self, endpoint: str, payload: Dict[str, Any], path: Sequence[str],
+                      envelope: Optional[Dict[str, Any]] = None) -> Iterator[Any]:
+        """
+        发送请求并流式解析响应，逐个产出 path 指向的数组元素
+        
+        响应按 STREAM_CHUNK_SIZE 读取和解压，不会整体读入内存。
+        
+        Args:
+            endpoint: API端点
+            payload: 请求负载
+            path: 数组在响应中的键路径，如 ('data', 'nodes')
+            envelope: 接收数组以外字段的字典 (code、message 等)
+            
+        Yields:
+            数组元素
+            
+        Raises:
+            InspireAPIError: 请求失败、响应不是合法JSON或 code 不为0时 (在产出全部元素之后检查 code)
+        """
+        url = f"{self.base_url}{endpoint}"
+        envelope = envelope if envelope is not None else {}
+        response = self._make_request_with_retry('POST', url, headers=self.headers, json=payload, stream=True)
+        logger.debug("Streaming response: POST %s (%s, encoding: %s)", url, response.status_code,
+                     response.headers.get('Content-Encoding', 'identity'))
+        
+        with closing(response):
+            try:
+                response.raise_for_status()
+                yield from iter_json_array(response.iter_content(STREAM_CHUNK_SIZE), path, envelope)
+            except json.JSONDecodeError:
+                raise InspireAPIError("Invalid JSON response from API")
+            except requests.exceptions.RequestException as e:
+                raise InspireAPIError(f"Request failed: {str(e)}")
+        
+        if 'code' not in envelope:
+            raise InspireAPIError("Invalid API response format")
+        if envelope['code'] != 0:
+            raise InspireAPIError(f"API error: {envelope.get('message', 'Unknown error')}")
+    
     def authenticate(self, username: str, password: str) -> bool:
         """
         使用用户名和密码获取访问令牌
@@ -247,7 +436,13 @@ class InspireAPI:
             if result.get('code') == 0:
                 self.token = result['data']['access_token']
                 self.headers['Authorization'] = f"Bearer {self.token}"
+                # 缓存的结果属于之前的凭证
+                self.cache.invalidate()
                 expires_in = result['data'].get('expires_in', 'unknown')
+                try:
+                    self.token_expires_at = time.monotonic() + float(expires_in)
+                except (TypeError, ValueError):
+                    self.token_expires_at = None
                 logger.info(f"Authentication successful. Token expires in {expires_in} seconds.")
                 return True
             else:
@@ -285,7 +480,8 @@ class InspireAPI:
                            reserve_on_success_ms: str = "0",
                            tb_summary_path: str = "",
                            dataset_info: Optional[list] = None,
-                           envs: Optional[list] = None) -> Dict[str, Any]:
+                           envs: Optional[list] = None,
+                           tags: Optional[List[str]] = None) -> Dict[str, Any]:
         """
         创建分布式训练任务
         
@@ -311,6 +507,7 @@ class InspireAPI:
             tb_summary_path: TensorBoard摘要路径 (默认: "")
             dataset_info: 数据集信息列表 (默认: None)
             envs: 环境变量列表 (默认: None)
+            tags: 记录到本地任务登记表的标签，如 ['lr=3e-4'] (默认: None)
             
         Returns:
             API响应数据
@@ -322,27 +519,66 @@ class InspireAPI:
         """
         self._check_authentication()
         
-        # 验证必需参数
-        self._validate_required_params(
+        payload = self.build_job_payload(
             name=name,
             logic_compute_group_id=logic_compute_group_id,
             project_id=project_id,
             workspace_id=workspace_id,
             framework=framework,
             command=command,
-            spec_id=spec_id
+            spec_id=spec_id,
+            task_priority=task_priority,
+            auto_fault_tolerance=auto_fault_tolerance,
+            enable_notification=enable_notification,
+            enable_troubleshoot=enable_troubleshoot,
+            image=image,
+            image_type=image_type,
+            instance_count=instance_count,
+            shm_gi=shm_gi,
+            max_running_time_ms=max_running_time_ms,
+            reserve_on_fail_ms=reserve_on_fail_ms,
+            reserve_on_success_ms=reserve_on_success_ms,
+            tb_summary_path=tb_summary_path,
+            dataset_info=dataset_info,
+            envs=envs
         )
+        # 在本地拒绝格式错误的负载 (包括 dataset_info/envs 中的每一项)，不必等服务端返回错误
+        self.validate_job_payload(payload)
         
-        # 验证数值参数
-        if instance_count < 1:
-            raise ValidationError("Instance count must be at least 1")
-        if shm_gi < 1:
-            raise ValidationError("Shared memory size must be at least 1")
-        if task_priority < 1 or task_priority > 10:
-            raise ValidationError("Task priority must be between 1 and 10")
+        logger.debug("Creating training job with payload structure defined")
+        return self.submit_job_payload(payload, tags=tags)
+    
+    @staticmethod
+    def build_job_payload(name: str,
+                          logic_compute_group_id: str,
+                          project_id: str,
+                          workspace_id: str,
+                          framework: str,
+                          command: str,
+                          spec_id: str,
+                          task_priority: int = DEFAULT_TASK_PRIORITY,
+                          auto_fault_tolerance: bool = False,
+                          enable_notification: bool = False,
+                          enable_troubleshoot: bool = False,
+                          image: str = "",
+                          image_type: str = DEFAULT_IMAGE_TYPE,
+                          instance_count: int = DEFAULT_INSTANCE_COUNT,
+                          shm_gi: int = DEFAULT_SHM_SIZE,
+                          max_running_time_ms: str = DEFAULT_MAX_RUNNING_TIME,
+                          reserve_on_fail_ms: str = "0",
+                          reserve_on_success_ms: str = "0",
+                          tb_summary_path: str = "",
+                          dataset_info: Optional[list] = None,
+                          envs: Optional[list] = None) -> Dict[str, Any]:
+        """
+        构建创建训练任务的请求负载 (不做验证)
         
-        # 构建请求负载
-        payload = {
+        参数含义同 create_training_job。
+        
+        Returns:
+            请求负载
+        """
+        return {
             "name": name,
             "logic_compute_group_id": logic_compute_group_id,
             "project_id": project_id,
@@ -367,14 +603,41 @@ class InspireAPI:
             "dataset_info": dataset_info or [],
             "envs": envs or []
         }
+    
+    def submit_job_payload(self, payload: Dict[str, Any], body: Optional[bytes] = None,
+                           tags: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        提交已构建好的训练任务负载
         
-        logger.debug("Creating training job with payload structure defined")
+        设置了 registry 时，提交成功后把任务和标签记录到本地登记表；写入失败只记录警告。
+        
+        Args:
+            payload: 请求负载 (调用方负责验证，例如 JobTemplate.render 的结果或经过 validate_job_payload 的负载)
+            body: 已编码的请求体，提供时直接发送，省去重复编码
+            tags: 记录到本地任务登记表的标签
+            
+        Returns:
+            API响应数据
+            
+        Raises:
+            ValidationError: 标签为空字符串时
+            JobCreationError: 任务创建失败时
+            AuthenticationError: 未认证时
+        """
+        self._check_authentication()
+        if tags and any(not tag.strip() for tag in tags):
+            raise ValidationError("Job tags cannot be empty")
+        name = payload.get('name', '')
         
         try:
-            result = self._make_request('POST', APIEndpoints.TRAIN_JOB_CREATE, payload)
+            result = self._make_request('POST', APIEndpoints.TRAIN_JOB_CREATE, payload, body=body)
             
             if result.get('code') == 0:
                 logger.info(f"Training job '{name}' created successfully.")
+                job_id = (result.get('data') or {}).get('job_id')
+                if job_id:
+                    self.cache.invalidate(('detail', job_id))
+                    self._record_job(job_id, payload, tags)
                 return result
             else:
                 error_msg = result.get('message', 'Unknown error')
@@ -385,10 +648,22 @@ class InspireAPI:
                 raise
             raise JobCreationError(f"Training job creation request failed: {str(e)}")
     
+    def _record_job(self, job_id: str, payload: Dict[str, Any], tags: Optional[List[str]]) -> None:
+        """把已创建的任务写入本地登记表 (任务已经创建，写入失败不影响返回结果)"""
+        if self.registry is None:
+            return
+        try:
+            self.registry.record(job_id, payload, tags or ())
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning(f"Failed to record job {job_id} in the local registry: {str(e)}")
+    
     def get_job_detail(self, job_id: str) -> Dict[str, Any]:
         """
         获取训练任务详情
         
+        同一任务同时进行的请求合并为一次，结果缓存 config.cache_ttl 秒 (见 read_cache)，
+        返回的字典由多个调用方共享，不要修改。
+        
         Args:
             job_id: 任务ID
             
@@ -402,13 +677,16 @@ class InspireAPI:
         """
         self._check_authentication()
         self._validate_required_params(job_id=job_id)
-        
+        return self._load_cached(('detail', job_id), lambda: self._fetch_job_detail(job_id))
+    
+    def _fetch_job_detail(self, job_id: str) -> Dict[str, Any]:
+        """不经过缓存请求任务详情"""
         payload = {"job_id": job_id}
         
         result = self._make_request('POST', APIEndpoints.TRAIN_JOB_DETAIL, payload)
         
         if result.get('code') == 0:
-            logger.info(f"Retrieved details for job {job_id}")
+            logger.info("Retrieved details for job %s", job_id, extra={'job_id': job_id})
             return result
         else:
             error_msg = result.get('message', 'Unknown error')
@@ -434,7 +712,11 @@ class InspireAPI:
         
         payload = {"job_id": job_id}
         
-        result = self._make_request('POST', APIEndpoints.TRAIN_JOB_STOP, payload)
+        try:
+            result = self._make_request('POST', APIEndpoints.TRAIN_JOB_STOP, payload)
+        finally:
+            # 请求失败时任务状态也可能已经改变
+            self.cache.invalidate(('detail', job_id))
         
         if result.get('code') == 0:
             logger.info(f"Training job {job_id} stopped successfully.")
@@ -443,10 +725,108 @@ class InspireAPI:
             error_msg = result.get('message', 'Unknown error')
             raise InspireAPIError(f"Failed to stop training job: {error_msg}")
     
+    def _run_batch(self, func: Callable[[str], Any], job_ids: List[str],
+                   max_workers: Optional[int] = None) -> BatchResult:
+        """
+        在并发上限内对一组任务执行同一操作
+        
+        单个请求的瞬时失败(超时、连接错误、5xx)由 _make_request_with_retry
+        按统一的重试策略处理，这里只汇总最终结果。
+        
+        Args:
+            func: 针对单个job_id的操作
+            job_ids: 任务ID列表
+            max_workers: 并发上限 (默认: config.max_workers)
+            
+        Returns:
+            批量操作结果
+        """
+        self._check_authentication()
+        result = BatchResult()
+        unique_ids = list(dict.fromkeys(job_ids))
+        if not unique_ids:
+            return result
+        
+        workers = min(max_workers or self.config.max_workers, len(unique_ids))
+        start_time = time.monotonic()
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(func, job_id): job_id for job_id in unique_ids}
+            for future in as_completed(futures):
+                job_id = futures[future]
+                try:
+                    result.succeeded[job_id] = future.result()
+                except InspireAPIError as e:
+                    result.failed[job_id] = str(e)
+        
+        result.elapsed = time.monotonic() - start_time
+        return result
+    
+    def get_job_details(self, job_ids: List[str], max_workers: Optional[int] = None) -> BatchResult:
+        """
+        并发获取一组训练任务的详情
+        
+        Args:
+            job_ids: 任务ID列表
+            max_workers: 并发上限 (默认: config.max_workers)
+            
+        Returns:
+            批量结果，succeeded 中为 job_id -> 任务详情数据
+        """
+        return self._run_batch(self.get_job_detail, job_ids, max_workers)
+    
+    def stop_training_jobs(self, job_ids: List[str], max_workers: Optional[int] = None) -> BatchResult:
+        """
+        并发停止一组训练任务
+        
+        Args:
+            job_ids: 任务ID列表
+            max_workers: 并发上限 (默认: config.max_workers)
+            
+        Returns:
+            批量结果，succeeded 中为已成功发送停止请求的任务
+        """
+        batch = self._run_batch(self.stop_training_job, job_ids, max_workers)
+        logger.info(f"Stop requests finished: {len(batch.succeeded)} succeeded, "
+                    f"{len(batch.failed)} failed in {batch.elapsed:.2f}s")
+        return batch
+    
+    def tail_job_logs(self, job_id: str, backend: LogBackend, follow: bool = False,
+                      poll_interval: float = 5.0,
+                      instances: Optional[List[str]] = None) -> Iterator[LogLine]:
+        """
+        增量读取训练任务日志
+        
+        Args:
+            job_id: 任务ID
+            backend: 日志后端 (OpenAPI暂无日志接口，见 log_stream)
+            follow: 是否持续跟踪直到任务结束
+            poll_interval: 跟踪时的轮询间隔(秒)
+            instances: 要读取的实例 (默认: 全部实例)
+            
+        Yields:
+            多实例合并后按时间排序的日志行
+        """
+        self._check_authentication()
+        self._validate_required_params(job_id=job_id)
+        
+        tailer = LogTailer(backend, job_id, instances=instances)
+        if not follow:
+            yield from tailer.read_all()
+            return
+        
+        def job_finished() -> bool:
+            status = self.get_job_detail(job_id).get('data', {}).get('status')
+            return status in ('SUCCEEDED', 'FAILED', 'CANCELLED')
+        
+        yield from tailer.follow(poll_interval, should_stop=job_finished, stop_token=self.stop_token)
+    
     def list_available_specs(self, logic_compute_group_id: str) -> Dict[str, Any]:
         """
         获取可用的规格列表
         
+        与 get_job_detail 一样合并同时进行的请求并短时缓存结果。
+        
         Args:
             logic_compute_group_id: 计算资源组ID
             
@@ -460,7 +840,11 @@ class InspireAPI:
         """
         self._check_authentication()
         self._validate_required_params(logic_compute_group_id=logic_compute_group_id)
-        
+        return self._load_cached(('specs', logic_compute_group_id),
+                                 lambda: self._fetch_specs(logic_compute_group_id))
+    
+    def _fetch_specs(self, logic_compute_group_id: str) -> Dict[str, Any]:
+        """不经过缓存请求规格列表"""
         payload = {"logic_compute_group_id": logic_compute_group_id}
         
         result = self._make_request('POST', APIEndpoints.SPECS_LIST, payload)
@@ -493,7 +877,56 @@ class InspireAPI:
             AuthenticationError: 未认证时
         """
         self._check_authentication()
+        payload = self._cluster_nodes_payload(page_num, page_size, resource_pool)
+        
+        result = self._make_request('POST', APIEndpoints.CLUSTER_NODES_LIST, payload)
+        
+        if result.get('code') == 0:
+            node_count = len(result['data'].get('nodes', []))
+            logger.info(f"Retrieved {node_count} nodes successfully.")
+            return result
+        else:
+            error_msg = result.get('message', 'Unknown error')
+            raise InspireAPIError(f"Failed to get node list: {error_msg}")
+    
+    def list_cluster_nodes_raw(self, page_num: int = 1, page_size: int = 10,
+                               resource_pool: Optional[str] = None) -> bytes:
+        """
+        获取一页集群节点列表的原始响应体 (已解压，未解析)
+        
+        供按内容摘要判断页面是否变化的调用方使用 (如 node_watcher)，内容没变时可以跳过解析。
+        
+        Args:
+            page_num: 页码 (默认: 1)
+            page_size: 每页数量 (默认: 10)
+            resource_pool: 资源池过滤 (online, backup, fault, unknown)
+            
+        Returns:
+            UTF-8 JSON 响应体
+            
+        Raises:
+            ValidationError: 参数验证失败时
+            InspireAPIError: 请求失败时
+            AuthenticationError: 未认证时
+        """
+        self._check_authentication()
+        payload = self._cluster_nodes_payload(page_num, page_size, resource_pool)
+        url = f"{self.base_url}{APIEndpoints.CLUSTER_NODES_LIST}"
+        response = self._make_request_with_retry('POST', url, headers=self.headers, json=payload)
+        try:
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            raise InspireAPIError(f"Request failed: {str(e)}")
+        return response.content
+    
+    @staticmethod
+    def _cluster_nodes_payload(page_num: int, page_size: int, resource_pool: Optional[str]) -> Dict[str, Any]:
+        """
+        验证分页参数并构造节点列表请求负载
         
+        Raises:
+            ValidationError: 参数验证失败时
+        """
         if page_num < 1:
             raise ValidationError("Page number must be at least 1")
         if page_size < 1 or page_size > 100:
@@ -510,16 +943,51 @@ class InspireAPI:
         
         if resource_pool:
             payload["filter"] = {"resource_pool": resource_pool}
+        return payload
+    
+    def iter_cluster_nodes(self, resource_pool: Optional[str] = None,
+                           page_size: int = 100) -> Iterator[Dict[str, Any]]:
+        """
+        逐页获取全部集群节点，边下载边解析，逐个产出节点
         
-        result = self._make_request('POST', APIEndpoints.CLUSTER_NODES_LIST, payload)
+        与 list_cluster_nodes 不同，每页响应都流式解析，内存占用与节点总数无关；
+        适合遍历整个集群做统计或过滤。
         
-        if result.get('code') == 0:
-            node_count = len(result['data'].get('nodes', []))
-            logger.info(f"Retrieved {node_count} nodes successfully.")
-            return result
-        else:
-            error_msg = result.get('message', 'Unknown error')
-            raise InspireAPIError(f"Failed to get node list: {error_msg}")
+        Args:
+            resource_pool: 资源池过滤 (online, backup, fault, unknown)
+            page_size: 每页数量 (默认: 100)
+            
+        Yields:
+            节点数据字典
+            
+        Raises:
+            ValidationError: 参数验证失败时
+            InspireAPIError: 请求失败时
+            AuthenticationError: 未认证时
+        """
+        self._check_authentication()
+        self._cluster_nodes_payload(1, page_size, resource_pool)
+        
+        page_num = 1
+        seen = 0
+        while True:
+            payload = self._cluster_nodes_payload(page_num, page_size, resource_pool)
+            envelope: Dict[str, Any] = {}
+            count = 0
+            try:
+                for node in self._stream_items(APIEndpoints.CLUSTER_NODES_LIST, payload, ('data', 'nodes'), envelope):
+                    count += 1
+                    yield node
+            except InspireAPIError as e:
+                raise InspireAPIError(f"Failed to get node list (page {page_num}): {str(e)}")
+            
+            seen += count
+            total = envelope.get('data', {}).get('total')
+            if count < page_size or (isinstance(total, int) and seen >= total):
+                break
+            page_num += 1
+        
+        logger.info(f"Retrieved {seen} nodes in {page_num} pages.")
 
 
 def get_credentials() -> tuple[str, str]:
@@ -550,6 +1018,134 @@ def get_credentials() -> tuple[str, str]:
     return username, password
 
 
+def load_job_ids(path: str) -> List[str]:
+    """
+    从文件读取任务ID列表
+    
+    支持每行一个job_id的文本文件(忽略空行和#注释)，
+    以及job_id字符串或含job_id字段的对象组成的JSON数组。
+    
+    Args:
+        path: 文件路径
+        
+    Returns:
+        任务ID列表
+        
+    Raises:
+        ValidationError: 文件无法读取或格式错误时
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except OSError as e:
+        raise ValidationError(f"Cannot read job file '{path}': {str(e)}")
+    
+    if content.lstrip().startswith('['):
+        try:
+            entries = json.loads(content)
+        except json.JSONDecodeError as e:
+            raise ValidationError(f"Invalid JSON in job file '{path}': {str(e)}")
+        job_ids = [entry.get('job_id', '') if isinstance(entry, dict) else str(entry)
+                   for entry in entries]
+    else:
+        job_ids = [line.split('#', 1)[0].strip() for line in content.splitlines()]
+    
+    return [job_id for job_id in job_ids if job_id]
+
+
+def resolve_jobs_by_name_prefix(api: InspireAPI, job_ids: List[str], name_prefix: str,
+                                max_workers: Optional[int] = None) -> List[str]:
+    """
+    按任务名前缀筛选候选任务
+    
+    OpenAPI 没有任务列表接口，因此只能在给定的候选任务中并发查询详情后匹配名称。
+    
+    Args:
+        api: 已认证的API客户端
+        job_ids: 候选任务ID列表
+        name_prefix: 任务名前缀
+        max_workers: 并发上限
+        
+    Returns:
+        名称匹配的任务ID列表
+    """
+    details = api.get_job_details(job_ids, max_workers)
+    for job_id, error in details.failed.items():
+        logger.warning(f"Failed to look up job {job_id}: {error}")
+    
+    # 按输入顺序返回；详情中的 name 可能为 null
+    return [job_id for job_id in job_ids if job_id in details.succeeded
+            and ((details.succeeded[job_id].get('data') or {}).get('name') or '').startswith(name_prefix)]
+
+
+def collect_usage(api: InspireAPI, job_ids: List[str], ledger: UsageLedger,
+                  specs: Optional[Dict[str, Any]] = None, max_workers: Optional[int] = None) -> int:
+    """
+    批量查询任务详情并把累计运行时长计入用量账本
+    
+    首次出现的任务按详情中的规格信息登记，之后只累加增量。
+    
+    Args:
+        api: 已认证的API客户端
+        job_ids: 任务ID列表
+        ledger: 用量账本
+        specs: parse_specs 解析出的规格
+        max_workers: 并发上限
+        
+    Returns:
+        查询失败的任务数
+    """
+    details = api.get_job_details(job_ids, max_workers)
+    for job_id, error in details.failed.items():
+        logger.warning(f"Failed to look up job {job_id}: {error}")
+    
+    for job_id, detail in details.succeeded.items():
+        data = detail.get('data', {})
+        if job_id not in ledger.jobs:
+            meta = job_meta_from_detail(data, specs)
+            meta.job_id = job_id
+            ledger.register(meta)
+        ledger.observe(job_id, data.get('running_time_ms'), data.get('status', ''))
+    return len(details.failed)
+
+
+def open_registry(path: Optional[str]) -> Optional[JobRegistry]:
+    """
+    打开本地任务登记表，失败时只记录警告 (命令仍然可以使用任务ID)
+    
+    Args:
+        path: 登记表路径 (默认: job_registry.default_registry_path())
+        
+    Returns:
+        登记表，无法打开时返回None
+    """
+    try:
+        return JobRegistry(path)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning(f"Local job registry unavailable: {str(e)}")
+        return None
+
+
+def format_job_record(record: JobRecord) -> str:
+    """
+    把登记表记录格式化为一行: 提交时间、任务ID、名称和标签
+    """
+    created = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(record.created_at))
+    tags = f"  [{', '.join(record.tags)}]" if record.tags else ''
+    return f"{created}  {record.job_id}  {record.name}{tags}"
+
+
+def print_result(result: Dict[str, Any], compact: bool = False) -> None:
+    """
+    打印API响应
+    
+    Args:
+        result: API响应数据
+        compact: 是否输出单行紧凑JSON
+    """
+    print(dumps_json(result, pretty=not compact).decode('utf-8'))
+
+
 def main():
     """
     主函数，提供命令行接口
@@ -561,8 +1157,23 @@ def main():
     
     # 全局选项
     parser.add_argument('--debug', action='store_true', help='启用调试模式')
+    parser.add_argument('--log-format', choices=['text', 'json'], default='text',
+                       help='日志格式，json为每行一条JSON (默认: text)')
     parser.add_argument('--base-url', type=str, default="https://qz.sii.edu.cn", 
                        help='API基础URL (默认: https://qz.sii.edu.cn)')
+    parser.add_argument('--http2', action='store_true',
+                       help='使用 HTTP/2 复用连接 (需要 pip install "httpx[http2]"，不可用时退回 HTTP/1.1)')
+    parser.add_argument('--record', type=str, metavar='FILE',
+                       help='录制HTTP请求和响应到文件 (.gz结尾时压缩)')
+    parser.add_argument('--replay', type=str, metavar='FILE',
+                       help='从录制文件回放HTTP响应，不访问平台')
+    parser.add_argument('--replay-speed', type=float, default=0.0,
+                       help='回放延迟倍率，0为全速，1为按录制延迟 (默认: 0)')
+    parser.add_argument('--compact', action='store_true', help='以单行紧凑JSON输出结果')
+    parser.add_argument('--registry', type=str, metavar='FILE',
+                       help='本地任务登记表 (默认: 环境变量 INSPIRE_REGISTRY 或 ~/.inspire/jobs.db)')
+    parser.add_argument('--no-registry', action='store_true', help='不记录提交的任务，也不解析任务选择器')
+    add_profile_arguments(parser)
     
     subparsers = parser.add_subparsers(dest='command', help='可用命令')
     
@@ -594,14 +1205,50 @@ def main():
     create_parser.add_argument('--auto-fault-tolerance', action='store_true', help='开启自动容错')
     create_parser.add_argument('--enable-notification', action='store_true', help='启用通知')
     create_parser.add_argument('--enable-troubleshoot', action='store_true', help='启用故障排除')
+    create_parser.add_argument('--tag', action='append',
+                              help='记录到本地任务登记表的标签，可重复 (如 --tag lr=3e-4 --tag baseline)')
     
     # 查询任务详情
     detail_parser = subparsers.add_parser('detail', help='查询训练任务详情')
-    detail_parser.add_argument('--job-id', required=True, type=str, help='任务ID')
+    detail_parser.add_argument('--job-id', required=True, type=str,
+                              help='任务ID或选择器 (如 name:sweep-,tag:lr=3e-4，在本地登记表中解析)')
     
     # 停止训练任务
     stop_parser = subparsers.add_parser('stop', help='停止训练任务')
-    stop_parser.add_argument('--job-id', required=True, type=str, help='任务ID')
+    stop_target = stop_parser.add_mutually_exclusive_group(required=True)
+    stop_target.add_argument('--job-id', type=str, help='任务ID或选择器 (如 tag:lr=3e-4)')
+    stop_target.add_argument('--job-file', type=str, help='任务ID列表文件 (每行一个job_id或JSON数组)')
+    stop_parser.add_argument('--name-prefix', type=str,
+                            help='只停止名称以该前缀开头的任务 (在 --job-id/--job-file 指定的任务中匹配)')
+    stop_parser.add_argument('--max-workers', type=int, default=16,
+                            help='批量停止的并发上限 (默认: 16)')
+    
+    # GPU时长与费用统计
+    usage_parser = subparsers.add_parser('usage', help='统计任务的GPU时长和费用')
+    usage_target = usage_parser.add_mutually_exclusive_group(required=True)
+    usage_target.add_argument('--job-id', type=str, help='任务ID或选择器 (如 name:sweep-)')
+    usage_target.add_argument('--job-file', type=str, help='任务ID列表文件 (每行一个job_id或JSON数组)')
+    usage_parser.add_argument('--compute-group-id', type=str,
+                             help='从该计算资源组的规格列表补全详情中缺少的GPU数量和价格')
+    usage_parser.add_argument('--prefix', action='append',
+                             help='按名称前缀汇总，可重复 (默认: 名称最后一个"-"之前的部分)')
+    usage_parser.add_argument('--budget', type=float, metavar='GPU_HOURS',
+                             help='GPU时长预算，超出时告警 (加 --enforce 时停止任务)')
+    usage_parser.add_argument('--budget-scope', choices=SCOPES, default='total',
+                             help='预算范围: 全部任务、每个项目、每个名称前缀或每个任务 (默认: total)')
+    usage_parser.add_argument('--enforce', action='store_true', help='超出预算时停止范围内仍在运行的任务')
+    usage_parser.add_argument('--watch', action='store_true', help='持续统计直到所有任务结束')
+    usage_parser.add_argument('--interval', type=int, default=60, help='--watch 的轮询间隔(秒) (默认: 60)')
+    usage_parser.add_argument('--max-workers', type=int, default=16, help='查询详情的并发上限 (默认: 16)')
+    
+    # 本地任务登记表
+    jobs_parser = subparsers.add_parser('jobs', help='查询本地登记的已提交任务 (不访问平台)')
+    jobs_parser.add_argument('--select', type=str,
+                            help='选择器，逗号分隔的条件同时满足: name:<名称前缀>、tag:<标签>、任务ID (默认: 全部)')
+    jobs_parser.add_argument('--limit', type=int, help='只显示最近提交的N个任务')
+    jobs_parser.add_argument('--add-tag', action='append', help='给选中的任务添加标签，可重复')
+    jobs_parser.add_argument('--remove-tag', action='append', help='删除选中任务的标签，可重复')
+    jobs_parser.add_argument('--json', action='store_true', help='每行输出一条JSON记录 (包含负载)')
     
     # 列出可用规格
     specs_parser = subparsers.add_parser('list-specs', help='列出可用的计算规格')
@@ -615,21 +1262,70 @@ def main():
     list_parser.add_argument('--size', type=int, default=10, help='每页数量 (默认: 10)')
     list_parser.add_argument('--pool', type=str, choices=['online', 'backup', 'fault', 'unknown'], 
                             help='资源池过滤')
+    list_parser.add_argument('--all', action='store_true',
+                            help='逐页流式获取全部节点，每行输出一个节点JSON (忽略 --page)')
     
     args = parser.parse_args()
     
-    # 设置日志级别
+    # 配置日志
+    configure_logging(
+        level=logging.DEBUG if args.debug else logging.INFO,
+        log_format=args.log_format
+    )
     if args.debug:
-        logging.getLogger().setLevel(logging.DEBUG)
         logger.debug("Debug mode enabled")
     
+    if args.record and args.replay:
+        parser.error("--record and --replay cannot be used together")
+    
+    if args.command == 'jobs':
+        # 只读写本地登记表，不需要凭证
+        if args.no_registry:
+            parser.error("jobs cannot be used with --no-registry")
+        try:
+            with JobRegistry(args.registry) as registry:
+                if args.select:
+                    records = registry.select(args.select)
+                    if args.limit is not None:
+                        records = records[-args.limit:] if args.limit > 0 else []
+                else:
+                    records = registry.find(limit=args.limit)
+                job_ids = [record.job_id for record in records]
+                if args.add_tag:
+                    registry.add_tags(job_ids, args.add_tag)
+                if args.remove_tag:
+                    registry.remove_tags(job_ids, args.remove_tag)
+                if args.add_tag or args.remove_tag:
+                    records = registry.find(job_ids=job_ids) if job_ids else []
+        except (sqlite3.Error, OSError, ValueError) as e:
+            logger.error(f"Error: {str(e)}")
+            return 1
+        for record in records:
+            if args.json:
+                print(dumps_json(record.to_dict(include_payload=True)).decode('utf-8'))
+            else:
+                print(format_job_record(record))
+        return 0
+    
+    cassette = None
+    registry = None
     try:
-        # 从环境变量获取凭证
-        username, password = get_credentials()
+        # 从环境变量获取凭证 (回放模式不需要真实凭证)
+        if args.replay:
+            username = os.getenv('INSPIRE_USERNAME', 'replay')
+            password = os.getenv('INSPIRE_PASSWORD', 'replay')
+        else:
+            username, password = get_credentials()
         
         # 创建API客户端
-        config = InspireConfig(base_url=args.base_url)
-        api = InspireAPI(config)
+        config = InspireConfig(base_url=args.base_url, http2=args.http2)
+        if args.command in ('stop', 'usage'):
+            config.max_workers = max(1, args.max_workers)
+        if not args.no_registry and (args.command == 'create' or is_selector(getattr(args, 'job_id', None) or '-')):
+            registry = open_registry(args.registry)
+        # 回放时创建的任务不是真实任务，不写入登记表
+        api = InspireAPI(config, registry=None if args.replay else registry)
+        cassette = install_cassette(api, args.record, args.replay, args.replay_speed)
         
         # 认证
         logger.info("Authenticating with Inspire API...")
@@ -652,25 +1348,120 @@ def main():
                 image=args.image,
                 instance_count=args.instances,
                 shm_gi=args.shm_size,
-                max_running_time_ms=args.max_time
+                max_running_time_ms=args.max_time,
+                tags=args.tag
             )
             
             print("创建结果:")
-            print(json.dumps(result, indent=2, ensure_ascii=False))
+            print_result(result, args.compact)
         
         elif args.command == 'detail':
-            result = api.get_job_detail(args.job_id)
-            print("任务详情:")
-            print(json.dumps(result, indent=2, ensure_ascii=False))
+            job_ids = resolve_job_ids(args.job_id, registry)
+            if not job_ids:
+                print("没有匹配的任务")
+                return 1
+            if len(job_ids) == 1:
+                result = api.get_job_detail(job_ids[0])
+                print("任务详情:")
+                print_result(result, args.compact)
+                return 0
+            
+            details = api.get_job_details(job_ids)
+            for job_id in job_ids:
+                if job_id in details.succeeded:
+                    print_result(details.succeeded[job_id], compact=True)
+                else:
+                    logger.error(f"Failed to get job {job_id}: {details.failed.get(job_id)}")
+            return 0 if not details.failed else 1
         
         elif args.command == 'stop':
-            api.stop_training_job(args.job_id)
-            print("任务已停止")
+            start_time = time.monotonic()
+            job_ids = resolve_job_ids(args.job_id, registry) if args.job_id else load_job_ids(args.job_file)
+            # 只有一个任务ID时直接停止；逗号分隔的多个ID、选择器和名称前缀走批量路径
+            if args.job_id and not is_selector(args.job_id) and not args.name_prefix and len(job_ids) == 1:
+                api.stop_training_job(job_ids[0])
+                print("任务已停止")
+                return 0
+            
+            if args.name_prefix:
+                job_ids = resolve_jobs_by_name_prefix(api, job_ids, args.name_prefix)
+            
+            if not job_ids:
+                print("没有匹配的任务")
+                return 0
+            
+            logger.info(f"Stopping {len(job_ids)} jobs with concurrency {config.max_workers}...")
+            stopped = api.stop_training_jobs(job_ids)
+            for job_id, error in stopped.failed.items():
+                logger.error(f"Failed to stop job {job_id}: {error}")
+            
+            # 一次批量状态查询确认最终状态
+            sweep = api.get_job_details(list(stopped.succeeded))
+            not_cancelled = {
+                job_id: detail.get('data', {}).get('status', 'UNKNOWN')
+                for job_id, detail in sweep.succeeded.items()
+                if detail.get('data', {}).get('status') != 'CANCELLED'
+            }
+            cancelled_count = len(sweep.succeeded) - len(not_cancelled)
+            for job_id, status in not_cancelled.items():
+                logger.warning(f"Job {job_id} is {status}, not CANCELLED yet")
+            
+            print(f"停止请求: 成功 {len(stopped.succeeded)}, 失败 {len(stopped.failed)} "
+                  f"(耗时 {stopped.elapsed:.2f}s)")
+            print(f"确认已取消: {cancelled_count}/{len(stopped.succeeded)} "
+                  f"(未确认 {len(not_cancelled) + len(sweep.failed)})")
+            print(f"总耗时: {time.monotonic() - start_time:.2f}s")
+            return 0 if not stopped.failed else 1
+        
+        elif args.command == 'usage':
+            job_ids = resolve_job_ids(args.job_id, registry) if args.job_id else load_job_ids(args.job_file)
+            if not job_ids:
+                print("没有匹配的任务")
+                return 1
+            specs = None
+            if args.compute_group_id:
+                try:
+                    specs = parse_specs(api.list_available_specs(args.compute_group_id))
+                except InspireAPIError as e:
+                    logger.warning(f"Failed to load specs, using job details only: {str(e)}")
+            
+            ledger = UsageLedger(prefixes=args.prefix)
+            guard = None
+            if args.budget is not None:
+                guard = BudgetGuard(ledger, args.budget, scope=args.budget_scope,
+                                    stop_jobs=api.stop_training_jobs, enforce=args.enforce)
+            
+            if args.watch:
+                install_signal_handlers(api.stop_token)
+            while True:
+                failed = collect_usage(api, job_ids, ledger, specs)
+                if guard is not None:
+                    over = guard.check()
+                    if over and not args.enforce:
+                        print(f"超出预算: {len(over)} 个任务仍在运行 (加 --enforce 停止)")
+                    elif over:
+                        print(f"超出预算: 已请求停止 {len(over)} 个任务")
+                
+                running = [job_id for job_id, state in ledger.jobs.items()
+                           if state.status not in ('SUCCEEDED', 'FAILED', 'CANCELLED')]
+                if not args.watch or not running:
+                    break
+                logger.info(f"{len(running)} jobs still running, next update in {args.interval}s")
+                if api.stop_token.wait(args.interval):
+                    break
+            
+            print(format_usage_report(ledger))
+            return 0 if not failed else 1
         
         elif args.command == 'list-specs':
             result = api.list_available_specs(args.compute_group_id)
             print("可用规格:")
-            print(json.dumps(result, indent=2, ensure_ascii=False))
+            print_result(result, args.compact)
+        
+        elif args.command == 'list-nodes' and args.all:
+            # 每行一个节点 (JSONL)，边下载边输出
+            for node in api.iter_cluster_nodes(resource_pool=args.pool, page_size=args.size):
+                print(dumps_json(node).decode('utf-8'))
         
         elif args.command == 'list-nodes':
             result = api.list_cluster_nodes(
@@ -679,7 +1470,7 @@ def main():
                 resource_pool=args.pool
             )
             print("节点列表:")
-            print(json.dumps(result, indent=2, ensure_ascii=False))
+            print_result(result, args.compact)
         
         else:
             parser.print_help()
@@ -687,7 +1478,7 @@ def main():
         
         return 0
         
-    except (ValidationError, AuthenticationError, JobCreationError, InspireAPIError) as e:
+    except (ValidationError, AuthenticationError, JobCreationError, InspireAPIError, ValueError) as e:
         logger.error(f"Error: {str(e)}")
         return 1
     except KeyboardInterrupt:
@@ -699,7 +1490,12 @@ def main():
             import traceback
             traceback.print_exc()
         return 1
+    finally:
+        if cassette is not None:
+            cassette.close()
+        if registry is not None:
+            registry.close()
 
 
 if __name__ == "__main__":
-    exit(main())
+    exit(run_with_profiling(main))
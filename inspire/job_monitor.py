@@ -22,19 +22,30 @@ import logging
 import requests
 import argparse
 import time
-import signal
 import sys
+import hashlib
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, List
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field, fields, replace
 from enum import Enum
 
+from dashboard import SORT_KEYS, Dashboard, run_dashboard
+from event_hooks import HookRegistry, ResubmitHook, ShellHook, TransitionEvent, WriteFileHook
+from failure_triage import FailureTriage, TriageSummary, iter_records, load_rules
+from http2_transport import ACCEPT_ENCODING, create_session
+from http_cassette import install_cassette
+from job_registry import JobRegistry, is_selector, resolve_job_ids
+from log_config import configure_logging
+from metrics_exporter import FleetMetrics, MetricsServer
+from log_stream import LogBackend, LogTailer, MockLogBackend, FileLogBackend, format_log_line
+from monitor_checkpoint import JobCheckpoint, MonitorCheckpoint
+from monitor_plugin import MonitorPlugin
+from profiling import add_profile_arguments, run_with_profiling
+from progress_metrics import TrainingProgressPlugin
+from serializers import FORMATS, format_for_path, write_snapshot, write_snapshots
+from stop_token import StopToken, install_signal_handlers
+
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 
@@ -62,6 +73,46 @@ class StatusSnapshot:
     timeline: Optional[Dict] = None
     node_count: int = 0
     priority: int = 0
+    step: Optional[int] = None  # 以下由训练进度插件填充
+    loss: Optional[float] = None
+    throughput: Optional[float] = None
+
+
+@dataclass
+class DeltaState:
+    """增量状态获取的单任务状态与统计"""
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    body_hash: Optional[bytes] = None
+    body_size: int = 0
+    snapshot: Optional[StatusSnapshot] = field(default=None, repr=False)
+    polls: int = 0
+    not_modified: int = 0  # 服务端返回304的次数
+    unchanged: int = 0  # 响应内容哈希未变化的次数
+    bytes_received: int = 0
+    bytes_saved: int = 0  # 304 省去的下载字节数
+    parse_count: int = 0
+    parse_seconds: float = 0.0
+    
+    @property
+    def parse_seconds_saved(self) -> float:
+        """按平均解析耗时估算跳过解析节省的时间"""
+        if not self.parse_count:
+            return 0.0
+        return (self.not_modified + self.unchanged) * self.parse_seconds / self.parse_count
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """统计信息"""
+        return {
+            'polls': self.polls,
+            'not_modified': self.not_modified,
+            'unchanged': self.unchanged,
+            'bytes_received': self.bytes_received,
+            'bytes_saved': self.bytes_saved,
+            'parse_count': self.parse_count,
+            'parse_seconds': round(self.parse_seconds, 6),
+            'parse_seconds_saved': round(self.parse_seconds_saved, 6)
+        }
 
 
 @dataclass
@@ -73,8 +124,17 @@ class MonitorConfig:
     max_retries: int = 3
     retry_delay: float = 1.0
     export_file: Optional[str] = None
+    export_format: Optional[str] = None  # 导出格式，默认按扩展名推断 (见 serializers.FORMATS)
     enable_notifications: bool = False
     github_config: Optional[Dict[str, str]] = None  # GitHub配置
+    progress_display: bool = True  # 是否在终端显示单行进度
+    progress_interval: float = 1.0  # 进度行最短刷新间隔(秒)
+    summary_display: bool = True  # 状态变化时是否打印摘要块
+    delta_mode: bool = False  # 条件请求/响应哈希，内容未变化时跳过解析
+    checkpoint_file: Optional[str] = None  # 断点文件，状态变化时写入
+    resume: bool = False  # 是否从断点文件恢复
+    http2: bool = False  # 使用 HTTP/2 (需要 httpx[http2])，不可用时退回 HTTP/1.1
+    triage_rules: Optional[str] = None  # 失败分类规则文件 (默认: failure_triage.DEFAULT_RULES)
 
 
 class JobMonitor:
@@ -82,32 +142,104 @@ class JobMonitor:
     启智训练任务监控器
     """
     
-    def __init__(self, config: MonitorConfig):
+    def __init__(self, config: MonitorConfig, stop_token: Optional[StopToken] = None):
         """
         初始化监控器
         
+        不注册信号处理函数，嵌入其他程序时调用 stop() 停止监控；
+        命令行入口通过 stop_token.install_signal_handlers 把 SIGINT/SIGTERM 接到 stop_token。
+        
         Args:
             config: 监控配置
+            stop_token: 停止令牌 (默认新建)，可以与其他组件共用
         """
         self.config = config
         self.base_url = config.base_url.rstrip('/')
         self.token = None
         self.headers = {
             'Content-Type': 'application/json',
-            'Accept': 'application/json'
+            'Accept': 'application/json',
+            'Accept-Encoding': ACCEPT_ENCODING
         }
-        self.session = requests.Session()
+        self.session = create_session(config.http2)
         self.snapshots: List[StatusSnapshot] = []
-        self.running = False
+        self.triage = FailureTriage(load_rules(config.triage_rules) if config.triage_rules else None)
+        self.plugins: List[MonitorPlugin] = [self.triage]
+        self.stop_token = stop_token or StopToken()
+        self._last_progress_time = 0.0
+        self.delta_states: Dict[str, DeltaState] = {}
+    
+    @property
+    def running(self) -> bool:
+        """是否未被请求停止 (兼容旧接口，设为 False 等同于 stop())"""
+        return not self.stop_token.stopped
+    
+    @running.setter
+    def running(self, value: bool) -> None:
+        if value:
+            self.stop_token.reset()
+        else:
+            self.stop_token.stop()
+    
+    def stop(self) -> None:
+        """请求停止监控，等待中的轮询和重试立即返回 (可以从其他线程或信号处理函数调用)"""
+        self.stop_token.stop()
+    
+    def add_plugin(self, plugin: MonitorPlugin) -> None:
+        """
+        注册监控插件
         
-        # 设置信号处理
-        signal.signal(signal.SIGINT, self._signal_handler)
-        signal.signal(signal.SIGTERM, self._signal_handler)
+        Args:
+            plugin: 插件实例
+        """
+        self.plugins.append(plugin)
+    
+    def _run_plugins(self, snapshot: StatusSnapshot, previous: Optional[StatusSnapshot]) -> None:
+        """依次调用插件，单个插件出错不影响监控"""
+        for plugin in self.plugins:
+            try:
+                plugin.on_snapshot(snapshot, previous)
+            except Exception as e:
+                logger.error(f"Monitor plugin {type(plugin).__name__} failed: {str(e)}")
     
-    def _signal_handler(self, signum, frame):
-        """信号处理器"""
-        logger.info("Received interrupt signal, stopping monitor...")
-        self.running = False
+    def _post(self, endpoint: str, payload: Dict[str, Any],
+              headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """
+        发送OpenAPI请求，并把耗时和错误报告给插件
+        
+        Args:
+            endpoint: 接口路径，如 'train_job/detail'
+            payload: 请求负载
+            headers: 请求头 (默认: self.headers)
+            
+        Returns:
+            响应对象
+            
+        Raises:
+            requests.exceptions.RequestException: 请求失败时
+        """
+        start = time.perf_counter()
+        error = None
+        try:
+            response = self.session.post(
+                f"{self.base_url}/openapi/v1/{endpoint}",
+                json=payload,
+                headers=headers or self.headers,
+                timeout=30
+            )
+            if response.status_code >= 400:
+                error = f"http_{response.status_code}"
+            return response
+        except requests.exceptions.RequestException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            for plugin in self.plugins:
+                try:
+                    plugin.on_api_call(endpoint, seconds, error)
+                except Exception as e:
+                    logger.error(f"Monitor plugin {type(plugin).__name__} failed: {str(e)}")
     
     def authenticate(self, username: str, password: str) -> bool:
         """
@@ -166,45 +298,152 @@ class JobMonitor:
         
         for attempt in range(self.config.max_retries):
             try:
-                response = self.session.post(
-                    f"{self.base_url}/openapi/v1/train_job/detail",
-                    json=payload,
-                    headers=self.headers,
-                    timeout=30
-                )
+                if self.config.delta_mode:
+                    return self._get_job_status_delta(job_id, payload)
+                
+                response = self._post('train_job/detail', payload)
                 response.raise_for_status()
                 result = response.json()
                 
                 if result.get('code') == 0:
-                    job_data = result['data']
-                    snapshot = StatusSnapshot(
-                        timestamp=datetime.now().isoformat(),
-                        job_id=job_id,
-                        status=job_data.get('status', 'UNKNOWN'),
-                        sub_status=job_data.get('sub_status', 0),
-                        sub_msg=job_data.get('sub_msg', ''),
-                        running_time_ms=job_data.get('running_time_ms', '0'),
-                        created_at=job_data.get('created_at', ''),
-                        finished_at=job_data.get('finished_at'),
-                        timeline=job_data.get('timeline'),
-                        node_count=job_data.get('node_count', 0),
-                        priority=job_data.get('priority', 0)
-                    )
-                    return snapshot
+                    return self._build_snapshot(job_id, result['data'])
                 else:
                     logger.error(f"API error: {result.get('message', 'Unknown error')}")
                     return None
                     
             except requests.exceptions.RequestException as e:
                 if attempt < self.config.max_retries - 1:
-                    logger.warning(f"Request failed (attempt {attempt + 1}), retrying: {str(e)}")
-                    time.sleep(self.config.retry_delay * (attempt + 1))
+                    logger.warning("Request failed (attempt %d), retrying: %s", attempt + 1, e,
+                                   extra={'job_id': job_id})
+                    if self.stop_token.wait(self.config.retry_delay * (attempt + 1)):
+                        return None
                 else:
-                    logger.error(f"Failed to get job status after {self.config.max_retries} attempts: {str(e)}")
+                    logger.error("Failed to get job status after %d attempts: %s", self.config.max_retries, e,
+                                 extra={'job_id': job_id})
                     return None
         
         return None
     
+    def _build_snapshot(self, job_id: str, job_data: Dict[str, Any]) -> StatusSnapshot:
+        """
+        从任务详情构建状态快照
+        
+        Args:
+            job_id: 任务ID
+            job_data: 详情接口返回的 data 字段
+            
+        Returns:
+            状态快照
+        """
+        return StatusSnapshot(
+            timestamp=datetime.now().isoformat(),
+            job_id=job_id,
+            status=job_data.get('status', 'UNKNOWN'),
+            sub_status=job_data.get('sub_status', 0),
+            sub_msg=job_data.get('sub_msg', ''),
+            running_time_ms=job_data.get('running_time_ms', '0'),
+            created_at=job_data.get('created_at', ''),
+            finished_at=job_data.get('finished_at'),
+            timeline=job_data.get('timeline'),
+            node_count=job_data.get('node_count', 0),
+            priority=job_data.get('priority', 0)
+        )
+    
+    def _get_job_status_delta(self, job_id: str, payload: Dict[str, Any]) -> Optional[StatusSnapshot]:
+        """
+        增量获取任务状态
+        
+        服务端返回过 ETag/Last-Modified 时发送条件请求，304 时直接复用上一次的快照；
+        否则对原始响应计算哈希，内容未变化时跳过JSON解析和快照构建。
+        
+        Args:
+            job_id: 任务ID
+            payload: 请求负载
+            
+        Returns:
+            状态快照，API返回错误时为None
+            
+        Raises:
+            requests.exceptions.RequestException: 请求失败时 (由调用方重试)
+        """
+        state = self.delta_states.setdefault(job_id, DeltaState())
+        state.polls += 1
+        
+        headers = self.headers
+        if state.snapshot is not None and (state.etag or state.last_modified):
+            headers = dict(self.headers)
+            if state.etag:
+                headers['If-None-Match'] = state.etag
+            if state.last_modified:
+                headers['If-Modified-Since'] = state.last_modified
+        
+        response = self._post('train_job/detail', payload, headers)
+        
+        if response.status_code == 304 and state.snapshot is not None:
+            state.not_modified += 1
+            state.bytes_saved += state.body_size
+            return replace(state.snapshot, timestamp=datetime.now().isoformat())
+        
+        response.raise_for_status()
+        content = response.content
+        state.bytes_received += len(content)
+        
+        body_hash = hashlib.blake2b(content, digest_size=16).digest()
+        if body_hash == state.body_hash and state.snapshot is not None:
+            state.unchanged += 1
+            return replace(state.snapshot, timestamp=datetime.now().isoformat())
+        
+        parse_start = time.perf_counter()
+        try:
+            result = json.loads(content)
+        except ValueError:
+            logger.error("Invalid JSON response for job %s", job_id, extra={'job_id': job_id})
+            return None
+        if not isinstance(result, dict) or 'code' not in result:
+            logger.error("Invalid API response format for job %s", job_id, extra={'job_id': job_id})
+            return None
+        if result.get('code') != 0:
+            logger.error(f"API error: {result.get('message', 'Unknown error')}")
+            return None
+        if not isinstance(result.get('data'), dict):
+            logger.error("Invalid API response format for job %s", job_id, extra={'job_id': job_id})
+            return None
+        snapshot = self._build_snapshot(job_id, result['data'])
+        state.parse_seconds += time.perf_counter() - parse_start
+        state.parse_count += 1
+        
+        state.etag = response.headers.get('ETag')
+        state.last_modified = response.headers.get('Last-Modified')
+        state.body_hash = body_hash
+        state.body_size = len(content)
+        state.snapshot = snapshot
+        return snapshot
+    
+    def log_delta_stats(self) -> None:
+        """记录每个任务的增量获取统计"""
+        for job_id, state in self.delta_states.items():
+            logger.info("Delta stats for job %s: %d polls, %d not modified, %d unchanged, "
+                        "%d bytes saved, %.3fms parse time saved",
+                        job_id, state.polls, state.not_modified, state.unchanged,
+                        state.bytes_saved, state.parse_seconds_saved * 1000,
+                        extra={'job_id': job_id, 'delta_stats': state.to_dict()})
+    
+    @staticmethod
+    def _restore_snapshot(data: Optional[Dict[str, Any]]) -> Optional[StatusSnapshot]:
+        """
+        从字典还原状态快照，忽略未知字段
+        
+        Args:
+            data: asdict 得到的快照字典
+            
+        Returns:
+            状态快照，data为空时返回None
+        """
+        if not data:
+            return None
+        known = {f.name for f in fields(StatusSnapshot)}
+        return StatusSnapshot(**{key: value for key, value in data.items() if key in known})
+    
     def _format_duration(self, ms: str) -> str:
         """
         格式化运行时长
@@ -247,6 +486,23 @@ class JobMonitor:
         except (ValueError, TypeError):
             return "Unknown"
     
+    def _format_progress(self, snapshot: StatusSnapshot) -> str:
+        """
+        格式化训练进度
+        
+        Args:
+            snapshot: 状态快照
+            
+        Returns:
+            step/loss/throughput 组成的字符串
+        """
+        parts = [f"step {snapshot.step}"]
+        if snapshot.loss is not None:
+            parts.append(f"loss {snapshot.loss:.4g}")
+        if snapshot.throughput is not None:
+            parts.append(f"{snapshot.throughput:.4g}/s")
+        return ", ".join(parts)
+    
     def print_status_summary(self, snapshot: StatusSnapshot) -> None:
         """
         打印状态摘要
@@ -261,6 +517,10 @@ class JobMonitor:
         print(f"Status:        {snapshot.status}")
         print(f"Sub Status:    {snapshot.sub_status}")
         print(f"Sub Message:   {snapshot.sub_msg}")
+        if snapshot.status == 'FAILED':
+            verdict = self.triage.classify(snapshot)
+            evidence = f" - {verdict.evidence}" if verdict.evidence else ''
+            print(f"Failure:       {verdict.category} ({verdict.label}){evidence}")
         print(f"Running Time:  {self._format_duration(snapshot.running_time_ms)}")
         print(f"Created At:    {self._format_timestamp(snapshot.created_at)}")
         
@@ -270,6 +530,9 @@ class JobMonitor:
         print(f"Node Count:    {snapshot.node_count}")
         print(f"Priority:      {snapshot.priority}")
         
+        if snapshot.step is not None:
+            print(f"Progress:      {self._format_progress(snapshot)}")
+        
         if snapshot.timeline:
             print(f"\nTimeline:")
             timeline = snapshot.timeline
@@ -282,6 +545,33 @@ class JobMonitor:
             if timeline.get('finished'):
                 print(f"  Finished:    {self._format_timestamp(timeline['finished'])}")
     
+    def _report_progress(self, snapshot: StatusSnapshot, elapsed_time: float) -> None:
+        """
+        报告状态未变化的轮询结果
+        
+        终端进度行按 progress_interval 限速刷新；关闭进度行时改为记录可采样的日志。
+        
+        Args:
+            snapshot: 当前状态快照
+            elapsed_time: 已监控时长(秒)
+        """
+        if not self.config.progress_display:
+            logger.info("No status change for job %s: %s", snapshot.job_id, snapshot.status,
+                        extra={'sample_key': 'no_change', 'job_id': snapshot.job_id,
+                               'status': snapshot.status, 'running_time_ms': snapshot.running_time_ms,
+                               'step': snapshot.step})
+            return
+        
+        now = time.monotonic()
+        if now - self._last_progress_time < self.config.progress_interval:
+            return
+        self._last_progress_time = now
+        
+        elapsed_str = str(timedelta(seconds=int(elapsed_time)))
+        progress_str = f" | {self._format_progress(snapshot)}" if snapshot.step is not None else ""
+        print(f"\r[{elapsed_str}] Status: {snapshot.status} | "
+              f"Running: {self._format_duration(snapshot.running_time_ms)}{progress_str}", end='', flush=True)
+    
     def _detect_status_change(self, current: StatusSnapshot, previous: Optional[StatusSnapshot]) -> bool:
         """
         检测状态是否发生变化
@@ -314,7 +604,9 @@ class JobMonitor:
     
     def monitor_job(self, job_id: str) -> bool:
         """
-        监控任务状态
+        监控任务状态，直到任务结束、超时或 stop()
+        
+        已经 stop() 的监控器会立即返回，再次使用前调用 stop_token.reset()。
         
         Args:
             job_id: 任务ID
@@ -322,29 +614,44 @@ class JobMonitor:
         Returns:
             监控是否成功完成
         """
-        logger.info(f"Starting to monitor job: {job_id}")
-        logger.info(f"Poll interval: {self.config.poll_interval}s, Timeout: {self.config.timeout}s")
+        logger.info("Starting to monitor job: %s", job_id, extra={'job_id': job_id})
+        logger.info("Poll interval: %ss, Timeout: %ss", self.config.poll_interval, self.config.timeout)
         
         start_time = time.time()
-        self.running = True
         previous_snapshot = None
         
-        while self.running:
+        checkpoint = MonitorCheckpoint(self.config.checkpoint_file) if self.config.checkpoint_file else None
+        job_state = checkpoint.get(job_id) if checkpoint and self.config.resume else None
+        if job_state is not None:
+            start_time = job_state.start_time
+            previous_snapshot = self._restore_snapshot(job_state.snapshot)
+            logger.info("Resuming monitor for job %s from checkpoint (last status: %s, elapsed: %ds)",
+                        job_id, previous_snapshot.status if previous_snapshot else None,
+                        int(time.time() - start_time), extra={'job_id': job_id})
+        else:
+            job_state = JobCheckpoint(start_time=start_time)
+        
+        while not self.stop_token.stopped:
             current_time = time.time()
             elapsed_time = current_time - start_time
             
             # 检查超时
             if elapsed_time > self.config.timeout:
-                logger.warning(f"Monitoring timeout after {self.config.timeout} seconds")
+                logger.warning("Monitoring timeout after %s seconds", self.config.timeout,
+                               extra={'job_id': job_id})
                 break
             
             # 获取当前状态
             snapshot = self.get_job_status(job_id)
             if snapshot is None:
-                logger.error("Failed to get job status, continuing...")
-                time.sleep(self.config.poll_interval)
+                if self.stop_token.stopped:
+                    break
+                logger.error("Failed to get job status, continuing...", extra={'job_id': job_id})
+                self.stop_token.wait(self.config.poll_interval)
                 continue
             
+            self._run_plugins(snapshot, previous_snapshot)
+            
             # 保存快照
             self.snapshots.append(snapshot)
             
@@ -352,28 +659,43 @@ class JobMonitor:
             status_changed = self._detect_status_change(snapshot, previous_snapshot)
             
             if status_changed:
-                logger.info(f"Status changed: {snapshot.status} (sub_status: {snapshot.sub_status})")
-                self.print_status_summary(snapshot)
+                logger.info("Status changed: %s (sub_status: %s)", snapshot.status, snapshot.sub_status,
+                            extra={'job_id': job_id, 'status': snapshot.status,
+                                   'sub_status': snapshot.sub_status, 'sub_msg': snapshot.sub_msg})
+                if self.config.summary_display:
+                    self.print_status_summary(snapshot)
                 
-                # 发送通知（如果启用）
-                if self.config.enable_notifications:
+                # 发送通知（如果启用），通知游标避免恢复后重复通知
+                notified = (job_state.notified_status, job_state.notified_sub_status)
+                if self.config.enable_notifications and notified != (snapshot.status, snapshot.sub_status):
                     self._send_notification(snapshot, previous_snapshot)
+                    job_state.notified_status = snapshot.status
+                    job_state.notified_sub_status = snapshot.sub_status
+                    job_state.notifications += 1
+                
+                if checkpoint is not None:
+                    job_state.snapshot = asdict(snapshot)
+                    checkpoint.update(job_id, job_state)
             else:
                 # 简化输出
-                elapsed_str = str(timedelta(seconds=int(elapsed_time)))
-                print(f"\r[{elapsed_str}] Status: {snapshot.status} | "
-                      f"Running: {self._format_duration(snapshot.running_time_ms)}", end='')
+                self._report_progress(snapshot, elapsed_time)
             
             # 检查是否到达终端状态
             if self._is_terminal_status(snapshot.status):
-                logger.info(f"Job reached terminal status: {snapshot.status}")
-                self.print_status_summary(snapshot)
+                logger.info("Job reached terminal status: %s", snapshot.status,
+                            extra={'job_id': job_id, 'status': snapshot.status})
+                if self.config.summary_display:
+                    self.print_status_summary(snapshot)
                 break
             
             previous_snapshot = snapshot
             
-            # 等待下次轮询
-            time.sleep(self.config.poll_interval)
+            # 等待下次轮询，stop() 时立即返回
+            if self.stop_token.wait(self.config.poll_interval):
+                break
+        
+        if self.config.delta_mode:
+            self.log_delta_stats()
         
         # 导出数据
         if self.config.export_file:
@@ -382,6 +704,38 @@ class JobMonitor:
         logger.info("Monitoring completed")
         return True
     
+    def follow_logs(self, job_id: str, backend: LogBackend,
+                    instances: Optional[List[str]] = None, follow: bool = True) -> bool:
+        """
+        跟踪任务日志，多实例日志合并为一个有序流输出
+        
+        Args:
+            job_id: 任务ID
+            backend: 日志后端
+            instances: 要跟踪的实例 (默认: 全部实例)
+            follow: 是否持续跟踪直到任务进入终端状态
+            
+        Returns:
+            是否成功完成
+        """
+        tailer = LogTailer(backend, job_id, instances=instances)
+        
+        if not follow:
+            for line in tailer.read_all():
+                print(format_log_line(line))
+            return True
+        
+        def should_stop() -> bool:
+            if self.stop_token.stopped:
+                return True
+            snapshot = self.get_job_status(job_id)
+            return snapshot is not None and self._is_terminal_status(snapshot.status)
+        
+        for line in tailer.follow(self.config.poll_interval, should_stop=should_stop, stop_token=self.stop_token):
+            print(format_log_line(line))
+        
+        return True
+    
     def _send_notification(self, current: StatusSnapshot, previous: Optional[StatusSnapshot]) -> None:
         """
         发送状态变化通知
@@ -441,7 +795,12 @@ class JobMonitor:
                 if current.status == 'SUCCEEDED':
                     status_info += f"\n🎉 **Training completed successfully!**"
                 elif current.status == 'FAILED':
-                    status_info += f"\n💥 **Training failed.** Check the logs for details."
+                    verdict = self.triage.classify(current)
+                    status_info += f"\n💥 **Training failed:** {verdict.category} ({verdict.label})"
+                    if verdict.evidence:
+                        status_info += f" - `{verdict.evidence}`"
+                    if verdict.label == 'unknown':
+                        status_info += ". Check the logs for details."
                 elif current.status == 'CANCELLED':
                     status_info += f"\n🛑 **Training was cancelled.**"
             
@@ -488,17 +847,21 @@ class JobMonitor:
         }
         return status_emojis.get(status, '📊')
     
-    def export_monitoring_data(self, filename: str) -> None:
+    def export_monitoring_data(self, filename: str, fmt: Optional[str] = None) -> None:
         """
         导出监控数据
         
+        pretty/json 格式导出包含配置和摘要的完整文档，jsonl/msgpack/csv 只导出快照流。
+        
         Args:
             filename: 导出文件名
+            fmt: 导出格式 (默认: config.export_format，未设置时按扩展名推断)
         """
+        fmt = fmt or self.config.export_format or format_for_path(filename)
         try:
-            data = {
+            meta = {
                 'monitoring_config': asdict(self.config),
-                'snapshots': [asdict(snapshot) for snapshot in self.snapshots],
+                'delta_stats': {job_id: state.to_dict() for job_id, state in self.delta_states.items()},
                 'summary': {
                     'total_snapshots': len(self.snapshots),
                     'monitoring_duration': self.snapshots[-1].timestamp if self.snapshots else None,
@@ -506,10 +869,10 @@ class JobMonitor:
                 }
             }
             
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            with open(filename, 'wb') as f:
+                write_snapshots(self.snapshots, f, fmt, meta=meta)
             
-            logger.info(f"Monitoring data exported to: {filename}")
+            logger.info(f"Monitoring data exported to: {filename} ({fmt})")
             
         except Exception as e:
             logger.error(f"Failed to export monitoring data: {str(e)}")
@@ -543,6 +906,132 @@ def get_credentials() -> tuple[str, str]:
     return username, password
 
 
+def resolve_job_arguments(args) -> None:
+    """
+    在本地任务登记表中把 --job-id 中的选择器 (如 tag:lr=3e-4) 解析成任务ID，不访问平台
+    
+    dashboard/monitor-many 的 --job-id 替换为全部匹配的任务，其余命令要求恰好匹配一个任务。
+    
+    Args:
+        args: 命令行参数 (就地修改 args.job_id)
+        
+    Raises:
+        ValueError: 选择器无效、没有匹配或匹配多个任务时
+    """
+    values = getattr(args, 'job_id', None)
+    if not values:
+        return
+    values = values if isinstance(values, list) else [values]
+    if not any(is_selector(value) for value in values):
+        return
+    if args.no_registry:
+        raise ValueError("Job selectors require the local job registry (remove --no-registry)")
+    
+    with JobRegistry(args.registry) as registry:
+        job_ids = list(dict.fromkeys(job_id for value in values for job_id in resolve_job_ids(value, registry)))
+    if not job_ids:
+        raise ValueError(f"No registered job matches {', '.join(values)}")
+    if args.command in ('dashboard', 'monitor-many'):
+        args.job_id = job_ids
+    elif len(job_ids) > 1:
+        shown = ', '.join(job_ids[:5]) + (', ...' if len(job_ids) > 5 else '')
+        raise ValueError(f"{values[0]} matches {len(job_ids)} jobs ({shown}), expected exactly one")
+    else:
+        args.job_id = job_ids[0]
+    logger.info(f"Resolved {', '.join(values)} to {len(job_ids)} job(s)")
+
+
+def run_triage(args) -> int:
+    """
+    triage 命令: 批量分类历史记录并打印各类别数量
+    
+    Args:
+        args: 命令行参数
+        
+    Returns:
+        退出码
+    """
+    try:
+        triage = FailureTriage(load_rules(args.rules) if args.rules else None)
+    except (OSError, ValueError) as e:
+        logger.error(f"Failed to load triage rules: {str(e)}")
+        return 1
+    
+    def records():
+        for path in args.files:
+            yield from iter_records(path)
+    
+    start = time.perf_counter()
+    try:
+        if args.verdicts:
+            summary = TriageSummary()
+            
+            def tally(verdicts):
+                for verdict in verdicts:
+                    key = (verdict.category, verdict.label)
+                    summary.counts[key] = summary.counts.get(key, 0) + 1
+                    summary.examples.setdefault(key, verdict.sub_msg)
+                    summary.classified += 1
+                    yield verdict
+            
+            def counted():
+                for record in records():
+                    summary.records += 1
+                    yield record
+            
+            with open(args.verdicts, 'wb') as f:
+                write_snapshots(tally(triage.classify_many(counted(), failed_only=not args.all_statuses)), f, 'jsonl')
+        else:
+            summary = triage.summarize(records(), failed_only=not args.all_statuses)
+    except (OSError, ValueError) as e:
+        logger.error(f"Failed to read history: {str(e)}")
+        return 1
+    elapsed = time.perf_counter() - start
+    
+    print(f"{'CATEGORY':<16} {'LABEL':<10} {'COUNT':>10} {'SHARE':>7}  EXAMPLE")
+    for (category, label), count in sorted(summary.counts.items(), key=lambda item: -item[1]):
+        example = ' '.join(summary.examples.get((category, label), '').split())[:60]
+        print(f"{category:<16} {label:<10} {count:>10} {count / max(summary.classified, 1):>7.1%}  {example}")
+    labels = summary.labels()
+    print(f"\n分类 {summary.classified} 条记录 (共读取 {summary.records} 条，耗时 {elapsed:.2f}s): "
+          + ", ".join(f"{label} {labels.get(label, 0)}" for label in ('retryable', 'fatal', 'unknown')))
+    return 0
+
+
+def _resubmit_failed(monitor: JobMonitor, resubmit: ResubmitHook, job_id: str) -> Optional[str]:
+    """
+    任务以 FAILED 结束时按重试策略重新提交
+    
+    Args:
+        monitor: 刚结束监控的 JobMonitor
+        resubmit: 重试钩子，同一重试链共享次数上限
+        job_id: 刚结束监控的任务ID
+        
+    Returns:
+        新任务ID，不重试、已达上限、等待被取消或提交失败时返回None
+    """
+    snapshots = [snapshot for snapshot in monitor.snapshots[-2:] if snapshot.job_id == job_id]
+    if monitor.stop_token.stopped or not snapshots or snapshots[-1].status != 'FAILED':
+        return None
+    snapshot = snapshots[-1]
+    previous = snapshots[0] if len(snapshots) > 1 else None
+    event = TransitionEvent(
+        job_id=job_id,
+        status=snapshot.status,
+        sub_status=snapshot.sub_status,
+        sub_msg=snapshot.sub_msg,
+        previous_status=previous.status if previous else None,
+        previous_sub_status=previous.sub_status if previous else None,
+        timestamp=snapshot.timestamp,
+        snapshot=snapshot
+    )
+    try:
+        return resubmit(event)
+    except Exception as e:
+        logger.error(f"Failed to resubmit job {job_id}: {str(e)}")
+        return None
+
+
 def main():
     """
     主函数，提供命令行接口
@@ -554,22 +1043,73 @@ def main():
     
     # 全局选项
     parser.add_argument('--debug', action='store_true', help='启用调试模式')
+    parser.add_argument('--log-format', choices=['text', 'json'], default='text',
+                       help='日志格式，json为每行一条JSON (默认: text)')
+    parser.add_argument('--log-sample', type=int, default=1,
+                       help='重复的"状态未变化"日志每N条输出1条 (默认: 1)')
     parser.add_argument('--base-url', type=str, default="https://qz.sii.edu.cn", 
                        help='API基础URL (默认: https://qz.sii.edu.cn)')
+    parser.add_argument('--http2', action='store_true',
+                       help='使用 HTTP/2 复用连接 (需要 pip install "httpx[http2]"，不可用时退回 HTTP/1.1)')
+    parser.add_argument('--record', type=str, metavar='FILE',
+                       help='录制HTTP请求和响应到文件 (.gz结尾时压缩)')
+    parser.add_argument('--replay', type=str, metavar='FILE',
+                       help='从录制文件回放HTTP响应，不访问平台')
+    parser.add_argument('--replay-speed', type=float, default=0.0,
+                       help='回放延迟倍率，0为全速，1为按录制延迟 (默认: 0)')
+    parser.add_argument('--registry', type=str, metavar='FILE',
+                       help='本地任务登记表，用于解析 --job-id 中的选择器 (默认: 环境变量 INSPIRE_REGISTRY 或 ~/.inspire/jobs.db)')
+    parser.add_argument('--no-registry', action='store_true', help='不使用本地任务登记表')
+    add_profile_arguments(parser)
     
     subparsers = parser.add_subparsers(dest='command', help='可用命令')
     
     # 监控命令
     monitor_parser = subparsers.add_parser('monitor', help='监控任务状态')
-    monitor_parser.add_argument('--job-id', required=True, type=str, help='任务ID')
+    monitor_parser.add_argument('--job-id', required=True, type=str,
+                               help='任务ID或选择器 (如 name:sweep-lr3e-4，需恰好匹配一个已登记的任务)')
     monitor_parser.add_argument('--interval', type=int, default=10, 
                                help='轮询间隔(秒) (默认: 10)')
     monitor_parser.add_argument('--timeout', type=int, default=3600, 
                                help='监控超时时间(秒) (默认: 3600)')
     monitor_parser.add_argument('--export', type=str, 
                                help='导出监控数据到文件')
+    monitor_parser.add_argument('--export-format', choices=FORMATS,
+                               help='导出格式 (默认: 按扩展名推断，否则为pretty)')
     monitor_parser.add_argument('--notifications', action='store_true', 
                                help='启用状态变化通知')
+    monitor_parser.add_argument('--metrics-path', type=str,
+                               help='训练指标路径 (tb_summary_path下的TensorBoard event文件或JSONL文件)')
+    monitor_parser.add_argument('--no-progress', action='store_true',
+                               help='不显示终端进度行 (json日志格式下默认关闭)')
+    monitor_parser.add_argument('--progress-interval', type=float, default=1.0,
+                               help='进度行最短刷新间隔(秒) (默认: 1.0)')
+    monitor_parser.add_argument('--checkpoint', type=str,
+                               help='断点文件，状态变化时原子写入 (--resume时默认: <job_id>.checkpoint.json)')
+    monitor_parser.add_argument('--resume', action='store_true',
+                               help='从断点文件恢复上次的监控状态')
+    monitor_parser.add_argument('--delta', action='store_true',
+                               help='增量获取状态: 条件请求或响应哈希未变化时跳过解析')
+    monitor_parser.add_argument('--stall-timeout', type=int, default=900,
+                               help='step停止前进多少秒后告警 (默认: 900)')
+    monitor_parser.add_argument('--hook-exec', action='append', metavar='CMD',
+                               help='状态变化时执行命令，事件通过环境变量 INSPIRE_* 和标准输入传入，可重复')
+    monitor_parser.add_argument('--hook-log', type=str, metavar='FILE',
+                               help='把状态变化事件追加写入JSONL文件')
+    monitor_parser.add_argument('--hook-status', type=str,
+                               help='--hook-exec/--hook-log 只响应这些状态，逗号分隔 (默认: 全部)')
+    monitor_parser.add_argument('--resubmit-failed', type=int, default=0, metavar='N',
+                               help='任务失败后按退避时间重新提交，最多N次 (默认: 0，不重试)')
+    monitor_parser.add_argument('--resubmit-all', action='store_true',
+                               help='--resubmit-failed 也重试被分类为不可重试的失败 (如OOM、代码错误)')
+    monitor_parser.add_argument('--triage-rules', type=str, metavar='FILE',
+                               help='失败分类规则文件 (JSON规则列表，默认使用内置规则)')
+    monitor_parser.add_argument('--resubmit-backoff', type=float, default=60.0,
+                               help='第一次重新提交前的等待时间(秒)，之后每次加倍 (默认: 60)')
+    monitor_parser.add_argument('--metrics-port', type=int,
+                               help='在本地端口提供 Prometheus/OpenMetrics 指标 (/metrics)')
+    monitor_parser.add_argument('--metrics-host', type=str, default='127.0.0.1',
+                               help='指标服务监听地址 (默认: 127.0.0.1)')
     
     # GitHub通知相关参数
     monitor_parser.add_argument('--github-token', type=str, 
@@ -579,21 +1119,122 @@ def main():
     monitor_parser.add_argument('--github-issue', type=int, 
                                help='GitHub Issue/PR号码')
     
+    # 多进程分片监控命令
+    many_parser = subparsers.add_parser('monitor-many', help='多进程分片监控大量任务')
+    many_target = many_parser.add_mutually_exclusive_group(required=True)
+    many_target.add_argument('--job-file', type=str, help='任务ID列表文件 (每行一个job_id或JSON数组)')
+    many_target.add_argument('--job-id', action='append',
+                             help='任务ID或选择器 (如 tag:sweep=lr，在本地登记表中解析)，可重复')
+    many_parser.add_argument('--workers', type=int, default=4, help='工作进程数 (默认: 4)')
+    many_parser.add_argument('--interval', type=int, default=10,
+                            help='每个任务的轮询间隔(秒) (默认: 10)')
+    many_parser.add_argument('--timeout', type=int, default=3600,
+                            help='监控超时时间(秒) (默认: 3600)')
+    many_parser.add_argument('--rate-limit', type=float, default=50.0,
+                            help='所有进程合计每秒最多请求数 (默认: 50)')
+    many_parser.add_argument('--export', type=str,
+                            help='导出状态变化事件到JSONL文件')
+    many_parser.add_argument('--metrics-port', type=int,
+                            help='在本地端口提供 Prometheus/OpenMetrics 指标 (/metrics)')
+    many_parser.add_argument('--metrics-host', type=str, default='127.0.0.1',
+                            help='指标服务监听地址 (默认: 127.0.0.1)')
+    
+    # 多任务仪表盘命令
+    dashboard_parser = subparsers.add_parser('dashboard', help='在终端表格中实时显示多个任务的状态')
+    dashboard_target = dashboard_parser.add_mutually_exclusive_group(required=True)
+    dashboard_target.add_argument('--job-id', action='append', help='任务ID或选择器 (如 tag:sweep=lr)，可重复')
+    dashboard_target.add_argument('--job-file', type=str, help='任务ID列表文件 (每行一个job_id或JSON数组)')
+    dashboard_parser.add_argument('--interval', type=int, default=10,
+                                 help='每个任务的轮询间隔(秒) (默认: 10)')
+    dashboard_parser.add_argument('--timeout', type=int, default=3600,
+                                 help='监控超时时间(秒) (默认: 3600)')
+    dashboard_parser.add_argument('--workers', type=int, default=8, help='并发查询数 (默认: 8)')
+    dashboard_parser.add_argument('--sort', choices=SORT_KEYS, default='status', help='排序字段 (默认: status)')
+    dashboard_parser.add_argument('--filter', type=str,
+                                 help='只显示这些状态的任务，逗号分隔 (如 RUNNING,FAILED)')
+    dashboard_parser.add_argument('--fps', type=float, default=4.0, help='每秒最多刷新次数 (默认: 4)')
+    
+    # 集群节点变化监视命令
+    nodes_parser = subparsers.add_parser('watch-nodes', help='监视集群节点的新增、移除和资源池变化 (如进入 fault)')
+    nodes_parser.add_argument('--interval', type=int, default=30,
+                             help='两轮获取的间隔(秒) (默认: 30)')
+    nodes_parser.add_argument('--pool', type=str, choices=['online', 'backup', 'fault', 'unknown'],
+                             help='只监视该资源池 (默认: 全部，才能看到池之间的移动)')
+    nodes_parser.add_argument('--page-size', type=int, default=100, help='每页数量 (默认: 100)')
+    nodes_parser.add_argument('--removal-sweeps', type=int, default=2,
+                             help='节点连续缺失多少轮后报告移除 (默认: 2)')
+    nodes_parser.add_argument('--emit-initial', action='store_true',
+                             help='把第一轮的所有节点作为新增事件输出 (默认只建立索引)')
+    nodes_parser.add_argument('--hook-exec', action='append', metavar='CMD',
+                             help='节点变化时执行的命令，可重复 (INSPIRE_JOB_ID 为节点ID，INSPIRE_STATUS 为新资源池)')
+    nodes_parser.add_argument('--hook-log', type=str, metavar='FILE',
+                             help='把节点变化事件追加写入JSONL文件')
+    nodes_parser.add_argument('--hook-status', type=str,
+                             help='--hook-exec/--hook-log 只响应进入这些资源池的变化，逗号分隔 (如 fault,REMOVED)')
+    nodes_parser.add_argument('--metrics-port', type=int,
+                             help='在本地端口提供 Prometheus/OpenMetrics 指标 (/metrics)')
+    nodes_parser.add_argument('--metrics-host', type=str, default='127.0.0.1',
+                             help='指标服务监听地址 (默认: 127.0.0.1)')
+    
     # 状态查询命令
     status_parser = subparsers.add_parser('status', help='查询当前任务状态')
-    status_parser.add_argument('--job-id', required=True, type=str, help='任务ID')
+    status_parser.add_argument('--job-id', required=True, type=str, help='任务ID或选择器 (需恰好匹配一个任务)')
     status_parser.add_argument('--json', action='store_true', help='以JSON格式输出')
+    status_parser.add_argument('--format', choices=FORMATS, dest='output_format',
+                              help='输出格式 (--json 等同于 --format pretty)')
+    
+    # 失败分类命令
+    triage_parser = subparsers.add_parser('triage', help='对导出的历史记录批量进行失败分类 (不访问平台)')
+    triage_parser.add_argument('files', nargs='+', help='历史记录文件 (.jsonl/.csv/.json，可以是导出文件或任务详情)')
+    triage_parser.add_argument('--rules', type=str, metavar='FILE', help='分类规则文件 (默认使用内置规则)')
+    triage_parser.add_argument('--all-statuses', action='store_true', help='也分类非 FAILED 状态的记录')
+    triage_parser.add_argument('--verdicts', type=str, metavar='FILE',
+                              help='把每条记录的分类结果写入JSONL文件')
+    
+    # 日志跟踪命令
+    logs_parser = subparsers.add_parser('logs', help='增量查看任务日志')
+    logs_parser.add_argument('--job-id', required=True, type=str, help='任务ID或选择器 (需恰好匹配一个任务)')
+    logs_parser.add_argument('--follow', action='store_true', help='持续跟踪直到任务结束')
+    logs_parser.add_argument('--interval', type=int, default=5,
+                            help='跟踪时的轮询间隔(秒) (默认: 5)')
+    logs_parser.add_argument('--backend', choices=['file', 'mock'], default='file',
+                            help='日志来源: 共享文件系统目录或模拟数据 (默认: file)')
+    logs_parser.add_argument('--log-dir', type=str,
+                            help='实例日志目录，包含 <instance>.log 文件 (file后端必需)')
+    logs_parser.add_argument('--instances', type=str,
+                            help='只跟踪指定实例，逗号分隔 (默认: 全部)')
     
     args = parser.parse_args()
     
-    # 设置日志级别
+    # 配置日志
+    configure_logging(
+        level=logging.DEBUG if args.debug else logging.INFO,
+        log_format=args.log_format,
+        sample_every=args.log_sample
+    )
     if args.debug:
-        logging.getLogger().setLevel(logging.DEBUG)
         logger.debug("Debug mode enabled")
     
+    if args.command == 'triage':
+        # 离线分类，不需要凭证
+        return run_triage(args)
+    
+    if args.record and args.replay:
+        parser.error("--record and --replay cannot be used together")
+    
+    cassette = None
+    metrics_server = None
+    hooks = None
+    registry = None
     try:
-        # 从环境变量获取凭证
-        username, password = get_credentials()
+        resolve_job_arguments(args)
+        
+        # 从环境变量获取凭证 (回放模式不需要真实凭证)
+        if args.replay:
+            username = os.getenv('INSPIRE_USERNAME', 'replay')
+            password = os.getenv('INSPIRE_PASSWORD', 'replay')
+        else:
+            username, password = get_credentials()
         
         # 准备GitHub配置
         github_config = None
@@ -621,12 +1262,31 @@ def main():
             poll_interval=getattr(args, 'interval', 10),
             timeout=getattr(args, 'timeout', 3600),
             export_file=getattr(args, 'export', None),
+            export_format=getattr(args, 'export_format', None),
             enable_notifications=getattr(args, 'notifications', False),
-            github_config=github_config
+            github_config=github_config,
+            progress_display=not getattr(args, 'no_progress', False) and args.log_format == 'text',
+            progress_interval=getattr(args, 'progress_interval', 1.0),
+            summary_display=args.log_format == 'text',
+            delta_mode=getattr(args, 'delta', False),
+            triage_rules=getattr(args, 'triage_rules', None),
+            http2=args.http2
         )
+        if args.command == 'monitor' and (args.checkpoint or args.resume):
+            config.checkpoint_file = args.checkpoint or f"{args.job_id}.checkpoint.json"
+            config.resume = args.resume
         
-        # 创建监控器
+        # 创建监控器，Ctrl-C/SIGTERM 通过停止令牌结束等待，再按一次 Ctrl-C 强制中断
         monitor = JobMonitor(config)
+        install_signal_handlers(monitor.stop_token)
+        cassette = install_cassette(monitor, args.record, args.replay, args.replay_speed)
+        
+        metrics = None
+        if getattr(args, 'metrics_port', None) is not None:
+            metrics = FleetMetrics()
+            monitor.add_plugin(metrics)
+            metrics_server = MetricsServer(metrics, args.metrics_port, host=args.metrics_host)
+            metrics_server.start()
         
         # 认证
         logger.info("Authenticating with Inspire API...")
@@ -636,7 +1296,39 @@ def main():
         
         # 根据命令执行相应操作
         if args.command == 'monitor':
-            success = monitor.monitor_job(args.job_id)
+            if args.metrics_path:
+                monitor.add_plugin(TrainingProgressPlugin(
+                    args.metrics_path, job_id=args.job_id, stall_timeout=args.stall_timeout
+                ))
+            if args.hook_exec or args.hook_log:
+                hooks = HookRegistry()
+                hook_statuses = args.hook_status.split(',') if args.hook_status else None
+                for command in args.hook_exec or []:
+                    hooks.register(ShellHook(command), status=hook_statuses)
+                if args.hook_log:
+                    hooks.register(WriteFileHook(args.hook_log), status=hook_statuses)
+                monitor.add_plugin(hooks)
+            resubmit = None
+            if args.resubmit_failed > 0:
+                from inspire_api_control import InspireAPI, InspireConfig, open_registry
+                # 重新提交的任务记录到本地登记表，并复用登记表中原任务的负载和标签
+                registry = None if args.no_registry or args.replay else open_registry(args.registry)
+                api = InspireAPI(InspireConfig(base_url=args.base_url, http2=args.http2), registry=registry)
+                api.authenticate(username, password)
+                should_retry = None
+                if not args.resubmit_all:
+                    # 未匹配任何规则的失败 (unknown) 也重试，只跳过判定为 fatal 的失败
+                    should_retry = lambda event: monitor.triage.classify(event.snapshot).label != 'fatal'
+                resubmit = ResubmitHook(api, max_attempts=args.resubmit_failed, backoff=args.resubmit_backoff,
+                                        should_retry=should_retry)
+                # Ctrl-C/SIGTERM 时立即结束重新提交前的退避等待
+                monitor.stop_token.add_callback(resubmit.cancel)
+
+            # monitor_job 在任务终止时返回，重新提交的任务在这里继续监控，直到成功或不再重试
+            job_id = args.job_id
+            while job_id:
+                success = monitor.monitor_job(job_id)
+                job_id = _resubmit_failed(monitor, resubmit, job_id) if resubmit is not None else None
             return 0 if success else 1
         
         elif args.command == 'status':
@@ -645,12 +1337,89 @@ def main():
                 logger.error("Failed to get job status")
                 return 1
             
-            if args.json:
-                print(json.dumps(asdict(snapshot), indent=2, ensure_ascii=False))
+            output_format = args.output_format or ('pretty' if args.json else None)
+            if output_format:
+                sys.stdout.flush()
+                write_snapshot(snapshot, sys.stdout.buffer, output_format)
+                sys.stdout.buffer.flush()
             else:
                 monitor.print_status_summary(snapshot)
             return 0
         
+        elif args.command == 'monitor-many':
+            from inspire_api_control import load_job_ids, ValidationError
+            from fleet_monitor import FleetMonitor
+            
+            try:
+                job_ids = args.job_id or load_job_ids(args.job_file)
+            except ValidationError as e:
+                logger.error(str(e))
+                return 1
+            
+            fleet = FleetMonitor(config, monitor.token, workers=args.workers, rate_limit=args.rate_limit,
+                                 metrics=metrics)
+            install_signal_handlers(fleet.stop_token)
+            final_statuses = fleet.run(job_ids)
+            
+            counts: Dict[str, int] = {}
+            for status in final_statuses.values():
+                counts[status or 'UNKNOWN'] = counts.get(status or 'UNKNOWN', 0) + 1
+            print("最终状态: " + ", ".join(f"{status} {count}" for status, count in sorted(counts.items())))
+            return 0
+        
+        elif args.command == 'dashboard':
+            job_ids = args.job_id
+            if args.job_file:
+                from inspire_api_control import load_job_ids, ValidationError
+                try:
+                    job_ids = load_job_ids(args.job_file)
+                except ValidationError as e:
+                    logger.error(str(e))
+                    return 1
+            
+            dashboard = Dashboard(max_fps=args.fps, sort_by=args.sort,
+                                  statuses=args.filter.split(',') if args.filter else None)
+            if dashboard.interactive and not args.debug:
+                # 仪表盘占用整个终端，只显示警告及以上的日志
+                logging.getLogger().setLevel(logging.WARNING)
+            run_dashboard(monitor, job_ids, dashboard, workers=args.workers)
+            return 0
+        
+        elif args.command == 'watch-nodes':
+            from inspire_api_control import InspireAPI, InspireConfig
+            from node_watcher import NodeWatcher
+            
+            # 共用监控器的会话 (包括录制/回放) 和停止令牌
+            api = InspireAPI(InspireConfig(base_url=args.base_url, http2=args.http2),
+                             session=monitor.session, stop_token=monitor.stop_token)
+            api.authenticate(username, password)
+            if args.hook_exec or args.hook_log:
+                hooks = HookRegistry()
+                hook_statuses = args.hook_status.split(',') if args.hook_status else None
+                for command in args.hook_exec or []:
+                    hooks.register(ShellHook(command), status=hook_statuses)
+                if args.hook_log:
+                    hooks.register(WriteFileHook(args.hook_log), status=hook_statuses)
+            
+            watcher = NodeWatcher(api, resource_pool=args.pool, page_size=args.page_size, interval=args.interval,
+                                  removal_sweeps=args.removal_sweeps, metrics=metrics, hooks=hooks)
+            watcher.run(on_change=lambda change: print(change, flush=True), emit_initial=args.emit_initial)
+            print("节点: " + ", ".join(f"{pool} {count}" for pool, count in sorted(watcher.pool_counts.items())))
+            return 0
+        
+        elif args.command == 'logs':
+            if args.backend == 'mock':
+                backend = MockLogBackend()
+            elif args.log_dir:
+                backend = FileLogBackend(args.log_dir)
+            else:
+                logger.error("--log-dir is required for the file backend")
+                return 1
+            
+            instances = args.instances.split(',') if args.instances else None
+            success = monitor.follow_logs(args.job_id, backend, instances=instances, follow=args.follow)
+            return 0 if success else 1
+        
         else:
             parser.print_help()
             return 1
@@ -667,7 +1436,17 @@ def main():
             import traceback
             traceback.print_exc()
         return 1
+    finally:
+        if hooks is not None:
+            # 等待已触发的钩子执行完
+            hooks.close(wait=True)
+        if metrics_server is not None:
+            metrics_server.stop()
+        if cassette is not None:
+            cassette.close()
+        if registry is not None:
+            registry.close()
 
 
 if __name__ == "__main__":
-    exit(main())
+    exit(run_with_profiling(main))
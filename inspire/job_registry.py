@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启智(Inspire)本地任务登记表
+Local SQLite registry of submitted jobs, indexed by name prefix and tag
+
+平台 OpenAPI 没有任务列表接口，提交后只拿到 job_id。JobRegistry 在本地 SQLite 文件中记录本客户端提交的
+每个任务 (job_id、名称、启动命令、规格、环境变量、完整负载和标签)，InspireAPI 设置了 registry 时
+submit_job_payload 成功后自动写入：
+- 名称上有索引，前缀查询是一次索引范围扫描
+- 标签单独成表 (tag, job_id)，按标签查询不需要扫描全部任务；超参数等用 key=value 形式的标签记录
+- 命令行的 --job-id 可以写选择器 (如 tag:lr=3e-4)，在本地解析成任务ID，不访问平台
+
+选择器由逗号分隔的条件组成，条件之间是"且"的关系：
+    name:sweep-lr        名称以 sweep-lr 开头
+    tag:lr=3e-4          带有标签 lr=3e-4
+    job-abc123           任务ID本身 (没有 name:/tag: 前缀的条件)
+
+数据库使用 WAL 模式，多个进程 (如同时运行的提交脚本和监控) 可以同时读写。
+新建的目录和数据库文件权限为 0700/0600，只有当前用户可以读取记录的环境变量。
+
+Usage:
+    registry = JobRegistry()   # 默认 ~/.inspire/jobs.db，可用环境变量 INSPIRE_REGISTRY 指定
+    api = InspireAPI(config, registry=registry)
+    api.create_training_job(..., tags=['sweep=lr', 'lr=3e-4'])
+    registry.resolve('name:sweep-,tag:lr=3e-4')   # ['job-...', ...]
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+REGISTRY_VERSION = 1
+SELECTOR_KEYS = ('name', 'tag')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    command TEXT NOT NULL,
+    spec_id TEXT,
+    envs TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_name ON jobs (name);
+CREATE TABLE IF NOT EXISTS tags (
+    tag TEXT NOT NULL,
+    job_id TEXT NOT NULL REFERENCES jobs (job_id) ON DELETE CASCADE,
+    PRIMARY KEY (tag, job_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS tags_job ON tags (job_id);
+"""
+
+
+def default_registry_path() -> str:
+    """登记表默认路径: 环境变量 INSPIRE_REGISTRY，否则为 ~/.inspire/jobs.db"""
+    return os.getenv('INSPIRE_REGISTRY') or os.path.join(os.path.expanduser('~'), '.inspire', 'jobs.db')
+
+
+@dataclass
+class JobRecord:
+    """一个已提交任务的记录"""
+    job_id: str
+    name: str
+    command: str
+    spec_id: Optional[str] = None
+    envs: List[Dict[str, Any]] = field(default_factory=list)
+    tags: List[str] = field(default_factory=list)
+    created_at: float = 0.0
+    payload: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self, include_payload: bool = False) -> Dict[str, Any]:
+        data = dict(self.__dict__)
+        if not include_payload:
+            del data['payload']
+        return data
+
+
+def parse_selector(selector: str) -> List[Tuple[str, str]]:
+    """
+    解析选择器
+
+    Args:
+        selector: 逗号分隔的条件，如 "name:sweep-,tag:lr=3e-4"
+
+    Returns:
+        (类型, 值) 列表，类型为 name、tag 或 job_id
+
+    Raises:
+        ValueError: 选择器为空或条件的值为空时
+    """
+    terms = []
+    for term in selector.split(','):
+        term = term.strip()
+        if not term:
+            continue
+        key, sep, value = term.partition(':')
+        if sep and key in SELECTOR_KEYS:
+            if not value:
+                raise ValueError(f"Empty value in job selector term '{term}'")
+            terms.append((key, value))
+        else:
+            terms.append(('job_id', term))
+    if not terms:
+        raise ValueError(f"Invalid job selector '{selector}'")
+    return terms
+
+
+def is_selector(value: str) -> bool:
+    """value 是否包含 name:/tag: 条件 (只有任务ID时不需要查询登记表)"""
+    return any(kind != 'job_id' for kind, _ in parse_selector(value))
+
+
+def _prefix_upper_bound(prefix: str) -> Optional[str]:
+    """大于所有以 prefix 开头的字符串的最小字符串 (按码点比较)，不存在时返回None"""
+    while prefix and ord(prefix[-1]) == 0x10FFFF:
+        prefix = prefix[:-1]
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class JobRegistry:
+    """
+    本地任务登记表 (线程安全)
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        打开 (不存在时创建) 登记表
+
+        Args:
+            path: SQLite 文件路径 (默认: default_registry_path())，":memory:" 为内存数据库
+
+        Raises:
+            sqlite3.Error: 无法打开数据库时
+        """
+        self.path = path or default_registry_path()
+        if self.path != ':memory:':
+            # 登记表记录了环境变量等完整负载，目录和数据库文件只允许当前用户访问
+            # (WAL/SHM 文件沿用数据库文件的权限)；已存在的目录和文件不修改权限
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            os.close(os.open(self.path, os.O_CREAT | os.O_RDWR, 0o600))
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        self._conn.execute('PRAGMA foreign_keys = ON')
+        if self.path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode = WAL')
+            self._conn.execute('PRAGMA synchronous = NORMAL')
+        with self._conn:
+            version = self._conn.execute('PRAGMA user_version').fetchone()[0]
+            if version > REGISTRY_VERSION:
+                raise sqlite3.DatabaseError(
+                    f"Job registry {self.path} has unsupported version {version}")
+            self._conn.executescript(_SCHEMA)
+            self._conn.execute(f'PRAGMA user_version = {REGISTRY_VERSION}')
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> 'JobRegistry':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM jobs').fetchone()[0]
+
+    def record(self, job_id: str, payload: Dict[str, Any], tags: Iterable[str] = (),
+               created_at: Optional[float] = None) -> JobRecord:
+        """
+        记录一个已提交的任务 (同一 job_id 再次记录时覆盖负载，标签合并)
+
+        Args:
+            job_id: 平台返回的任务ID
+            payload: 提交的请求负载
+            tags: 标签，如 ['baseline', 'lr=3e-4']
+            created_at: 提交时间 (默认: 当前时间)
+
+        Returns:
+            写入的记录
+
+        Raises:
+            ValueError: job_id 为空或标签为空字符串时
+        """
+        if not job_id:
+            raise ValueError("Cannot record a job without job_id")
+        tags = sorted(set(tags))
+        if any(not tag.strip() for tag in tags):
+            raise ValueError("Job tags cannot be empty")
+        framework_config = payload.get('framework_config') or [{}]
+        record = JobRecord(
+            job_id=job_id,
+            name=payload.get('name', ''),
+            command=payload.get('command', ''),
+            spec_id=framework_config[0].get('spec_id'),
+            envs=list(payload.get('envs') or []),
+            tags=tags,
+            created_at=created_at if created_at is not None else time.time(),
+            payload=payload
+        )
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT INTO jobs (job_id, name, command, spec_id, envs, payload, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (job_id) DO UPDATE SET name = excluded.name, '
+                'command = excluded.command, spec_id = excluded.spec_id, envs = excluded.envs, '
+                'payload = excluded.payload',
+                (job_id, record.name, record.command, record.spec_id,
+                 json.dumps(record.envs, ensure_ascii=False), json.dumps(payload, ensure_ascii=False),
+                 record.created_at)
+            )
+            self._conn.executemany('INSERT OR IGNORE INTO tags (tag, job_id) VALUES (?, ?)',
+                                   [(tag, job_id) for tag in tags])
+        return record
+
+    def add_tags(self, job_ids: Iterable[str], tags: Iterable[str]) -> int:
+        """
+        给已记录的任务添加标签
+
+        Returns:
+            新增的 (任务, 标签) 数量 (未记录的任务被忽略)
+        """
+        rows = [(tag, job_id) for job_id in job_ids for tag in tags]
+        if any(not tag.strip() for tag, _ in rows):
+            raise ValueError("Job tags cannot be empty")
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO tags (tag, job_id) SELECT ?, job_id FROM jobs WHERE job_id = ?', rows)
+            return self._conn.total_changes - before
+
+    def remove_tags(self, job_ids: Iterable[str], tags: Iterable[str]) -> int:
+        """
+        删除任务的标签
+
+        Returns:
+            删除的 (任务, 标签) 数量
+        """
+        rows = [(tag, job_id) for job_id in job_ids for tag in tags]
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany('DELETE FROM tags WHERE tag = ? AND job_id = ?', rows)
+            return self._conn.total_changes - before
+
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        """
+        获取任务记录
+
+        Returns:
+            记录，未记录时返回None
+        """
+        records = self._fetch('WHERE job_id = ?', [job_id])
+        return records[0] if records else None
+
+    def find(self, name_prefix: Optional[str] = None, tags: Iterable[str] = (),
+             job_ids: Iterable[str] = (), limit: Optional[int] = None) -> List[JobRecord]:
+        """
+        查询同时满足所有条件的任务，按提交时间排序
+
+        Args:
+            name_prefix: 名称前缀 (走名称索引的范围查询)
+            tags: 必须全部带有的标签
+            job_ids: 只在这些任务中查找
+            limit: 最多返回条数 (返回最近提交的)
+
+        Returns:
+            记录列表
+        """
+        where, params = self._where(name_prefix, tags, job_ids)
+        if limit is not None:
+            records = self._fetch(f'{where} ORDER BY created_at DESC, job_id LIMIT ?', params + [limit])
+            return records[::-1]
+        return self._fetch(f'{where} ORDER BY created_at, job_id', params)
+
+    def select(self, selector: str) -> List[JobRecord]:
+        """
+        按选择器查询任务记录
+
+        Args:
+            selector: 如 "name:sweep-,tag:lr=3e-4" (见模块说明)
+
+        Returns:
+            记录列表，按提交时间排序
+
+        Raises:
+            ValueError: 选择器无效时
+        """
+        conditions = self._conditions(selector)
+        return self.find(*conditions) if conditions is not None else []
+
+    def resolve(self, selector: str) -> List[str]:
+        """
+        把选择器解析成任务ID，按提交时间排序
+
+        只查询任务ID，不读取和解码负载；只由任务ID组成的选择器直接返回这些ID (不要求已记录)。
+
+        Returns:
+            任务ID列表
+
+        Raises:
+            ValueError: 选择器无效时
+        """
+        if not is_selector(selector):
+            return [value for _, value in parse_selector(selector)]
+        conditions = self._conditions(selector)
+        if conditions is None:
+            return []
+        where, params = self._where(*conditions)
+        with self._lock:
+            rows = self._conn.execute(f'SELECT job_id FROM jobs {where} ORDER BY created_at, job_id', params)
+            return [row[0] for row in rows]
+
+    @staticmethod
+    def _conditions(selector: str) -> Optional[Tuple[Optional[str], List[str], List[str]]]:
+        """把选择器拆成 (名称前缀, 标签, 任务ID)；多个名称前缀互相矛盾时返回None"""
+        name_prefix, tags, job_ids = None, [], []
+        for kind, value in parse_selector(selector):
+            if kind == 'name':
+                if name_prefix is not None and not (value.startswith(name_prefix) or name_prefix.startswith(value)):
+                    return None
+                name_prefix = max(value, name_prefix or '', key=len)
+            elif kind == 'tag':
+                tags.append(value)
+            else:
+                job_ids.append(value)
+        return name_prefix, tags, job_ids
+
+    def _where(self, name_prefix: Optional[str], tags: Iterable[str],
+               job_ids: Iterable[str]) -> Tuple[str, List[Any]]:
+        """生成 WHERE 子句和参数"""
+        clauses, params = [], []
+        if name_prefix:
+            clauses.append('name >= ?')
+            params.append(name_prefix)
+            upper = _prefix_upper_bound(name_prefix)
+            if upper is not None:
+                clauses.append('name < ?')
+                params.append(upper)
+        tags = list(dict.fromkeys(tags))
+        if len(tags) > 1:
+            # 从任务最少的标签出发，其余标签逐个用 (tag, job_id) 主键检查，
+            # 不必读出 lr=3e-4 这类常见标签的全部任务再求交集
+            with self._lock:
+                tags.sort(key=lambda tag: self._conn.execute(
+                    'SELECT COUNT(*) FROM tags WHERE tag = ?', (tag,)).fetchone()[0])
+        for number, tag in enumerate(tags):
+            if number == 0:
+                clauses.append('job_id IN (SELECT job_id FROM tags WHERE tag = ?)')
+            else:
+                clauses.append('EXISTS (SELECT 1 FROM tags WHERE tags.tag = ? AND tags.job_id = jobs.job_id)')
+            params.append(tag)
+        job_ids = list(dict.fromkeys(job_ids))
+        if job_ids:
+            clauses.append(f"job_id IN ({','.join('?' * len(job_ids))})")
+            params.extend(job_ids)
+        return (f"WHERE {' AND '.join(clauses)}" if clauses else ''), params
+
+    def _fetch(self, where: str, params: List[Any]) -> List[JobRecord]:
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT job_id, name, command, spec_id, envs, payload, created_at FROM jobs {where}', params
+            ).fetchall()
+            tags: Dict[str, List[str]] = {row[0]: [] for row in rows}
+            job_ids = list(tags)
+            # SQLite 限制每条语句的参数个数，分批查询标签
+            for start in range(0, len(job_ids), 500):
+                batch = job_ids[start:start + 500]
+                for tag, job_id in self._conn.execute(
+                        f"SELECT tag, job_id FROM tags WHERE job_id IN ({','.join('?' * len(batch))}) "
+                        f"ORDER BY tag", batch):
+                    tags[job_id].append(tag)
+        return [JobRecord(job_id=job_id, name=name, command=command, spec_id=spec_id, envs=json.loads(envs),
+                          tags=tags[job_id], created_at=created_at, payload=json.loads(payload))
+                for job_id, name, command, spec_id, envs, payload, created_at in rows]
+
+
+def resolve_job_ids(value: str, registry: Optional[JobRegistry]) -> List[str]:
+    """
+    把命令行的 --job-id 参数解析成任务ID
+
+    Args:
+        value: 任务ID或选择器
+        registry: 登记表 (只有任务ID时可以为None)
+
+    Returns:
+        任务ID列表
+
+    Raises:
+        ValueError: 选择器无效，或需要登记表但没有提供时
+    """
+    if not is_selector(value):
+        return [job_id for _, job_id in parse_selector(value)]
+    if registry is None:
+        raise ValueError(f"Job selector '{value}' requires the local job registry")
+    return registry.resolve(value)
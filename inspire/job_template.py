@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启智(Inspire)批量提交用的训练任务模板
+Reusable job template for high-rate batch submission
+
+JobTemplate 在创建时构建一次基础负载并验证共享字段，
+之后每个任务只覆盖自身的字段(名称、命令、环境变量等)，避免每次提交都重建完整负载；
+生成的负载由 payload_validators 编译的验证函数整体检查。
+
+Example:
+    template = JobTemplate(
+        logic_compute_group_id="lcg-...", project_id="project-...",
+        workspace_id="ws-...", framework="pytorch", spec_id="...",
+        image="docker.sii.shaipower.online/...", task_priority=8
+    )
+    for lr in ["1e-4", "3e-4"]:
+        template.submit(api, name=f"sweep-lr{lr}", command=f"python train.py --lr {lr}")
+"""
+
+from typing import Any, Dict, List, Optional
+
+from inspire_api_control import InspireAPI, ValidationError, dumps_json
+
+
+class JobTemplate:
+    """
+    训练任务模板
+    """
+
+    # 可以按任务覆盖的顶层字段
+    JOB_FIELDS = frozenset({
+        'task_priority', 'auto_fault_tolerance', 'enable_notification', 'enable_troubleshoot',
+        'max_running_time_ms', 'reserve_on_fail_ms', 'reserve_on_success_ms', 'tb_summary_path'
+    })
+    # 可以按任务覆盖的 framework_config 字段
+    FRAMEWORK_FIELDS = frozenset({'image', 'image_type', 'instance_count', 'shm_gi', 'spec_id'})
+
+    def __init__(self,
+                 logic_compute_group_id: str,
+                 project_id: str,
+                 workspace_id: str,
+                 framework: str,
+                 spec_id: str,
+                 command: str = "",
+                 task_priority: int = InspireAPI.DEFAULT_TASK_PRIORITY,
+                 instance_count: int = InspireAPI.DEFAULT_INSTANCE_COUNT,
+                 shm_gi: int = InspireAPI.DEFAULT_SHM_SIZE,
+                 dataset_info: Optional[list] = None,
+                 envs: Optional[list] = None,
+                 **defaults: Any):
+        """
+        构建并验证共享字段
+
+        Args:
+            logic_compute_group_id: 计算资源组ID
+            project_id: 项目ID
+            workspace_id: 工作空间ID
+            framework: 训练框架
+            spec_id: 规格ID
+            command: 默认启动命令 (可在 render 时覆盖)
+            task_priority: 任务优先级
+            instance_count: 实例数量
+            shm_gi: 共享内存大小
+            dataset_info: 所有任务共享的数据集信息
+            envs: 所有任务共享的环境变量
+            **defaults: 其余 create_training_job 参数的默认值
+
+        Raises:
+            ValidationError: 共享字段验证失败时
+        """
+        unknown = set(defaults) - self.JOB_FIELDS - self.FRAMEWORK_FIELDS
+        if unknown:
+            raise ValidationError(f"Unknown job template parameters: {sorted(unknown)}")
+
+        InspireAPI._validate_required_params(
+            logic_compute_group_id=logic_compute_group_id,
+            project_id=project_id,
+            workspace_id=workspace_id,
+            framework=framework,
+            spec_id=spec_id
+        )
+        InspireAPI._validate_job_resources(instance_count, shm_gi, task_priority)
+
+        self.command = command
+        self._base = InspireAPI.build_job_payload(
+            name="",
+            logic_compute_group_id=logic_compute_group_id,
+            project_id=project_id,
+            workspace_id=workspace_id,
+            framework=framework,
+            command=command,
+            spec_id=spec_id,
+            task_priority=task_priority,
+            instance_count=instance_count,
+            shm_gi=shm_gi,
+            dataset_info=dataset_info,
+            envs=envs,
+            **defaults
+        )
+        self._shared_envs = self._base['envs']
+        # 名称和命令在 render 时提供，这里用占位值验证共享字段 (类型、dataset_info/envs 的每一项)
+        InspireAPI.validate_job_payload({**self._base, 'name': 'template', 'command': command or 'template'})
+
+    def render(self, name: str, command: Optional[str] = None,
+               envs: Optional[list] = None, dataset_info: Optional[list] = None,
+               **overrides: Any) -> Dict[str, Any]:
+        """
+        生成单个任务的请求负载
+
+        只复制被覆盖的部分，未覆盖的嵌套结构与模板共享，调用方不应修改返回值。
+
+        Args:
+            name: 任务名称
+            command: 启动命令 (默认: 模板命令)
+            envs: 追加到共享环境变量之后的任务环境变量
+            dataset_info: 替换共享数据集信息
+            **overrides: 覆盖 JOB_FIELDS / FRAMEWORK_FIELDS 中的字段
+
+        Returns:
+            请求负载
+
+        Raises:
+            ValidationError: 任务字段验证失败时
+        """
+        command = command if command is not None else self.command
+        payload = self._base.copy()
+        payload['name'] = name
+        payload['command'] = command
+        if envs:
+            payload['envs'] = self._shared_envs + envs
+        if dataset_info is not None:
+            payload['dataset_info'] = dataset_info
+
+        if overrides:
+            framework_overrides = {}
+            for key, value in overrides.items():
+                if key in self.FRAMEWORK_FIELDS:
+                    framework_overrides[key] = value
+                elif key in self.JOB_FIELDS:
+                    payload[key] = value
+                else:
+                    raise ValidationError(f"Unknown job parameter '{key}'")
+
+            if framework_overrides:
+                payload['framework_config'] = [{**self._base['framework_config'][0], **framework_overrides}]
+
+        # 编译后的验证函数检查整个负载只需几微秒，覆盖字段和追加的 envs/dataset_info 都会被检查
+        InspireAPI.validate_job_payload(payload)
+        return payload
+
+    def render_json(self, name: str, **kwargs: Any) -> bytes:
+        """
+        生成单个任务的已编码请求体
+
+        Args:
+            name: 任务名称
+            **kwargs: 同 render
+
+        Returns:
+            JSON字节串 (安装了 orjson 时使用 orjson 编码)
+        """
+        return dumps_json(self.render(name, **kwargs))
+
+    def submit(self, api: InspireAPI, name: str, tags: Optional[List[str]] = None, **kwargs: Any) -> Dict[str, Any]:
+        """
+        生成并提交单个任务
+
+        Args:
+            api: 已认证的API客户端
+            name: 任务名称
+            tags: 记录到 api.registry 的标签，如 ['sweep=lr', 'lr=3e-4']
+            **kwargs: 同 render
+
+        Returns:
+            API响应数据
+        """
+        payload = self.render(name, **kwargs)
+        return api.submit_job_payload(payload, body=dumps_json(payload), tags=tags)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启智(Inspire) API 大响应的流式JSON解析
+Incremental JSON parsing that yields array items while the response is downloading
+
+集群节点列表等响应的主体是一个大数组 (如 data.nodes)，response.json() 需要先把整个响应读入内存，
+再一次性构造所有对象。iter_json_array 按块读取响应 (requests 在 iter_content 中完成 gzip/br 解压)，
+沿给定路径找到数组后逐个解码并产出元素，已产出的元素不再被解析器引用：
+- 峰值内存只与单个元素和一个读取块有关，不随响应大小增长
+- 路径以外的字段 (code、message、data.total 等) 照常解码，写入调用方传入的 envelope 字典
+- 每个元素由标准库 json 的C扫描器解码，结果与 json.loads 一致
+
+不依赖第三方流式JSON库；路径以外的单个值仍然需要完整读入后才能解码。
+"""
+
+import re
+import json
+import codecs
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence
+
+
+WHITESPACE = ' \t\n\r'
+NUMBER_CHARS = '0123456789.eE+-'
+_SKIP_WHITESPACE = re.compile(r'[ \t\n\r]*').match
+
+
+class _Reader:
+    """
+    按需读取数据块的文本缓冲区
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self.scan = self._json.scan_once
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """读取下一个数据块，丢弃已解析的部分；没有更多数据时返回False"""
+        while not self.eof:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self.eof = True
+                text = self._decoder.decode(b'', final=True)
+            else:
+                text = self._decoder.decode(chunk)
+            if text or self.eof:
+                self.buffer = self.buffer[self.pos:] + text
+                self.pos = 0
+                return bool(text)
+        return False
+
+    def error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self.buffer, self.pos)
+
+    def peek(self) -> str:
+        """跳过空白并返回下一个字符 (数据结束时返回空字符串)"""
+        while True:
+            buffer, pos = self.buffer, self.pos
+            while pos < len(buffer) and buffer[pos] in WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < len(buffer):
+                return buffer[pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise self.error(f"Expecting '{char}'")
+        self.pos += 1
+
+    def complete(self, end: int) -> bool:
+        """在 end 结束的值是否完整: 数字在缓冲区末尾被截断时 (如 "12" "1." "1e") 需要读完再解码"""
+        buffer = self.buffer
+        if self.eof or (end < len(buffer) and buffer[end] not in NUMBER_CHARS):
+            return True
+        return bool(buffer[end:].strip(NUMBER_CHARS))
+
+    def value(self) -> Any:
+        """解码下一个完整的JSON值"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            else:
+                if self.complete(end):
+                    self.pos = end
+                    return value
+            self.fill()
+
+
+def _walk(reader: _Reader, path: Sequence[str], envelope: Dict[str, Any]) -> Iterator[Any]:
+    """解析一个对象，沿 path 进入目标数组并产出元素，其余字段写入 envelope"""
+    reader.expect('{')
+    if reader.peek() == '}':
+        reader.pos += 1
+        return
+    while True:
+        if reader.peek() != '"':
+            raise reader.error("Expecting property name enclosed in double quotes")
+        key = reader.value()
+        reader.expect(':')
+        char = reader.peek()
+        if key == path[0] and len(path) == 1 and char == '[':
+            reader.pos += 1
+            yield from _items(reader)
+        elif key == path[0] and len(path) > 1 and char == '{':
+            yield from _walk(reader, path[1:], envelope.setdefault(key, {}))
+        else:
+            envelope[key] = reader.value()
+
+        char = reader.peek()
+        reader.pos += 1
+        if char == '}':
+            return
+        if char != ',':
+            reader.pos -= 1
+            raise reader.error("Expecting ',' delimiter")
+
+
+def _items(reader: _Reader) -> Iterator[Any]:
+    """产出数组元素，调用前已经读过 '['"""
+    if reader.peek() == ']':
+        reader.pos += 1
+        return
+    scan = reader.scan
+    while True:
+        # 快速路径: 在当前缓冲区内直接用C扫描器连续解码 "元素,元素,..."，
+        # 遇到缓冲区末尾、截断的元素或数组结束时交给下面的通用路径
+        buffer = reader.buffer
+        pos = _SKIP_WHITESPACE(buffer, reader.pos).end()
+        size = len(buffer)
+        while True:
+            try:
+                value, end = scan(buffer, pos)
+            except (StopIteration, json.JSONDecodeError):
+                break
+            if end >= size or buffer[end] != ',':
+                break
+            yield value
+            pos = _SKIP_WHITESPACE(buffer, end + 1).end()
+        reader.pos = pos
+
+        yield reader.value()
+        char = reader.peek()
+        reader.pos += 1
+        if char == ']':
+            return
+        if char != ',':
+            reader.pos -= 1
+            raise reader.error("Expecting ',' delimiter")
+
+
+def iter_json_array(chunks: Iterable[bytes], path: Sequence[str],
+                    envelope: Optional[Dict[str, Any]] = None) -> Iterator[Any]:
+    """
+    流式解析JSON对象，逐个产出 path 指向的数组中的元素
+
+    Args:
+        chunks: UTF-8编码的数据块 (如 response.iter_content(65536))
+        path: 从顶层对象到数组的键路径，如 ('data', 'nodes')
+        envelope: 用于接收路径以外字段的字典，如 {'code': 0, 'data': {'total': 10000}}；
+                  在迭代结束后完整
+
+    Yields:
+        数组元素；路径不存在或不是数组时不产出任何元素 (该值写入 envelope)
+
+    Raises:
+        ValueError: path 为空时
+        json.JSONDecodeError: 数据不是合法JSON或顶层不是对象时
+    """
+    if not path:
+        raise ValueError("path must contain at least one key")
+    reader = _Reader(chunks)
+    yield from _walk(reader, tuple(path), envelope if envelope is not None else {})
+    if reader.peek():
+        raise reader.error("Extra data")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启智(Inspire)工具日志配置
+Logging configuration for the Inspire CLI tools
+
+模块导入时不配置日志，由各命令行入口在启动时调用 configure_logging：
+- text: 与原来相同的可读格式
+- json: 每条日志一行JSON，extra 中的字段(job_id、status 等)作为独立键输出
+- 采样: 对标记了 sample_key 的重复消息(如"状态未变化")每N条只输出1条
+"""
+
+import json
+import logging
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# LogRecord 自带的属性，其余属性视为 extra 字段
+_STANDARD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    JSON Lines 格式化器
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and key != 'sample_key':
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    重复消息采样过滤器
+
+    只作用于带有 extra={'sample_key': ...} 的日志记录：
+    同一 (sample_key, job_id) 每 sample_every 条只放行第1条，
+    放行的记录附带 suppressed 字段说明之前被丢弃了多少条。
+    """
+
+    def __init__(self, sample_every: int):
+        super().__init__()
+        self.sample_every = max(1, sample_every)
+        self._counters: Dict[Tuple[str, Optional[str]], int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        sample_key = getattr(record, 'sample_key', None)
+        if sample_key is None or self.sample_every == 1:
+            return True
+
+        key = (sample_key, getattr(record, 'job_id', None))
+        count = self._counters.get(key, 0)
+        self._counters[key] = count + 1
+        if count % self.sample_every:
+            return False
+        if count:
+            record.suppressed = self.sample_every - 1
+        return True
+
+
+def configure_logging(level: int = logging.INFO, log_format: str = 'text',
+                      sample_every: int = 1) -> None:
+    """
+    配置根日志记录器
+
+    Args:
+        level: 日志级别
+        log_format: 'text' 或 'json'
+        sample_every: 重复消息每N条输出1条 (默认: 1，不采样)
+    """
+    handler = logging.StreamHandler()
+    if log_format == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    if sample_every > 1:
+        handler.addFilter(SamplingFilter(sample_every))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启智(Inspire)训练任务日志增量跟踪
+Incremental log tailing for Inspire training job instances
+
+当前 OpenAPI 文档中没有日志接口，因此日志读取被抽象为 LogBackend 接口：
+- MockLogBackend: 生成合成日志，用于演示和离线调试
+- FileLogBackend: 读取共享文件系统上每个实例的日志文件 (<log_dir>/<instance>.log)
+
+LogTailer 为每个实例记录读取偏移量(行号或字节)，每次轮询只取新增内容，
+将多实例的日志按时间戳合并为一个有序流。缓冲区有上限，满时不再读取 (背压)，
+偏移量只推进到已放入缓冲区的行，未读取的日志留在后端，不会丢失。
+一次轮询读满上限时 (积压的日志) 不等待轮询间隔继续读取，read_all 读到没有新日志为止。
+"""
+
+import os
+import re
+import time
+import heapq
+import logging
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Callable
+from dataclasses import dataclass, field
+
+from stop_token import StopToken
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LogLine:
+    """单行日志"""
+    timestamp: float
+    instance: str
+    offset: int
+    text: str
+
+
+@dataclass
+class LogChunk:
+    """一次增量读取的结果"""
+    lines: List[LogLine] = field(default_factory=list)
+    next_offset: int = 0
+
+
+class LogBackend(ABC):
+    """
+    日志后端接口
+
+    offset 的含义由后端决定(行号或字节偏移)，LogTailer 只负责保存并原样传回。
+    """
+
+    @abstractmethod
+    def list_instances(self, job_id: str) -> List[str]:
+        """
+        列出任务的实例
+
+        Args:
+            job_id: 任务ID
+
+        Returns:
+            实例名称列表
+        """
+
+    @abstractmethod
+    def fetch(self, job_id: str, instance: str, offset: int, limit: int) -> LogChunk:
+        """
+        从 offset 开始读取最多 limit 行新日志
+
+        Args:
+            job_id: 任务ID
+            instance: 实例名称
+            offset: 上次读取结束的位置
+            limit: 最多返回的行数
+
+        Returns:
+            日志块及下一次读取的偏移量
+        """
+
+
+class MockLogBackend(LogBackend):
+    """
+    模拟日志后端
+
+    每个实例按固定速率产生日志，按行号偏移读取，不在内存中保留历史日志。
+    """
+
+    def __init__(self, instances: Optional[List[str]] = None, lines_per_second: float = 2.0):
+        """
+        Args:
+            instances: 实例名称列表 (默认: 两个实例)
+            lines_per_second: 每个实例每秒产生的日志行数
+        """
+        self.instances = instances or ['node-0', 'node-1']
+        self.lines_per_second = lines_per_second
+        self.start_time = time.time()
+
+    def list_instances(self, job_id: str) -> List[str]:
+        return list(self.instances)
+
+    def fetch(self, job_id: str, instance: str, offset: int, limit: int) -> LogChunk:
+        available = int((time.time() - self.start_time) * self.lines_per_second)
+        end = min(available, offset + limit)
+        # 不同实例错开半个周期，便于观察合并顺序
+        phase = (self.instances.index(instance) if instance in self.instances else 0) / (
+            2 * self.lines_per_second * max(len(self.instances), 1))
+        lines = [
+            LogLine(
+                timestamp=self.start_time + index / self.lines_per_second + phase,
+                instance=instance,
+                offset=index,
+                text=f"step {index} | loss {1.0 / (index + 1):.4f} | job {job_id}"
+            )
+            for index in range(offset, end)
+        ]
+        return LogChunk(lines=lines, next_offset=max(offset, end))
+
+
+class FileLogBackend(LogBackend):
+    """
+    共享文件系统日志后端
+
+    读取 <log_dir>/<instance>.log，按字节偏移增量读取，
+    只消费到最后一个完整行，未写完的行留到下一次读取。
+    """
+
+    LOG_SUFFIX = '.log'
+    TIMESTAMP_PATTERN = re.compile(r'^\[?(\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:\.\d+)?)')
+
+    def __init__(self, log_dir: str, max_bytes: int = 1 << 20):
+        """
+        Args:
+            log_dir: 日志目录
+            max_bytes: 单次读取的最大字节数
+        """
+        self.log_dir = log_dir
+        self.max_bytes = max_bytes
+
+    def list_instances(self, job_id: str) -> List[str]:
+        try:
+            names = os.listdir(self.log_dir)
+        except OSError as e:
+            logger.error(f"Cannot list log directory {self.log_dir}: {str(e)}")
+            return []
+        return sorted(name[:-len(self.LOG_SUFFIX)] for name in names if name.endswith(self.LOG_SUFFIX))
+
+    def _parse_timestamp(self, text: str, default: float) -> float:
+        """解析行首时间戳，没有时使用读取时间"""
+        match = self.TIMESTAMP_PATTERN.match(text)
+        if match:
+            try:
+                return datetime.fromisoformat(match.group(1).replace(' ', 'T')).timestamp()
+            except ValueError:
+                pass
+        return default
+
+    def fetch(self, job_id: str, instance: str, offset: int, limit: int) -> LogChunk:
+        path = os.path.join(self.log_dir, instance + self.LOG_SUFFIX)
+        try:
+            with open(path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                size = f.tell()
+                if size < offset:
+                    # 文件被截断或轮转，从头开始读
+                    logger.warning(f"Log file {path} was truncated, restarting from the beginning")
+                    offset = 0
+                f.seek(offset)
+                data = f.read(self.max_bytes)
+        except OSError as e:
+            logger.debug(f"Cannot read log file {path}: {str(e)}")
+            return LogChunk(next_offset=offset)
+
+        end = data.rfind(b'\n') + 1
+        if end == 0 and len(data) == self.max_bytes:
+            # 超长行，整块输出避免卡住
+            end = len(data)
+
+        now = time.time()
+        lines = []
+        position = offset
+        for raw in data[:end].splitlines(keepends=True):
+            if len(lines) >= limit:
+                break
+            text = raw.decode('utf-8', errors='replace').rstrip('\r\n')
+            lines.append(LogLine(
+                timestamp=self._parse_timestamp(text, now),
+                instance=instance,
+                offset=position,
+                text=text
+            ))
+            position += len(raw)
+
+        return LogChunk(lines=lines, next_offset=position)
+
+
+class LogTailer:
+    """
+    多实例日志增量跟踪器
+    """
+
+    def __init__(self, backend: LogBackend, job_id: str,
+                 instances: Optional[List[str]] = None,
+                 max_lines_per_fetch: int = 500,
+                 buffer_size: int = 10000):
+        """
+        Args:
+            backend: 日志后端
+            job_id: 任务ID
+            instances: 要跟踪的实例 (默认: 后端列出的全部实例)
+            max_lines_per_fetch: 每个实例每次轮询最多读取的行数
+            buffer_size: 缓冲区最多保留的行数，满时暂停读取，直到 drain() 取出日志
+        """
+        self.backend = backend
+        self.job_id = job_id
+        self.instances = instances
+        self.max_lines_per_fetch = max_lines_per_fetch
+        self.buffer_size = buffer_size
+        self.buffer: deque = deque()
+        self.offsets: Dict[str, int] = {}
+        self._next_instance = 0  # 缓冲区不够时轮流优先读取的实例
+        self.behind = False  # 上一次轮询是否读满了上限 (后端可能还有未读取的日志)
+
+    def _current_instances(self) -> List[str]:
+        """获取当前跟踪的实例，新出现的实例从头开始读"""
+        if self.instances is not None:
+            return self.instances
+        return self.backend.list_instances(self.job_id)
+
+    def poll(self) -> int:
+        """
+        拉取所有实例的新日志并按时间戳合并进缓冲区
+
+        每次读取的行数不超过缓冲区剩余空间 (在实例之间平均分配，起始实例轮换)，
+        偏移量只推进到实际读取的行，缓冲区满时日志留在后端等下一次读取。
+
+        Returns:
+            本次新增的行数
+        """
+        instances = self._current_instances()
+        free = self.buffer_size - len(self.buffer)
+        self.behind = free <= 0
+        if not instances or free <= 0:
+            return 0
+
+        start = self._next_instance % len(instances)
+        self._next_instance = start + 1
+        chunks = []
+        for position, instance in enumerate(instances[start:] + instances[:start]):
+            limit = min(self.max_lines_per_fetch, free // (len(instances) - position))
+            if limit <= 0:
+                continue
+            offset = self.offsets.get(instance, 0)
+            chunk = self.backend.fetch(self.job_id, instance, offset, limit)
+            lines = chunk.lines[:limit]
+            if len(lines) >= limit:
+                self.behind = True
+            if len(lines) < len(chunk.lines):
+                # 后端返回了超过 limit 的行，偏移量只推进到保留的行
+                self.offsets[instance] = chunk.lines[limit].offset
+            else:
+                self.offsets[instance] = chunk.next_offset
+            if lines:
+                chunks.append(lines)
+                free -= len(lines)
+
+        count = 0
+        for line in heapq.merge(*chunks, key=lambda line: (line.timestamp, line.instance)):
+            self.buffer.append(line)
+            count += 1
+        return count
+
+    def drain(self) -> Iterator[LogLine]:
+        """
+        取出缓冲区中的日志
+
+        Yields:
+            按时间排序的日志行
+        """
+        while self.buffer:
+            yield self.buffer.popleft()
+
+    def read_all(self) -> Iterator[LogLine]:
+        """
+        读取所有实例的剩余日志，直到一次轮询没有新日志
+
+        Yields:
+            日志行 (每次轮询内按时间排序)
+        """
+        while True:
+            count = self.poll()
+            yield from self.drain()
+            if count == 0:
+                break
+
+    def follow(self, poll_interval: float = 2.0,
+               should_stop: Optional[Callable[[], bool]] = None,
+               stop_token: Optional[StopToken] = None) -> Iterator[LogLine]:
+        """
+        持续跟踪日志
+
+        Args:
+            poll_interval: 轮询间隔(秒)
+            should_stop: 返回True时停止跟踪(停止前读取全部剩余日志)
+            stop_token: 停止令牌，停止时立即结束等待并读取全部剩余日志
+
+        Yields:
+            按时间排序的日志行
+        """
+        while True:
+            stopping = (stop_token is not None and stop_token.stopped) or \
+                (should_stop is not None and should_stop())
+            if stopping:
+                yield from self.read_all()
+                break
+            self.poll()
+            yield from self.drain()
+            if self.behind:
+                # 积压的日志不等待轮询间隔，直到追上后端
+                continue
+            if stop_token is not None:
+                stop_token.wait(poll_interval)
+            else:
+                time.sleep(poll_interval)
+
+
+def format_log_line(line: LogLine) -> str:
+    """
+    格式化日志行
+
+    Args:
+        line: 日志行
+
+    Returns:
+        带时间和实例前缀的文本
+    """
+    timestamp = datetime.fromtimestamp(line.timestamp).strftime('%H:%M:%S')
+    return f"{timestamp} [{line.instance}] {line.text}"
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启智(Inspire)任务状态 Prometheus/OpenMetrics 导出
+Prometheus/OpenMetrics exporter for monitored job states
+
+FleetMetrics 作为监控插件在每次轮询时更新内存中的任务状态和API调用统计，
+MetricsServer 在本地端口以 OpenMetrics 文本格式提供 /metrics：
+- inspire_jobs{status} / inspire_jobs_by_sub_status{status,sub_status}: 各状态任务数
+- inspire_job_state_seconds{job_id,status}: 任务处于当前状态的时间
+- inspire_job_transitions_total{from_status,to_status}: 状态变化次数
+- inspire_api_request_duration_seconds{endpoint}: API请求延迟直方图
+- inspire_api_errors_total{endpoint,error}: API错误次数
+- inspire_cluster_nodes{resource_pool} / inspire_node_changes_total{kind,from_pool,to_pool}:
+  各资源池节点数和节点变化次数 (由 node_watcher 更新，没有数据时不输出)
+
+抓取只读取内存中的状态，不会调用启智API。
+"""
+
+import time
+import bisect
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from monitor_plugin import MonitorPlugin
+
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+# API请求延迟直方图的桶上界(秒)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    """转义标签值"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels) -> str:
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+class _Histogram:
+    """固定桶的直方图"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += 1
+        self.sum += value
+
+
+class FleetMetrics(MonitorPlugin):
+    """
+    内存中的任务状态和API调用指标
+
+    可以作为插件注册到 JobMonitor，也可以由 FleetMonitor 在主进程中按事件更新。
+    所有方法线程安全，render() 供 HTTP 抓取线程调用。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # job_id -> (status, sub_status, 进入当前状态的时间)
+        self._jobs: Dict[str, Tuple[str, int, float]] = {}
+        self._transitions: Dict[Tuple[str, str], int] = {}
+        self._latency: Dict[str, _Histogram] = {}
+        self._errors: Dict[Tuple[str, str], int] = {}
+        self._node_pools: Dict[str, int] = {}
+        self._node_changes: Dict[Tuple[str, str, str], int] = {}
+
+    def on_snapshot(self, snapshot, previous) -> None:
+        self.record_status(snapshot.job_id, snapshot.status, snapshot.sub_status)
+
+    def on_api_call(self, endpoint: str, seconds: float, error: Optional[str]) -> None:
+        self.record_api_call(endpoint, seconds, error)
+
+    def record_status(self, job_id: str, status: str, sub_status: int,
+                      timestamp: Optional[float] = None) -> None:
+        """
+        记录任务的当前状态
+
+        Args:
+            job_id: 任务ID
+            status: 任务状态
+            sub_status: 子状态
+            timestamp: 观察到该状态的时间 (默认: 当前时间)
+        """
+        now = timestamp if timestamp is not None else time.time()
+        with self._lock:
+            current = self._jobs.get(job_id)
+            if current is not None and current[0] == status:
+                if current[1] != sub_status:
+                    self._jobs[job_id] = (status, sub_status, current[2])
+                return
+            if current is not None:
+                key = (current[0], status)
+                self._transitions[key] = self._transitions.get(key, 0) + 1
+            self._jobs[job_id] = (status, sub_status, now)
+
+    def record_api_call(self, endpoint: str, seconds: float, error: Optional[str] = None) -> None:
+        """
+        记录一次API调用
+
+        Args:
+            endpoint: 接口路径
+            seconds: 耗时(秒)
+            error: 错误类型，成功时为None
+        """
+        with self._lock:
+            histogram = self._latency.get(endpoint)
+            if histogram is None:
+                histogram = self._latency[endpoint] = _Histogram()
+            histogram.observe(seconds)
+            if error is not None:
+                key = (endpoint, error)
+                self._errors[key] = self._errors.get(key, 0) + 1
+
+    def record_node_pools(self, counts: Dict[str, int]) -> None:
+        """
+        记录各资源池的当前节点数
+
+        Args:
+            counts: resource_pool -> 节点数
+        """
+        with self._lock:
+            self._node_pools = dict(counts)
+
+    def record_node_change(self, kind: str, from_pool: Optional[str], to_pool: Optional[str]) -> None:
+        """
+        记录一次节点变化
+
+        Args:
+            kind: added/removed/moved
+            from_pool: 原资源池 (新增节点为None)
+            to_pool: 新资源池 (移除的节点为None)
+        """
+        key = (kind, from_pool or '', to_pool or '')
+        with self._lock:
+            self._node_changes[key] = self._node_changes.get(key, 0) + 1
+
+    def render(self) -> str:
+        """
+        生成 OpenMetrics 文本
+
+        Returns:
+            以 "# EOF" 结尾的指标文本
+        """
+        now = time.time()
+        with self._lock:
+            jobs = list(self._jobs.items())
+            transitions = sorted(self._transitions.items())
+            latency = sorted((endpoint, list(h.counts), h.total, h.sum) for endpoint, h in self._latency.items())
+            errors = sorted(self._errors.items())
+            node_pools = sorted(self._node_pools.items())
+            node_changes = sorted(self._node_changes.items())
+
+        by_status: Dict[str, int] = {}
+        by_sub_status: Dict[Tuple[str, int], int] = {}
+        for _, (status, sub_status, _) in jobs:
+            by_status[status] = by_status.get(status, 0) + 1
+            by_sub_status[(status, sub_status)] = by_sub_status.get((status, sub_status), 0) + 1
+
+        lines: List[str] = [
+            '# TYPE inspire_jobs gauge',
+            '# HELP inspire_jobs Monitored jobs by current status.',
+        ]
+        lines += [f'inspire_jobs{_labels(status=status)} {count}' for status, count in sorted(by_status.items())]
+
+        lines += [
+            '# TYPE inspire_jobs_by_sub_status gauge',
+            '# HELP inspire_jobs_by_sub_status Monitored jobs by current status and sub_status.',
+        ]
+        lines += [f'inspire_jobs_by_sub_status{_labels(status=status, sub_status=sub_status)} {count}'
+                  for (status, sub_status), count in sorted(by_sub_status.items())]
+
+        lines += [
+            '# TYPE inspire_job_state_seconds gauge',
+            '# UNIT inspire_job_state_seconds seconds',
+            '# HELP inspire_job_state_seconds Time each job has spent in its current status.',
+        ]
+        lines += [f'inspire_job_state_seconds{_labels(job_id=job_id, status=status)} {now - since:.3f}'
+                  for job_id, (status, _, since) in sorted(jobs)]
+
+        lines += [
+            '# TYPE inspire_job_transitions counter',
+            '# HELP inspire_job_transitions Observed job status transitions.',
+        ]
+        lines += [f'inspire_job_transitions_total{_labels(from_status=old, to_status=new)} {count}'
+                  for (old, new), count in transitions]
+
+        lines += [
+            '# TYPE inspire_api_request_duration_seconds histogram',
+            '# UNIT inspire_api_request_duration_seconds seconds',
+            '# HELP inspire_api_request_duration_seconds Inspire API request latency.',
+        ]
+        for endpoint, counts, total, latency_sum in latency:
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'inspire_api_request_duration_seconds_bucket{_labels(endpoint=endpoint, le=le)} '
+                             f'{cumulative}')
+            lines.append(f'inspire_api_request_duration_seconds_count{_labels(endpoint=endpoint)} {total}')
+            lines.append(f'inspire_api_request_duration_seconds_sum{_labels(endpoint=endpoint)} {latency_sum:.6f}')
+
+        lines += [
+            '# TYPE inspire_api_errors counter',
+            '# HELP inspire_api_errors Failed Inspire API requests by error type.',
+        ]
+        lines += [f'inspire_api_errors_total{_labels(endpoint=endpoint, error=error)} {count}'
+                  for (endpoint, error), count in errors]
+
+        if node_pools or node_changes:
+            lines += [
+                '# TYPE inspire_cluster_nodes gauge',
+                '# HELP inspire_cluster_nodes Cluster nodes by resource pool.',
+            ]
+            lines += [f'inspire_cluster_nodes{_labels(resource_pool=pool)} {count}' for pool, count in node_pools]
+            lines += [
+                '# TYPE inspire_node_changes counter',
+                '# HELP inspire_node_changes Observed node additions, removals and resource pool moves.',
+            ]
+            lines += [f'inspire_node_changes_total{_labels(kind=kind, from_pool=old, to_pool=new)} {count}'
+                      for (kind, old, new), count in node_changes]
+
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+
+class ApiCallRecorder(MonitorPlugin):
+    """
+    缓存API调用记录的插件
+
+    FleetMonitor 的工作进程用它收集本轮的调用，再通过事件队列批量发送给主进程。
+    """
+
+    def __init__(self):
+        self.calls: List[Tuple[str, float, Optional[str]]] = []
+
+    def on_api_call(self, endpoint: str, seconds: float, error: Optional[str]) -> None:
+        self.calls.append((endpoint, seconds, error))
+
+    def drain(self) -> List[Tuple[str, float, Optional[str]]]:
+        """取出并清空已缓存的调用记录"""
+        calls, self.calls = self.calls, []
+        return calls
+
+
+class MetricsServer:
+    """
+    在后台线程中提供 /metrics 的HTTP服务
+    """
+
+    def __init__(self, metrics: FleetMetrics, port: int, host: str = '127.0.0.1'):
+        """
+        Args:
+            metrics: 指标对象
+            port: 监听端口 (0 表示随机端口)
+            host: 监听地址 (默认只监听本机)
+        """
+        self.metrics = metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug("Metrics request from %s: %s", self.address_string(), format % args)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """启动后台服务线程"""
+        self._thread = threading.Thread(target=self.server.serve_forever, name='metrics-server', daemon=True)
+        self._thread.start()
+        logger.info(f"Serving metrics on http://{self.server.server_address[0]}:{self.port}/metrics")
+
+    def stop(self) -> None:
+        """停止服务"""
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
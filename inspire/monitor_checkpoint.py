@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启智(Inspire)任务监控断点文件
+Checkpointed monitor state for resumable monitoring
+
+按任务保存监控开始时间、最后一次状态快照和通知游标(最后一次已通知的状态)，
+监控重启后 `monitor --resume` 从断点继续：超时计时不重置，也不会重复发送 "Initial Status" 通知。
+
+只在状态变化时写入，先写临时文件再 os.replace 原子替换，进程中途退出不会留下损坏的文件。
+"""
+
+import os
+import json
+import logging
+import tempfile
+from typing import Any, Dict, Optional
+from dataclasses import dataclass
+
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_VERSION = 1
+
+
+@dataclass
+class JobCheckpoint:
+    """单个任务的监控断点"""
+    start_time: float
+    snapshot: Optional[Dict[str, Any]] = None
+    notified_status: Optional[str] = None
+    notified_sub_status: Optional[int] = None
+    notifications: int = 0
+
+
+class MonitorCheckpoint:
+    """
+    监控断点文件
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: 断点文件路径
+        """
+        self.path = path
+        self.jobs: Dict[str, JobCheckpoint] = {}
+        self.load()
+
+    def load(self) -> None:
+        """读取断点文件，文件不存在或损坏时从空状态开始"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self.path}: {str(e)}")
+            return
+
+        if data.get('version') != CHECKPOINT_VERSION:
+            logger.warning(f"Ignoring checkpoint {self.path} with unsupported version {data.get('version')}")
+            return
+
+        for job_id, state in data.get('jobs', {}).items():
+            try:
+                self.jobs[job_id] = JobCheckpoint(**state)
+            except TypeError as e:
+                logger.warning(f"Ignoring malformed checkpoint entry for job {job_id}: {str(e)}")
+
+    def get(self, job_id: str) -> Optional[JobCheckpoint]:
+        """
+        获取任务断点
+
+        Args:
+            job_id: 任务ID
+
+        Returns:
+            断点，不存在时返回None
+        """
+        return self.jobs.get(job_id)
+
+    def update(self, job_id: str, state: JobCheckpoint) -> None:
+        """
+        更新任务断点并立即原子写入文件
+
+        Args:
+            job_id: 任务ID
+            state: 断点
+        """
+        self.jobs[job_id] = state
+        self.save()
+
+    def save(self) -> None:
+        """原子写入断点文件"""
+        data = {
+            'version': CHECKPOINT_VERSION,
+            'jobs': {job_id: state.__dict__ for job_id, state in self.jobs.items()}
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix='.checkpoint-', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Failed to write checkpoint {self.path}: {str(e)}")
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启智(Inspire)任务监控插件接口
+Monitor plugin interface for JobMonitor
+
+插件在每次轮询得到状态快照后被调用，可以向快照附加额外信息或触发告警；
+每次API请求后也会收到一次调用记录。
+插件模块只依赖本接口，不需要导入 job_monitor。
+"""
+
+
+class MonitorPlugin:
+    """
+    监控插件基类
+
+    子类按需覆盖 on_snapshot，默认不做任何处理。
+    """
+
+    def on_snapshot(self, snapshot, previous) -> None:
+        """
+        每次轮询得到新快照时调用(在保存和打印快照之前)
+
+        Args:
+            snapshot: 当前状态快照，插件可以修改其字段
+            previous: 上一次状态快照，首次轮询时为None
+        """
+        pass
+
+    def on_api_call(self, endpoint: str, seconds: float, error) -> None:
+        """
+        每次调用启智API后调用(包括失败的请求)
+
+        Args:
+            endpoint: 接口路径，如 'train_job/detail'
+            seconds: 请求耗时(秒)
+            error: 错误类型(异常类名或 'http_<状态码>')，成功时为None
+        """
+        pass
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启智(Inspire) API 请求负载验证
+Payload validators generated from the data models in the OpenAPI document
+
+从 `启智openapi 接口文档.md` 的"数据模型"部分解析字段和类型，为指定模型(默认为创建任务的
+JobOpenapi)生成一个 Python 验证函数：
+- 嵌套模型(framework_config、envs、dataset_info)展开为直线代码，没有逐字段的解释开销
+- 错误路径(如 envs[3].name)只在出错时格式化，验证通过的负载不创建任何中间对象
+- 文档中没有的约束(必填字段、优先级范围、环境变量名格式等)由 FIELD_RULES 补充
+- 每个进程每种模型只解析和编译一次
+
+验证失败时抛出 PayloadError，message 指出第一个出错的字段。
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+SPEC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '启智openapi 接口文档.md')
+
+JOB_MODEL = 'pkg_openapi_controller_train.JobOpenapi'
+FRAMEWORK_MODEL = 'train.FrameworkConfigOpenAPI'
+ENV_MODEL = 'train.Env'
+DATASET_MODEL = 'train.DatasetInfo'
+
+SCALAR_TYPES = ('string', 'integer', 'number', 'boolean', 'object')
+
+
+class PayloadError(ValueError):
+    """负载验证失败"""
+
+    def __init__(self, message: str, path: str = ''):
+        super().__init__(message)
+        self.path = path
+
+
+@dataclass
+class FieldSpec:
+    """文档中的一个字段"""
+    name: str
+    type: str  # SCALAR_TYPES 之一，或引用的模型名
+    array: bool = False
+    required: bool = False
+    description: str = ''
+
+
+@dataclass
+class ModelSpec:
+    """文档中的一个数据模型，标量模型(如枚举)只有 scalar 和 enum"""
+    name: str
+    fields: Dict[str, FieldSpec] = field(default_factory=dict)
+    scalar: Optional[str] = None
+    enum: List[Any] = field(default_factory=list)
+
+
+@dataclass
+class FieldRule:
+    """文档之外的字段约束"""
+    required: bool = False  # 不能缺失或为 null，字符串不能为空白
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+    pattern: Optional[str] = None  # 字符串需要完整匹配的正则
+    min_items: Optional[int] = None
+
+
+FIELD_RULES: Dict[Tuple[str, str], FieldRule] = {
+    (JOB_MODEL, 'name'): FieldRule(required=True),
+    (JOB_MODEL, 'logic_compute_group_id'): FieldRule(required=True),
+    (JOB_MODEL, 'project_id'): FieldRule(required=True),
+    (JOB_MODEL, 'workspace_id'): FieldRule(required=True),
+    (JOB_MODEL, 'framework'): FieldRule(required=True),
+    (JOB_MODEL, 'command'): FieldRule(required=True),
+    (JOB_MODEL, 'task_priority'): FieldRule(minimum=1, maximum=10),
+    (JOB_MODEL, 'max_running_time_ms'): FieldRule(pattern=r'\d+'),
+    (JOB_MODEL, 'reserve_on_fail_ms'): FieldRule(pattern=r'\d+'),
+    (JOB_MODEL, 'reserve_on_success_ms'): FieldRule(pattern=r'\d+'),
+    (JOB_MODEL, 'framework_config'): FieldRule(required=True, min_items=1),
+    (FRAMEWORK_MODEL, 'spec_id'): FieldRule(required=True),
+    (FRAMEWORK_MODEL, 'instance_count'): FieldRule(minimum=1),
+    (FRAMEWORK_MODEL, 'shm_gi'): FieldRule(minimum=1),
+    (ENV_MODEL, 'name'): FieldRule(required=True, pattern=r'[A-Za-z_][A-Za-z0-9_]*'),
+    (ENV_MODEL, 'value'): FieldRule(),
+    (DATASET_MODEL, 'dataset_id'): FieldRule(required=True),
+}
+# 值可以是空字符串但不能缺失的字段
+PRESENT_FIELDS = frozenset({(ENV_MODEL, 'value')})
+
+_HEADING = re.compile(r'<h2 id="tocS_[^"]*">([^<]+)</h2>')
+_ARRAY_REF = re.compile(r'\[\[([^\]]+)\]\(')
+_REF = re.compile(r'\[([^\]]+)\]\(')
+_ARRAY_SCALAR = re.compile(r'\[(\w+)\]')
+
+
+def _parse_type(cell: str) -> Tuple[str, bool]:
+    """解析类型列，返回 (类型或模型名, 是否为数组)"""
+    match = _ARRAY_REF.match(cell)
+    if match:
+        return match.group(1), True
+    match = _REF.match(cell)
+    if match:
+        return match.group(1), False
+    match = _ARRAY_SCALAR.fullmatch(cell)
+    if match:
+        return match.group(1), True
+    return cell, False
+
+
+def parse_models(text: str) -> Dict[str, ModelSpec]:
+    """
+    解析文档的数据模型部分
+
+    Args:
+        text: Markdown 文档内容
+
+    Returns:
+        模型名 -> ModelSpec
+    """
+    models = {}
+    headings = list(_HEADING.finditer(text))
+    for index, heading in enumerate(headings):
+        end = headings[index + 1].start() if index + 1 < len(headings) else len(text)
+        section = text[heading.end():end]
+        model = ModelSpec(heading.group(1).strip())
+
+        in_properties = in_enum = False
+        for line in section.splitlines():
+            if line.startswith('### 属性'):
+                in_properties, in_enum = True, False
+                continue
+            if line.startswith('#### 枚举值'):
+                in_properties, in_enum = False, True
+                continue
+            if not line.startswith('|') or line.startswith('|---') or line.startswith('|名称|') \
+                    or line.startswith('|属性|'):
+                continue
+            cells = [cell.strip() for cell in line.strip('|').split('|')]
+            if in_properties and len(cells) >= 3:
+                type_name, array = _parse_type(cells[1])
+                if cells[0] == '*anonymous*':
+                    model.scalar = type_name
+                else:
+                    model.fields[cells[0]] = FieldSpec(cells[0], type_name, array, cells[2] == 'true',
+                                                       cells[5] if len(cells) > 5 else '')
+            elif in_enum and len(cells) >= 2:
+                model.enum.append(cells[1])
+
+        if model.scalar in ('integer', 'number'):
+            model.enum = [float(value) if '.' in value else int(value) for value in model.enum]
+        models[model.name] = model
+    return models
+
+
+@lru_cache(maxsize=None)
+def load_models(path: str = SPEC_PATH) -> Dict[str, ModelSpec]:
+    """
+    读取并解析文档 (每个路径只解析一次)
+
+    Raises:
+        OSError: 文档无法读取时
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return parse_models(f.read())
+
+
+_TYPE_CHECKS = {
+    'string': ('not isinstance({v}, str)', 'string'),
+    'integer': ('type({v}) is not int', 'integer'),
+    'number': ('type({v}) is not int and type({v}) is not float', 'number'),
+    'boolean': ('type({v}) is not bool', 'boolean'),
+    'object': ('type({v}) is not dict', 'object'),
+}
+
+
+class _Generator:
+    """把模型展开成验证函数的源代码"""
+
+    def __init__(self, models: Dict[str, ModelSpec], rules: Dict[Tuple[str, str], FieldRule], strict: bool):
+        self.models = models
+        self.rules = rules
+        self.strict = strict
+        self.lines: List[str] = []
+        self.constants: Dict[str, Any] = {}
+        self.counter = 0
+
+    def name(self, prefix: str) -> str:
+        self.counter += 1
+        return f"{prefix}{self.counter}"
+
+    def constant(self, value: Any) -> str:
+        name = self.name('_c')
+        self.constants[name] = value
+        return name
+
+    def emit(self, depth: int, line: str) -> None:
+        self.lines.append('    ' * depth + line)
+
+    def fail(self, depth: int, path: str, message: str) -> None:
+        """path 和 message 是 f-string 的内容"""
+        self.emit(depth, f'raise PayloadError(f"{message}", f"{path}")')
+
+    def model(self, name: str, var: str, path: str, depth: int) -> None:
+        model = self.models.get(name)
+        if model is None:
+            raise KeyError(f"Data model '{name}' not found in the API document")
+        if model.scalar is not None:
+            self.scalar(model.scalar, var, path, depth)
+            if model.enum:
+                allowed = self.constant(frozenset(model.enum))
+                self.emit(depth, f"if {var} not in {allowed}:")
+                self.fail(depth + 1, path, f"{path}: must be one of {sorted(model.enum)}, got {{{var}!r}}")
+            return
+
+        self.emit(depth, f"if type({var}) is not dict:")
+        self.fail(depth + 1, path, f"{path or 'payload'}: expected object, got {{type({var}).__name__}}")
+        if self.strict:
+            known = self.constant(frozenset(model.fields))
+            self.emit(depth, f"if not {known}.issuperset({var}):")
+            self.fail(depth + 1, path,
+                      f"{path or 'payload'}: unknown field(s) {{sorted(set({var}) - {known})}}")
+        prefix = f"{path}." if path else ''
+        for spec in model.fields.values():
+            self.field(name, spec, var, prefix + spec.name, depth)
+
+    def field(self, model: str, spec: FieldSpec, parent: str, path: str, depth: int) -> None:
+        rule = self.rules.get((model, spec.name), FieldRule())
+        var = self.name('v')
+        self.emit(depth, f"{var} = {parent}.get({spec.name!r})")
+        if rule.required or spec.required or (model, spec.name) in PRESENT_FIELDS:
+            self.emit(depth, f"if {var} is None:")
+            self.fail(depth + 1, path, f"Required parameter '{path}' cannot be empty")
+            self.emit(depth, "else:")
+        else:
+            self.emit(depth, f"if {var} is not None:")
+
+        if not spec.array:
+            self.value(spec.type, rule, var, path, depth + 1)
+            return
+        self.emit(depth + 1, f"if type({var}) is not list:")
+        self.fail(depth + 2, path, f"{path}: expected array, got {{type({var}).__name__}}")
+        if rule.min_items:
+            self.emit(depth + 1, f"if len({var}) < {rule.min_items}:")
+            self.fail(depth + 2, path, f"{path}: must contain at least {rule.min_items} item(s)")
+        index, item = self.name('i'), self.name('e')
+        self.emit(depth + 1, f"for {index}, {item} in enumerate({var}):")
+        self.value(spec.type, FieldRule(), item, f"{path}[{{{index}}}]", depth + 2)
+
+    def value(self, type_name: str, rule: FieldRule, var: str, path: str, depth: int) -> None:
+        if type_name in SCALAR_TYPES:
+            self.scalar(type_name, var, path, depth)
+        else:
+            self.model(type_name, var, path, depth)
+
+        if rule.required and type_name == 'string':
+            self.emit(depth, f"if not {var} or {var}.isspace():")
+            self.fail(depth + 1, path, f"Required parameter '{path}' cannot be empty")
+        if rule.pattern is not None:
+            regex = self.constant(re.compile(rule.pattern))
+            self.emit(depth, f"if {regex}.fullmatch({var}) is None:")
+            self.fail(depth + 1, path, f"{path}: {{{var}!r}} does not match {{{regex}.pattern!r}}")
+        if rule.minimum is not None:
+            self.emit(depth, f"if {var} < {rule.minimum!r}:")
+            self.fail(depth + 1, path, f"{path}: must be at least {rule.minimum}, got {{{var}!r}}")
+        if rule.maximum is not None:
+            self.emit(depth, f"if {var} > {rule.maximum!r}:")
+            self.fail(depth + 1, path, f"{path}: must be at most {rule.maximum}, got {{{var}!r}}")
+
+    def scalar(self, type_name: str, var: str, path: str, depth: int) -> None:
+        check, expected = _TYPE_CHECKS.get(type_name, _TYPE_CHECKS['object'])
+        self.emit(depth, f"if {check.format(v=var)}:")
+        self.fail(depth + 1, path, f"{path}: expected {expected}, got {{type({var}).__name__}}")
+
+
+def generate_source(model: str, models: Dict[str, ModelSpec],
+                    rules: Optional[Dict[Tuple[str, str], FieldRule]] = None,
+                    strict: bool = True) -> Tuple[str, Dict[str, Any]]:
+    """
+    生成验证函数的源代码
+
+    Args:
+        model: 模型名
+        models: parse_models 的结果
+        rules: 额外约束 (默认: FIELD_RULES)
+        strict: 是否拒绝文档中没有的字段
+
+    Returns:
+        (源代码, 源代码引用的常量)
+
+    Raises:
+        KeyError: 模型或其引用的模型不存在时
+    """
+    generator = _Generator(models, FIELD_RULES if rules is None else rules, strict)
+    generator.emit(0, "def validate(payload):")
+    generator.model(model, 'payload', '', 1)
+    generator.emit(1, "return None")
+    return '\n'.join(generator.lines) + '\n', generator.constants
+
+
+@lru_cache(maxsize=None)
+def compile_validator(model: str = JOB_MODEL, path: str = SPEC_PATH,
+                      strict: bool = True) -> Callable[[Any], None]:
+    """
+    编译指定模型的验证函数 (同一组参数只编译一次)
+
+    Args:
+        model: 模型名
+        path: 接口文档路径
+        strict: 是否拒绝文档中没有的字段
+
+    Returns:
+        validate(payload)，验证失败时抛出 PayloadError；源代码在 validate.source 中
+
+    Raises:
+        OSError: 文档无法读取时
+        KeyError: 模型不存在时
+    """
+    source, constants = generate_source(model, load_models(path), strict=strict)
+    namespace: Dict[str, Any] = {'PayloadError': PayloadError, **constants}
+    exec(compile(source, f"<validator {model}>", 'exec'), namespace)
+    validate = namespace['validate']
+    validate.source = source
+    return validate
+
+
+def validate_job_payload(payload: Dict[str, Any]) -> None:
+    """
+    验证创建训练任务的请求负载
+
+    Raises:
+        PayloadError: 验证失败时
+    """
+    compile_validator()(payload)
+
+
+def validate_many(payloads: Iterable[Dict[str, Any]],
+                  model: str = JOB_MODEL) -> List[Tuple[int, PayloadError]]:
+    """
+    批量验证
+
+    Args:
+        payloads: 请求负载
+        model: 模型名
+
+    Returns:
+        (序号, 错误) 列表，全部有效时为空
+    """
+    validate = compile_validator(model)
+    errors = []
+    for index, payload in enumerate(payloads):
+        try:
+            validate(payload)
+        except PayloadError as e:
+            errors.append((index, e))
+    return errors
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启智(Inspire)命令行工具的性能分析开关
+Built-in profiling for the CLI commands and long-running monitor loops
+
+两个命令行工具共用的全局选项：
+- --profile FILE: 用 cProfile + tracemalloc 运行整个命令，写入 FILE (pstats 格式，可用
+  `python -m pstats FILE` 或 snakeviz 查看) 和 FILE.txt 报告，结束时在 stderr 输出耗时最多的函数、
+  按区域(导入/网络/JSON/本项目代码)汇总的耗时和分配内存最多的代码行
+- --profile-window SECONDS: 收到 SIGUSR1 时对所有线程采样 SECONDS 秒(同时记录该时间段内的内存分配)，
+  写入 collapsed stack 文件(可直接生成火焰图)和报告，适合已经运行很久的 monitor
+
+模块级 import 在命令开始前完成，不在 --profile 的统计范围内，导入耗时请用 `python -X importtime`。
+"""
+
+import io
+import os
+import sys
+import time
+import signal
+import pstats
+import cProfile
+import logging
+import argparse
+import threading
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from typing import Callable, List, Optional, Sequence, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 按文件路径把函数归入区域，先匹配的优先
+AREAS: List[Tuple[str, Tuple[str, ...]]] = [
+    ('import', ('<frozen importlib', 'importlib' + os.sep)),
+    ('network', ('socket.py', 'ssl.py', os.sep + 'http' + os.sep, 'urllib3', 'requests' + os.sep,
+                 'httpx', 'httpcore', 'h2' + os.sep, 'selectors.py', '_socket', '_ssl')),
+    ('json', ('json' + os.sep, 'orjson', 'msgpack', '_json')),
+    ('inspire', (PACKAGE_DIR,)),
+]
+
+
+def classify_area(filename: str) -> str:
+    """函数所在文件 -> 区域名，无法归类的为 other"""
+    for area, markers in AREAS:
+        if any(marker in filename for marker in markers):
+            return area
+    return 'other'
+
+
+def _location(filename: str, line: int, name: str) -> str:
+    if filename == '~':  # 内置函数
+        return name
+    return f"{os.path.basename(filename)}:{line}({name})"
+
+
+def format_time_report(stats: pstats.Stats, top: int) -> str:
+    """按自身耗时、累计耗时和区域汇总 pstats 结果"""
+    out = io.StringIO()
+    entries = stats.stats  # (file, line, name) -> (cc, ncalls, tottime, cumtime, callers)
+
+    areas: Counter = Counter()
+    for (filename, _line, name), (_cc, _calls, tottime, _cumtime, _callers) in entries.items():
+        areas[classify_area(name if filename == '~' else filename)] += tottime
+    total = sum(areas.values()) or 1.0
+    out.write("Time by area (own time):\n")
+    for area, seconds in areas.most_common():
+        out.write(f"  {area:<10}{seconds:>10.3f}s{seconds / total:>8.1%}\n")
+
+    for title, index in (('own time', 2), ('cumulative time', 3)):
+        out.write(f"\nTop {top} functions by {title}:\n")
+        out.write(f"  {'own s':>9}{'cum s':>9}{'calls':>10}  function\n")
+        ranked = sorted(entries.items(), key=lambda item: item[1][index], reverse=True)[:top]
+        for (filename, line, name), (_cc, calls, tottime, cumtime, _callers) in ranked:
+            out.write(f"  {tottime:>9.3f}{cumtime:>9.3f}{calls:>10,}  {_location(filename, line, name)}\n")
+    return out.getvalue()
+
+
+def format_memory_report(snapshot: tracemalloc.Snapshot, top: int, peak: int) -> str:
+    """按代码行汇总 tracemalloc 快照中仍存活的分配"""
+    out = io.StringIO()
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<unknown>'),
+    ))
+    statistics = snapshot.statistics('lineno')
+    current = sum(stat.size for stat in statistics)
+    out.write(f"\nMemory: {current / 1024 / 1024:.1f} MiB traced at exit, peak {peak / 1024 / 1024:.1f} MiB\n")
+    out.write(f"Top {top} allocation sites:\n")
+    out.write(f"  {'KiB':>10}{'blocks':>10}  location\n")
+    for stat in statistics[:top]:
+        frame = stat.traceback[0]
+        out.write(f"  {stat.size / 1024:>10.1f}{stat.count:>10,}  {os.path.basename(frame.filename)}:{frame.lineno}\n")
+    return out.getvalue()
+
+
+class CommandProfiler:
+    """
+    用 cProfile + tracemalloc 分析一段代码 (上下文管理器)
+
+    cProfile 只统计启动它的线程，线程池中的请求只在调用方线程中体现为等待时间。
+    """
+
+    def __init__(self, path: str, top: int = 15, stream=None):
+        """
+        Args:
+            path: pstats 输出文件，报告写入 path + '.txt'
+            top: 报告中列出的条目数
+            stream: 报告输出流 (默认: stderr)
+        """
+        self.path = path
+        self.top = top
+        self.stream = stream if stream is not None else sys.stderr
+        self.profile = cProfile.Profile()
+        self._started_tracing = False
+        self._start = 0.0
+
+    def __enter__(self) -> 'CommandProfiler':
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._start = time.perf_counter()
+        self.profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.profile.disable()
+        wall = time.perf_counter() - self._start
+        snapshot = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+        if self._started_tracing:
+            tracemalloc.stop()
+
+        report = (f"Profile of {' '.join(sys.argv)}\nWall time {wall:.3f}s, written to {self.path}\n\n"
+                  f"{format_time_report(pstats.Stats(self.profile), self.top)}"
+                  f"{format_memory_report(snapshot, self.top, peak)}")
+        try:
+            self.profile.dump_stats(self.path)
+            with open(self.path + '.txt', 'w', encoding='utf-8') as f:
+                f.write(report)
+        except OSError as e:
+            # 写文件失败不影响命令的返回值，报告仍然输出
+            logger.error(f"Cannot write profile to '{self.path}': {str(e)}")
+        self.stream.write('\n' + report)
+        self.stream.flush()
+
+
+class SamplingProfiler:
+    """
+    采样分析器：后台线程定期读取所有线程的调用栈
+
+    开销与被分析代码的调用次数无关，可以对正在运行的监控随时开启和关闭。
+    线程阻塞在 sleep 或网络IO中时，采样计入发起调用的 Python 函数的自身采样数。
+    """
+
+    def __init__(self, interval: float = 0.005, ignore_threads: Sequence[int] = ()):
+        """
+        Args:
+            interval: 采样间隔(秒)
+            ignore_threads: 不采样的线程ID (如控制采样的线程)
+        """
+        self.interval = interval
+        self.ignore_threads = set(ignore_threads)
+        self.stacks: Counter = Counter()  # 调用栈(外层在前) -> 采样数
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='inspire-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        ignore = self.ignore_threads | {threading.get_ident()}
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id in ignore:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+                self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+    def write_collapsed(self, path: str) -> None:
+        """写入 collapsed stack 格式 (每行 "外层;...;内层 采样数")，可用 flamegraph.pl / speedscope 查看"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(';'.join(_location(*frame) for frame in stack) + f" {count}\n")
+
+    def format_report(self, top: int) -> str:
+        """按自身采样数和包含采样数列出最热的函数"""
+        own: Counter = Counter()
+        inclusive: Counter = Counter()
+        areas: Counter = Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            areas[classify_area(stack[-1][0])] += count
+            for frame in set(stack):
+                inclusive[frame] += count
+        total = sum(self.stacks.values()) or 1
+
+        out = io.StringIO()
+        out.write(f"{self.samples:,} samples every {self.interval * 1000:.0f}ms, {total:,} thread stacks\n")
+        out.write("Samples by area (innermost frame):\n")
+        for area, count in areas.most_common():
+            out.write(f"  {area:<10}{count:>10,}{count / total:>8.1%}\n")
+        for title, counter in (('own', own), ('inclusive', inclusive)):
+            out.write(f"\nTop {top} functions by {title} samples:\n")
+            for frame, count in counter.most_common(top):
+                out.write(f"  {count:>8,}{count / total:>8.1%}  {_location(*frame)}\n")
+        return out.getvalue()
+
+
+class SignalProfiler:
+    """
+    收到信号时对运行中的进程采样一个时间窗口
+
+    信号处理函数只启动一个后台线程，不会打断监控循环；窗口进行中收到的信号被忽略。
+    """
+
+    def __init__(self, prefix: str, window: float = 30.0, top: int = 15,
+                 signum: Optional[int] = None, interval: float = 0.005):
+        """
+        Args:
+            prefix: 输出文件前缀，每个窗口写入 <prefix>-<时间>.collapsed 和 .txt
+            window: 每次采样的时长(秒)
+            top: 报告中列出的条目数
+            signum: 触发信号 (默认: SIGUSR1)
+            interval: 采样间隔(秒)
+        """
+        self.prefix = prefix
+        self.window = window
+        self.top = top
+        self.signum = signum if signum is not None else getattr(signal, 'SIGUSR1', None)
+        self.interval = interval
+        self._active = threading.Lock()
+
+    def install(self) -> bool:
+        """
+        注册信号处理函数 (只能在主线程调用)
+
+        Returns:
+            平台不支持该信号时为 False
+        """
+        if self.signum is None:
+            logger.warning("On-demand profiling requires SIGUSR1, which this platform does not support")
+            return False
+        signal.signal(self.signum, self._on_signal)
+        # 命令行入口此时还没有配置日志，直接写 stderr
+        name = signal.Signals(self.signum).name[3:]
+        sys.stderr.write(f"Run 'kill -{name} {os.getpid()}' to profile the next {self.window:g}s\n")
+        return True
+
+    def _on_signal(self, signum, frame) -> None:
+        threading.Thread(target=self.capture, name='inspire-profile-window', daemon=True).start()
+
+    def capture(self) -> Optional[str]:
+        """
+        采样一个窗口并写入文件 (由信号触发时在后台线程中运行)
+
+        Returns:
+            报告文件路径，已有窗口在进行中时为 None
+        """
+        if not self._active.acquire(blocking=False):
+            logger.info("Profiling window already in progress, signal ignored")
+            return None
+        try:
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            logger.info(f"Profiling window started ({self.window:g}s)")
+            sampler = SamplingProfiler(self.interval, ignore_threads=[threading.get_ident()])
+            sampler.start()
+            time.sleep(self.window)
+            sampler.stop()
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            if started_tracing:
+                tracemalloc.stop()
+
+            base = f"{self.prefix}-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+            report = (f"Profiling window of {self.window:g}s, stacks in {base}.collapsed\n"
+                      f"{sampler.format_report(self.top)}{format_memory_report(snapshot, self.top, peak)}")
+            try:
+                sampler.write_collapsed(base + '.collapsed')
+                with open(base + '.txt', 'w', encoding='utf-8') as f:
+                    f.write(report)
+            except OSError as e:
+                logger.error(f"Cannot write profiling window to '{base}': {str(e)}")
+            logger.info(f"Profiling window finished, report written to {base}.txt\n{report}")
+            return base + '.txt'
+        finally:
+            self._active.release()
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    """添加全局的性能分析选项"""
+    parser.add_argument('--profile', type=str, metavar='FILE',
+                        help='用 cProfile + tracemalloc 运行命令，写入 FILE 和 FILE.txt 并输出热点')
+    parser.add_argument('--profile-top', type=int, default=15, metavar='N',
+                        help='性能报告中列出的条目数 (默认: 15)')
+    parser.add_argument('--profile-window', type=float, metavar='SECONDS',
+                        help='收到 SIGUSR1 时采样 SECONDS 秒并写入报告，用于长时间运行的监控')
+
+
+def run_with_profiling(main: Callable[[], int], argv: Optional[Sequence[str]] = None) -> int:
+    """
+    按命令行中的性能分析选项运行 main
+
+    选项在 main 解析参数之前预先读取，因此参数解析和命令执行都在统计范围内。
+
+    Args:
+        main: 命令行入口
+        argv: 命令行参数 (默认: sys.argv[1:])
+
+    Returns:
+        main 的返回值
+    """
+    pre_parser = argparse.ArgumentParser(add_help=False)
+    add_profile_arguments(pre_parser)
+    options, _ = pre_parser.parse_known_args(argv)
+
+    if options.profile_window:
+        prefix = os.path.splitext(options.profile)[0] if options.profile else f"inspire-profile-{os.getpid()}"
+        SignalProfiler(prefix, window=options.profile_window, top=options.profile_top).install()
+    if not options.profile:
+        return main()
+    with CommandProfiler(options.profile, top=options.profile_top):
+        return main()
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启智(Inspire)训练进度指标采集插件
+Training progress scraping from tb_summary_path
+
+从共享文件系统上的 TensorBoard event 文件或 JSONL 指标文件中增量读取训练指标，
+把最新的 step、loss、throughput 附加到每个状态快照上，并在 step 长时间不前进时告警。
+
+每个文件记录已读取的字节偏移，只解析新追加的完整记录；未写完的记录留到下一次读取。
+TensorBoard 文件使用内置的最小 protobuf 解码，不依赖 tensorflow/tensorboard。
+"""
+
+import os
+import json
+import time
+import struct
+import logging
+from typing import Dict, Iterator, List, Optional, Tuple, Callable
+from dataclasses import dataclass
+
+from monitor_plugin import MonitorPlugin
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ProgressRecord:
+    """单条训练进度记录"""
+    step: int
+    loss: Optional[float] = None
+    throughput: Optional[float] = None
+
+
+def _read_varint(buf: bytes, pos: int) -> Tuple[int, int]:
+    """读取 protobuf varint，返回 (值, 新位置)"""
+    result = 0
+    shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def _iter_fields(buf: bytes) -> Iterator[Tuple[int, int, object]]:
+    """
+    遍历 protobuf 消息的字段
+
+    Yields:
+        (字段号, wire type, 值)，varint 为 int，其余为 bytes
+    """
+    pos = 0
+    end = len(buf)
+    while pos < end:
+        key, pos = _read_varint(buf, pos)
+        field_number, wire_type = key >> 3, key & 0x07
+        if wire_type == 0:
+            value, pos = _read_varint(buf, pos)
+        elif wire_type == 1:
+            value = buf[pos:pos + 8]
+            pos += 8
+        elif wire_type == 2:
+            length, pos = _read_varint(buf, pos)
+            value = buf[pos:pos + length]
+            pos += length
+        elif wire_type == 5:
+            value = buf[pos:pos + 4]
+            pos += 4
+        else:
+            raise ValueError(f"Unsupported protobuf wire type {wire_type}")
+        yield field_number, wire_type, value
+
+
+# TensorProto dtype 常量
+_DT_FLOAT = 1
+_DT_DOUBLE = 2
+
+
+def _decode_tensor_scalar(buf: bytes) -> Optional[float]:
+    """从 TensorProto 中取出标量值 (TF2 写入的标量摘要)"""
+    dtype = None
+    content = None
+    for field_number, wire_type, value in _iter_fields(buf):
+        if field_number == 1 and wire_type == 0:
+            dtype = value
+        elif field_number == 4:
+            content = value
+        elif field_number == 5:
+            return struct.unpack('<f', value[:4])[0]
+        elif field_number == 6:
+            return struct.unpack('<d', value[:8])[0]
+
+    if content:
+        if dtype == _DT_FLOAT and len(content) >= 4:
+            return struct.unpack('<f', content[:4])[0]
+        if dtype == _DT_DOUBLE and len(content) >= 8:
+            return struct.unpack('<d', content[:8])[0]
+    return None
+
+
+def decode_event(buf: bytes) -> Tuple[Optional[int], Dict[str, float]]:
+    """
+    解码 TensorBoard Event 记录
+
+    Args:
+        buf: Event protobuf 字节
+
+    Returns:
+        (step, {tag: 标量值})
+    """
+    step = None
+    scalars: Dict[str, float] = {}
+    for field_number, _, value in _iter_fields(buf):
+        if field_number == 2:
+            step = value
+        elif field_number == 5:
+            for summary_field, _, summary_value in _iter_fields(value):
+                if summary_field != 1:
+                    continue
+                tag = None
+                scalar = None
+                for value_field, wire_type, item in _iter_fields(summary_value):
+                    if value_field == 1:
+                        tag = item.decode('utf-8', errors='replace')
+                    elif value_field == 2 and wire_type == 5:
+                        scalar = struct.unpack('<f', item)[0]
+                    elif value_field == 8:
+                        scalar = _decode_tensor_scalar(item)
+                if tag is not None and scalar is not None:
+                    scalars[tag] = scalar
+    return step, scalars
+
+
+class ProgressScraper:
+    """
+    指标文件增量解析器
+
+    扫描目录下的 TensorBoard event 文件 (*tfevents*) 和 JSONL 文件 (*.jsonl)，
+    按文件记录读取偏移。
+    """
+
+    DEFAULT_LOSS_KEYS = ('loss',)
+    DEFAULT_THROUGHPUT_KEYS = ('throughput', 'samples_per_sec', 'tokens_per_sec', 'samples/s', 'tokens/s')
+
+    def __init__(self, path: str,
+                 loss_keys: Tuple[str, ...] = DEFAULT_LOSS_KEYS,
+                 throughput_keys: Tuple[str, ...] = DEFAULT_THROUGHPUT_KEYS,
+                 max_bytes: int = 4 << 20):
+        """
+        Args:
+            path: 指标文件或目录
+            loss_keys: 匹配 loss 指标的标签子串 (不区分大小写)
+            throughput_keys: 匹配吞吐量指标的标签子串 (不区分大小写)
+            max_bytes: 单个文件单次读取的最大字节数
+        """
+        self.path = path
+        self.loss_keys = tuple(key.lower() for key in loss_keys)
+        self.throughput_keys = tuple(key.lower() for key in throughput_keys)
+        self.max_bytes = max_bytes
+        self.offsets: Dict[str, int] = {}
+        self.latest: Optional[ProgressRecord] = None
+        self._tag_kinds: Dict[str, Optional[str]] = {}
+
+    def _discover_files(self) -> List[str]:
+        """列出指标文件"""
+        if os.path.isfile(self.path):
+            return [self.path]
+
+        files = []
+        for root, _, names in os.walk(self.path):
+            for name in names:
+                if 'tfevents' in name or name.endswith('.jsonl'):
+                    files.append(os.path.join(root, name))
+        return files
+
+    def _classify_tag(self, tag: str) -> Optional[str]:
+        """判断标签是 loss、throughput 还是无关指标 (结果缓存)"""
+        kind = self._tag_kinds.get(tag, '')
+        if kind != '':
+            return kind
+
+        lowered = tag.lower()
+        if any(key in lowered for key in self.throughput_keys):
+            kind = 'throughput'
+        elif any(key in lowered for key in self.loss_keys):
+            kind = 'loss'
+        else:
+            kind = None
+        self._tag_kinds[tag] = kind
+        return kind
+
+    def _make_record(self, step: Optional[int], values: Dict[str, object]) -> Optional[ProgressRecord]:
+        """从一条记录的指标中提取 loss 和 throughput"""
+        if step is None:
+            return None
+
+        record = ProgressRecord(step=int(step))
+        for tag, value in values.items():
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                continue
+            kind = self._classify_tag(tag)
+            if kind == 'loss':
+                record.loss = float(value)
+            elif kind == 'throughput':
+                record.throughput = float(value)
+        return record
+
+    def _read_tfrecords(self, data: bytes) -> Tuple[List[ProgressRecord], int]:
+        """解析 TFRecord 帧，返回 (记录, 消费的字节数)"""
+        records = []
+        pos = 0
+        # 帧格式: uint64 长度 | uint32 长度CRC | 数据 | uint32 数据CRC
+        while pos + 12 <= len(data):
+            (length,) = struct.unpack_from('<Q', data, pos)
+            frame_end = pos + 12 + length + 4
+            if frame_end > len(data):
+                break
+            try:
+                step, scalars = decode_event(data[pos + 12:pos + 12 + length])
+            except (ValueError, IndexError, struct.error) as e:
+                logger.debug(f"Skipping undecodable event record: {str(e)}")
+            else:
+                if scalars:
+                    record = self._make_record(step, scalars)
+                    if record:
+                        records.append(record)
+            pos = frame_end
+        return records, pos
+
+    def _read_jsonl(self, data: bytes) -> Tuple[List[ProgressRecord], int]:
+        """解析 JSONL 行，返回 (记录, 消费的字节数)"""
+        end = data.rfind(b'\n') + 1
+        records = []
+        for raw in data[:end].splitlines():
+            if not raw.strip():
+                continue
+            try:
+                item = json.loads(raw)
+            except json.JSONDecodeError:
+                logger.debug("Skipping malformed JSONL metrics line")
+                continue
+            if isinstance(item, dict):
+                record = self._make_record(item.get('step', item.get('global_step')), item)
+                if record:
+                    records.append(record)
+        return records, end
+
+    def _skip_oversized(self, f, path: str, offset: int, data: bytes) -> int:
+        """
+        读取窗口内没有一条完整记录时，跳过超过 max_bytes 的 TFRecord 帧或 JSONL 行
+
+        记录还没写完时不跳过，下一次轮询再检查。
+
+        Args:
+            f: 已打开的指标文件
+            path: 文件路径
+            offset: 记录开始的位置
+            data: 从 offset 读取的 max_bytes 字节
+
+        Returns:
+            新的读取位置
+        """
+        if path.endswith('.jsonl'):
+            # 向后查找这一行的结尾
+            position = offset + len(data)
+            while True:
+                f.seek(position)
+                block = f.read(self.max_bytes)
+                if not block:
+                    return offset
+                newline = block.find(b'\n')
+                if newline >= 0:
+                    end = position + newline + 1
+                    break
+                position += len(block)
+            logger.warning(f"Skipping {end - offset} byte JSONL line in {path} (larger than {self.max_bytes} bytes)")
+            return end
+
+        (length,) = struct.unpack_from('<Q', data, 0)
+        end = offset + 12 + length + 4
+        if os.fstat(f.fileno()).st_size < end:
+            return offset
+        logger.warning(f"Skipping {end - offset} byte event record in {path} (larger than {self.max_bytes} bytes)")
+        return end
+
+    def poll(self) -> Optional[ProgressRecord]:
+        """
+        读取所有指标文件新增的记录
+
+        Returns:
+            至今为止 step 最大的进度记录
+        """
+        for path in self._discover_files():
+            offset = self.offsets.get(path, 0)
+            try:
+                with open(path, 'rb') as f:
+                    f.seek(offset)
+                    data = f.read(self.max_bytes)
+                    if not data:
+                        continue
+                    if path.endswith('.jsonl'):
+                        records, consumed = self._read_jsonl(data)
+                    else:
+                        records, consumed = self._read_tfrecords(data)
+                    if consumed == 0 and len(data) == self.max_bytes:
+                        # 单条记录比读取窗口大，不跳过的话这个文件再也不会前进
+                        self.offsets[path] = self._skip_oversized(f, path, offset, data)
+                        continue
+            except OSError as e:
+                logger.debug(f"Cannot read metrics file {path}: {str(e)}")
+                continue
+            self.offsets[path] = offset + consumed
+
+            for record in records:
+                latest = self.latest
+                if latest is None or record.step > latest.step:
+                    self.latest = ProgressRecord(
+                        step=record.step,
+                        loss=record.loss if record.loss is not None else (latest.loss if latest else None),
+                        throughput=record.throughput if record.throughput is not None else (
+                            latest.throughput if latest else None)
+                    )
+                elif record.step == latest.step:
+                    # 同一 step 的指标可能分多条记录写入
+                    if record.loss is not None:
+                        latest.loss = record.loss
+                    if record.throughput is not None:
+                        latest.throughput = record.throughput
+
+        return self.latest
+
+
+class TrainingProgressPlugin(MonitorPlugin):
+    """
+    训练进度监控插件
+
+    把最新进度附加到快照的 step/loss/throughput 字段，
+    任务处于 RUNNING 且 step 超过 stall_timeout 秒没有前进时发出一次告警。
+    """
+
+    def __init__(self, metrics_path: str, job_id: Optional[str] = None,
+                 stall_timeout: float = 900,
+                 on_stall: Optional[Callable[[str, int, float], None]] = None):
+        """
+        Args:
+            metrics_path: 指标文件或目录 (通常为任务的 tb_summary_path)
+            job_id: 只处理该任务的快照 (默认: 所有快照)
+            stall_timeout: step 停止前进多少秒后告警
+            on_stall: 告警回调 (job_id, step, 停滞秒数)，默认记录警告日志
+        """
+        self.scraper = ProgressScraper(metrics_path)
+        self.job_id = job_id
+        self.stall_timeout = stall_timeout
+        self.on_stall = on_stall or self._log_stall
+        self._last_step: Optional[int] = None
+        self._last_advance = time.monotonic()
+        self._alerted = False
+
+    @staticmethod
+    def _log_stall(job_id: str, step: int, stalled_seconds: float) -> None:
+        logger.warning(f"Job {job_id} looks stalled: step {step} has not advanced for {int(stalled_seconds)}s")
+
+    def on_snapshot(self, snapshot, previous) -> None:
+        if self.job_id and snapshot.job_id != self.job_id:
+            return
+
+        latest = self.scraper.poll()
+        now = time.monotonic()
+        if latest is None:
+            self._last_advance = now
+            return
+
+        snapshot.step = latest.step
+        snapshot.loss = latest.loss
+        snapshot.throughput = latest.throughput
+
+        if self._last_step is None or latest.step > self._last_step or snapshot.status != 'RUNNING':
+            self._last_step = latest.step
+            self._last_advance = now
+            self._alerted = False
+            return
+
+        stalled_seconds = now - self._last_advance
+        if stalled_seconds >= self.stall_timeout and not self._alerted:
+            self._alerted = True
+            self.on_stall(snapshot.job_id, latest.step, stalled_seconds)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启智(Inspire) API 读请求合并与短时缓存
+Single-flight request coalescing and short-TTL read cache
+
+多个线程同时读取同一个键(如同一任务的详情)时只发送一次请求：
+- 第一个调用方发送请求，其余调用方等待同一个结果(或同一个异常)
+- 成功的结果按 TTL 缓存，条目数超过上限时淘汰最久未使用的条目
+- 写操作后调用 invalidate 作废相关条目；请求进行中被作废时结果不写入缓存
+- 等待的调用方可以设置超时和停止令牌，超时或停止时放弃等待，进行中的请求不受影响
+
+缓存的结果在有效期内由多个调用方共享，调用方不应修改返回的对象。
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future, TimeoutError
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class ReadCache:
+    """
+    线程安全的 single-flight + TTL/LRU 缓存
+    """
+
+    def __init__(self, ttl: float = 1.0, max_entries: int = 1024,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            ttl: 结果缓存时间(秒)，0 表示只合并进行中的请求，不缓存
+            max_entries: 缓存条目上限
+            clock: 时钟函数
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()  # 键 -> (过期时间, 结果)
+        self._inflight: Dict[Hashable, Future] = {}
+        self.hits = 0
+        self.misses = 0  # 实际发送的请求数
+        self.coalesced = 0  # 等待进行中请求的调用次数
+        self.evictions = 0
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], timeout: Optional[float] = None,
+                    stop_token: Any = None) -> Any:
+        """
+        返回缓存的结果，没有时调用 loader (同一个键同时只调用一次)
+
+        Args:
+            key: 缓存键
+            loader: 获取结果的函数，抛出的异常会传给所有等待的调用方，不会被缓存
+            timeout: 等待进行中请求的最长时间(秒)，None 表示一直等待
+            stop_token: 停止令牌 (StopToken)，停止后等待的调用方立即放弃
+
+        Returns:
+            结果
+
+        Raises:
+            TimeoutError: 等待进行中的请求超时
+            CancelledError: 等待期间 stop_token 被停止
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                future = self._inflight[key] = Future()
+                self.misses += 1
+                leader = True
+
+        if not leader:
+            return self._wait(future, timeout, stop_token)
+
+        try:
+            value = loader()
+        except BaseException as e:
+            with self._lock:
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            # 请求期间被 invalidate 时 future 已不在 _inflight 中，结果可能已过时，不写入缓存
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+                if self.ttl > 0:
+                    self._entries[key] = (self.clock() + self.ttl, value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                        self.evictions += 1
+        future.set_result(value)
+        return value
+
+    @staticmethod
+    def _wait(future: Future, timeout: Optional[float], stop_token: Any) -> Any:
+        """等待其他调用方的请求结果"""
+        if stop_token is None:
+            return future.result(timeout)
+        woken = threading.Event()
+        future.add_done_callback(lambda _: woken.set())
+        stop_token.add_callback(woken.set)
+        try:
+            woken.wait(timeout)
+        finally:
+            stop_token.remove_callback(woken.set)
+        if future.done():
+            return future.result()
+        if stop_token.stopped:
+            raise CancelledError("stopped while waiting for an in-flight request")
+        raise TimeoutError(f"in-flight request did not finish within {timeout}s")
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """
+        作废缓存条目，进行中的请求结果也不会再写入缓存
+
+        Args:
+            key: 缓存键，None 表示全部
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._inflight.clear()
+            else:
+                self._entries.pop(key, None)
+                self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """命中/未命中等统计"""
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'hit_rate': round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启智(Inspire)监控数据序列化后端
+Pluggable serialization backends for snapshots and exports
+
+直接从快照对象的属性字典序列化，不经过 asdict 深拷贝：
+- pretty: 缩进JSON文档 (原有格式)
+- json: 紧凑JSON文档
+- jsonl: 每行一个快照
+- msgpack: MessagePack 流，每个快照一个对象 (需要安装 msgpack)
+- csv: 每行一个快照，timeline 以JSON字符串保存
+
+安装了 orjson 时 JSON 类格式使用 orjson 编码。
+"""
+
+import io
+import csv
+import json
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+FORMATS = ('pretty', 'json', 'jsonl', 'msgpack', 'csv')
+
+# 按文件扩展名推断的格式
+_EXTENSION_FORMATS = {
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+    '.msgpack': 'msgpack',
+    '.mpk': 'msgpack',
+    '.csv': 'csv',
+}
+
+
+def format_for_path(path: str, default: str = 'pretty') -> str:
+    """
+    根据文件扩展名推断输出格式
+
+    Args:
+        path: 文件路径
+        default: 无法推断时的格式
+
+    Returns:
+        格式名称
+    """
+    for extension, fmt in _EXTENSION_FORMATS.items():
+        if path.endswith(extension):
+            return fmt
+    return default
+
+
+def _record(obj: Any) -> Dict[str, Any]:
+    """取对象的属性字典 (dataclass 实例不复制)"""
+    return obj if isinstance(obj, dict) else vars(obj)
+
+
+def _dumps(obj: Any, pretty: bool = False) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=vars, option=orjson.OPT_INDENT_2 if pretty else 0)
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False, default=vars).encode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=vars).encode('utf-8')
+
+
+def _write_document(snapshots: Iterable[Any], out: BinaryIO, meta: Optional[Dict[str, Any]],
+                    pretty: bool) -> None:
+    """JSON文档格式: meta 的字段加上 snapshots 列表"""
+    document = dict(meta or {})
+    document['snapshots'] = [_record(snapshot) for snapshot in snapshots]
+    out.write(_dumps(document, pretty=pretty))
+    out.write(b'\n')
+
+
+def _write_jsonl(snapshots: Iterable[Any], out: BinaryIO, meta: Optional[Dict[str, Any]]) -> None:
+    if orjson is not None:
+        option = orjson.OPT_APPEND_NEWLINE
+        for snapshot in snapshots:
+            out.write(orjson.dumps(snapshot, default=vars, option=option))
+        return
+
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    for snapshot in snapshots:
+        out.write((encoder.encode(_record(snapshot)) + '\n').encode('utf-8'))
+
+
+def _write_msgpack(snapshots: Iterable[Any], out: BinaryIO, meta: Optional[Dict[str, Any]]) -> None:
+    if msgpack is None:
+        raise ValueError("MessagePack output requires the 'msgpack' package (pip install msgpack)")
+    packer = msgpack.Packer()
+    for snapshot in snapshots:
+        out.write(packer.pack(_record(snapshot)))
+
+
+def _write_csv(snapshots: Iterable[Any], out: BinaryIO, meta: Optional[Dict[str, Any]]) -> None:
+    text = io.TextIOWrapper(out, encoding='utf-8', newline='')
+    try:
+        writer = csv.writer(text)
+        columns: Optional[List[str]] = None
+        nested: List[str] = []
+        for snapshot in snapshots:
+            record = _record(snapshot)
+            if columns is None:
+                # 列与嵌套字段(timeline 等)按第一个快照确定，同一批快照字段一致
+                columns = list(record)
+                nested = [column for column, value in record.items() if isinstance(value, (dict, list))]
+                writer.writerow(columns)
+            if nested:
+                record = dict(record)
+                for column in nested:
+                    record[column] = json.dumps(record.get(column), ensure_ascii=False)
+            writer.writerow([record.get(column) for column in columns])
+    finally:
+        text.detach()
+
+
+_WRITERS: Dict[str, Callable[[Iterable[Any], BinaryIO, Optional[Dict[str, Any]]], None]] = {
+    'pretty': lambda snapshots, out, meta: _write_document(snapshots, out, meta, pretty=True),
+    'json': lambda snapshots, out, meta: _write_document(snapshots, out, meta, pretty=False),
+    'jsonl': _write_jsonl,
+    'msgpack': _write_msgpack,
+    'csv': _write_csv,
+}
+
+
+def write_snapshots(snapshots: Iterable[Any], out: BinaryIO, fmt: str = 'pretty',
+                    meta: Optional[Dict[str, Any]] = None) -> None:
+    """
+    序列化一组快照
+
+    Args:
+        snapshots: 快照对象 (dataclass 实例或字典)
+        out: 二进制输出流
+        fmt: 格式名称，见 FORMATS
+        meta: 文档格式(pretty/json)中与 snapshots 并列的其他字段，流式格式忽略
+
+    Raises:
+        ValueError: 格式未知或依赖未安装时
+    """
+    writer = _WRITERS.get(fmt)
+    if writer is None:
+        raise ValueError(f"Unknown output format '{fmt}', expected one of: {FORMATS}")
+    writer(snapshots, out, meta)
+
+
+def write_snapshot(snapshot: Any, out: BinaryIO, fmt: str = 'pretty') -> None:
+    """
+    序列化单个快照，pretty/json 格式输出快照对象本身
+
+    Args:
+        snapshot: 快照对象
+        out: 二进制输出流
+        fmt: 格式名称，见 FORMATS
+    """
+    if fmt in ('pretty', 'json'):
+        out.write(_dumps(_record(snapshot), pretty=fmt == 'pretty'))
+        out.write(b'\n')
+    else:
+        write_snapshots([snapshot], out, fmt)
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""
+启智(Inspire)任务队列的离散事件模拟
+Discrete-event simulation of the Inspire queue for tuning polling and placement
+
+在虚拟时钟上运行真实的 JobMonitor 和 InspireAPI，一周的任务在几秒到几十秒内跑完，
+按策略报告API调用次数、检测延迟和漏掉的状态。需要把 inspire 目录加入 sys.path (在该目录下运行即可)。
+
+Usage:
+    python -m simulation --days 7 --poll-interval 10,30,60
+"""
+
+from .clock import VirtualClock, VirtualStopToken
+from .platform import ApiModel, JobSpec, SimulatedPlatform, SimulatedSession, WorkloadModel, generate_workload
+from .policy import PLACEMENTS, LatencyStats, Policy, PolicyReport, format_report, simulate
+
+__all__ = [
+    'VirtualClock', 'VirtualStopToken',
+    'ApiModel', 'JobSpec', 'SimulatedPlatform', 'SimulatedSession', 'WorkloadModel', 'generate_workload',
+    'PLACEMENTS', 'LatencyStats', 'Policy', 'PolicyReport', 'format_report', 'simulate',
+]
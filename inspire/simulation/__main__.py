@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模拟命令行入口
+Compare polling/submission policies on a simulated week of Inspire jobs
+
+轮询间隔、提交并发数和计算组选择的每种组合是一个策略，所有策略使用同一种子生成的任务和 5xx 突发。
+
+Usage (在 inspire 目录下):
+    python -m simulation --days 7 --poll-interval 10,30,60
+    python -m simulation --poll-interval 30 --concurrency 1,8,16 --bursts-per-day 6
+    python -m simulation --poll-interval 30 --placement preferred,least_active --json
+"""
+
+import sys
+import json
+import logging
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+from log_config import configure_logging
+
+from .platform import ApiModel, WorkloadModel
+from .policy import PLACEMENTS, Policy, format_report, simulate
+
+
+def _list(value: str, kind=float) -> List:
+    """解析逗号分隔的列表"""
+    try:
+        return [kind(item) for item in value.split(',') if item.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid list: {value}")
+
+
+def build_policies(args) -> List[Policy]:
+    """按参数组合生成策略"""
+    policies = []
+    for poll_interval, concurrency, placement in itertools.product(args.poll_interval, args.concurrency,
+                                                                   args.placement):
+        policies.append(Policy(
+            name=f"poll={poll_interval:g}s conc={concurrency} {placement}",
+            poll_interval=poll_interval,
+            max_retries=args.max_retries,
+            retry_delay=args.retry_delay,
+            submit_concurrency=concurrency,
+            api_max_retries=args.max_retries,
+            api_retry_delay=args.retry_delay,
+            placement=placement
+        ))
+    return policies
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m simulation', description='启智任务队列模拟 (比较轮询和提交策略)')
+    parser.add_argument('--days', type=float, default=7.0, help='提交任务的天数 (默认: 7)')
+    parser.add_argument('--drain-days', type=float, default=2.0,
+                        help='最后一批提交后继续监控的天数 (默认: 2)')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子 (默认: 0)')
+    parser.add_argument('--poll-interval', type=_list, default=[10.0, 30.0, 60.0],
+                        help='轮询间隔(秒)，逗号分隔 (默认: 10,30,60)')
+    parser.add_argument('--concurrency', type=lambda value: _list(value, int), default=[4],
+                        help='提交并发数，逗号分隔 (默认: 4)')
+    parser.add_argument('--placement', type=lambda value: _list(value, str), default=['preferred'],
+                        help=f"计算组选择，逗号分隔: {', '.join(PLACEMENTS)} (默认: preferred)")
+    parser.add_argument('--max-retries', type=int, default=3, help='监控和API请求的重试次数 (默认: 3)')
+    parser.add_argument('--retry-delay', type=float, default=1.0, help='重试间隔基数(秒) (默认: 1.0)')
+    parser.add_argument('--batches-per-day', type=float, default=WorkloadModel.batches_per_day,
+                        help=f'每天提交的批次数 (默认: {WorkloadModel.batches_per_day:g})')
+    parser.add_argument('--failure-rate', type=float, default=WorkloadModel.failure_rate,
+                        help=f'失败任务比例 (默认: {WorkloadModel.failure_rate:g})')
+    parser.add_argument('--latency', type=float, default=ApiModel.latency_median,
+                        help=f'API延迟中位数(秒) (默认: {ApiModel.latency_median:g})')
+    parser.add_argument('--capacity', type=int, default=ApiModel.capacity,
+                        help=f'同时进行的请求上限，超过返回429 (默认: {ApiModel.capacity})')
+    parser.add_argument('--bursts-per-day', type=float, default=ApiModel.bursts_per_day,
+                        help=f'每天的 5xx 突发次数 (默认: {ApiModel.bursts_per_day:g})')
+    parser.add_argument('--workers', type=int, default=1, help='并行模拟的进程数 (默认: 1)')
+    parser.add_argument('--json', action='store_true', help='输出JSON')
+    parser.add_argument('--verbose', '-v', action='store_true', help='显示监控和API客户端的日志')
+    args = parser.parse_args()
+
+    unknown = [placement for placement in args.placement if placement not in PLACEMENTS]
+    if unknown:
+        parser.error(f"unknown placement: {', '.join(unknown)}")
+
+    configure_logging(level=logging.INFO if args.verbose else logging.ERROR)
+    if not args.verbose:
+        # 5xx 突发期间监控会记录大量重试和失败，模拟结果已经统计了这些错误
+        for name in ('job_monitor', 'inspire_api_control'):
+            logging.getLogger(name).setLevel(logging.CRITICAL)
+
+    workload = WorkloadModel(batches_per_day=args.batches_per_day, failure_rate=args.failure_rate)
+    api_model = ApiModel(latency_median=args.latency, capacity=args.capacity, bursts_per_day=args.bursts_per_day)
+    policies = build_policies(args)
+    kwargs = dict(workload=workload, api_model=api_model, days=args.days, seed=args.seed,
+                  drain_days=args.drain_days)
+
+    if args.workers > 1 and len(policies) > 1:
+        with ProcessPoolExecutor(max_workers=min(args.workers, len(policies))) as executor:
+            futures = [executor.submit(simulate, policy, **kwargs) for policy in policies]
+            reports = [future.result() for future in futures]
+    else:
+        reports = []
+        for policy in policies:
+            reports.append(simulate(policy, **kwargs))
+            if not args.json:
+                print(f"simulated {policy.name}: {reports[-1].wall_seconds:.1f}s", file=sys.stderr)
+
+    if args.json:
+        print(json.dumps([report.to_dict() for report in reports], indent=2, ensure_ascii=False))
+        return 0
+
+    print(f"{args.days:g} days, {reports[0].jobs_planned} jobs, seed {args.seed}\n")
+    print(format_report(reports))
+    errors = sum(report.actor_errors for report in reports)
+    if errors:
+        print(f"\n{errors} simulation actors failed", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模拟用的虚拟时钟
+Virtual clock that runs blocking client code as cooperatively scheduled actors
+
+JobMonitor、InspireAPI 的轮询、重试和请求都是阻塞调用。VirtualClock 让每个参与者 (actor) 在自己的线程中
+运行这些真实代码，但同一时刻只有一个参与者在执行：
+- 参与者只能通过 sleep() 等待 (VirtualStopToken.wait、模拟会话的请求延迟最终都调用它)，
+  等待时把 (唤醒时间, 参与者) 放入事件堆并交出控制权
+- 交出控制权的线程取出最早的唤醒事件，把虚拟时间推进到该时刻并直接唤醒这一个参与者，
+  直到它再次 sleep 或结束；自己就是最早的唤醒时不切换线程。没有空等，一周的虚拟时间只取决于事件数量
+- 同一时刻只有一个线程修改模拟状态，给定随机种子时结果可以复现
+
+参与者不能在时钟之外阻塞 (如 time.sleep、等待其他参与者持有的锁或 Future)，
+否则 run() 在 block_timeout 秒 (真实时间) 内没有进展时报错。
+"""
+
+import heapq
+import logging
+import itertools
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from stop_token import StopToken
+
+
+logger = logging.getLogger(__name__)
+
+# 虚拟时间 0 对应的 Unix 时间 (只影响详情中的 created_at 等时间戳)
+DEFAULT_EPOCH = datetime(2026, 1, 5).timestamp()
+
+
+class _Actor:
+    """一个参与者线程，go 锁被释放时运行"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.go = threading.Lock()
+        self.go.acquire()
+        self.done = False
+
+
+class _Wakeup:
+    """事件堆中的一次唤醒"""
+
+    __slots__ = ('actor', 'token', 'cancelled')
+
+    def __init__(self, actor: _Actor, token: Optional[StopToken] = None):
+        self.actor = actor
+        self.token = token
+        self.cancelled = False
+
+
+class VirtualClock:
+    """
+    虚拟时钟和参与者调度器
+    """
+
+    def __init__(self, epoch: float = DEFAULT_EPOCH, block_timeout: float = 60.0):
+        """
+        Args:
+            epoch: 虚拟时间 0 对应的 Unix 时间
+            block_timeout: 参与者在时钟之外阻塞多久(真实秒数)后判定为死锁
+        """
+        self.epoch = epoch
+        self.block_timeout = block_timeout
+        self.wakeups = 0
+        self.switches = 0
+        self.errors: List[Tuple[str, BaseException]] = []
+        self._now = 0.0
+        self._heap: List[Tuple[float, int, _Wakeup]] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._actors: Dict[int, _Actor] = {}
+        self._sleepers: Dict[int, Set[_Wakeup]] = {}  # id(token) -> 等待该令牌的唤醒
+        self._names = itertools.count(1)
+        self._running: Optional[_Actor] = None
+        self._finished = threading.Event()
+        self._until: Optional[float] = None
+        self._on_horizon: Optional[Callable[[], None]] = None
+
+    def now(self) -> float:
+        """当前虚拟时间(秒，从 0 开始)"""
+        return self._now
+
+    def time(self) -> float:
+        """当前虚拟时间对应的 Unix 时间"""
+        return self.epoch + self._now
+
+    def _push(self, when: float, wakeup: _Wakeup) -> None:
+        heapq.heappush(self._heap, (when, next(self._seq), wakeup))
+
+    def spawn(self, target: Callable[..., Any], *args: Any, name: Optional[str] = None) -> None:
+        """
+        创建参与者，在当前虚拟时间开始运行 target(*args)
+
+        可以在 run() 之前调用，也可以由正在运行的参与者调用。
+        """
+        actor = _Actor(name or f"actor-{next(self._names)}")
+        with self._lock:
+            self._push(self._now, _Wakeup(actor))
+        threading.Thread(target=self._run_actor, args=(actor, target, args), name=actor.name, daemon=True).start()
+
+    def _run_actor(self, actor: _Actor, target: Callable[..., Any], args: Tuple[Any, ...]) -> None:
+        ident = threading.get_ident()
+        self._actors[ident] = actor
+        actor.go.acquire()
+        try:
+            target(*args)
+        except BaseException as e:
+            logger.error(f"Simulation actor {actor.name} failed: {type(e).__name__}: {str(e)}")
+            self.errors.append((actor.name, e))
+        finally:
+            actor.done = True
+            del self._actors[ident]
+            self._switch(None)
+
+    def _switch(self, current: Optional[_Actor]) -> bool:
+        """
+        由交出控制权的线程调用: 取出最早的唤醒，推进虚拟时间并直接唤醒对应的参与者
+
+        Returns:
+            下一个运行的是否就是 current (此时不需要切换线程)
+        """
+        while True:
+            with self._lock:
+                if not self._heap:
+                    self._finished.set()
+                    return False
+                when, _, wakeup = self._heap[0]
+                horizon = self._until is not None and when > self._until
+                if horizon:
+                    self._now = self._until
+                    self._until = None
+                else:
+                    heapq.heappop(self._heap)
+            if horizon:
+                if self._on_horizon is not None:
+                    try:
+                        self._on_horizon()
+                    except Exception as e:
+                        logger.error(f"Simulation horizon callback failed: {str(e)}")
+                continue
+            if wakeup.cancelled:
+                continue
+            if when == float('inf'):
+                names = sorted({entry.actor.name for _, _, entry in self._heap if not entry.cancelled}
+                               | {wakeup.actor.name})
+                logger.warning(f"Simulation ended with {len(names)} actors waiting forever: {', '.join(names[:5])}")
+                self._finished.set()
+                return False
+
+            if wakeup.token is not None:
+                self._sleepers.get(id(wakeup.token), set()).discard(wakeup)
+            self._now = max(self._now, when)
+            self.wakeups += 1
+            self._running = wakeup.actor
+            if wakeup.actor is current:
+                return True
+            self.switches += 1
+            wakeup.actor.go.release()
+            return False
+
+    def sleep(self, seconds: Optional[float], token: Optional[StopToken] = None) -> None:
+        """
+        当前参与者等待 seconds 虚拟秒
+
+        Args:
+            seconds: 等待时间，None 表示等到 token 停止
+            token: 停止时提前唤醒的令牌
+
+        Raises:
+            RuntimeError: 不是在参与者线程中调用时
+        """
+        actor = self._actors.get(threading.get_ident())
+        if actor is None:
+            raise RuntimeError("VirtualClock.sleep() called outside a simulation actor")
+        wakeup = _Wakeup(actor, token)
+        with self._lock:
+            if token is not None:
+                if token.stopped:
+                    return
+                self._sleepers.setdefault(id(token), set()).add(wakeup)
+            self._push(self._now + seconds if seconds is not None else float('inf'), wakeup)
+        # 自己就是最早的唤醒时直接继续，否则把控制权交给下一个参与者并等待被唤醒
+        if not self._switch(actor):
+            actor.go.acquire()
+
+    def interrupt(self, token: StopToken) -> None:
+        """令牌停止时，把等待该令牌的参与者改为在当前虚拟时间唤醒"""
+        with self._lock:
+            for wakeup in self._sleepers.pop(id(token), ()):
+                wakeup.cancelled = True
+                self._push(self._now, _Wakeup(wakeup.actor))
+
+    def run(self, until: Optional[float] = None, on_horizon: Optional[Callable[[], None]] = None) -> float:
+        """
+        运行所有参与者直到全部结束
+
+        Args:
+            until: 虚拟时间上限，到达时调用 on_horizon (通常是停止令牌)，之后继续运行直到参与者全部退出
+            on_horizon: 到达上限时调用
+
+        Returns:
+            结束时的虚拟时间
+
+        Raises:
+            RuntimeError: 参与者在时钟之外阻塞超过 block_timeout 秒时
+        """
+        self._until = until
+        self._on_horizon = on_horizon
+        self._finished.clear()
+        self._switch(None)
+        last = -1
+        while not self._finished.wait(self.block_timeout):
+            if self.wakeups == last:
+                name = self._running.name if self._running is not None else '?'
+                raise RuntimeError(f"Simulation actor {name} blocked outside the virtual clock "
+                                   f"for {self.block_timeout}s")
+            last = self.wakeups
+        return self._now
+
+
+class VirtualStopToken(StopToken):
+    """
+    在虚拟时钟上等待的停止令牌，可以直接传给 JobMonitor/InspireAPI
+    """
+
+    def __init__(self, clock: VirtualClock):
+        super().__init__()
+        self.clock = clock
+
+    def stop(self, reason: str = '') -> None:
+        super().stop(reason)
+        self.clock.interrupt(self)
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        if self.stopped:
+            return True
+        if timeout is not None and timeout <= 0:
+            return False
+        self.clock.sleep(timeout, token=self)
+        return self.stopped
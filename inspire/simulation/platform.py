@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启智平台模型
+Simulated Inspire platform: job lifecycles, queueing and API behaviour
+
+SimulatedPlatform 在虚拟时钟上模拟启智平台：
+- 任务生命周期: 创建后经过调度延迟进入所属逻辑计算组的队列 (按优先级、就绪时间排队)，
+  节点足够时开始 RUNNING，运行时长服从对数正态分布；一部分任务失败，其中大部分在启动后几分钟内失败
+- API 行为: 请求延迟服从对数正态分布，平时有少量 5xx，按泊松过程出现一段时间的 5xx 突发，
+  同时进行的请求超过 capacity 时返回 429
+- 平台状态只在处理请求时按当前虚拟时间推进 (advance)，每个任务记录真实的状态变化时间，
+  用于计算检测延迟和漏掉的状态
+
+SimulatedSession 是 requests.Session 的子类，可以直接替换 InspireAPI.session 或 JobMonitor.session，
+请求延迟通过 VirtualClock.sleep 等待，响应与真实接口的格式相同。
+
+任务负载 (generate_workload) 和突发时间窗口只由随机种子决定，不同策略面对的是同一批任务和同样的故障。
+"""
+
+import json
+import math
+import heapq
+import bisect
+import random
+import logging
+import itertools
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from .clock import VirtualClock
+
+
+logger = logging.getLogger(__name__)
+
+SIM_BASE_URL = "https://inspire.sim"
+SIM_TOKEN = "sim-token"
+TERMINAL_STATUSES = ('SUCCEEDED', 'FAILED', 'CANCELLED')
+DAY = 86400.0
+
+
+@dataclass
+class WorkloadModel:
+    """任务负载模型"""
+    batches_per_day: float = 6.0  # 每天提交的批次数 (泊松过程)
+    batch_size: Tuple[int, int] = (1, 8)  # 每批任务数范围 (均匀分布)
+    schedule_delay_median: float = 60.0  # 创建到进入队列的调度延迟中位数(秒)
+    schedule_delay_sigma: float = 0.8
+    run_median: float = 3 * 3600.0  # 运行时长中位数(秒)
+    run_sigma: float = 1.0
+    failure_rate: float = 0.15  # 失败任务比例
+    early_failure_share: float = 0.6  # 失败任务中在启动后 early_failure_window 秒内失败的比例
+    early_failure_window: float = 300.0
+    failure_messages: Tuple[str, ...] = (
+        "CUDA out of memory. Tried to allocate 2.00 GiB",
+        "NCCL timeout: Watchdog caught collective operation timeout",
+        "ModuleNotFoundError: No module named 'flash_attn'",
+        "Container exited with code 137 (OOMKilled)",
+    )
+    groups: Dict[str, int] = field(default_factory=lambda: {'lcg-h200': 16, 'lcg-a100': 16})  # 逻辑计算组 -> 节点数
+    group_weights: Tuple[float, ...] = (0.7, 0.3)  # 任务首选各计算组的比例 (与 groups 顺序对应)
+    instance_counts: Tuple[int, ...] = (1, 1, 1, 2, 4)  # 节点数，均匀抽取
+    priorities: Tuple[int, ...] = (4, 4, 4, 6, 8)
+
+
+@dataclass
+class ApiModel:
+    """API 行为模型"""
+    latency_median: float = 0.15  # 请求延迟中位数(秒)
+    latency_sigma: float = 0.5
+    capacity: int = 8  # 同时进行的请求上限，超过时返回 429
+    error_rate: float = 0.002  # 平时返回 500 的比例
+    bursts_per_day: float = 2.0  # 5xx 突发次数 (泊松过程)
+    burst_duration: float = 600.0  # 每次突发的持续时间(秒)
+    burst_error_rate: float = 0.7  # 突发期间返回 503 的比例
+    burst_slowdown: float = 4.0  # 突发期间请求延迟的倍数
+
+
+@dataclass
+class JobSpec:
+    """预先生成的任务 (创建后的行为由种子决定，与提交策略无关)"""
+    name: str
+    submit_at: float  # 所属批次的提交时间(虚拟秒)
+    group: str  # 首选逻辑计算组
+    instance_count: int
+    priority: int
+    schedule_delay: float
+    duration: float
+    outcome: str  # SUCCEEDED / FAILED
+    sub_msg: str = ''
+
+
+def generate_workload(model: WorkloadModel, days: float, seed: int = 0) -> List[JobSpec]:
+    """
+    生成 days 天内提交的任务
+
+    Args:
+        model: 负载模型
+        days: 提交任务的天数
+        seed: 随机种子
+
+    Returns:
+        按提交时间排序的任务
+    """
+    rng = random.Random(f"{seed}-workload")
+    groups = list(model.groups)
+    specs: List[JobSpec] = []
+    t = rng.expovariate(model.batches_per_day / DAY)
+    while t < days * DAY:
+        for _ in range(rng.randint(*model.batch_size)):
+            group = rng.choices(groups, weights=model.group_weights[:len(groups)])[0]
+            instance_count = min(rng.choice(model.instance_counts), model.groups[group])
+            failed = rng.random() < model.failure_rate
+            if failed and rng.random() < model.early_failure_share:
+                duration = rng.uniform(5.0, model.early_failure_window)
+            else:
+                duration = model.run_median * math.exp(model.run_sigma * rng.gauss(0, 1))
+            specs.append(JobSpec(
+                name=f"sim-{len(specs):05d}",
+                submit_at=t,
+                group=group,
+                instance_count=instance_count,
+                priority=rng.choice(model.priorities),
+                schedule_delay=model.schedule_delay_median * math.exp(model.schedule_delay_sigma * rng.gauss(0, 1)),
+                duration=duration,
+                outcome='FAILED' if failed else 'SUCCEEDED',
+                sub_msg=rng.choice(model.failure_messages) if failed else ''
+            ))
+        t += rng.expovariate(model.batches_per_day / DAY)
+    return specs
+
+
+@dataclass
+class SimJob:
+    """平台上的一个任务"""
+    job_id: str
+    spec: JobSpec
+    group: str
+    instance_count: int
+    priority: int
+    created: float
+    status: str = 'PENDING'
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    ready: Optional[float] = None  # 进入队列的时间
+    history: List[Tuple[float, str]] = field(default_factory=list)  # 真实的 (时间, 状态)
+
+    def transition(self, t: float, status: str) -> None:
+        self.status = status
+        self.history.append((t, status))
+
+    @property
+    def queue_wait(self) -> Optional[float]:
+        """进入队列到开始运行的时间"""
+        if self.started is None or self.ready is None:
+            return None
+        return self.started - self.ready
+
+
+class SimulatedPlatform:
+    """
+    启智平台模拟 (任务、队列和API)
+    """
+
+    def __init__(self, clock: VirtualClock, workload: Optional[WorkloadModel] = None,
+                 api: Optional[ApiModel] = None, seed: int = 0, days: float = 7.0):
+        """
+        Args:
+            clock: 虚拟时钟
+            workload: 负载模型，决定计算组和未预先生成的任务的行为
+            api: API 行为模型
+            seed: 随机种子
+            days: 生成 5xx 突发的天数
+        """
+        self.clock = clock
+        self.workload = workload or WorkloadModel()
+        self.api = api or ApiModel()
+        self.jobs: Dict[str, SimJob] = {}
+        self.calls: Dict[str, int] = {}  # 接口 -> 请求次数
+        self.responses: Dict[str, int] = {}  # 状态码或异常 -> 次数
+        self.in_flight = 0
+        self.free = dict(self.workload.groups)
+        self._specs: Dict[str, JobSpec] = {}
+        self._queues: Dict[str, List[Tuple[int, float, int, SimJob]]] = {group: [] for group in self.free}
+        self._events: List[Tuple[float, int, str, SimJob]] = []
+        self._seq = itertools.count()
+        self._rng = random.Random(f"{seed}-api")
+        self._extra = random.Random(f"{seed}-extra")
+        self.bursts = self._generate_bursts(random.Random(f"{seed}-bursts"), days)
+        self._burst_starts = [start for start, _ in self.bursts]
+
+    def _generate_bursts(self, rng: random.Random, days: float) -> List[Tuple[float, float]]:
+        """生成 5xx 突发的 (开始, 结束) 时间窗口"""
+        bursts = []
+        if self.api.bursts_per_day <= 0:
+            return bursts
+        t = rng.expovariate(self.api.bursts_per_day / DAY)
+        while t < days * DAY:
+            bursts.append((t, t + self.api.burst_duration))
+            t += rng.expovariate(self.api.bursts_per_day / DAY)
+        return bursts
+
+    def expect(self, specs: List[JobSpec]) -> None:
+        """登记预先生成的任务，按名称匹配创建请求"""
+        self._specs.update((spec.name, spec) for spec in specs)
+
+    def in_burst(self, t: float) -> bool:
+        """t 是否在 5xx 突发期间"""
+        index = bisect.bisect_right(self._burst_starts, t) - 1
+        return index >= 0 and t < self.bursts[index][1]
+
+    # ---- 任务生命周期 ----
+
+    def _push(self, t: float, kind: str, job: SimJob) -> None:
+        heapq.heappush(self._events, (t, next(self._seq), kind, job))
+
+    def advance(self, now: float) -> None:
+        """按时间顺序处理 now 之前的所有平台事件"""
+        while self._events and self._events[0][0] <= now:
+            t, _, kind, job = heapq.heappop(self._events)
+            if job.status in TERMINAL_STATUSES:
+                continue
+            if kind == 'ready':
+                job.ready = t
+                heapq.heappush(self._queues[job.group], (-job.priority, t, next(self._seq), job))
+                self._place(job.group, t)
+            elif kind == 'finish':
+                job.finished = t
+                job.transition(t, job.spec.outcome)
+                self.free[job.group] += job.instance_count
+                self._place(job.group, t)
+
+    def _place(self, group: str, t: float) -> None:
+        """按队列顺序启动节点足够的任务 (队首不满足时后面的任务也等待)"""
+        queue = self._queues[group]
+        while queue:
+            job = queue[0][3]
+            if job.status != 'PENDING':
+                heapq.heappop(queue)
+                continue
+            if job.instance_count > self.free[group]:
+                break
+            heapq.heappop(queue)
+            self.free[group] -= job.instance_count
+            job.started = t
+            job.transition(t, 'RUNNING')
+            self._push(t + job.spec.duration, 'finish', job)
+
+    def _spec_for(self, name: str) -> JobSpec:
+        """预先生成的任务，名称未登记时按负载模型抽取"""
+        spec = self._specs.get(name)
+        if spec is not None:
+            return spec
+        model = self.workload
+        return JobSpec(name=name, submit_at=self.clock.now(), group=next(iter(model.groups)), instance_count=1,
+                       priority=4, schedule_delay=model.schedule_delay_median,
+                       duration=model.run_median * math.exp(model.run_sigma * self._extra.gauss(0, 1)),
+                       outcome='SUCCEEDED')
+
+    def create_job(self, payload: Dict[str, Any]) -> SimJob:
+        """创建任务 (计算组、节点数和优先级取自请求负载)"""
+        now = self.clock.now()
+        spec = self._spec_for(payload.get('name', ''))
+        group = payload.get('logic_compute_group_id') or spec.group
+        if group not in self.free:
+            raise KeyError(f"unknown logic compute group {group}")
+        framework = (payload.get('framework_config') or [{}])[0]
+        instance_count = min(int(framework.get('instance_count', spec.instance_count)), self.workload.groups[group])
+        job = SimJob(job_id=f"job-sim-{len(self.jobs):05d}", spec=spec, group=group, instance_count=instance_count,
+                     priority=int(payload.get('task_priority', spec.priority)), created=now)
+        job.transition(now, 'PENDING')
+        self.jobs[job.job_id] = job
+        self._push(now + spec.schedule_delay, 'ready', job)
+        return job
+
+    def stop_job(self, job: SimJob) -> None:
+        """停止任务，运行中的任务释放节点"""
+        now = self.clock.now()
+        if job.status in TERMINAL_STATUSES:
+            return
+        if job.status == 'RUNNING':
+            self.free[job.group] += job.instance_count
+        job.finished = now
+        job.transition(now, 'CANCELLED')
+        self._place(job.group, now)
+
+    def job_detail(self, job: SimJob) -> Dict[str, Any]:
+        """任务详情 (格式同 train_job/detail 的 data 字段)"""
+        now = self.clock.now()
+        end = job.finished if job.finished is not None else now
+
+        def ms(t: Optional[float]) -> Optional[str]:
+            return str(int((self.clock.epoch + t) * 1000)) if t is not None else None
+
+        return {
+            'job_id': job.job_id,
+            'name': job.spec.name,
+            'logic_compute_group_id': job.group,
+            'status': job.status,
+            'sub_status': 0,
+            'sub_msg': job.spec.sub_msg if job.status == 'FAILED' else '',
+            'running_time_ms': str(int((end - job.started) * 1000)) if job.started is not None else '0',
+            'created_at': ms(job.created),
+            'finished_at': ms(job.finished),
+            'timeline': {'created': ms(job.created), 'run': ms(job.started), 'finished': ms(job.finished)},
+            'node_count': job.instance_count,
+            'priority': job.priority,
+        }
+
+    # ---- API ----
+
+    def latency(self) -> float:
+        """抽取一次请求延迟"""
+        latency = self.api.latency_median * math.exp(self.api.latency_sigma * self._rng.gauss(0, 1))
+        if self.in_burst(self.clock.now()):
+            latency *= self.api.burst_slowdown
+        return latency
+
+    def fault(self) -> Optional[int]:
+        """请求开始时决定是否失败，返回错误状态码"""
+        if self.in_flight > self.api.capacity:
+            return 429
+        if self.in_burst(self.clock.now()) and self._rng.random() < self.api.burst_error_rate:
+            return 503
+        if self._rng.random() < self.api.error_rate:
+            return 500
+        return None
+
+    def handle(self, path: str, body: Dict[str, Any], authorization: Optional[str]) -> Tuple[int, Dict[str, Any]]:
+        """
+        在当前虚拟时间处理一个请求
+
+        Returns:
+            (HTTP状态码, 响应JSON)
+        """
+        self.advance(self.clock.now())
+        if path == '/auth/token':
+            return 200, {'code': 0, 'data': {'access_token': SIM_TOKEN, 'expires_in': 30 * DAY}}
+        if authorization != f"Bearer {SIM_TOKEN}":
+            return 401, {'code': 401, 'message': 'invalid token'}
+
+        if path.endswith('/train_job/create'):
+            try:
+                job = self.create_job(body)
+            except (KeyError, TypeError, ValueError) as e:
+                return 200, {'code': 400, 'message': str(e)}
+            return 200, {'code': 0, 'data': {'job_id': job.job_id}}
+        job = self.jobs.get(body.get('job_id', ''))
+        if path.endswith('/train_job/detail') or path.endswith('/train_job/stop'):
+            if job is None:
+                return 200, {'code': 404, 'message': 'job not found'}
+            if path.endswith('/train_job/stop'):
+                self.stop_job(job)
+                return 200, {'code': 0, 'data': {}}
+            return 200, {'code': 0, 'data': self.job_detail(job)}
+        return 404, {'code': 404, 'message': f'unknown endpoint {path}'}
+
+
+def _make_response(status: int, result: Dict[str, Any], url: str) -> requests.Response:
+    """构造 requests.Response"""
+    response = requests.Response()
+    response.status_code = status
+    response.reason = HTTPStatus(status).phrase
+    response.headers = CaseInsensitiveDict({'Content-Type': 'application/json'})
+    response._content = json.dumps(result).encode('utf-8')
+    response._content_consumed = True
+    response.encoding = 'utf-8'
+    response.url = url
+    return response
+
+
+class SimulatedSession(requests.Session):
+    """
+    把请求交给 SimulatedPlatform 的会话，请求延迟在虚拟时钟上等待
+
+    必须在虚拟时钟的参与者中使用。
+    """
+
+    def __init__(self, platform: SimulatedPlatform):
+        super().__init__()
+        self.platform = platform
+
+    def request(self, method, url, **kwargs):
+        platform = self.platform
+        clock = platform.clock
+        path = urlsplit(url).path
+        endpoint = path[len('/openapi/v1/'):] if path.startswith('/openapi/v1/') else path.lstrip('/')
+        platform.calls[endpoint] = platform.calls.get(endpoint, 0) + 1
+
+        body = kwargs.get('json')
+        if body is None and kwargs.get('data') is not None:
+            body = json.loads(kwargs['data'])
+        headers = kwargs.get('headers') or {}
+        timeout = kwargs.get('timeout')
+
+        platform.in_flight += 1
+        try:
+            status = platform.fault()
+            latency = platform.latency()
+            if timeout is not None and latency > timeout:
+                clock.sleep(timeout)
+                platform.responses['timeout'] = platform.responses.get('timeout', 0) + 1
+                raise requests.exceptions.ReadTimeout(f"Simulated read timeout ({timeout}s) for {url}")
+            clock.sleep(latency)
+        finally:
+            platform.in_flight -= 1
+
+        if status is None:
+            status, result = platform.handle(path, body or {}, headers.get('Authorization'))
+        else:
+            result = {'code': status, 'message': 'simulated server error'}
+        key = str(status)
+        platform.responses[key] = platform.responses.get(key, 0) + 1
+        return _make_response(status, result, url)
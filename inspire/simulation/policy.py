@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+提交/监控策略的模拟运行与报告
+Run submission and monitoring policies against the simulated platform
+
+simulate() 在一个 VirtualClock 上运行真实的客户端代码：
+- 驱动参与者用 InspireAPI 认证，在每个批次的提交时间启动 submit_concurrency 个提交参与者，
+  它们用 build_job_payload/validate_job_payload/submit_job_payload 逐个提交该批次的任务
+  (对应 create --batch 的并发提交；InspireAPI 的重试和等待都在虚拟时钟上进行)
+- 每个创建成功的任务由一个参与者运行 JobMonitor.monitor_job，观察插件记录每次看到新状态的虚拟时间
+- 同一种子下不同策略面对同一批任务、同样的 5xx 突发，报告可以直接比较
+
+报告包括：按接口统计的API调用次数和错误、提交失败数、检测延迟 (真实状态变化到监控看到它的时间)、
+漏掉的状态 (监控从未看到、但看到了之后的状态，如轮询间隔内开始又失败的任务的 RUNNING)，以及队列等待时间。
+"""
+
+import time
+import logging
+import statistics
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from inspire_api_control import InspireAPI, InspireAPIError, InspireConfig
+from job_monitor import JobMonitor, MonitorConfig
+from monitor_plugin import MonitorPlugin
+
+from .clock import VirtualClock, VirtualStopToken
+from .platform import (DAY, SIM_BASE_URL, TERMINAL_STATUSES, ApiModel, JobSpec, SimulatedPlatform,
+                       SimulatedSession, WorkloadModel, generate_workload)
+
+
+logger = logging.getLogger(__name__)
+
+PLACEMENTS = ('preferred', 'round_robin', 'least_active')
+
+
+@dataclass
+class Policy:
+    """提交和监控策略"""
+    name: str
+    poll_interval: float = 10.0  # JobMonitor 轮询间隔(秒)
+    max_retries: int = 3  # JobMonitor 获取状态的重试次数
+    retry_delay: float = 1.0  # JobMonitor 重试间隔基数(秒)
+    submit_concurrency: int = 4  # 同时提交的任务数
+    api_max_retries: int = 3  # InspireAPI 请求重试次数
+    api_retry_delay: float = 1.0  # InspireAPI 重试间隔基数(秒)
+    placement: str = 'preferred'  # 计算组选择，见 PLACEMENTS
+
+
+@dataclass
+class LatencyStats:
+    """检测延迟统计(秒)"""
+    count: int = 0
+    mean: float = 0.0
+    p50: float = 0.0
+    p95: float = 0.0
+    max: float = 0.0
+
+    @classmethod
+    def from_values(cls, values: List[float]) -> 'LatencyStats':
+        if not values:
+            return cls()
+        ordered = sorted(values)
+        return cls(count=len(ordered), mean=statistics.fmean(ordered), p50=_percentile(ordered, 0.5),
+                   p95=_percentile(ordered, 0.95), max=ordered[-1])
+
+
+@dataclass
+class PolicyReport:
+    """一个策略的模拟结果"""
+    policy: Policy
+    days: float
+    jobs_planned: int = 0
+    jobs_created: int = 0
+    submit_failures: int = 0
+    api_calls: Dict[str, int] = field(default_factory=dict)  # 接口 -> 请求次数
+    responses: Dict[str, int] = field(default_factory=dict)  # 状态码或 timeout -> 次数
+    detection: Dict[str, LatencyStats] = field(default_factory=dict)  # RUNNING / terminal
+    missed: Dict[str, int] = field(default_factory=dict)  # 状态 -> 漏掉次数
+    unfinished: int = 0  # 到达模拟上限时监控仍未看到结束的任务
+    queue_wait: LatencyStats = field(default_factory=LatencyStats)
+    virtual_seconds: float = 0.0
+    wall_seconds: float = 0.0
+    wakeups: int = 0
+    actor_errors: int = 0
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.api_calls.values())
+
+    @property
+    def calls_per_job(self) -> float:
+        return self.total_calls / self.jobs_created if self.jobs_created else 0.0
+
+    @property
+    def server_errors(self) -> int:
+        return sum(count for status, count in self.responses.items() if status.startswith('5'))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'policy': self.policy.__dict__,
+            'days': self.days,
+            'jobs_planned': self.jobs_planned,
+            'jobs_created': self.jobs_created,
+            'submit_failures': self.submit_failures,
+            'api_calls': self.api_calls,
+            'calls_per_job': round(self.calls_per_job, 1),
+            'responses': self.responses,
+            'detection': {key: stats.__dict__ for key, stats in self.detection.items()},
+            'missed': self.missed,
+            'unfinished': self.unfinished,
+            'queue_wait': self.queue_wait.__dict__,
+            'virtual_seconds': self.virtual_seconds,
+            'wall_seconds': round(self.wall_seconds, 3),
+            'wakeups': self.wakeups,
+            'actor_errors': self.actor_errors
+        }
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class ObservationPlugin(MonitorPlugin):
+    """记录监控第一次看到每个状态的虚拟时间"""
+
+    def __init__(self, clock: VirtualClock, observations: Dict[str, List[Tuple[float, str]]]):
+        self.clock = clock
+        self.observations = observations
+
+    def on_snapshot(self, snapshot, previous) -> None:
+        if previous is None or snapshot.status != previous.status:
+            self.observations.setdefault(snapshot.job_id, []).append((self.clock.now(), snapshot.status))
+
+
+class _Run:
+    """一次模拟运行中参与者共享的状态"""
+
+    def __init__(self, policy: Policy, specs: List[JobSpec], platform: SimulatedPlatform,
+                 token: VirtualStopToken):
+        self.policy = policy
+        self.specs = specs
+        self.platform = platform
+        self.clock = platform.clock
+        self.token = token
+        self.session = SimulatedSession(platform)
+        self.api = InspireAPI(InspireConfig(base_url=SIM_BASE_URL, max_retries=policy.api_max_retries,
+                                            retry_delay=policy.api_retry_delay, cache_ttl=0),
+                              session=self.session, stop_token=token)
+        self.observations: Dict[str, List[Tuple[float, str]]] = {}
+        self.active: Dict[str, int] = {group: 0 for group in platform.workload.groups}  # 计算组 -> 未结束的任务数
+        self.submit_failures = 0
+        self._round_robin = 0
+
+    def choose_group(self, spec: JobSpec) -> str:
+        """按策略选择计算组"""
+        groups = self.platform.workload.groups
+        fits = [group for group, nodes in groups.items() if nodes >= spec.instance_count]
+        if self.policy.placement == 'round_robin':
+            self._round_robin += 1
+            return fits[self._round_robin % len(fits)]
+        if self.policy.placement == 'least_active':
+            # 只用客户端自己知道的信息: 本客户端在各组未结束的任务数相对节点数
+            return min(fits, key=lambda group: ((self.active[group] + 1) * spec.instance_count / groups[group],
+                                                group != spec.group))
+        return spec.group
+
+    def drive(self) -> None:
+        """认证并按批次提交任务"""
+        try:
+            self.api.authenticate('sim', 'sim')
+        except InspireAPIError as e:
+            logger.error(f"Simulated authentication failed: {str(e)}")
+            return
+        index = 0
+        while index < len(self.specs) and not self.token.stopped:
+            submit_at = self.specs[index].submit_at
+            batch: Deque[JobSpec] = deque()
+            while index < len(self.specs) and self.specs[index].submit_at == submit_at:
+                batch.append(self.specs[index])
+                index += 1
+            if self.token.wait(submit_at - self.clock.now()):
+                break
+            for _ in range(min(self.policy.submit_concurrency, len(batch))):
+                self.clock.spawn(self.submit, batch)
+
+    def submit(self, batch: Deque[JobSpec]) -> None:
+        """从批次中逐个取出任务提交"""
+        while batch and not self.token.stopped:
+            spec = batch.popleft()
+            group = self.choose_group(spec)
+            payload = self.api.build_job_payload(
+                name=spec.name, logic_compute_group_id=group, project_id='project-sim', workspace_id='ws-sim',
+                framework='pytorch', command=f"python train.py --run {spec.name}", spec_id=f"spec-{group}",
+                task_priority=spec.priority, image='sim/pytorch:latest', instance_count=spec.instance_count)
+            try:
+                self.api.validate_job_payload(payload)
+                result = self.api.submit_job_payload(payload)
+            except InspireAPIError as e:
+                self.submit_failures += 1
+                logger.debug(f"Simulated submission of {spec.name} failed: {str(e)}")
+                continue
+            job_id = result['data']['job_id']
+            self.active[group] += 1
+            self.clock.spawn(self.monitor, job_id, group, name=f"monitor-{job_id}")
+
+    def monitor(self, job_id: str, group: str) -> None:
+        """用真实的 JobMonitor 监控一个任务"""
+        policy = self.policy
+        # JobMonitor 的超时按真实时间计算，模拟的上限由停止令牌控制
+        config = MonitorConfig(base_url=SIM_BASE_URL, poll_interval=policy.poll_interval, timeout=10 ** 9,
+                               max_retries=policy.max_retries, retry_delay=policy.retry_delay,
+                               progress_display=False, summary_display=False)
+        monitor = JobMonitor(config, stop_token=self.token)
+        monitor.session = self.session
+        monitor.token = self.api.token
+        monitor.headers['Authorization'] = self.api.headers['Authorization']
+        monitor.add_plugin(ObservationPlugin(self.clock, self.observations))
+        try:
+            monitor.monitor_job(job_id)
+        finally:
+            self.active[group] -= 1
+
+
+def _evaluate(report: PolicyReport, run: _Run) -> None:
+    """比较真实状态历史与监控观察，填充检测延迟和漏掉的状态"""
+    latencies: Dict[str, List[float]] = {'RUNNING': [], 'terminal': []}
+    for job in run.platform.jobs.values():
+        seen = run.observations.get(job.job_id, [])
+        observed = {status: t for t, status in reversed(seen)}  # 每个状态第一次被看到的时间
+        last_seen = max((t for t, _ in seen), default=None)
+        if not any(status in TERMINAL_STATUSES for _, status in seen):
+            report.unfinished += 1
+        for t, status in job.history:
+            if status in observed:
+                key = 'terminal' if status in TERMINAL_STATUSES else status
+                if key in latencies:
+                    latencies[key].append(observed[status] - t)
+            elif last_seen is not None and last_seen > t:
+                # 之后的状态已经被看到，这个状态再也不会被看到
+                report.missed[status] = report.missed.get(status, 0) + 1
+    report.detection = {key: LatencyStats.from_values(values) for key, values in latencies.items()}
+    report.queue_wait = LatencyStats.from_values([job.queue_wait for job in run.platform.jobs.values()
+                                                  if job.queue_wait is not None])
+
+
+def simulate(policy: Policy, workload: Optional[WorkloadModel] = None, api_model: Optional[ApiModel] = None,
+             days: float = 7.0, seed: int = 0, drain_days: float = 2.0) -> PolicyReport:
+    """
+    在虚拟时钟上运行一个策略
+
+    Args:
+        policy: 提交和监控策略
+        workload: 负载模型
+        api_model: API 行为模型
+        days: 提交任务的天数
+        seed: 随机种子 (决定任务和 5xx 突发)
+        drain_days: 最后一批提交后继续监控的天数，到达后停止所有监控
+
+    Returns:
+        模拟报告
+
+    Raises:
+        ValueError: 策略参数无效时
+    """
+    if policy.placement not in PLACEMENTS:
+        raise ValueError(f"Unknown placement '{policy.placement}', expected one of: {', '.join(PLACEMENTS)}")
+    if policy.poll_interval <= 0 or policy.submit_concurrency < 1:
+        raise ValueError("poll_interval must be positive and submit_concurrency at least 1")
+
+    workload = workload or WorkloadModel()
+    clock = VirtualClock()
+    token = VirtualStopToken(clock)
+    specs = generate_workload(workload, days, seed)
+    platform = SimulatedPlatform(clock, workload, api_model, seed=seed, days=days + drain_days)
+    platform.expect(specs)
+    run = _Run(policy, specs, platform, token)
+
+    start = time.perf_counter()
+    clock.spawn(run.drive, name='driver')
+    end = clock.run(until=(days + drain_days) * DAY, on_horizon=lambda: token.stop('simulation horizon'))
+
+    report = PolicyReport(policy=policy, days=days, jobs_planned=len(specs), jobs_created=len(platform.jobs),
+                          submit_failures=run.submit_failures, api_calls=dict(platform.calls),
+                          responses=dict(platform.responses), virtual_seconds=end,
+                          wall_seconds=time.perf_counter() - start, wakeups=clock.wakeups,
+                          actor_errors=len(clock.errors))
+    _evaluate(report, run)
+    return report
+
+
+def format_report(reports: List[PolicyReport]) -> str:
+    """把多个策略的报告格式化为对比表"""
+    lines = [f"{'policy':<28}{'jobs':>6}{'fail':>6}{'calls':>9}{'/job':>7}{'5xx':>6}{'429':>5}"
+             f"{'run p50':>9}{'run p95':>9}{'end p50':>9}{'end p95':>9}{'missed':>8}{'unfin':>7}"
+             f"{'queue p95':>11}{'wall s':>8}"]
+    for report in reports:
+        running = report.detection.get('RUNNING', LatencyStats())
+        terminal = report.detection.get('terminal', LatencyStats())
+        lines.append(
+            f"{report.policy.name:<28}{report.jobs_created:>6}{report.submit_failures:>6}{report.total_calls:>9}"
+            f"{report.calls_per_job:>7.0f}{report.server_errors:>6}{report.responses.get('429', 0):>5}"
+            f"{running.p50:>9.1f}{running.p95:>9.1f}{terminal.p50:>9.1f}{terminal.p95:>9.1f}"
+            f"{sum(report.missed.values()):>8}{report.unfinished:>7}{report.queue_wait.p95:>11.0f}"
+            f"{report.wall_seconds:>8.1f}")
+    return '\n'.join(lines)
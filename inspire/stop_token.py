@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启智(Inspire)监控循环的可取消等待
+Cancellable stop token for polling loops and retry back-off
+
+轮询间隔和重试退避都通过 StopToken.wait 等待，而不是 time.sleep：
+- stop() 之后所有正在等待的线程立即返回，停止延迟不再取决于轮询间隔和重试延迟
+- 令牌可以包装 multiprocessing.Event，多进程监控的工作进程共用同一个停止信号
+- stop() 时调用注册的回调，用于唤醒阻塞在队列等其他对象上的线程
+- 模块和监控器不注册信号处理函数，由命令行入口调用 install_signal_handlers，
+  嵌入其他程序时由宿主程序决定何时调用 stop()
+
+正在进行的HTTP请求不会被中断，停止延迟的上限是单个请求的耗时。
+"""
+
+import signal
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+class StopToken:
+    """
+    可取消的停止令牌
+    """
+
+    def __init__(self, event: Any = None):
+        """
+        Args:
+            event: 底层事件，需要有 set/clear/is_set/wait 方法 (默认: threading.Event，
+                   跨进程使用时传入 multiprocessing.Event)
+        """
+        self._event = event if event is not None else threading.Event()
+        self._callbacks: List[Callable[[], None]] = []
+        self.reason = ''
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # 回调只在创建它的进程中有意义
+        return {'_event': self._event, 'reason': self.reason}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self._event = state['_event']
+        self.reason = state['reason']
+        self._callbacks = []
+
+    @property
+    def stopped(self) -> bool:
+        """是否已请求停止"""
+        return self._event.is_set()
+
+    def stop(self, reason: str = '') -> None:
+        """
+        请求停止，唤醒所有等待中的线程 (可以在信号处理函数中调用)
+
+        Args:
+            reason: 停止原因，用于日志
+        """
+        if self._event.is_set():
+            return
+        self.reason = reason
+        self._event.set()
+        for callback in list(self._callbacks):
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Stop callback failed: {str(e)}")
+
+    def reset(self) -> None:
+        """清除停止状态，令牌可以再次使用"""
+        self._event.clear()
+        self.reason = ''
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        """
+        等待 timeout 秒或直到被停止
+
+        Args:
+            timeout: 等待时间(秒)，None 表示一直等到停止
+
+        Returns:
+            是否已停止 (True 时调用方应结束循环)
+        """
+        if timeout is not None and timeout <= 0:
+            return self._event.is_set()
+        return self._event.wait(timeout)
+
+    def add_callback(self, callback: Callable[[], None]) -> None:
+        """
+        注册停止时调用的回调，已停止时立即调用
+
+        回调可能在信号处理函数中运行，应该快速返回且不获取可能被主线程持有的锁。
+        """
+        self._callbacks.append(callback)
+        if self.stopped:
+            callback()
+
+    def remove_callback(self, callback: Callable[[], None]) -> None:
+        """移除回调"""
+        try:
+            self._callbacks.remove(callback)
+        except ValueError:
+            pass
+
+
+def install_signal_handlers(token: StopToken,
+                            signals: Optional[Iterable[int]] = None) -> Callable[[], None]:
+    """
+    收到信号时停止令牌 (只能在主线程调用，供命令行入口使用)
+
+    第一次收到信号时请求停止；停止进行中再次收到 SIGINT 时抛出 KeyboardInterrupt，
+    用于中断卡住的请求。
+
+    Args:
+        token: 停止令牌
+        signals: 信号列表 (默认: SIGINT, SIGTERM)
+
+    Returns:
+        恢复原信号处理函数的函数
+    """
+    signals = list(signals) if signals is not None else [signal.SIGINT, signal.SIGTERM]
+
+    def handler(signum, frame):
+        if token.stopped and signum == signal.SIGINT:
+            raise KeyboardInterrupt
+        logger.info("Received interrupt signal, stopping monitor...")
+        token.stop(signal.Signals(signum).name)
+
+    previous = {signum: signal.signal(signum, handler) for signum in signals}
+
+    def restore() -> None:
+        for signum, original in previous.items():
+            signal.signal(signum, original)
+
+    return restore
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""inspire 下的模块使用平铺导入 (如 from stop_token import StopToken)，测试时把 inspire 目录加入 sys.path"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+StopToken 与监控/客户端的停止行为
+
+- 创建 JobMonitor 不修改 SIGINT/SIGTERM 处理函数
+- stop() 立即唤醒轮询间隔和重试退避中的等待 (间隔设为30秒)
+- 基于 multiprocessing.Event 的令牌可以传给工作进程
+"""
+
+import signal
+import threading
+import time
+import multiprocessing
+
+import pytest
+import requests
+
+from inspire_api_control import InspireAPI, InspireAPIError, InspireConfig
+from job_monitor import JobMonitor, MonitorConfig
+from stop_token import StopToken
+
+# stop() 之后等待返回的时间上限 (秒)，留出线程调度的余量
+WAKE_LIMIT = 0.5
+INTERVAL = 30
+
+
+class FakeResponse:
+    """只实现监控和客户端用到的 requests.Response 接口"""
+
+    def __init__(self, status_code=200, data=None):
+        self.status_code = status_code
+        self._data = data
+        self.headers = {}
+        self.text = ''
+
+    def json(self):
+        return self._data
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} error")
+
+
+class FakeSession:
+    """按 respond 返回响应或抛出异常，记录请求次数"""
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.calls = 0
+
+    def post(self, url, **kwargs):
+        self.calls += 1
+        return self.respond()
+
+    def get(self, url, **kwargs):
+        return self.post(url, **kwargs)
+
+    def close(self):
+        pass
+
+
+def running_job():
+    return FakeResponse(data={'code': 0, 'data': {'status': 'RUNNING', 'sub_status': 0, 'sub_msg': ''}})
+
+
+def connection_error():
+    raise requests.exceptions.ConnectionError("connection refused")
+
+
+def make_monitor(respond):
+    monitor = JobMonitor(MonitorConfig(poll_interval=INTERVAL, retry_delay=INTERVAL, progress_display=False,
+                                       summary_display=False))
+    monitor.session = FakeSession(respond)
+    monitor.token = 'token'
+    return monitor
+
+
+def stop_while_waiting(call, stop, session):
+    """在线程中运行 call，等第一次请求发出后调用 stop，返回 (call 的结果, stop 后的等待时间)"""
+    result = {}
+    thread = threading.Thread(target=lambda: result.setdefault('value', call()), daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while session.calls == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.05)  # 让 call 进入等待
+    stopped_at = time.monotonic()
+    stop()
+    thread.join(INTERVAL)
+    assert not thread.is_alive()
+    return result.get('value'), time.monotonic() - stopped_at
+
+
+def test_monitor_does_not_install_signal_handlers():
+    before = {signum: signal.getsignal(signum) for signum in (signal.SIGINT, signal.SIGTERM)}
+    JobMonitor(MonitorConfig())
+    assert {signum: signal.getsignal(signum) for signum in before} == before
+
+
+def test_stop_wakes_monitor_poll_interval():
+    monitor = make_monitor(running_job)
+    success, waited = stop_while_waiting(lambda: monitor.monitor_job('job-1'), monitor.stop, monitor.session)
+    assert success is True
+    assert waited < WAKE_LIMIT
+    assert monitor.session.calls == 1
+
+
+def test_stop_wakes_get_job_status_retry():
+    monitor = make_monitor(connection_error)
+    snapshot, waited = stop_while_waiting(lambda: monitor.get_job_status('job-1'), monitor.stop,
+                                          monitor.session)
+    assert snapshot is None
+    assert waited < WAKE_LIMIT
+    assert monitor.session.calls == 1
+
+
+def test_stop_wakes_api_retry():
+    session = FakeSession(lambda: FakeResponse(status_code=503))
+    api = InspireAPI(InspireConfig(retry_delay=INTERVAL), session=session)
+
+    def request():
+        with pytest.raises(InspireAPIError, match='cancelled'):
+            api._make_request_with_retry('POST', 'https://example.invalid/openapi/v1/train_job/detail')
+        return True
+
+    raised, waited = stop_while_waiting(request, api.stop_token.stop, session)
+    assert raised is True
+    assert waited < WAKE_LIMIT
+    assert session.calls == 1
+
+
+def wait_for_stop(token, timeout):
+    # 工作进程的退出码表示是否看到了停止
+    raise SystemExit(0 if token.wait(timeout) else 1)
+
+
+def test_stop_token_crosses_processes():
+    context = multiprocessing.get_context()
+    token = StopToken(context.Event())
+    token.stop()
+    worker = context.Process(target=wait_for_stop, args=(token, 0))
+    worker.start()
+    worker.join(10)
+    assert worker.exitcode == 0
+
+
+def test_stop_wakes_waiting_worker_process():
+    context = multiprocessing.get_context()
+    token = StopToken(context.Event())
+    worker = context.Process(target=wait_for_stop, args=(token, INTERVAL))
+    worker.start()
+    time.sleep(0.2)
+    stopped_at = time.monotonic()
+    token.stop()
+    worker.join(10)
+    assert worker.exitcode == 0
+    assert time.monotonic() - stopped_at < 5